@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de carga de la API REST
+
+Levanta PLCs simulados, un GatewayAPI con el servidor de producción (o el
+de desarrollo para comparar) y lanza clientes concurrentes con conexiones
+keep-alive contra GET /api/v1/status y POST /api/v1/command.
+
+Uso:
+    python benchmarks/bench_api.py --plcs 10 --clients 32 --requests 200
+    python benchmarks/bench_api.py --server development
+"""
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import get_database_manager  # noqa: E402
+from src.plc.plc_simulator import PLCSimulator, PROTOCOL_DELTA  # noqa: E402
+
+
+def run_client(port: int, requests: int, plc_ids, results: dict, lock) -> None:
+    """Cliente que alterna peticiones de estado y de comando"""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    local = {"status": [], "command": [], "errors": 0}
+    for i in range(requests):
+        started = time.perf_counter()
+        try:
+            if i % 2 == 0:
+                endpoint = "status"
+                conn.request("GET", "/api/v1/status")
+            else:
+                endpoint = "command"
+                body = json.dumps({"command": 0,
+                                   "machine_id": plc_ids[i % len(plc_ids)]})
+                conn.request("POST", "/api/v1/command", body=body,
+                             headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                local["errors"] += 1
+            local[endpoint].append(time.perf_counter() - started)
+            if response.will_close:
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        except Exception:
+            local["errors"] += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.close()
+
+    with lock:
+        results["status"].extend(local["status"])
+        results["command"].extend(local["command"])
+        results["errors"] += local["errors"]
+
+
+def report(name: str, latencies: list) -> None:
+    """Muestra las latencias de un endpoint"""
+    if not latencies:
+        return
+    latencies.sort()
+    total = len(latencies)
+    print(f"{name:<22} {total:>7} peticiones  "
+          f"media {statistics.mean(latencies) * 1000:8.2f} ms  "
+          f"p50 {latencies[total // 2] * 1000:8.2f} ms  "
+          f"p99 {latencies[max(0, int(total * 0.99) - 1)] * 1000:8.2f} ms")
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(description="Benchmark de carga de la API REST")
+    parser.add_argument("--plcs", type=int, default=10, help="PLCs simulados")
+    parser.add_argument("--clients", type=int, default=32,
+                        help="Clientes HTTP concurrentes")
+    parser.add_argument("--requests", type=int, default=200,
+                        help="Peticiones por cliente")
+    parser.add_argument("--threads", type=int, default=16,
+                        help="Hilos del servidor de producción")
+    parser.add_argument("--server", choices=["production", "development"],
+                        default="production", help="Servidor a medir")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    workdir = tempfile.mkdtemp(prefix="bench_api_")
+
+    simulators = [PLCSimulator(port=0, protocol=PROTOCOL_DELTA)
+                  for _ in range(args.plcs)]
+    for simulator in simulators:
+        simulator.start()
+    plc_ids = [f"PLC-{index:03d}" for index in range(args.plcs)]
+
+    config_file = os.path.join(workdir, "gateway_config.json")
+    with open(config_file, "w") as f:
+        json.dump({
+            "wms": {"auth_token": ""},
+            "logging": {"level": "WARNING",
+                        "file": os.path.join(workdir, "gateway.log")},
+            "api": {"server": {"threads": args.threads}},
+            "plcs": [{"id": plc_id, "type": "delta_async", "ip": "127.0.0.1",
+                      "port": simulator.port}
+                     for plc_id, simulator in zip(plc_ids, simulators)]
+        }, f)
+
+    # Usar una base de datos temporal
+    get_database_manager(os.path.join(workdir, "gateway.db"))
+    from src.api.gateway_api import GatewayAPI
+    api = GatewayAPI(config_file)
+    api.gateway.start()
+
+    if args.server == "production":
+        server_thread = threading.Thread(
+            target=api.serve, args=("127.0.0.1", 0), daemon=True)
+        server_thread.start()
+        while api.server is None:
+            time.sleep(0.05)
+        port = api.server.port
+    else:
+        from werkzeug.serving import make_server
+        dev_server = make_server("127.0.0.1", 0, api.app, threaded=True)
+        port = dev_server.port
+        threading.Thread(target=dev_server.serve_forever, daemon=True).start()
+
+    results = {"status": [], "command": [], "errors": 0}
+    lock = threading.Lock()
+    clients = [threading.Thread(target=run_client,
+                                args=(port, args.requests, plc_ids, results, lock))
+               for _ in range(args.clients)]
+    start = time.perf_counter()
+    for client in clients:
+        client.start()
+    for client in clients:
+        client.join()
+    elapsed = time.perf_counter() - start
+
+    if args.server == "production":
+        api.shutdown()
+        server_thread.join(timeout=15)
+    else:
+        dev_server.shutdown()
+        api.gateway.stop()
+    for simulator in simulators:
+        simulator.stop()
+
+    total = len(results["status"]) + len(results["command"])
+    print(f"Servidor:              {args.server}")
+    print(f"Peticiones totales:    {total} ({results['errors']} errores)")
+    print(f"Peticiones/s:          {total / elapsed:10.1f}")
+    report("GET /api/v1/status", results["status"])
+    report("POST /api/v1/command", results["command"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de carga del transporte asyncio de PLC Delta
+
+Levanta N simuladores (protocolo "delta") y los sondea concurrentemente
+desde un único bucle de eventos con AsyncDeltaPLC, midiendo peticiones por
+segundo y latencias.
+
+Uso:
+    python benchmarks/bench_async_plc.py --plcs 200 --requests 50
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.plc.async_delta_plc import AsyncDeltaPLC  # noqa: E402
+from src.plc.plc_simulator import PLCSimulator, PROTOCOL_DELTA  # noqa: E402
+
+
+async def poll_plc(plc: AsyncDeltaPLC, requests: int, latencies: list) -> int:
+    """Sondea un PLC ``requests`` veces y devuelve el número de errores"""
+    errors = 0
+    for _ in range(requests):
+        started = time.perf_counter()
+        result = await plc.get_status_async()
+        latencies.append(time.perf_counter() - started)
+        if not result["success"]:
+            errors += 1
+    return errors
+
+
+async def run(ports, requests: int):
+    """Conecta todos los PLCs y los sondea en paralelo"""
+    plcs = [AsyncDeltaPLC("127.0.0.1", port) for port in ports]
+    connected = await asyncio.gather(*(plc.connect_async() for plc in plcs))
+
+    latencies: list = []
+    start = time.perf_counter()
+    errors = await asyncio.gather(
+        *(poll_plc(plc, requests, latencies) for plc in plcs))
+    elapsed = time.perf_counter() - start
+
+    await asyncio.gather(*(plc.disconnect_async() for plc in plcs))
+    return sum(connected), sum(errors), latencies, elapsed
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark de carga de AsyncDeltaPLC")
+    parser.add_argument("--plcs", type=int, default=200,
+                        help="Número de PLCs simulados")
+    parser.add_argument("--requests", type=int, default=50,
+                        help="Peticiones de estado por PLC")
+    parser.add_argument("--delay", type=float, default=0.0,
+                        help="Latencia simulada de cada respuesta (segundos)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    simulators = [PLCSimulator(port=0, protocol=PROTOCOL_DELTA,
+                               response_delay=args.delay)
+                  for _ in range(args.plcs)]
+    for simulator in simulators:
+        simulator.start()
+
+    try:
+        connected, errors, latencies, elapsed = asyncio.run(
+            run([s.port for s in simulators], args.requests))
+    finally:
+        for simulator in simulators:
+            simulator.stop()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"PLCs conectados:        {connected}/{args.plcs}")
+    print(f"Peticiones:             {total} ({errors} errores)")
+    print(f"Peticiones/s:           {total / elapsed:12.1f}")
+    print(f"Latencia media (ms):    {statistics.mean(latencies) * 1000:12.2f}")
+    print(f"Latencia p50 (ms):      {latencies[total // 2] * 1000:12.2f}")
+    print(f"Latencia p99 (ms):      {latencies[int(total * 0.99) - 1] * 1000:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
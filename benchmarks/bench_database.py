@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de DatabaseManager bajo carga concurrente
+
+Simula los hilos reales del gateway contra una base de datos temporal:
+- monitor: add_command + add_event por PLC en cada ciclo
+- api: get_events, get_commands y get_database_stats
+- tunnel: add_event de comandos recibidos desde el WMS
+
+Como referencia se mide también la estrategia anterior (una conexión nueva
+por operación bajo un lock global, sin WAL).
+
+Uso:
+    python benchmarks/bench_database.py --duration 5 --plcs 40
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database.database_manager import DatabaseManager  # noqa: E402
+
+
+def _legacy_insert_events(db_path: str, lock: threading.Lock, count: int) -> None:
+    """Inserción con conexión nueva por operación (comportamiento previo)"""
+    for i in range(count):
+        with lock:
+            conn = sqlite3.connect(db_path)
+            conn.execute(
+                "INSERT INTO events (event_type, source, data) VALUES (?, ?, ?)",
+                ("plc.status_update", "bench", json.dumps({"i": i})))
+            conn.commit()
+            conn.close()
+
+
+def run_legacy(tmp_dir: str, threads: int, per_thread: int) -> float:
+    """Mide inserciones/s con la estrategia de conexión por operación"""
+    db_path = os.path.join(tmp_dir, "legacy.db")
+    conn = sqlite3.connect(db_path)
+    conn.execute("""CREATE TABLE events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, event_type TEXT NOT NULL,
+        source TEXT NOT NULL, data TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    conn.commit()
+    conn.close()
+
+    lock = threading.Lock()
+    workers = [threading.Thread(target=_legacy_insert_events,
+                                args=(db_path, lock, per_thread))
+               for _ in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * per_thread / (time.perf_counter() - start)
+
+
+def run_mixed(tmp_dir: str, duration: float, plcs: int, api_threads: int) -> dict:
+    """Ejecuta la carga mixta monitor/API/túnel sobre DatabaseManager"""
+    db = DatabaseManager(os.path.join(tmp_dir, "pooled.db"))
+    stop = threading.Event()
+    counters = {"monitor_writes": 0, "tunnel_writes": 0, "api_reads": 0}
+    counters_lock = threading.Lock()
+
+    def add(key, amount):
+        with counters_lock:
+            counters[key] += amount
+
+    def monitor():
+        status = {"success": True, "status_code": 0, "position": 3,
+                  "response_time": 0.004}
+        while not stop.is_set():
+            for n in range(plcs):
+                plc_id = f"PLC-{n:03d}"
+                db.add_command(plc_id=plc_id, command=0, result=status)
+                db.add_event("plc.status_update", "gateway_core",
+                             {"plc_id": plc_id, "status": status})
+            add("monitor_writes", plcs * 2)
+
+    def tunnel():
+        while not stop.is_set():
+            db.add_event("wms.command_received", "gateway_core",
+                         {"command": "MOVE", "argument": 5})
+            add("tunnel_writes", 1)
+
+    def api():
+        while not stop.is_set():
+            db.get_events(limit=100)
+            db.get_commands(limit=100)
+            db.get_database_stats()
+            add("api_reads", 3)
+
+    workers = [threading.Thread(target=monitor), threading.Thread(target=tunnel)]
+    workers += [threading.Thread(target=api) for _ in range(api_threads)]
+
+    for worker in workers:
+        worker.start()
+    time.sleep(duration)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    db.close()
+
+    return {key: value / duration for key, value in counters.items()}
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark de DatabaseManager con pool de conexiones")
+    parser.add_argument("--duration", type=float, default=5.0,
+                        help="Duración de la carga mixta en segundos")
+    parser.add_argument("--plcs", type=int, default=40,
+                        help="Número de PLCs simulados por el monitor")
+    parser.add_argument("--api-threads", type=int, default=4,
+                        help="Número de hilos de lectura (API)")
+    parser.add_argument("--legacy-inserts", type=int, default=500,
+                        help="Inserciones por hilo en la medición de referencia")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix="gateway_bench_")
+    try:
+        legacy = run_legacy(tmp_dir, 3, args.legacy_inserts)
+        mixed = run_mixed(tmp_dir, args.duration, args.plcs, args.api_threads)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print("Referencia (conexión por operación, sin WAL)")
+    print(f"  inserciones/s:           {legacy:10.1f}")
+    print("Pool persistente + WAL (carga mixta)")
+    print(f"  monitor escrituras/s:    {mixed['monitor_writes']:10.1f}")
+    print(f"  túnel escrituras/s:      {mixed['tunnel_writes']:10.1f}")
+    print(f"  API lecturas/s:          {mixed['api_reads']:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
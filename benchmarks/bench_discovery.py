@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del descubrimiento de PLCs
+
+Levanta N simuladores (protocolo "delta") repartidos por direcciones de
+loopback de 127.<octeto>.0.0/16, todos en el mismo puerto, y escanea la /16
+completa con AsyncPLCScanner. Como referencia se mide el escáner anterior
+(ThreadPoolExecutor de 50 hilos con connect bloqueante) sobre una muestra
+aleatoria de la misma red y se extrapola al total.
+
+En loopback los puertos cerrados responden con RST al instante, lo que no
+ocurre en una red de planta con cortafuegos. Con --silent se añaden hosts
+"filtrados": listeners con la cola de aceptación llena, que descartan el SYN
+y obligan a esperar el timeout de conexión.
+
+Uso:
+    python benchmarks/bench_discovery.py --plcs 200
+    python benchmarks/bench_discovery.py --plcs 50 --concurrency 4096 --rate 0
+    python benchmarks/bench_discovery.py --plcs 100 --silent 500
+"""
+
+import argparse
+import logging
+import os
+import random
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.discovery.async_scanner import (AsyncPLCScanner, count_subnet_hosts,  # noqa: E402
+                                         iter_subnet_hosts)
+from src.plc.plc_simulator import PLCSimulator, PROTOCOL_DELTA  # noqa: E402
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def silent_host(host: str, port: int):
+    """Listener que no completa nuevos handshakes (cola de aceptación llena)"""
+    listener = socket.socket()
+    listener.bind((host, port))
+    listener.listen(0)
+    fillers = []
+    for _ in range(2):
+        filler = socket.socket()
+        filler.setblocking(False)
+        filler.connect_ex((host, port))
+        fillers.append(filler)
+    return [listener] + fillers
+
+
+def legacy_scan(ips, port: int, timeout: float) -> int:
+    """Escáner anterior: un connect bloqueante por IP en 50 hilos"""
+    def scan_single_ip(ip):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            return sock.connect_ex((ip, port)) == 0
+        finally:
+            sock.close()
+
+    with ThreadPoolExecutor(max_workers=50) as executor:
+        return sum(executor.map(scan_single_ip, ips))
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark del descubrimiento de PLCs")
+    parser.add_argument("--plcs", type=int, default=200,
+                        help="Número de PLCs simulados")
+    parser.add_argument("--octet", type=int, default=77,
+                        help="Segundo octeto de la red 127.X.0.0/16 escaneada")
+    parser.add_argument("--concurrency", type=int, default=1024,
+                        help="Conexiones simultáneas del escáner asíncrono")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="Conexiones por segundo (0 = sin límite)")
+    parser.add_argument("--silent", type=int, default=0,
+                        help="Hosts que descartan el SYN (red filtrada)")
+    parser.add_argument("--timeout", type=float, default=1.0,
+                        help="Timeout de conexión de ambos escáneres (segundos)")
+    parser.add_argument("--sample", type=int, default=4096,
+                        help="Direcciones escaneadas con el escáner anterior")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    subnet = f"127.{args.octet}.0.0/16"
+    port = free_port()
+    hosts = random.sample(range(1, 65535), args.plcs + args.silent)
+    addresses = [f"127.{args.octet}.{h >> 8}.{h & 0xFF}" for h in hosts]
+    simulators = [PLCSimulator(host=host, port=port, protocol=PROTOCOL_DELTA)
+                  for host in addresses[:args.plcs]]
+    for simulator in simulators:
+        simulator.start()
+    silent = [sock for host in addresses[args.plcs:] for sock in silent_host(host, port)]
+    time.sleep(0.2)
+
+    try:
+        scanner = AsyncPLCScanner(port=port, connect_timeout=args.timeout,
+                                  concurrency=args.concurrency, rate=args.rate)
+        found = scanner.scan(iter_subnet_hosts(subnet), count_subnet_hosts(subnet))
+        elapsed = scanner.stats["elapsed"]
+
+        sample = random.sample(list(iter_subnet_hosts(subnet)), args.sample)
+        started = time.perf_counter()
+        legacy_scan(sample, port, timeout=args.timeout)
+        legacy_elapsed = time.perf_counter() - started
+    finally:
+        for simulator in simulators:
+            simulator.stop()
+        for sock in silent:
+            sock.close()
+
+    total = count_subnet_hosts(subnet)
+    legacy_total = legacy_elapsed * total / len(sample)
+    print(f"Red escaneada:             {subnet} ({total} direcciones)")
+    print(f"PLCs encontrados:          {len(found)}/{args.plcs}")
+    print(f"Hosts filtrados:           {args.silent}")
+    print(f"Asíncrono (s):             {elapsed:12.2f}")
+    print(f"Asíncrono (dir/s):         {total / elapsed:12.1f}")
+    print(f"Anterior, estimado (s):    {legacy_total:12.2f}")
+    print(f"Anterior (dir/s):          {len(sample) / legacy_elapsed:12.1f}")
+    print(f"Mejora:                    {legacy_total / elapsed:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del formato compacto de la tabla events
+
+Crea una base de datos con el formato anterior (tipo y fuente como texto,
+data como JSON) llena de eventos plc.status_update como los que registra el
+gateway en cada sondeo, la abre con DatabaseManager (que la migra en el
+sitio) y compara el tamaño por fila y el tiempo de recorrer todos los
+eventos en ambos formatos.
+
+Uso:
+    python benchmarks/bench_event_storage.py --events 200000 --plcs 20
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import event_codec  # noqa: E402
+from src.database.database_manager import DatabaseManager  # noqa: E402
+
+
+def build_legacy(path: str, events: int, plcs: int) -> None:
+    """Base de datos con la tabla events del formato anterior"""
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("""CREATE TABLE events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, event_type TEXT NOT NULL,
+        source TEXT NOT NULL, data TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+    conn.execute("CREATE INDEX idx_events_type_timestamp ON events (event_type, timestamp)")
+    conn.execute("CREATE INDEX idx_events_timestamp ON events (timestamp)")
+
+    rows = []
+    for i in range(events):
+        status = {"success": True, "status_code": random.randint(0, 3),
+                  "position": random.randint(0, 1000), "timestamp": 1700000000 + i,
+                  "response_time": random.lognormvariate(-5, 0.5)}
+        data = {"plc_id": f"PLC-{i % plcs:03d}", "status": status}
+        rows.append(("plc.status_update", "gateway_core", json.dumps(data),
+                     f"2025-01-{1 + i // 86400 % 28:02d} {i // 3600 % 24:02d}:"
+                     f"{i // 60 % 60:02d}:{i % 60:02d}"))
+    conn.executemany(
+        "INSERT INTO events (event_type, source, data, timestamp) VALUES (?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+
+
+def scan_legacy(path: str) -> float:
+    """Recorre todos los eventos del formato anterior decodificando data"""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    started = time.perf_counter()
+    for row in conn.execute("SELECT * FROM events ORDER BY timestamp DESC, id DESC"):
+        event = dict(row)
+        event["data"] = json.loads(event["data"])
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return elapsed
+
+
+def table_bytes(path: str) -> int:
+    """Bytes ocupados por la tabla events y sus índices"""
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name = 'events' "
+            "OR name LIKE 'idx_events%'").fetchone()[0]
+    except sqlite3.OperationalError:  # SQLite compilado sin dbstat
+        return os.path.getsize(path)
+    finally:
+        conn.close()
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark del formato compacto de events")
+    parser.add_argument("--events", type=int, default=200000, help="Número de eventos")
+    parser.add_argument("--plcs", type=int, default=20, help="Número de PLCs")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        legacy_path = os.path.join(tmp_dir, "legacy.db")
+        build_legacy(legacy_path, args.events, args.plcs)
+        legacy_bytes = table_bytes(legacy_path)
+        legacy_scan = scan_legacy(legacy_path)
+
+        path = os.path.join(tmp_dir, "gateway.db")
+        shutil.copy(legacy_path, path)
+        started = time.perf_counter()
+        db = DatabaseManager(path)
+        migration = time.perf_counter() - started
+        db.incremental_vacuum(1 << 30)
+
+        started = time.perf_counter()
+        scanned = len(db.get_events(limit=args.events))
+        compact_scan = time.perf_counter() - started
+        db.close()
+        compact_bytes = table_bytes(path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"Eventos:                   {args.events} ({scanned} leídos)")
+    print(f"Resto de data:             {'msgpack' if event_codec.msgpack else 'JSON compacto'}")
+    print(f"Migración (s):             {migration:12.2f}")
+    print(f"Anterior (bytes/fila):     {legacy_bytes / args.events:12.1f}")
+    print(f"Compacto (bytes/fila):     {compact_bytes / args.events:12.1f}")
+    print(f"Anterior, recorrido (s):   {legacy_scan:12.2f}")
+    print(f"Compacto, recorrido (s):   {compact_scan:12.2f}")
+    print(f"Reducción de tamaño:       {legacy_bytes / compact_bytes:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
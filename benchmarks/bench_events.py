@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de throughput del EventManager
+
+Varios productores emiten eventos plc.status_update / plc.command_sent y se
+mide cuántos eventos por segundo llegan a los listeners.
+
+Uso:
+    python benchmarks/bench_events.py --events 200000 --producers 4
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.events.event_manager import EventManager  # noqa: E402
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark de throughput del EventManager")
+    parser.add_argument("--events", type=int, default=200000,
+                        help="Número total de eventos a emitir")
+    parser.add_argument("--producers", type=int, default=4,
+                        help="Número de hilos productores")
+    parser.add_argument("--listeners", type=int, default=3,
+                        help="Listeners por tipo de evento")
+    args = parser.parse_args()
+
+    manager = EventManager(max_queue_size=args.events)
+    per_producer = args.events // args.producers
+    delivered = [0]
+    done = threading.Event()
+    expected = per_producer * args.producers * args.listeners
+
+    def listener(event):
+        delivered[0] += 1
+        if delivered[0] >= expected:
+            done.set()
+
+    for _ in range(args.listeners):
+        manager.subscribe("plc.status_update", listener)
+        manager.subscribe("plc.command_sent", listener)
+
+    def producer(worker_id):
+        for i in range(per_producer):
+            event_type = "plc.status_update" if i % 2 else "plc.command_sent"
+            manager.emit(event_type, {"plc_id": f"PLC-{worker_id:03d}", "i": i})
+
+    manager.start()
+    start = time.perf_counter()
+    producers = [threading.Thread(target=producer, args=(n,))
+                 for n in range(args.producers)]
+    for thread in producers:
+        thread.start()
+    for thread in producers:
+        thread.join()
+    emit_elapsed = time.perf_counter() - start
+
+    done.wait(timeout=120)
+    elapsed = time.perf_counter() - start
+    manager.stop()
+
+    stats = manager.get_stats()
+    print(f"Eventos emitidos:       {stats['emitted']}")
+    print(f"Eventos despachados:    {stats['dispatched']}")
+    print(f"Eventos descartados:    {stats['dropped']}")
+    print(f"Emisión (eventos/s):    {stats['emitted'] / emit_elapsed:12.1f}")
+    print(f"Despacho (eventos/s):   {stats['dispatched'] / elapsed:12.1f}")
+    print(f"Entregas a listeners/s: {delivered[0] / elapsed:12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del almacén de series temporales
+
+Guarda un día de latencias de N PLCs (una muestra por segundo) de dos
+formas: una fila por muestra en la tabla metrics (esquema anterior) y en
+bloques de TimeSeriesStore. Compara el tamaño en disco y el tiempo de servir
+la serie de un PLC: filas completas frente a ``points`` cubetas agregadas.
+
+Uso:
+    python benchmarks/bench_timeseries.py --plcs 10 --hours 24 --points 120
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database import timeseries  # noqa: E402
+from src.database.database_manager import DatabaseManager  # noqa: E402
+from src.database.timeseries import TimeSeriesStore  # noqa: E402
+
+
+def file_size(db: DatabaseManager, path: str) -> int:
+    """Tamaño de la base de datos tras volcar el WAL"""
+    db.close()
+    return os.path.getsize(path)
+
+
+def main():
+    """Función principal del benchmark"""
+    parser = argparse.ArgumentParser(
+        description="Benchmark del almacén de series temporales")
+    parser.add_argument("--plcs", type=int, default=10, help="Número de PLCs")
+    parser.add_argument("--hours", type=int, default=24, help="Horas de histórico")
+    parser.add_argument("--points", type=int, default=120, help="Puntos por consulta")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    end = int(time.time())
+    start = end - args.hours * 3600
+    samples = [(f"PLC-{p:03d}", start + s, random.lognormvariate(-5, 0.5))
+               for s in range(args.hours * 3600) for p in range(args.plcs)]
+
+    try:
+        # Esquema anterior: una fila por muestra
+        rows_path = os.path.join(tmp_dir, "rows.db")
+        db = DatabaseManager(rows_path)
+        started = time.perf_counter()
+        for i in range(0, len(samples), 10000):
+            db.write_batch(metrics=[
+                ("response_time", plc_id, value,
+                 datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%d %H:%M:%S"))
+                for plc_id, ts, value in samples[i:i + 10000]])
+        rows_write = time.perf_counter() - started
+        started = time.perf_counter()
+        rows = db.get_metrics("response_time", "PLC-000", args.hours + 1)
+        rows_query = time.perf_counter() - started
+        rows_size = file_size(db, rows_path)
+
+        # Bloques de TimeSeriesStore
+        chunks_path = os.path.join(tmp_dir, "chunks.db")
+        db = DatabaseManager(chunks_path)
+        store = TimeSeriesStore(db)
+        started = time.perf_counter()
+        for plc_id, ts, value in samples:
+            store.append("response_time", plc_id, value, ts)
+        store.flush()
+        chunks_write = time.perf_counter() - started
+        store = TimeSeriesStore(db)  # Consulta desde disco, sin bloques en memoria
+        started = time.perf_counter()
+        series = store.query("response_time", "PLC-000", start, end + 1, args.points)
+        chunks_query = time.perf_counter() - started
+        chunks_size = file_size(db, chunks_path)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    print(f"Muestras:                  {len(samples)} ({args.plcs} PLCs, {args.hours} h)")
+    print(f"NumPy:                     {'sí' if timeseries.np is not None else 'no'}")
+    print(f"Filas - escritura (s):     {rows_write:12.2f}")
+    print(f"Filas - disco (KiB):       {rows_size / 1024:12.1f}")
+    print(f"Filas - consulta (ms):     {rows_query * 1000:12.1f} ({len(rows)} filas)")
+    print(f"Bloques - escritura (s):   {chunks_write:12.2f}")
+    print(f"Bloques - disco (KiB):     {chunks_size / 1024:12.1f}")
+    print(f"Bloques - consulta (ms):   {chunks_query * 1000:12.1f} ({len(series)} puntos)")
+    print(f"Reducción de disco:        {rows_size / chunks_size:12.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,8 @@ Script de demostración para descubrir PLCs Vertical PIC en la red
 """
 
 from src.plc.plc_discovery import PLCDiscovery
+from src.discovery.discovery_cache import DiscoveryCache, range_scope, subnet_scope
+from src.database.database_manager import DatabaseManager
 import sys
 import os
 import argparse
@@ -44,6 +46,9 @@ Ejemplos de uso:
   
   # Escanear con más hilos para mayor velocidad
   python discover_plcs.py --workers 100 --verbose
+
+  # Ignorar la caché y barrer de nuevo la subred completa
+  python discover_plcs.py --subnet 192.168.1.0/24 --full
         """
     )
 
@@ -76,6 +81,18 @@ Ejemplos de uso:
         help='Número de hilos para escaneo paralelo (por defecto: 50)'
     )
 
+    parser.add_argument(
+        '--db',
+        default='gateway.db',
+        help='Base de datos con la caché de PLCs descubiertos (por defecto: gateway.db)'
+    )
+
+    parser.add_argument(
+        '--full',
+        action='store_true',
+        help='Barrer el rango completo aunque haya PLCs conocidos en la caché'
+    )
+
     parser.add_argument(
         '--output',
         help='Archivo de salida para guardar resultados (formato JSON)'
@@ -95,12 +112,30 @@ Ejemplos de uso:
     print("🔍 Descubridor de PLCs Vertical PIC")
     print("=" * 40)
 
-    # Crear descubridor
-    discovery = PLCDiscovery(port=args.port, timeout=2)
+    # Crear descubridor con la caché de PLCs conocidos
+    db_manager = DatabaseManager(args.db)
+    discovery = PLCDiscovery(port=args.port, timeout=2,
+                             cache=DiscoveryCache(db_manager, port=args.port))
 
     # Realizar escaneo según los parámetros
     try:
         if args.subnet:
+            scope = subnet_scope(args.subnet)
+        elif args.start_ip and args.end_ip:
+            scope = range_scope(args.start_ip, args.end_ip)
+        else:
+            scope = None
+
+        known = [] if args.full else discovery.known_plcs(scope)
+        if known:
+            # Los PLCs conocidos se muestran al instante y sólo se vuelven a sondear
+            print(f"📋 {len(known)} PLCs conocidos (usar --full para barrer el rango):")
+            for plc in known:
+                print(f"  - {plc['ip']}:{plc['port']} (visto por última vez {plc['last_seen']})")
+            print("\nComprobando PLCs conocidos...")
+            diff = discovery.refresh_known(scope, args.workers)
+            results = diff["added"] + diff["changed"] + diff["unchanged"]
+        elif args.subnet:
             print(f"Escaneando subred: {args.subnet}")
             results = discovery.quick_scan_subnet(args.subnet, args.workers)
         elif args.start_ip and args.end_ip:
@@ -111,6 +146,13 @@ Ejemplos de uso:
             print("Escaneando red local...")
             results = discovery.scan_local_network(args.workers)
 
+        if discovery.last_diff:
+            print(f"Cambios: {len(discovery.last_diff['added'])} nuevos, "
+                  f"{len(discovery.last_diff['removed'])} desaparecidos, "
+                  f"{len(discovery.last_diff['changed'])} cambiados")
+            for plc in discovery.last_diff["removed"]:
+                print(f"  ✗ {plc['ip']}:{plc['port']} ya no responde")
+
         # Mostrar resultados
         print(f"\n✅ Escaneo completado. {len(results)} PLCs encontrados:")
         print("-" * 50)
@@ -4,7 +4,7 @@
 Adaptador para mantener compatibilidad con la API existente
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 # Corregir la importación
 from src.core.gateway_core import GatewayCore
@@ -16,11 +16,12 @@ class APIAdapter:
     def __init__(self, gateway_core: GatewayCore):
         self.gateway_core = gateway_core
 
-    def get_status(self, machine_id: Optional[str] = None) -> Dict[str, Any]:
+    def get_status(self, machine_id: Optional[str] = None,
+                   max_age: Optional[float] = None) -> Dict[str, Any]:
         """Obtiene el estado de un PLC o todos los PLCs"""
         if machine_id:
             # Obtener estado de un PLC específico
-            status = self.gateway_core.get_status()
+            status = self.gateway_core.get_status(machine_id, max_age)
             plc_status = status.get("plcs", {}).get(machine_id, {})
             return {
                 "success": True,
@@ -28,7 +29,7 @@ class APIAdapter:
             }
         else:
             # Obtener estado de todos los PLCs
-            status = self.gateway_core.get_status()
+            status = self.gateway_core.get_status(max_age=max_age)
             return {
                 "success": True,
                 "data": status.get("plcs", {})
@@ -55,6 +56,24 @@ class APIAdapter:
             # Enviar comando a todos los PLCs
             return self.gateway_core.send_command(command_name, argument)
 
+    def _normalize_batch(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Acepta "machine_id" o "plc_id" en cada comando del lote"""
+        return [{
+            "plc_id": item.get("plc_id", item.get("machine_id")),
+            "command": item.get("command"),
+            "argument": item.get("argument")
+        } for item in items]
+
+    def send_commands(self, items: List[Dict[str, Any]],
+                      deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Envía un lote de comandos a varios PLCs en paralelo"""
+        return self.gateway_core.send_commands(self._normalize_batch(items), deadline)
+
+    def iter_commands(self, items: List[Dict[str, Any]],
+                      deadline: Optional[float] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Envía un lote de comandos y devuelve los resultados según terminan"""
+        return self.gateway_core.iter_commands(self._normalize_batch(items), deadline)
+
     def get_machines(self) -> Dict[str, Any]:
         """Obtiene la lista de máquinas disponibles"""
         status = self.gateway_core.get_status()
@@ -5,8 +5,8 @@ API REST para el Gateway Local
 """
 
 from .gateway_api import GatewayAPI, create_app, main
-from .routes import register_status_routes, register_health_routes, register_database_routes, register_ui_routes
-from .middleware import AuthMiddleware, RateLimitMiddleware, SecurityMiddleware
+from .routes import register_status_routes, register_health_routes, register_database_routes, register_ui_routes, register_stream_routes
+from .middleware import AuthMiddleware, RateLimitMiddleware, SecurityMiddleware, MetricsMiddleware
 
 __all__ = [
     'GatewayAPI',
@@ -16,7 +16,9 @@ __all__ = [
     'register_health_routes',
     'register_database_routes',
     'register_ui_routes',
+    'register_stream_routes',
     'AuthMiddleware',
     'RateLimitMiddleware',
-    'SecurityMiddleware'
+    'SecurityMiddleware',
+    'MetricsMiddleware'
 ]
@@ -9,10 +9,13 @@ from src.health.health_checker import HealthChecker
 from src.adapters.api_adapter import APIAdapter
 from src.core.gateway_core import GatewayCore
 from src.database import get_database_manager
+from src.events import get_event_manager
+from src.events.event_stream import EventStreamBroker
 import sys
 import os
 import logging
-from typing import Optional
+import threading
+from typing import Optional, Tuple
 from flask import Flask
 from flask.logging import default_handler
 
@@ -21,6 +24,9 @@ from src.api.routes.status_routes import register_status_routes
 from src.api.routes.health_routes import register_health_routes
 from src.api.routes.database_routes import register_database_routes
 from src.api.routes.ui_routes import register_ui_routes
+from src.api.routes.stream_routes import register_stream_routes
+from src.api.routes.export_routes import register_export_routes
+from src.api.middleware.metrics_middleware import MetricsMiddleware
 
 # Añadir el directorio src al path para importaciones
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
@@ -36,9 +42,25 @@ class GatewayAPI:
         self.health_checker = HealthChecker(self.gateway)
         self.metrics_collector = get_metrics_collector()
         self.database_manager = get_database_manager()
+        self.event_stream = self._create_event_stream()
+        self.server = None
+        self._stop_requested = threading.Event()
         self._setup_logging()
         self._setup_routes()
 
+    def _create_event_stream(self) -> EventStreamBroker:
+        """Crea el broker del stream de eventos a partir de la configuración"""
+        stream_config = self.gateway.config_manager.get("stream", {})
+        if not isinstance(stream_config, dict):
+            stream_config = {}
+        return EventStreamBroker(
+            get_event_manager(),
+            buffer_size=int(stream_config.get("buffer_size", 256)),
+            max_clients=int(stream_config.get("max_clients", 32)),
+            keepalive=float(stream_config.get("keepalive", 15)),
+            event_types=stream_config.get("event_types") or None
+        )
+
     def _setup_logging(self) -> None:
         """Configura el logging para la API"""
         # Eliminar el handler por defecto
@@ -54,16 +76,22 @@ class GatewayAPI:
 
     def _setup_routes(self) -> None:
         """Configura las rutas de la API"""
+        # Latencia de las peticiones por ruta
+        MetricsMiddleware(self.metrics_collector).init_app(self.app)
+
         # Registrar las rutas modulares
         register_status_routes(self.app, self.adapter)
         register_health_routes(
             self.app, self.health_checker, self.metrics_collector)
-        register_database_routes(self.app, self.database_manager)
+        register_database_routes(
+            self.app, self.database_manager,
+            self.gateway.timeseries_store)
+        register_export_routes(self.app, self.database_manager)
         register_ui_routes(self.app)
+        register_stream_routes(self.app, self.event_stream)
 
-    def run(self, host: Optional[str] = None, port: Optional[int] = None, debug: bool = False) -> None:
-        """Inicia el servidor Flask"""
-        # Obtener configuración de red del gateway
+    def _resolve_address(self, host: Optional[str], port: Optional[int]) -> Tuple[str, int]:
+        """Obtiene la dirección de escucha de la configuración de red"""
         if host is None:
             host_config = self.gateway.config_manager.get(
                 "network.bind_address", "0.0.0.0")
@@ -72,10 +100,71 @@ class GatewayAPI:
             port_config = self.gateway.config_manager.get(
                 "network.bind_port", 8080)
             port = port_config if isinstance(port_config, int) else 8080
+        return host, port
 
+    def run(self, host: Optional[str] = None, port: Optional[int] = None, debug: bool = False) -> None:
+        """Inicia el servidor de desarrollo de Flask"""
+        host, port = self._resolve_address(host, port)
         self.app.logger.info(f"Iniciando API REST en {host}:{port}")
         self.app.run(host=host, port=port, debug=debug)
 
+    def serve(self, host: Optional[str] = None, port: Optional[int] = None) -> None:
+        """Inicia la API con el servidor de producción
+
+        Bloquea hasta que se llama a ``shutdown`` (o Ctrl+C). Al salir deja
+        de aceptar conexiones, espera a las peticiones en curso hasta
+        ``api.server.drain_timeout`` segundos y detiene el gateway.
+        """
+        # Importar el servidor de producción sólo si se necesita
+        from src.api.wsgi_server import create_server
+
+        host, port = self._resolve_address(host, port)
+        server_config = self.gateway.config_manager.get("api.server", {})
+        if not isinstance(server_config, dict):
+            server_config = {}
+
+        self.server = create_server(self.app, host, port, server_config)
+
+        # Cada cliente del stream ocupa un hilo: reservar la mitad del pool
+        max_streams = max(1, self.server.threads // 2)
+        if self.event_stream.max_clients > max_streams:
+            self.app.logger.info(
+                f"Limitando clientes de stream a {max_streams} "
+                f"({self.server.threads} hilos de servidor)")
+            self.event_stream.max_clients = max_streams
+
+        self._stop_requested.clear()
+        server_thread = threading.Thread(
+            target=self.server.serve_forever, name="api-server", daemon=True)
+        server_thread.start()
+        self.app.logger.info(
+            f"Iniciando API REST (producción) en {host}:{self.server.port} "
+            f"con {self.server.threads} hilos")
+
+        try:
+            # Espera con timeout para que las señales se atiendan a tiempo
+            while not self._stop_requested.wait(0.5):
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._drain(float(server_config.get("drain_timeout", 10)))
+            server_thread.join(timeout=5)
+
+    def shutdown(self) -> None:
+        """Solicita la parada ordenada del servidor de producción"""
+        self._stop_requested.set()
+
+    def _drain(self, timeout: float) -> None:
+        """Drena el servidor de producción y detiene el gateway"""
+        self.app.logger.info("Deteniendo API REST: drenando peticiones en curso")
+        self.event_stream.close_all("shutdown")
+        if self.server:
+            self.server.drain(timeout)
+            self.server = None
+        if self.gateway.running:
+            self.gateway.stop()
+
 
 def create_app(config_file: str = "gateway_config.json") -> Flask:
     """Crea y configura la aplicación Flask"""
@@ -95,11 +184,16 @@ def main():
     parser.add_argument("--config", default="gateway_config.json",
                         help="Archivo de configuración")
     parser.add_argument("--debug", action="store_true", help="Modo debug")
+    parser.add_argument("--production", action="store_true",
+                        help="Usar el servidor de producción")
 
     args = parser.parse_args()
 
     api = GatewayAPI(args.config)
-    api.run(args.host, args.port, args.debug)
+    if args.production:
+        api.serve(args.host, args.port)
+    else:
+        api.run(args.host, args.port, args.debug)
 
 
 if __name__ == "__main__":
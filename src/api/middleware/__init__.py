@@ -7,5 +7,7 @@ Módulo de middleware para la API REST del Gateway Local
 from .auth_middleware import AuthMiddleware
 from .rate_limit_middleware import RateLimitMiddleware
 from .security_middleware import SecurityMiddleware
+from .metrics_middleware import MetricsMiddleware
 
-__all__ = ['AuthMiddleware', 'RateLimitMiddleware', 'SecurityMiddleware']
+__all__ = ['AuthMiddleware', 'RateLimitMiddleware', 'SecurityMiddleware',
+           'MetricsMiddleware']
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Middleware de métricas para la API REST del Gateway Local
+"""
+
+import time
+from flask import Flask, request, g
+
+
+class MetricsMiddleware:
+    """Mide la latencia de cada petición por método, ruta y código de estado
+
+    La ruta se etiqueta con la plantilla de Flask (p. ej.
+    ``/api/v1/status/<machine_id>``) para que el número de series no crezca
+    con los identificadores; las peticiones sin ruta se agrupan en
+    ``unmatched``. En respuestas en streaming se mide el tiempo hasta las
+    cabeceras.
+    """
+
+    def __init__(self, metrics_collector):
+        self.metrics_collector = metrics_collector
+
+    def init_app(self, app: Flask) -> None:
+        """Registra los hooks de la aplicación"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self) -> None:
+        g.request_started = time.perf_counter()
+
+    def _after_request(self, response):
+        started = g.pop("request_started", None)
+        if started is not None:
+            rule = request.url_rule
+            self.metrics_collector.record_http_request(
+                request.method, rule.rule if rule else "unmatched",
+                response.status_code, time.perf_counter() - started)
+        return response
@@ -8,6 +8,9 @@ from .status_routes import register_status_routes
 from .health_routes import register_health_routes
 from .database_routes import register_database_routes
 from .ui_routes import register_ui_routes
+from .stream_routes import register_stream_routes
+from .export_routes import register_export_routes
 
 __all__ = ['register_status_routes', 'register_health_routes',
-           'register_database_routes', 'register_ui_routes']
+           'register_database_routes', 'register_ui_routes',
+           'register_stream_routes', 'register_export_routes']
@@ -4,12 +4,100 @@
 Rutas para la gestión de datos en la base de datos
 """
 
+from datetime import datetime, timezone
+
 from flask import jsonify, request
-from src.database.database_manager import DatabaseManager
+from src.database.database_manager import DatabaseManager, decode_cursor, normalize_timestamp
+
+# Tamaño máximo de página de /api/v1/events y /api/v1/commands
+MAX_PAGE_SIZE = 1000
+
+# Puntos por serie de /api/v1/metrics (por defecto y máximo)
+DEFAULT_SERIES_POINTS = 120
+MAX_SERIES_POINTS = 2000
+
+
+def _page_args():
+    """Lee y valida limit, since, until y cursor de la consulta
+
+    Raises:
+        ValueError: Si algún parámetro no es válido
+    """
+    limit = request.args.get('limit', default=100, type=int)
+    if limit < 1:
+        raise ValueError("'limit' debe ser mayor que 0")
+    args = {
+        "limit": min(limit, MAX_PAGE_SIZE),
+        "since": request.args.get('since'),
+        "until": request.args.get('until'),
+        "cursor": request.args.get('cursor'),
+    }
+    for key in ("since", "until"):
+        if args[key] is not None:
+            args[key] = normalize_timestamp(args[key])
+    if args["cursor"]:
+        decode_cursor(args["cursor"])
+    return args
+
+
+def _page_response(database_manager, rows, limit):
+    """Respuesta JSON con la lista de filas y el cursor de la página siguiente
+
+    El cuerpo sigue siendo la lista; el cursor va en la cabecera
+    X-Next-Cursor (ausente en la última página).
+    """
+    response = jsonify(rows)
+    next_cursor = database_manager.page_cursor(rows, limit)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+
+def _epoch(value: str) -> float:
+    """Convierte un instante de la consulta (epoch, ISO 8601) a epoch"""
+    return datetime.strptime(normalize_timestamp(value), "%Y-%m-%d %H:%M:%S").replace(
+        tzinfo=timezone.utc).timestamp()
 
 
-def register_database_routes(app, database_manager):
-    """Registra las rutas para la gestión de datos en la base de datos"""
+def _series_response(timeseries_store, metric_type, plc_id):
+    """Serie agregada por cubetas de /api/v1/metrics
+
+    Cada punto conserva timestamp y value (la media) del formato anterior y
+    añade count, min, max, mean, p50, p95 y p99. La duración de las cubetas
+    va en la cabecera X-Bucket-Seconds.
+    """
+    points = request.args.get('points', default=DEFAULT_SERIES_POINTS, type=int)
+    if points < 1:
+        raise ValueError("'points' debe ser mayor que 0")
+    points = min(points, MAX_SERIES_POINTS)
+
+    until = request.args.get('until')
+    until = _epoch(until) if until else datetime.now(timezone.utc).timestamp()
+    since = request.args.get('since')
+    if since:
+        since = _epoch(since)
+    else:
+        since = until - request.args.get('hours', default=24, type=int) * 3600
+
+    series = timeseries_store.query(metric_type, plc_id, since, until, points)
+    for point in series:
+        point["timestamp"] = datetime.fromtimestamp(
+            point.pop("start"), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        point["value"] = point["mean"]
+        point["metric_type"] = metric_type
+        point["plc_id"] = plc_id
+
+    response = jsonify(series)
+    response.headers['X-Bucket-Seconds'] = f"{max(until - since, 0) / points:g}"
+    return response
+
+
+def register_database_routes(app, database_manager, timeseries_store=None):
+    """Registra las rutas para la gestión de datos en la base de datos
+
+    Con ``timeseries_store`` /api/v1/metrics sirve series agregadas por
+    cubetas; ?raw=1 devuelve los registros de la tabla metrics.
+    """
 
     @app.route('/api/v1/plcs', methods=['GET'])
     def get_all_plcs():
@@ -110,34 +198,56 @@ def register_database_routes(app, database_manager):
 
     @app.route('/api/v1/commands', methods=['GET'])
     def get_commands():
-        """Obtiene los comandos registrados"""
+        """Obtiene los comandos registrados
+
+        Parámetros: plc_id, limit, since, until (ISO 8601 o epoch) y cursor
+        (cabecera X-Next-Cursor de la página anterior).
+        """
         try:
             plc_id = request.args.get('plc_id')
-            limit = request.args.get('limit', default=100, type=int)
-            commands = database_manager.get_commands(plc_id, limit)
-            return jsonify(commands)
+            try:
+                page = _page_args()
+            except ValueError as e:
+                return jsonify({"error": str(e), "success": False}), 400
+            commands = database_manager.get_commands(plc_id, **page)
+            return _page_response(database_manager, commands, page["limit"])
         except Exception as e:
             app.logger.error(f"Error obteniendo comandos: {e}")
             return jsonify({"error": str(e), "success": False}), 500
 
     @app.route('/api/v1/events', methods=['GET'])
     def get_events():
-        """Obtiene los eventos registrados"""
+        """Obtiene los eventos registrados
+
+        Parámetros: type, limit, since, until (ISO 8601 o epoch) y cursor
+        (cabecera X-Next-Cursor de la página anterior).
+        """
         try:
             event_type = request.args.get('type')
-            limit = request.args.get('limit', default=100, type=int)
-            events = database_manager.get_events(event_type, limit)
-            return jsonify(events)
+            try:
+                page = _page_args()
+            except ValueError as e:
+                return jsonify({"error": str(e), "success": False}), 400
+            events = database_manager.get_events(event_type, **page)
+            return _page_response(database_manager, events, page["limit"])
         except Exception as e:
             app.logger.error(f"Error obteniendo eventos: {e}")
             return jsonify({"error": str(e), "success": False}), 500
 
     @app.route('/api/v1/metrics', methods=['GET'])
     def get_metrics():
-        """Obtiene los registros de métricas"""
+        """Obtiene las métricas: serie agregada o registros (?raw=1)"""
         try:
             metric_type = request.args.get('type')
             plc_id = request.args.get('plc_id')
+            raw = request.args.get('raw', '').lower() in ('1', 'true', 'yes')
+            if timeseries_store is not None and not raw:
+                try:
+                    return _series_response(
+                        timeseries_store, metric_type or "response_time", plc_id)
+                except ValueError as e:
+                    return jsonify({"error": str(e), "success": False}), 400
+
             hours = request.args.get('hours', default=24, type=int)
             metrics = database_manager.get_metrics(
                 metric_type, plc_id, hours)
@@ -148,9 +258,13 @@ def register_database_routes(app, database_manager):
 
     @app.route('/api/v1/stats', methods=['GET'])
     def get_database_stats():
-        """Obtiene estadísticas de la base de datos"""
+        """Obtiene estadísticas de la base de datos
+
+        Con ?breakdown=1 incluye los comandos por PLC y los eventos por tipo.
+        """
         try:
-            stats = database_manager.get_database_stats()
+            breakdown = request.args.get('breakdown', '').lower() in ('1', 'true', 'yes')
+            stats = database_manager.get_database_stats(breakdown=breakdown)
             return jsonify(stats)
         except Exception as e:
             app.logger.error(f"Error obteniendo estadísticas: {e}")
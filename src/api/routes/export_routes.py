@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rutas para exportar el histórico de eventos y comandos en streaming
+"""
+
+import csv
+import io
+import json
+import zlib
+from typing import Any, Dict, Iterable, Iterator, List
+
+from flask import Response, jsonify, request
+from src.database.database_manager import normalize_timestamp
+
+# Formatos de exportación admitidos y su tipo MIME
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Columnas que llegan como texto JSON: se copian tal cual
+JSON_COLUMNS = {"data", "result"}
+
+# Filas leídas por lote (y por fragmento de la respuesta)
+EXPORT_BATCH_SIZE = 500
+
+
+def ndjson_chunks(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """Un fragmento NDJSON por lote de filas (una línea JSON por fila)
+
+    Las columnas JSON llegan ya serializadas (ver iter_events) y se
+    insertan en la línea sin volver a codificarlas.
+    """
+    encode = json.JSONEncoder().encode
+    for rows in batches:
+        keys = rows[0].keys()
+        prefixes = [encode(key) + ": " for key in keys]
+        raw = [key in JSON_COLUMNS for key in keys]
+        lines = []
+        for row in rows:
+            fields = [prefix + (value if is_raw and value is not None else encode(value))
+                      for prefix, is_raw, value in zip(prefixes, raw, row.values())]
+            lines.append("{" + ", ".join(fields) + "}\n")
+        yield "".join(lines)
+
+
+def csv_chunks(batches: Iterable[List[Dict[str, Any]]]) -> Iterator[str]:
+    """Un fragmento CSV por lote de filas, con cabecera en el primero
+
+    Las columnas JSON se escriben como texto JSON en su celda. Sin filas no
+    se genera nada (ni siquiera la cabecera).
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    header = True
+    for rows in batches:
+        if header:
+            writer.writerow(rows[0].keys())
+            header = False
+        writer.writerows(row.values() for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def gzip_chunks(chunks: Iterable[str]) -> Iterator[bytes]:
+    """Comprime en gzip un flujo de fragmentos de texto sin acumularlo"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def register_export_routes(app, database_manager):
+    """Registra las rutas de exportación del histórico
+
+    GET /api/v1/export/events y /api/v1/export/commands recorren la tabla
+    por lotes, del más reciente al más antiguo, y envían cada lote según se
+    lee: la memoria usada no depende del tamaño de la exportación.
+
+    Parámetros:
+        format: "ndjson" (por defecto) o "csv"
+        since, until: Intervalo de fechas (epoch o ISO 8601)
+        type (eventos) / plc_id (comandos): Filtro opcional
+        gzip: "1" para comprimir la descarga (.gz)
+    """
+
+    def export(name: str, iterate, filter_value):
+        export_format = request.args.get('format', 'ndjson').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({
+                "error": f"Formato no admitido: {export_format}",
+                "success": False
+            }), 400
+        try:
+            since = request.args.get('since')
+            until = request.args.get('until')
+            since = normalize_timestamp(since) if since else None
+            until = normalize_timestamp(until) if until else None
+        except ValueError as e:
+            return jsonify({"error": str(e), "success": False}), 400
+
+        def generate():
+            try:
+                batches = iterate(filter_value, since, until, EXPORT_BATCH_SIZE)
+                if export_format == "csv":
+                    yield from csv_chunks(batches)
+                else:
+                    yield from ndjson_chunks(batches)
+            except Exception as e:
+                # Las cabeceras ya se enviaron: se corta la respuesta para que
+                # el cliente no tome la exportación por completa
+                app.logger.error(f"Error exportando {name}: {e}")
+                raise
+
+        filename = f"{name}.{export_format}"
+        body = generate()
+        mimetype = EXPORT_FORMATS[export_format]
+        if request.args.get('gzip', '').lower() in ('1', 'true', 'yes'):
+            body = gzip_chunks(body)
+            filename += ".gz"
+            mimetype = "application/gzip"
+
+        return Response(
+            body,
+            mimetype=mimetype,
+            headers={
+                'Content-Disposition': f'attachment; filename="{filename}"',
+                'X-Accel-Buffering': 'no'
+            })
+
+    @app.route('/api/v1/export/events', methods=['GET'])
+    def export_events():
+        """Exporta los eventos en NDJSON o CSV"""
+        return export("events", database_manager.iter_events, request.args.get('type'))
+
+    @app.route('/api/v1/export/commands', methods=['GET'])
+    def export_commands():
+        """Exporta los comandos en NDJSON o CSV"""
+        return export("commands", database_manager.iter_commands, request.args.get('plc_id'))
@@ -4,10 +4,17 @@
 Rutas para el estado y control del gateway y PLCs
 """
 
-from flask import jsonify, request
+import json
+
+from flask import Response, jsonify, request, stream_with_context
 from src.adapters.api_adapter import APIAdapter
 
 
+def _max_age_param():
+    """Lee el parámetro opcional ?max_age= (segundos)"""
+    return request.args.get('max_age', type=float)
+
+
 def register_status_routes(app, adapter: APIAdapter):
     """Registra las rutas de estado y control"""
 
@@ -15,7 +22,7 @@ def register_status_routes(app, adapter: APIAdapter):
     def get_status():
         """Obtiene el estado de todos los PLCs"""
         try:
-            status = adapter.get_status()
+            status = adapter.get_status(max_age=_max_age_param())
             return jsonify(status)
         except Exception as e:
             app.logger.error(f"Error obteniendo status: {e}")
@@ -25,7 +32,7 @@ def register_status_routes(app, adapter: APIAdapter):
     def get_machine_status(machine_id: str):
         """Obtiene el estado de un PLC específico"""
         try:
-            status = adapter.get_status(machine_id)
+            status = adapter.get_status(machine_id, _max_age_param())
             return jsonify(status)
         except Exception as e:
             app.logger.error(
@@ -63,6 +70,50 @@ def register_status_routes(app, adapter: APIAdapter):
             app.logger.error(f"Error enviando comando: {e}")
             return jsonify({"error": str(e), "success": False}), 500
 
+    @app.route('/api/v1/commands/batch', methods=['POST'])
+    def send_commands_batch():
+        """Envía un lote de comandos a varios PLCs en paralelo
+
+        Cuerpo: {"commands": [{"machine_id", "command", "argument"}, ...],
+        "deadline": segundos}. Con ?stream=1 responde NDJSON con cada
+        resultado según termina.
+        """
+        try:
+            data = request.get_json(silent=True)
+            if not data or not isinstance(data.get('commands'), list) or not data['commands']:
+                return jsonify({"error": "Falta la lista 'commands'", "success": False}), 400
+
+            items = data['commands']
+            if not all(isinstance(item, dict) and item.get('command') is not None
+                       for item in items):
+                return jsonify({"error": "Cada comando requiere 'command'", "success": False}), 400
+
+            max_batch_size = adapter.gateway_core.config_manager.get(
+                "commands.max_batch_size", 500)
+            if isinstance(max_batch_size, int) and len(items) > max_batch_size:
+                return jsonify({
+                    "error": f"El lote supera el máximo de {max_batch_size} comandos",
+                    "success": False
+                }), 413
+
+            deadline = data.get('deadline')
+            deadline = float(deadline) if deadline is not None else None
+
+            if request.args.get('stream', '').lower() in ('1', 'true'):
+                def generate():
+                    for index, entry in adapter.iter_commands(items, deadline):
+                        yield json.dumps(dict(entry, index=index), default=str) + "\n"
+
+                return Response(stream_with_context(generate()),
+                                mimetype='application/x-ndjson')
+
+            return jsonify(adapter.send_commands(items, deadline))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e), "success": False}), 400
+        except Exception as e:
+            app.logger.error(f"Error enviando lote de comandos: {e}")
+            return jsonify({"error": str(e), "success": False}), 500
+
     @app.route('/api/v1/move/<int:position>', methods=['POST'])
     def move_to_position(position: int):
         """Mueve un carrusel a una posición específica"""
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Rutas para el stream de eventos en tiempo real
+"""
+
+from flask import Response, jsonify, request, stream_with_context
+from src.events.event_stream import EventStreamBroker
+
+
+def register_stream_routes(app, broker: EventStreamBroker):
+    """Registra las rutas del stream de eventos"""
+
+    @app.route('/api/v1/stream', methods=['GET'])
+    def event_stream():
+        """Stream Server-Sent Events de estado de PLCs y eventos
+
+        Parámetros:
+            types: Lista separada por comas de tipos de evento ("plc.*"
+                admite prefijos); por defecto los configurados
+        """
+        types_param = request.args.get('types', '')
+        event_types = [t.strip() for t in types_param.split(',') if t.strip()]
+
+        subscriber = broker.subscribe(event_types or None)
+        if subscriber is None:
+            return jsonify({
+                "error": "Número máximo de clientes de stream alcanzado",
+                "success": False
+            }), 503
+
+        return Response(
+            stream_with_context(broker.stream(subscriber)),
+            mimetype='text/event-stream',
+            headers={
+                'Cache-Control': 'no-cache',
+                'X-Accel-Buffering': 'no'
+            })
+
+    @app.route('/api/v1/stream/stats', methods=['GET'])
+    def event_stream_stats():
+        """Obtiene estadísticas de los clientes del stream"""
+        return jsonify({"success": True, "data": broker.get_stats()})
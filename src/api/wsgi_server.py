@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor WSGI de producción para la API REST del Gateway Local
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from waitress.server import create_server as create_waitress_server
+from waitress import wasyncore
+
+# Espera del bucle del servidor entre comprobaciones de parada (segundos)
+LOOP_TIMEOUT = 0.1
+
+# Espera máxima al cerrar para enviar las respuestas pendientes (segundos)
+FLUSH_TIMEOUT = 2.0
+
+# Respuesta a las peticiones que llegan durante el drenado
+DRAINING_BODY = "Servidor deteniéndose".encode("utf-8")
+
+
+class _ClosingIterator:
+    """Cuerpo de respuesta que avisa cuando el servidor termina de enviarlo"""
+
+    def __init__(self, body: Iterable[bytes], on_close: Callable[[], None]):
+        self._body = body
+        self._on_close = on_close
+
+    def __iter__(self):
+        return iter(self._body)
+
+    def close(self) -> None:
+        try:
+            close = getattr(self._body, "close", None)
+            if close:
+                close()
+        finally:
+            self._on_close()
+
+
+class GatewayWSGIServer:
+    """Servidor WSGI de producción (waitress) con drenado ordenado
+
+    Un único proceso sirve todas las peticiones con un pool fijo de hilos,
+    de modo que el GatewayCore (y sus conexiones a los PLCs) sigue teniendo
+    un único propietario. Las conexiones HTTP/1.1 se mantienen abiertas
+    (keep-alive) hasta ``idle_timeout`` segundos de inactividad; no hay
+    plazo para la duración de una petición (el stream de eventos es
+    indefinido).
+
+    Las peticiones en curso se cuentan en la propia aplicación WSGI y el
+    servidor usa su propio mapa de sockets: el drenado sólo usa la API
+    pública de waitress.
+    """
+
+    def __init__(self, app, host: str, port: int, threads: int = 16,
+                 idle_timeout: float = 30.0, connection_limit: int = 100,
+                 backlog: int = 128):
+        """Inicializa el servidor
+
+        Args:
+            app: Aplicación WSGI
+            host: Dirección en la que escuchar
+            port: Puerto en el que escuchar (0 = puerto libre)
+            threads: Número de hilos que atienden peticiones
+            idle_timeout: Inactividad máxima de una conexión (lectura de
+                la petición o espera keep-alive) en segundos
+            connection_limit: Conexiones simultáneas máximas
+            backlog: Tamaño de la cola de conexiones pendientes
+        """
+        self.app = app
+        self.threads = threads
+        self.draining = False
+        self.logger = logging.getLogger(__name__)
+
+        self._in_flight = 0
+        self._idle = threading.Condition()
+        self._stopped = threading.Event()
+        self._serving = False
+        self._map: Dict[int, Any] = {}
+
+        self._server = create_waitress_server(
+            self._track, map=self._map, host=host, port=port, threads=threads,
+            channel_timeout=int(idle_timeout),
+            cleanup_interval=max(1, int(idle_timeout) // 2),
+            connection_limit=connection_limit, backlog=backlog,
+            ident="gateway-local")
+        self.port = self._server.effective_port
+
+    def serve_forever(self) -> None:
+        """Atiende peticiones hasta que se drena el servidor"""
+        self._serving = True
+        try:
+            while not self._stopped.is_set():
+                wasyncore.loop(timeout=LOOP_TIMEOUT, map=self._map, count=1)
+        finally:
+            # Cerrar desde el propio bucle, que es el dueño de los sockets
+            self._close()
+
+    @property
+    def in_flight(self) -> int:
+        """Peticiones en curso (hasta que se termina de enviar la respuesta)"""
+        with self._idle:
+            return self._in_flight
+
+    def drain(self, timeout: float = 10.0) -> bool:
+        """Rechaza las peticiones nuevas y espera a las que están en curso
+
+        Durante el drenado las peticiones nuevas reciben un 503; al terminar
+        se cierran la escucha y las conexiones keep-alive.
+
+        Args:
+            timeout: Espera máxima por las peticiones en curso (segundos)
+
+        Returns:
+            True si todas las peticiones terminaron dentro del plazo
+        """
+        self.draining = True
+        with self._idle:
+            drained = self._idle.wait_for(lambda: self._in_flight == 0, timeout)
+            if not drained:
+                self.logger.warning(
+                    f"{self._in_flight} peticiones sin terminar tras {timeout}s de drenado")
+
+        self._stopped.set()
+        if not self._serving:
+            self._close()
+        return drained
+
+    def _close(self) -> None:
+        """Cierra la escucha, las conexiones restantes y el pool de hilos
+
+        Antes termina de enviar las respuestas que aún están en los búferes.
+        """
+        deadline = time.monotonic() + FLUSH_TIMEOUT
+        while (any(channel.writable() for channel in list(self._map.values()))
+               and time.monotonic() < deadline):
+            wasyncore.loop(timeout=LOOP_TIMEOUT, map=self._map, count=1)
+        # Incluye el socket de escucha y el trigger del servidor
+        wasyncore.close_all(self._map)
+        self._server.task_dispatcher.shutdown(timeout=1)
+
+    def _track(self, environ, start_response):
+        """Aplicación WSGI que cuenta las peticiones en curso"""
+        if self.draining:
+            start_response("503 Service Unavailable",
+                           [("Content-Type", "text/plain; charset=utf-8")])
+            return [DRAINING_BODY]
+
+        with self._idle:
+            self._in_flight += 1
+        try:
+            body = self.app(environ, start_response)
+        except Exception:
+            self._finished()
+            raise
+        return _ClosingIterator(body, self._finished)
+
+    def _finished(self) -> None:
+        with self._idle:
+            self._in_flight -= 1
+            if self._in_flight == 0:
+                self._idle.notify_all()
+
+
+def create_server(app, host: str, port: int,
+                  config: Optional[Dict[str, Any]] = None) -> GatewayWSGIServer:
+    """Crea el servidor de producción a partir de la sección "api.server"
+
+    Args:
+        app: Aplicación WSGI
+        host: Dirección en la que escuchar
+        port: Puerto en el que escuchar
+        config: Configuración del servidor (threads, idle_timeout,
+            connection_limit, backlog)
+    """
+    config = config or {}
+    return GatewayWSGIServer(
+        app, host, port,
+        threads=int(config.get("threads", 16)),
+        idle_timeout=float(config.get("idle_timeout", 30)),
+        connection_limit=int(config.get("connection_limit", 100)),
+        backlog=int(config.get("backlog", 128))
+    )
@@ -17,6 +17,13 @@ from .service_client import (
     register_service,
     get_service_client
 )
+from .http_pool import (
+    HTTPClientPool,
+    RETRYABLE_STATUS,
+    backoff_delay,
+    get_http_pool,
+    configure_http_pool
+)
 
 __all__ = [
     "ServiceClient",
@@ -25,5 +32,10 @@ __all__ = [
     "ServiceStatus",
     "get_service_registry",
     "register_service",
-    "get_service_client"
+    "get_service_client",
+    "HTTPClientPool",
+    "RETRYABLE_STATUS",
+    "backoff_delay",
+    "get_http_pool",
+    "configure_http_pool"
 ]
\ No newline at end of file
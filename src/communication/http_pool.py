@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Capa HTTP saliente compartida por los clientes del Gateway Local
+"""
+
+import ipaddress
+import logging
+import random
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.poolmanager import PoolManager
+from urllib3.util.retry import Retry
+
+# Respuestas que indican un fallo transitorio del servidor
+RETRYABLE_STATUS = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Métodos que se reintentan ante RETRYABLE_STATUS (los POST no son
+# idempotentes: cada cliente decide cómo reintentarlos)
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+
+
+def backoff_delay(failures: int, base: float, maximum: float,
+                  jitter: float = 0.5) -> float:
+    """Espera exponencial con jitter tras ``failures`` fallos consecutivos
+
+    Args:
+        failures: Fallos consecutivos (1 = primer fallo)
+        base: Espera tras el primer fallo (segundos)
+        maximum: Espera máxima (segundos)
+        jitter: Fracción aleatoria que se descuenta de la espera
+    """
+    delay = min(base * (2 ** max(0, failures - 1)), maximum)
+    return delay * random.uniform(1.0 - jitter, 1.0)
+
+
+class _BackoffRetry(Retry):
+    """Retry con espera máxima y jitter configurables
+
+    urllib3 1.26 no admite los argumentos ``backoff_max`` ni
+    ``backoff_jitter`` (añadidos en 2.0), así que la espera se acota aquí
+    con el mismo resultado en ambas versiones.
+    """
+
+    def __init__(self, *args, backoff_cap: float = 30.0, jitter: float = 0.0, **kwargs):
+        self.backoff_cap = backoff_cap
+        self.jitter = jitter
+        super().__init__(*args, **kwargs)
+
+    def new(self, **kwargs) -> "_BackoffRetry":
+        retry = super().new(**kwargs)
+        retry.backoff_cap = self.backoff_cap
+        retry.jitter = self.jitter
+        return retry
+
+    def get_backoff_time(self) -> float:
+        delay = super().get_backoff_time()
+        if delay <= 0:
+            return 0
+        return min(self.backoff_cap, delay + random.uniform(0, self.jitter))
+
+
+class _DNSCache:
+    """Caché de resoluciones DNS con TTL
+
+    Sólo la usan las conexiones de los pools de HTTPClientPool (ver
+    _CachedDNSConnection) y sólo al abrir una conexión nueva; las conexiones
+    del pool se reutilizan sin resolver de nuevo.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple[str, int], Tuple[float, List[str]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, host: str, port: int) -> List[str]:
+        """Direcciones de ``host`` (desde la caché si no han caducado)"""
+        key = (host, port)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        addresses: List[str] = []
+        for _, _, _, _, sockaddr in socket.getaddrinfo(host, port, type=socket.SOCK_STREAM):
+            if sockaddr[0] not in addresses:
+                addresses.append(sockaddr[0])
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl, addresses)
+        return addresses
+
+    def invalidate(self, host: str, port: int) -> None:
+        with self._lock:
+            self._entries.pop((host, port), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class _CachedDNSConnection:
+    """Conexión de urllib3 que resuelve el host con una _DNSCache
+
+    Se combina con HTTPConnection/HTTPSConnection en _PoolManager. Conecta a
+    la dirección cacheada cambiando sólo ``_dns_host``: el nombre original se
+    sigue usando en la cabecera Host, en SNI y al verificar el certificado.
+    Si ninguna dirección cacheada acepta la conexión, la entrada se invalida.
+    """
+
+    dns_cache: _DNSCache
+
+    def _new_conn(self):
+        host = self._dns_host
+        try:
+            ipaddress.ip_address(host.strip("[]"))
+            return super()._new_conn()
+        except ValueError:
+            pass
+        try:
+            addresses = self.dns_cache.resolve(host, self.port)
+        except OSError:
+            # urllib3 resuelve de nuevo y genera su error habitual
+            return super()._new_conn()
+
+        error: Optional[Exception] = None
+        try:
+            for ip in addresses:
+                self._dns_host = ip
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError as e:
+                    error = e
+        finally:
+            self._dns_host = host
+        self.dns_cache.invalidate(host, self.port)
+        if error is None:
+            return super()._new_conn()
+        raise error
+
+
+class _PoolManager(PoolManager):
+    """PoolManager con tamaño de pool por host y caché DNS propia"""
+
+    def __init__(self, *args, host_maxsize: Optional[Dict[str, int]] = None,
+                 dns_cache: Optional[_DNSCache] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.host_maxsize = host_maxsize or {}
+        if dns_cache is not None:
+            self.pool_classes_by_scheme = {
+                scheme: self._cached_pool_class(pool_cls, dns_cache)
+                for scheme, pool_cls in self.pool_classes_by_scheme.items()
+            }
+
+    @staticmethod
+    def _cached_pool_class(pool_cls, dns_cache: _DNSCache):
+        connection_cls = type(pool_cls.ConnectionCls.__name__,
+                              (_CachedDNSConnection, pool_cls.ConnectionCls),
+                              {"dns_cache": dns_cache})
+        return type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": connection_cls})
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        maxsize = self.host_maxsize.get(host)
+        if maxsize:
+            request_context = dict(request_context or self.connection_pool_kw)
+            request_context["maxsize"] = maxsize
+        return super()._new_pool(scheme, host, port, request_context)
+
+
+class _PooledAdapter(HTTPAdapter):
+    """HTTPAdapter con tamaño de pool por host y caché DNS propia"""
+
+    def __init__(self, host_maxsize: Optional[Dict[str, int]] = None,
+                 dns_cache: Optional[_DNSCache] = None, **kwargs):
+        self.host_maxsize = dict(host_maxsize or {})
+        self.dns_cache = dns_cache
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block, **pool_kwargs)
+        self.poolmanager = _PoolManager(
+            num_pools=connections, maxsize=maxsize, block=block,
+            host_maxsize=self.host_maxsize, dns_cache=self.dns_cache, **pool_kwargs)
+
+
+class HTTPClientPool:
+    """Pool de conexiones HTTP salientes compartido
+
+    Todas las sesiones creadas con ``session()`` montan el mismo adaptador,
+    de modo que comparten las conexiones keep-alive (y su handshake TLS) por
+    host, la política de reintentos y la caché DNS. Cada cliente obtiene su
+    propia sesión para sus cabeceras y para no compartir el objeto Session
+    entre hilos.
+
+    Los reintentos del adaptador cubren los errores de conexión de cualquier
+    método y las respuestas RETRYABLE_STATUS de los métodos idempotentes,
+    respetando la cabecera Retry-After.
+    """
+
+    def __init__(self, pool_connections: int = 10, pool_maxsize: int = 10,
+                 host_maxsize: Optional[Dict[str, int]] = None,
+                 max_retries: int = 2, backoff_factor: float = 0.5,
+                 backoff_max: float = 30.0, dns_ttl: float = 300.0,
+                 http2: bool = False, metrics_collector=None):
+        """Inicializa el pool
+
+        Args:
+            pool_connections: Hosts distintos con pool propio
+            pool_maxsize: Conexiones keep-alive por host
+            host_maxsize: Conexiones por host para hosts concretos
+            max_retries: Reintentos de cada petición
+            backoff_factor: Espera base entre reintentos (segundos)
+            backoff_max: Espera máxima entre reintentos (segundos)
+            dns_ttl: Segundos que se cachea cada resolución (0 = sin caché)
+            http2: Usar HTTP/2 en HTTPS (requiere el paquete h2 y que todos
+                los servidores HTTPS lo admitan)
+            metrics_collector: Colector donde publicar la latencia por destino
+        """
+        self.logger = logging.getLogger(__name__)
+        self.backoff_factor = backoff_factor
+        self.backoff_max = backoff_max
+        self.metrics_collector = metrics_collector
+        self.retry = _BackoffRetry(
+            total=max_retries, connect=max_retries, read=max_retries,
+            status=max_retries, backoff_factor=backoff_factor,
+            backoff_cap=backoff_max, jitter=backoff_factor / 2,
+            status_forcelist=RETRYABLE_STATUS, allowed_methods=IDEMPOTENT_METHODS,
+            raise_on_status=False, respect_retry_after_header=True)
+
+        # Antes de crear el adaptador: sus pools heredan la conexión HTTP/2
+        self.http2 = http2 and self._enable_http2()
+
+        self.dns_cache = _DNSCache(dns_ttl) if dns_ttl > 0 else None
+        self.adapter = _PooledAdapter(
+            host_maxsize=host_maxsize, dns_cache=self.dns_cache,
+            pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+            max_retries=self.retry)
+
+    def _enable_http2(self) -> bool:
+        """Activa HTTP/2 en urllib3 si el paquete h2 está disponible"""
+        try:
+            import h2  # noqa: F401
+            from urllib3.http2 import inject_into_urllib3
+            inject_into_urllib3()
+            return True
+        except ImportError:
+            self.logger.warning("Paquete h2 no disponible; se usará HTTP/1.1")
+            return False
+
+    def session(self, client: str, headers: Optional[Dict[str, str]] = None) -> requests.Session:
+        """Crea una sesión sobre las conexiones compartidas
+
+        La sesión no debe cerrarse con ``close()``: cerraría el adaptador
+        compartido y con él las conexiones de todos los clientes.
+
+        Args:
+            client: Nombre del cliente para las métricas (wms, tunnel...)
+            headers: Cabeceras por defecto de la sesión
+        """
+        session = requests.Session()
+        session.mount("http://", self.adapter)
+        session.mount("https://", self.adapter)
+        if headers:
+            session.headers.update(headers)
+        if self.metrics_collector:
+            session.hooks["response"].append(
+                lambda response, *args, **kwargs: self._record(client, response))
+        return session
+
+    def backoff(self, failures: int, base: Optional[float] = None,
+                maximum: Optional[float] = None) -> float:
+        """Espera tras ``failures`` fallos con la política del pool"""
+        return backoff_delay(failures,
+                             self.backoff_factor if base is None else base,
+                             self.backoff_max if maximum is None else maximum)
+
+    def close(self) -> None:
+        """Cierra las conexiones del pool"""
+        self.adapter.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene el estado del pool"""
+        pools = self.adapter.poolmanager.pools
+        return {
+            "hosts": len(pools),
+            "http2": self.http2,
+            "dns_cache_entries": len(self.dns_cache) if self.dns_cache else 0,
+            "dns_cache_hits": self.dns_cache.hits if self.dns_cache else 0,
+            "dns_cache_misses": self.dns_cache.misses if self.dns_cache else 0
+        }
+
+    def _record(self, client: str, response: requests.Response) -> None:
+        """Registra la latencia de una respuesta por cliente y destino"""
+        request = response.request
+        self.metrics_collector.record_http_client_request(
+            client, urlparse(request.url).netloc, request.method,
+            response.status_code, response.elapsed.total_seconds())
+
+
+# Instancia global del pool HTTP
+_http_pool: Optional[HTTPClientPool] = None
+_http_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HTTPClientPool:
+    """Obtiene el pool HTTP global (creándolo con valores por defecto)"""
+    global _http_pool
+    with _http_pool_lock:
+        if _http_pool is None:
+            _http_pool = HTTPClientPool()
+        return _http_pool
+
+
+def configure_http_pool(**kwargs) -> HTTPClientPool:
+    """Sustituye el pool HTTP global por uno con la configuración dada"""
+    global _http_pool
+    with _http_pool_lock:
+        if _http_pool is not None:
+            _http_pool.close()
+        _http_pool = HTTPClientPool(**kwargs)
+        return _http_pool
@@ -7,11 +7,16 @@ Cliente para comunicación entre microservicios del Gateway Local
 import requests
 import json
 import logging
-from typing import Dict, Any, Optional
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Any, Iterator, Optional, Tuple
 from urllib.parse import urljoin
 from dataclasses import dataclass
 from enum import Enum
 
+from .http_pool import HTTPClientPool, get_http_pool
+
 
 class ServiceStatus(Enum):
     """Estados posibles de un servicio"""
@@ -36,22 +41,32 @@ class ServiceInfo:
 class ServiceClient:
     """Cliente para comunicación con microservicios"""
 
-    def __init__(self, service_url: str, timeout: int = 30):
-        """Inicializa el cliente de servicio"""
+    def __init__(self, service_url: str, timeout: int = 30,
+                 http_pool: Optional[HTTPClientPool] = None):
+        """Inicializa el cliente de servicio
+
+        Las conexiones se toman del pool HTTP compartido (por defecto, el
+        global de ``get_http_pool()``).
+        """
         self.service_url = service_url.rstrip('/')
         self.timeout = timeout
-        self.session = requests.Session()
+        self.session = (http_pool or get_http_pool()).session("service")
         self.logger = logging.getLogger(__name__)
 
     def _make_request(self, method: str, endpoint: str, **kwargs) -> Optional[Dict[str, Any]]:
-        """Realiza una solicitud HTTP al servicio"""
+        """Realiza una solicitud HTTP al servicio
+
+        Acepta ``timeout`` para sustituir el timeout del cliente en esta
+        solicitud.
+        """
         url = urljoin(self.service_url, endpoint)
-        
+        timeout = kwargs.pop("timeout", None) or self.timeout
+
         try:
             response = self.session.request(
                 method=method,
                 url=url,
-                timeout=self.timeout,
+                timeout=timeout,
                 **kwargs
             )
             response.raise_for_status()
@@ -67,9 +82,9 @@ class ServiceClient:
             self.logger.error(f"Error en solicitud a {url}: {e}")
             return None
 
-    def get_health(self) -> Optional[Dict[str, Any]]:
+    def get_health(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """Obtiene el estado de salud del servicio"""
-        return self._make_request("GET", "/health")
+        return self._make_request("GET", "/health", timeout=timeout)
 
     def get_metrics(self) -> Optional[Dict[str, Any]]:
         """Obtiene las métricas del servicio"""
@@ -90,13 +105,15 @@ class ServiceClient:
             )
         return None
 
-    def send_command(self, command: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    def send_command(self, command: str, data: Dict[str, Any],
+                     timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """Envía un comando al servicio"""
         return self._make_request(
             "POST", 
             f"/api/v1/commands/{command}",
             json=data,
-            headers={"Content-Type": "application/json"}
+            headers={"Content-Type": "application/json"},
+            timeout=timeout
         )
 
     def get_resource(self, resource: str, params: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
@@ -134,21 +151,49 @@ class ServiceClient:
 
 
 class ServiceRegistry:
-    """Registro de servicios disponibles"""
-
-    def __init__(self):
+    """Registro de servicios disponibles
+
+    Las comprobaciones de salud y los comandos a todos los servicios se
+    lanzan en paralelo en un pool de hilos, con un plazo global: un servicio
+    colgado sólo retrasa la llamada hasta ese plazo y el resto de respuestas
+    se entregan igualmente. La salud de cada servicio se cachea durante
+    ``health_ttl`` segundos; una entrada caducada se sigue usando mientras
+    se refresca en segundo plano.
+    """
+
+    def __init__(self, max_workers: int = 16, health_ttl: float = 10.0,
+                 deadline: float = 5.0):
+        """Inicializa el registro
+
+        Args:
+            max_workers: Peticiones simultáneas a los servicios
+            health_ttl: Segundos que se considera vigente cada estado de salud
+            deadline: Plazo global por defecto de cada operación (segundos)
+        """
         self.services: Dict[str, ServiceClient] = {}
         self.logger = logging.getLogger(__name__)
+        self.max_workers = max_workers
+        self.health_ttl = health_ttl
+        self.deadline = deadline
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        # service_id -> (instante de la comprobación, respuesta de /health)
+        self._health: Dict[str, Tuple[float, Optional[Dict[str, Any]]]] = {}
+        self._refreshing: set = set()
 
     def register_service(self, service_id: str, service_url: str, timeout: int = 30) -> None:
         """Registra un servicio en el registro"""
         self.services[service_id] = ServiceClient(service_url, timeout)
+        with self._lock:
+            self._health.pop(service_id, None)
         self.logger.info(f"Servicio registrado: {service_id} -> {service_url}")
 
     def unregister_service(self, service_id: str) -> bool:
         """Elimina un servicio del registro"""
         if service_id in self.services:
             del self.services[service_id]
+            with self._lock:
+                self._health.pop(service_id, None)
             self.logger.info(f"Servicio desregistrado: {service_id}")
             return True
         return False
@@ -161,29 +206,169 @@ class ServiceRegistry:
         """Obtiene todos los servicios registrados"""
         return self.services.copy()
 
-    def get_healthy_services(self) -> Dict[str, ServiceClient]:
-        """Obtiene solo los servicios que están saludables"""
+    def get_healthy_services(self, deadline: Optional[float] = None) -> Dict[str, ServiceClient]:
+        """Obtiene solo los servicios que están saludables
+
+        Usa la salud cacheada; los servicios sin comprobar se consultan en
+        paralelo y los que no responden dentro del plazo se consideran no
+        saludables.
+        """
         healthy_services = {}
-        for service_id, client in self.services.items():
-            try:
-                health = client.get_health()
-                if health and health.get("status") == "healthy":
-                    healthy_services[service_id] = client
-            except Exception as e:
-                self.logger.warning(f"Error verificando salud de {service_id}: {e}")
+        for service_id, health in self.iter_health(deadline):
+            client = self.services.get(service_id)
+            if client and health and health.get("status") == "healthy":
+                healthy_services[service_id] = client
         return healthy_services
 
-    def broadcast_command(self, command: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Envía un comando a todos los servicios registrados"""
-        results = {}
-        for service_id, client in self.services.items():
-            try:
-                result = client.send_command(command, data)
-                results[service_id] = result
-            except Exception as e:
-                self.logger.error(f"Error enviando comando a {service_id}: {e}")
-                results[service_id] = {"error": str(e)}
-        return results
+    def iter_health(self, deadline: Optional[float] = None,
+                    max_age: Optional[float] = None) -> Iterator[Tuple[str, Optional[Dict[str, Any]]]]:
+        """Devuelve el estado de salud de cada servicio según se conoce
+
+        Primero se entregan los estados cacheados (los caducados se refrescan
+        en segundo plano) y después los de los servicios sin comprobar, en el
+        orden en que responden. Un servicio que no responde en el plazo se
+        entrega con None.
+
+        Args:
+            deadline: Plazo global en segundos (por defecto, el del registro)
+            max_age: Antigüedad máxima de un estado cacheado para no volver a
+                consultarlo (por defecto, sin límite)
+
+        Yields:
+            Tuplas (service_id, respuesta de /health o None)
+        """
+        now = time.monotonic()
+        unknown = {}
+        stale = {}
+        for service_id, client in self.services.copy().items():
+            with self._lock:
+                cached = self._health.get(service_id)
+            if cached is None or (max_age is not None and now - cached[0] > max_age):
+                unknown[service_id] = client
+                continue
+            if now - cached[0] > self.health_ttl:
+                stale[service_id] = client
+            yield service_id, cached[1]
+
+        self._refresh_in_background(stale)
+        for service_id, health in self._fan_out(unknown, self._check_health, deadline):
+            if isinstance(health, Exception) or (health or {}).get("timed_out"):
+                health = None
+            yield service_id, health
+
+    def refresh_health(self, deadline: Optional[float] = None) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Vuelve a comprobar la salud de todos los servicios"""
+        return dict(self.iter_health(deadline, max_age=0))
+
+    def broadcast_command(self, command: str, data: Dict[str, Any],
+                          deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Envía un comando a todos los servicios registrados
+
+        Los servicios que no responden dentro del plazo devuelven
+        ``{"error": ..., "timed_out": True}``.
+        """
+        return dict(self.iter_broadcast_command(command, data, deadline))
+
+    def iter_broadcast_command(self, command: str, data: Dict[str, Any],
+                               deadline: Optional[float] = None) -> Iterator[Tuple[str, Any]]:
+        """Envía un comando a todos los servicios y devuelve las respuestas según llegan
+
+        Yields:
+            Tuplas (service_id, respuesta del servicio)
+        """
+        for service_id, result in self._fan_out(
+                self.services.copy(),
+                lambda service_id, client, timeout: client.send_command(
+                    command, data, timeout=timeout),
+                deadline):
+            if isinstance(result, Exception):
+                self.logger.error(f"Error enviando comando a {service_id}: {result}")
+                result = {"error": str(result)}
+            yield service_id, result
+
+    def stop(self) -> None:
+        """Libera el pool de hilos (las peticiones en curso no se esperan)"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    # --- Fan-out -------------------------------------------------------
+
+    def _fan_out(self, clients: Dict[str, ServiceClient],
+                 call: Callable[[str, ServiceClient, float], Any],
+                 deadline: Optional[float]) -> Iterator[Tuple[str, Any]]:
+        """Ejecuta ``call(service_id, client, timeout)`` contra cada servicio en paralelo
+
+        Cada petición usa como timeout el menor entre el del cliente y el
+        plazo global. Las excepciones se entregan como resultado; los
+        servicios sin respuesta al vencer el plazo, como timed_out.
+        """
+        if not clients:
+            return
+        if deadline is None:
+            deadline = self.deadline
+        cutoff = time.monotonic() + deadline
+        executor = self._get_executor()
+        futures = {}
+        for service_id, client in clients.items():
+            timeout = min(client.timeout, deadline)
+            futures[executor.submit(call, service_id, client, timeout)] = service_id
+
+        pending = set(futures)
+        while pending:
+            remaining = cutoff - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                yield futures[future], error if error is not None else future.result()
+
+        for future in pending:
+            future.cancel()
+            yield futures[future], {
+                "error": f"Sin respuesta en el plazo ({deadline}s)",
+                "timed_out": True
+            }
+
+    def _refresh_in_background(self, clients: Dict[str, ServiceClient]) -> None:
+        """Refresca la salud de los servicios dados sin esperar la respuesta"""
+        with self._lock:
+            clients = {service_id: client for service_id, client in clients.items()
+                       if service_id not in self._refreshing}
+            self._refreshing.update(clients)
+        if not clients:
+            return
+        executor = self._get_executor()
+        for service_id, client in clients.items():
+            executor.submit(self._check_health, service_id, client,
+                            min(client.timeout, self.deadline))
+
+    def _check_health(self, service_id: str, client: ServiceClient,
+                      timeout: float) -> Optional[Dict[str, Any]]:
+        """Consulta la salud de un servicio y la guarda en la caché
+
+        La respuesta se guarda aunque llegue después del plazo de quien la
+        pidió, de modo que la siguiente consulta ya la encuentra.
+        """
+        try:
+            health = client.get_health(timeout=timeout)
+        except Exception as e:
+            self.logger.warning(f"Error verificando salud de {service_id}: {e}")
+            health = None
+        with self._lock:
+            self._refreshing.discard(service_id)
+            if self.services.get(service_id) is client:
+                self._health[service_id] = (time.monotonic(), health)
+        return health
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="service-fanout")
+            return self._executor
 
 
 # Instancia global del registro de servicios
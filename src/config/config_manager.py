@@ -32,6 +32,38 @@ class ConfigManager:
                 "reconnect_interval": 30,
                 "heartbeat_interval": 60
             },
+            "http": {
+                "pool_connections": 10,
+                "pool_maxsize": 10,
+                "host_maxsize": {},
+                "max_retries": 2,
+                "backoff_factor": 0.5,
+                "backoff_max": 30,
+                "dns_ttl": 300,
+                "http2": False
+            },
+            "tunnel": {
+                "mode": "long_poll",  # long_poll o poll
+                "long_poll_wait": 25,
+                "poll_interval": 5,
+                "max_workers": 8,
+                "result_batch_size": 50,
+                "idempotency_ttl": 600
+            },
+            "telemetry": {
+                # Requiere el endpoint de lotes en el WMS; sin él los datos de
+                # sensores se envían con WMSClient.send_sensor_data
+                "enabled": False,
+                "path": "/api/v1/gateways/sensor-data/batch",
+                "batch_size": 500,
+                "flush_interval": 5,
+                "max_buffer": 10000,
+                "compression": "gzip",
+                "spool_dir": "telemetry_spool",
+                "max_spool_bytes": 104857600,  # 100MB
+                "max_retries": 3,
+                "timeout": 10
+            },
             "network": {
                 "bind_address": "0.0.0.0",
                 "bind_port": 8080,
@@ -54,6 +86,83 @@ class ConfigManager:
                 "metrics_port": 8081,
                 "health_check_interval": 30
             },
+            "polling": {
+                "interval": 10,
+                "deadline": 2.0,
+                "jitter": 0.1,
+                "max_workers": 16,
+                "max_backoff": 120
+            },
+            "command_queue": {
+                "default_timeout": 10,
+                "max_depth": 1000
+            },
+            "connections": {
+                "connect_timeout": 10,
+                "probe_interval": 5,
+                "backoff_base": 1,
+                "backoff_max": 60,
+                "jitter": 0.2,
+                "failure_threshold": 3,
+                "reset_timeout": 30,
+                "max_workers": 8
+            },
+            "commands": {
+                "max_workers": 16,
+                "batch_deadline": 10,
+                "max_batch_size": 500
+            },
+            "status_cache": {
+                "max_age": 15,
+                "failure_max_age": 1
+            },
+            "api": {
+                "server": {
+                    "threads": 16,
+                    "idle_timeout": 30,
+                    "connection_limit": 100,
+                    "backlog": 128,
+                    "drain_timeout": 10
+                }
+            },
+            "stream": {
+                "buffer_size": 256,
+                "max_clients": 32,
+                "keepalive": 15
+            },
+            "database": {
+                "write_behind": {
+                    "max_queue_size": 10000,
+                    "batch_size": 500,
+                    "flush_interval": 1.0,
+                    "overflow_policy": "block",
+                    "max_retries": 3
+                },
+                "retention": {
+                    "enabled": True,
+                    "interval": 300,
+                    "batch_size": 1000,
+                    "reconcile_interval": 86400,
+                    "archive_dir": "",
+                    "windows": {
+                        "events": 30,
+                        "commands": 30,
+                        "status_commands": 2,
+                        "metrics": 30,
+                        "rollups_minute": 30,
+                        "rollups_hour": 365
+                    },
+                    "event_types": {
+                        "plc.status_update": 2,
+                        "gateway.heartbeat": 7
+                    }
+                },
+                "timeseries": {
+                    "enabled": True,
+                    "chunk_seconds": 3600,
+                    "flush_interval": 10
+                }
+            },
             "plcs": [
                 # Ejemplo de configuración de PLCs
                 # {
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cola de comandos por PLC con prioridades para el Gateway Local
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.interfaces.plc_interface import PLCInterface
+
+# Clases de prioridad (menor valor = antes)
+PRIORITY_OPERATOR = 0   # Operador: API REST y GUI
+PRIORITY_WMS = 1        # Comandos recibidos del WMS
+PRIORITY_POLL = 2       # Sondeo de estado en segundo plano
+
+PRIORITY_NAMES = {
+    PRIORITY_OPERATOR: "operator",
+    PRIORITY_WMS: "wms",
+    PRIORITY_POLL: "poll"
+}
+
+STATUS_COMMAND = 0
+
+
+class _QueuedCommand:
+    """Petición pendiente en la cola (compartida por las peticiones fusionadas)"""
+
+    __slots__ = ("command", "argument", "priority", "deadline", "enqueued_at",
+                 "future", "started")
+
+    def __init__(self, command: int, argument: Optional[int], priority: int,
+                 deadline: float):
+        self.command = command
+        self.argument = argument
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.future: Future = Future()
+        self.started = False
+
+
+class PLCCommandQueue:
+    """Serializa los comandos de un PLC con un único hilo escritor
+
+    Todas las peticiones al PLC (comandos del operador y del WMS, sondeos de
+    estado) pasan por esta cola, de modo que las tramas de distintos hilos
+    nunca se mezclan en el socket. Se atienden por clase de prioridad y, dentro
+    de cada clase, por orden de llegada. Las peticiones de ESTADO pendientes se
+    fusionan en una sola, y las que superan su plazo antes de enviarse se
+    descartan sin llegar al PLC.
+
+    El protocolo no identifica las respuestas, por lo que sólo hay una
+    petición en vuelo por conexión.
+    """
+
+    def __init__(self, plc_id: str, plc: PLCInterface, default_timeout: float = 10.0,
+                 max_depth: int = 1000, metrics_collector=None):
+        """Inicializa la cola
+
+        Args:
+            plc_id: Identificador del PLC
+            plc: Instancia del PLC
+            default_timeout: Plazo por defecto de cada petición (segundos)
+            max_depth: Peticiones pendientes máximas antes de rechazar
+            metrics_collector: Colector donde publicar la instrumentación
+        """
+        self.plc_id = plc_id
+        self.plc = plc
+        self.default_timeout = default_timeout
+        self.max_depth = max_depth
+        self.metrics_collector = metrics_collector
+        self.logger = logging.getLogger(__name__)
+
+        self._heap: List[Tuple[int, int, _QueuedCommand]] = []
+        self._sequence = itertools.count()
+        self._pending_status: Optional[_QueuedCommand] = None
+        self._depth = 0
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._running = False
+        self._generation = 0
+        self._thread: Optional[threading.Thread] = None
+
+        self.executed = 0
+        self.merged = 0
+        self.expired = 0
+        self.rejected = 0
+
+    @property
+    def depth(self) -> int:
+        """Peticiones pendientes de enviar"""
+        return self._depth
+
+    def submit(self, command: int, argument: Optional[int] = None,
+               priority: int = PRIORITY_OPERATOR,
+               timeout: Optional[float] = None) -> Future:
+        """Encola una petición y devuelve un Future con la respuesta del PLC
+
+        Args:
+            command: Código del comando
+            argument: Argumento opcional del comando
+            priority: Clase de prioridad (PRIORITY_*)
+            timeout: Plazo de la petición en segundos; si vence antes de
+                enviarse se responde con ``timed_out`` sin tocar el PLC
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        with self._lock:
+            pending = self._pending_status
+            if command == STATUS_COMMAND and argument is None and pending is not None:
+                # Fusionar con el ESTADO pendiente (adelantándolo si hace falta)
+                pending.deadline = max(pending.deadline, deadline)
+                if priority < pending.priority:
+                    pending.priority = priority
+                    heapq.heappush(self._heap, (priority, next(self._sequence), pending))
+                self.merged += 1
+                self._record_outcome("merged")
+                return pending.future
+
+            if self._depth >= self.max_depth:
+                self.rejected += 1
+                self._record_outcome("rejected")
+                future: Future = Future()
+                future.set_result({"success": False,
+                                   "error": "Cola de comandos del PLC llena"})
+                return future
+
+            request = _QueuedCommand(command, argument, priority, deadline)
+            heapq.heappush(self._heap, (priority, next(self._sequence), request))
+            self._depth += 1
+            if command == STATUS_COMMAND and argument is None:
+                self._pending_status = request
+            self._ensure_writer()
+            self._not_empty.notify()
+            self._record_depth()
+            return request.future
+
+    def execute(self, command: int, argument: Optional[int] = None,
+                priority: int = PRIORITY_OPERATOR,
+                timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Encola una petición y espera su respuesta
+
+        Si el plazo vence con la petición ya enviada, la respuesta llegará
+        igualmente al PLC pero se devuelve ``timed_out`` al llamante.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        future = self.submit(command, argument, priority, timeout)
+        try:
+            return future.result(timeout=max(0.0, timeout))
+        except FutureTimeoutError:
+            return {"success": False, "timed_out": True,
+                    "error": f"Sin respuesta del PLC en {timeout}s"}
+
+    def stop(self) -> None:
+        """Detiene el hilo escritor y responde con error lo que quede en cola"""
+        with self._lock:
+            self._running = False
+            self._generation += 1
+            self._not_empty.notify_all()
+            pending = [entry[2] for entry in self._heap
+                       if not entry[2].started and entry[0] == entry[2].priority]
+            self._heap.clear()
+            self._pending_status = None
+            self._depth = 0
+            self._record_depth()
+        for request in pending:
+            self._resolve(request, {"success": False, "error": "Cola de comandos detenida"})
+        if self._thread and self._thread.is_alive() \
+                and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self._thread = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene la instrumentación de la cola"""
+        with self._lock:
+            by_priority: Dict[str, int] = {}
+            for priority, _, request in self._heap:
+                if request.priority == priority and not request.started:
+                    name = PRIORITY_NAMES.get(priority, str(priority))
+                    by_priority[name] = by_priority.get(name, 0) + 1
+            return {
+                "depth": self._depth,
+                "by_priority": by_priority,
+                "executed": self.executed,
+                "merged": self.merged,
+                "expired": self.expired,
+                "rejected": self.rejected
+            }
+
+    # --- Hilo escritor -------------------------------------------------
+
+    def _ensure_writer(self) -> None:
+        """Arranca el hilo escritor si no está activo (con el lock tomado)"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(
+            target=self._writer_loop, args=(self._generation,),
+            name=f"plc-queue-{self.plc_id}", daemon=True)
+        self._thread.start()
+
+    def _next_request(self, generation: int) -> Optional[_QueuedCommand]:
+        """Espera y extrae la siguiente petición vigente
+
+        Devuelve None si la cola se detuvo; un escritor de una ejecución
+        anterior nunca compite con el actual.
+        """
+        with self._lock:
+            while True:
+                while self._running and generation == self._generation and not self._heap:
+                    self._not_empty.wait()
+                if not self._running or generation != self._generation:
+                    return None
+                priority, _, request = heapq.heappop(self._heap)
+                if request.started or priority != request.priority:
+                    continue  # Entrada obsoleta de una petición adelantada
+                request.started = True
+                self._depth -= 1
+                if request is self._pending_status:
+                    self._pending_status = None
+                self._record_depth()
+                return request
+
+    def _writer_loop(self, generation: int) -> None:
+        """Envía las peticiones al PLC de una en una"""
+        while True:
+            request = self._next_request(generation)
+            if request is None:
+                break
+
+            now = time.monotonic()
+            self._record_wait(request, now - request.enqueued_at)
+            if now > request.deadline:
+                self.expired += 1
+                self._record_outcome("expired")
+                self._resolve(request, {
+                    "success": False, "timed_out": True,
+                    "error": "Plazo agotado antes de enviar el comando"})
+                continue
+
+            try:
+                if request.argument is not None:
+                    result = self.plc.send_command(request.command, request.argument)
+                else:
+                    result = self.plc.send_command(request.command)
+            except Exception as e:
+                self.executed += 1
+                if not request.future.done():
+                    request.future.set_exception(e)
+                continue
+            self.executed += 1
+            self._resolve(request, result)
+
+    def _resolve(self, request: _QueuedCommand, result: Dict[str, Any]) -> None:
+        """Entrega la respuesta a todas las peticiones fusionadas"""
+        if not request.future.done():
+            request.future.set_result(result)
+
+    # --- Instrumentación -----------------------------------------------
+
+    def _record_depth(self) -> None:
+        if self.metrics_collector:
+            self.metrics_collector.record_command_queue_depth(self.plc_id, self._depth)
+
+    def _record_wait(self, request: _QueuedCommand, wait: float) -> None:
+        if self.metrics_collector:
+            self.metrics_collector.record_command_queue_wait(
+                PRIORITY_NAMES.get(request.priority, str(request.priority)), wait)
+
+    def _record_outcome(self, outcome: str) -> None:
+        if self.metrics_collector:
+            self.metrics_collector.record_command_queue_outcome(self.plc_id, outcome)
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Gestor de conexiones persistentes a los PLCs para el Gateway Local
+"""
+
+import heapq
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.interfaces.plc_interface import PLCInterface
+
+# Estados del circuit breaker
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class PLCConnectionState:
+    """Estado de la conexión y del circuit breaker de un PLC"""
+
+    def __init__(self, plc_id: str):
+        self.plc_id = plc_id
+        self.connected = False
+        self.connecting = False
+        self.circuit = CIRCUIT_CLOSED
+        self.consecutive_failures = 0
+        self.next_check = 0.0
+        self.opened_at: Optional[float] = None
+        self.connects = 0
+        self.failed_connects = 0
+        self.drops = 0
+        self.last_error: Optional[str] = None
+        self.last_connected_at: Optional[float] = None
+        self.last_disconnected_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte el estado a diccionario"""
+        return {
+            "connected": self.connected,
+            "connecting": self.connecting,
+            "circuit": self.circuit,
+            "consecutive_failures": self.consecutive_failures,
+            "connects": self.connects,
+            "failed_connects": self.failed_connects,
+            "drops": self.drops,
+            "last_error": self.last_error,
+            "last_connected_at": self.last_connected_at,
+            "last_disconnected_at": self.last_disconnected_at
+        }
+
+
+class PLCConnectionManager:
+    """Mantiene abiertas las conexiones a los PLCs y las restablece al caerse
+
+    Un hilo supervisor comprueba periódicamente cada conexión con
+    ``PLCInterface.probe`` (sin tráfico hacia el PLC) y reconecta las caídas
+    en un pool de hilos con backoff exponencial y jitter. Los resultados de
+    los sondeos y comandos (``record_result``) alimentan un circuit breaker
+    por PLC: tras ``failure_threshold`` fallos consecutivos el circuito se
+    abre y las peticiones se rechazan de inmediato durante
+    ``reset_timeout`` segundos; después se permite un único intento.
+
+    El estado se mantiene en memoria con contadores agregados, de modo que
+    las comprobaciones de salud lo consultan sin abrir sockets.
+    """
+
+    def __init__(self, on_change: Optional[Callable[[str, str, Dict[str, Any]], None]] = None,
+                 probe_interval: float = 5.0, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, jitter: float = 0.2,
+                 failure_threshold: int = 3, reset_timeout: float = 30.0,
+                 max_workers: int = 8, metrics_collector=None):
+        """Inicializa el gestor
+
+        Args:
+            on_change: Callback (plc_id, evento, datos) en cada transición:
+                "connected", "disconnected", "connection_error",
+                "circuit_open", "circuit_half_open" o "circuit_closed"
+            probe_interval: Intervalo entre comprobaciones de vida (segundos)
+            backoff_base: Espera tras el primer fallo de reconexión (segundos)
+            backoff_max: Espera máxima entre reconexiones (segundos)
+            jitter: Fracción aleatoria aplicada a cada espera
+            failure_threshold: Fallos consecutivos que abren el circuito
+            reset_timeout: Tiempo con el circuito abierto antes de reintentar
+            max_workers: Reconexiones simultáneas
+            metrics_collector: Colector donde publicar la instrumentación
+        """
+        self.on_change = on_change
+        self.probe_interval = probe_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.max_workers = max_workers
+        self.metrics_collector = metrics_collector
+        self.logger = logging.getLogger(__name__)
+
+        self._plcs: Dict[str, PLCInterface] = {}
+        self._states: Dict[str, PLCConnectionState] = {}
+        self._schedule: List[Tuple[float, str]] = []
+        self._connected_count = 0
+        self._open_count = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._running = False
+        # Se incrementa en cada stop(): una reconexión lanzada antes no debe
+        # dejar abierto un PLC que el gateway ya ha desconectado
+        self._generation = 0
+        self._thread: Optional[threading.Thread] = None
+        self._executor = self._create_executor()
+
+    def _create_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="plc-connect")
+
+    def add_plc(self, plc_id: str, plc: PLCInterface) -> None:
+        """Registra un PLC (se conecta con ``connect_all`` o al iniciar)"""
+        with self._lock:
+            self._forget(plc_id)
+            self._plcs[plc_id] = plc
+            self._states[plc_id] = PLCConnectionState(plc_id)
+            self._schedule_check(self._states[plc_id], time.monotonic())
+
+    def remove_plc(self, plc_id: str) -> None:
+        """Deja de gestionar un PLC"""
+        with self._lock:
+            self._forget(plc_id)
+
+    def mark_disconnected(self, plc_id: str) -> None:
+        """Registra una desconexión solicitada por el gateway (sin notificarla)"""
+        with self._lock:
+            state = self._states.get(plc_id)
+            if state is not None and state.connected:
+                self._set_connected(state, False, dropped=False)
+                self._schedule_check(state, time.monotonic())
+
+    def start(self) -> None:
+        """Inicia el hilo supervisor"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._supervisor_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo supervisor y las reconexiones (no cierra las conexiones)
+
+        Las reconexiones pendientes se cancelan y se espera a las que están
+        en curso; si alguna llega a conectar su PLC, lo vuelve a desconectar.
+        """
+        with self._lock:
+            self._running = False
+            self._generation += 1
+            self._wakeup.notify_all()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            self._executor = self._create_executor()  # Para connect_all/start
+            for state in self._states.values():
+                state.connecting = False
+
+    def connect_all(self, timeout: Optional[float] = None) -> int:
+        """Conecta en paralelo todos los PLCs desconectados
+
+        Args:
+            timeout: Espera máxima (segundos); los intentos pendientes siguen
+                en segundo plano
+
+        Returns:
+            Número de PLCs conectados
+        """
+        with self._lock:
+            targets = [(plc_id, self._plcs[plc_id], state)
+                       for plc_id, state in self._states.items()
+                       if not state.connected and not state.connecting]
+            for _, _, state in targets:
+                state.connecting = True
+            generation = self._generation
+        futures = [self._executor.submit(self._reconnect, plc_id, plc, state, generation)
+                   for plc_id, plc, state in targets]
+        wait(futures, timeout=timeout)
+        return self._connected_count
+
+    # --- Consultas -----------------------------------------------------
+
+    def allow_request(self, plc_id: str) -> bool:
+        """Indica si el circuit breaker deja pasar una petición al PLC
+
+        Con el circuito abierto se rechaza hasta agotar ``reset_timeout``;
+        entonces el circuito pasa a semiabierto y deja pasar una petición de
+        prueba cuyo resultado (``record_result``) lo cierra o lo reabre.
+        """
+        with self._lock:
+            state = self._states.get(plc_id)
+            if state is None or state.circuit == CIRCUIT_CLOSED:
+                return True
+            if (state.circuit != CIRCUIT_OPEN
+                    or time.monotonic() - state.opened_at < self.reset_timeout):
+                return False
+            event = self._set_circuit(state, CIRCUIT_HALF_OPEN)
+        self._notify(plc_id, [event])
+        return True
+
+    def is_connected(self, plc_id: str) -> bool:
+        """Estado de conexión conocido de un PLC (sin acceder a la red)"""
+        with self._lock:
+            state = self._states.get(plc_id)
+            return bool(state and state.connected)
+
+    def get_summary(self) -> Dict[str, int]:
+        """Resumen agregado en O(1) para las comprobaciones de salud"""
+        with self._lock:
+            return {
+                "total": len(self._states),
+                "connected": self._connected_count,
+                "open_circuits": self._open_count
+            }
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Obtiene el estado de conexión de cada PLC"""
+        with self._lock:
+            return {plc_id: state.to_dict()
+                    for plc_id, state in self._states.items()}
+
+    # --- Resultados de las peticiones ----------------------------------
+
+    def record_result(self, plc_id: str, success: bool,
+                      error: Optional[str] = None) -> None:
+        """Registra el resultado de un sondeo o comando enviado al PLC
+
+        Los fallos consecutivos abren el circuito; un éxito lo cierra. Si el
+        PLC perdió la conexión se programa su reconexión inmediata.
+        """
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        with self._lock:
+            state = self._states.get(plc_id)
+            plc = self._plcs.get(plc_id)
+            if state is None or plc is None:
+                return
+            if success:
+                state.consecutive_failures = 0
+                if state.circuit != CIRCUIT_CLOSED:
+                    events.append(self._set_circuit(state, CIRCUIT_CLOSED))
+            else:
+                state.last_error = error
+                self._register_failure(state, events)
+                if state.connected and not plc.is_connected():
+                    events.append(self._set_connected(state, False, error))
+                    self._schedule_check(state, time.monotonic())
+        self._notify(plc_id, events)
+
+    # --- Supervisión ---------------------------------------------------
+
+    def _supervisor_loop(self) -> None:
+        """Bucle que comprueba las conexiones y lanza las reconexiones"""
+        while True:
+            with self._lock:
+                if not self._running:
+                    break
+                if not self._schedule:
+                    self._wakeup.wait()
+                    continue
+
+                due, plc_id = self._schedule[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    continue
+
+                heapq.heappop(self._schedule)
+                state = self._states.get(plc_id)
+                plc = self._plcs.get(plc_id)
+                if state is None or plc is None or due != state.next_check:
+                    continue  # PLC eliminado o entrada reprogramada
+                if state.connecting:
+                    continue  # La reconexión en curso reprograma al terminar
+
+                if state.connected:
+                    self._schedule_check(state, time.monotonic())
+                else:
+                    state.connecting = True
+                generation = self._generation
+
+            if state.connected:
+                self._probe(plc_id, plc, state)
+            else:
+                self._executor.submit(self._reconnect, plc_id, plc, state, generation)
+
+    def _probe(self, plc_id: str, plc: PLCInterface, state: PLCConnectionState) -> None:
+        """Comprueba una conexión abierta sin generar tráfico"""
+        try:
+            alive = plc.probe()
+        except Exception as e:
+            self.logger.debug(f"Error comprobando PLC {plc_id}: {e}")
+            alive = False
+        if alive:
+            return
+
+        self.logger.warning(f"Conexión con PLC {plc_id} perdida")
+        try:
+            plc.disconnect()
+        except Exception:
+            pass
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        with self._lock:
+            if state.connected and plc_id in self._states:
+                events.append(self._set_connected(state, False, "Conexión perdida"))
+                self._schedule_check(state, time.monotonic())
+        self._notify(plc_id, events)
+
+    def _reconnect(self, plc_id: str, plc: PLCInterface, state: PLCConnectionState,
+                   generation: int) -> None:
+        """Intenta abrir la conexión de un PLC (en un hilo del pool)
+
+        ``generation`` es la de cuando se lanzó el intento; si el gestor se
+        ha detenido desde entonces no se conecta, o se desconecta de nuevo.
+        """
+        with self._lock:
+            if generation != self._generation:
+                state.connecting = False
+                return
+
+        error: Optional[str] = None
+        try:
+            connected = bool(plc.connect()) and plc.probe()
+            if not connected:
+                error = "Connection failed"
+        except Exception as e:
+            connected = False
+            error = str(e)
+
+        events: List[Tuple[str, Dict[str, Any]]] = []
+        with self._lock:
+            state.connecting = False
+            stale = generation != self._generation
+            if not stale:
+                if plc_id not in self._states:
+                    return
+                if connected:
+                    state.connects += 1
+                    state.consecutive_failures = 0
+                    events.append(self._set_connected(state, True))
+                    if state.circuit != CIRCUIT_CLOSED:
+                        events.append(self._set_circuit(state, CIRCUIT_CLOSED))
+                else:
+                    state.failed_connects += 1
+                    state.last_error = error
+                    if state.consecutive_failures == 0:
+                        # Avisar sólo del primer fallo de cada caída
+                        events.append(("connection_error", {"error": error}))
+                    self._register_failure(state, events)
+                self._schedule_check(state, time.monotonic())
+
+        if stale:
+            if connected:
+                self.logger.info(f"PLC {plc_id} conectado tras detener el gestor; se desconecta")
+                try:
+                    plc.disconnect()
+                except Exception:
+                    pass
+            return
+        if self.metrics_collector and not connected:
+            self.metrics_collector.record_connection_error(plc_id)
+        self._notify(plc_id, events)
+
+    # --- Transiciones (con el lock tomado) -----------------------------
+
+    def _forget(self, plc_id: str) -> None:
+        """Elimina un PLC descontando su estado de los contadores"""
+        self._plcs.pop(plc_id, None)
+        state = self._states.pop(plc_id, None)
+        if state is not None:
+            self._connected_count -= state.connected
+            self._open_count -= state.circuit != CIRCUIT_CLOSED
+
+    def _register_failure(self, state: PLCConnectionState,
+                          events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Cuenta un fallo y abre (o reabre) el circuito si procede"""
+        state.consecutive_failures += 1
+        if state.circuit != CIRCUIT_CLOSED:
+            # Falló la prueba: otro periodo completo con el circuito abierto
+            reopened = state.circuit == CIRCUIT_OPEN
+            event = self._set_circuit(state, CIRCUIT_OPEN)
+            if not reopened:
+                events.append(event)
+        elif state.consecutive_failures >= self.failure_threshold:
+            events.append(self._set_circuit(state, CIRCUIT_OPEN))
+
+    def _set_connected(self, state: PLCConnectionState, connected: bool,
+                       error: Optional[str] = None,
+                       dropped: bool = True) -> Tuple[str, Dict[str, Any]]:
+        """Cambia el estado de conexión manteniendo los contadores
+
+        ``dropped=False`` indica una desconexión solicitada, que no cuenta
+        como caída.
+        """
+        state.connected = connected
+        if connected:
+            self._connected_count += 1
+            state.last_connected_at = time.time()
+        else:
+            self._connected_count -= 1
+            if dropped:
+                state.drops += 1
+            state.last_disconnected_at = time.time()
+        if self.metrics_collector:
+            self.metrics_collector.record_plc_connection(state.plc_id, connected)
+        if connected:
+            return "connected", {}
+        return "disconnected", {"error": error}
+
+    def _set_circuit(self, state: PLCConnectionState, circuit: str) -> Tuple[str, Dict[str, Any]]:
+        """Cambia el estado del circuito manteniendo los contadores"""
+        self._open_count += ((circuit != CIRCUIT_CLOSED)
+                             - (state.circuit != CIRCUIT_CLOSED))
+        state.circuit = circuit
+        if circuit == CIRCUIT_OPEN:
+            state.opened_at = time.monotonic()
+        if self.metrics_collector:
+            self.metrics_collector.record_circuit_state(state.plc_id, circuit)
+        if circuit == CIRCUIT_CLOSED:
+            return "circuit_closed", {}
+        return "circuit_" + circuit, {"failures": state.consecutive_failures}
+
+    def _schedule_check(self, state: PLCConnectionState, reference: float) -> None:
+        """Programa la próxima comprobación o reconexión de un PLC
+
+        Una entrada anterior del mismo PLC queda obsoleta y se ignora.
+        """
+        if state.connected:
+            delay = self.probe_interval
+        elif state.consecutive_failures == 0:
+            delay = 0.0
+        else:
+            delay = min(self.backoff_base * (2 ** (state.consecutive_failures - 1)),
+                        self.backoff_max)
+            delay += random.uniform(-self.jitter, self.jitter) * delay
+            if state.circuit == CIRCUIT_OPEN:
+                # No reintentar hasta que el circuito admita una prueba
+                delay = max(delay, state.opened_at + self.reset_timeout - reference)
+        state.next_check = reference + max(0.0, delay)
+        heapq.heappush(self._schedule, (state.next_check, state.plc_id))
+        self._wakeup.notify()
+
+    def _notify(self, plc_id: str, events: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Informa de las transiciones fuera del lock"""
+        if not self.on_change:
+            return
+        for event, data in events:
+            try:
+                self.on_change(plc_id, event, data)
+            except Exception as e:
+                self.logger.error(f"Error notificando {event} de PLC {plc_id}: {e}")
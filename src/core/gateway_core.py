@@ -5,9 +5,12 @@ Core del Gateway Local - Orquestador principal
 """
 
 import logging
+import queue
 import threading
 import time
-from typing import Dict, Any, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 # Corregir las importaciones
 from src.config.config_manager import ConfigManager
@@ -23,12 +26,72 @@ from src.events import get_event_manager, emit_event
 
 # Importar el cliente WMS
 from src.wms.wms_client import WMSClient
+from src.communication.http_pool import HTTPClientPool, configure_http_pool
 
 # Importar el túnel reverso
 from src.wms.reverse_tunnel import ReverseTunnel
+from src.wms.telemetry_uplink import TelemetryUplink
 
 # Importar el gestor de base de datos
 from src.database import get_database_manager
+from src.database.write_behind import WriteBehindQueue, utc_timestamp
+from src.database.retention import RetentionManager
+from src.database.timeseries import TimeSeriesStore
+from src.database.event_codec import summarize_status
+
+# Importar el planificador de sondeo de PLCs
+from src.core.plc_scheduler import PLCPollScheduler
+from src.core.status_cache import PLCStatusCache
+from src.core.connection_manager import PLCConnectionManager
+from src.core.command_queue import (PLCCommandQueue, PRIORITY_OPERATOR,
+                                    PRIORITY_WMS, PRIORITY_POLL)
+
+
+# Códigos de los comandos soportados por los PLCs
+COMMAND_MAP = {
+    "STATUS": 0,
+    "MOVE": 1,
+    "START": 2,
+    "STOP": 3,
+    "RESET": 4
+}
+
+
+class _CommandBatchRecorder:
+    """Acumula los registros de un lote de comandos para escribirlos juntos
+
+    Cada fila conserva la marca de tiempo del momento en que se registró su
+    resultado, no la del cierre del lote. Los registros añadidos después de
+    ``close`` (comandos que terminaron tras el plazo del lote) se encolan
+    directamente.
+    """
+
+    def __init__(self, db_writer: WriteBehindQueue):
+        self.db_writer = db_writer
+        self._commands: List[tuple] = []
+        self._events: List[tuple] = []
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def add(self, command: Optional[tuple] = None, event: Optional[tuple] = None) -> None:
+        """Añade la fila de un comando y/o de un evento"""
+        timestamp = utc_timestamp()
+        commands = [command + (timestamp,)] if command else []
+        events = [event + (timestamp,)] if event else []
+        with self._lock:
+            if not self._closed:
+                self._commands.extend(commands)
+                self._events.extend(events)
+                return
+        self.db_writer.add_batch(events=events, commands=commands)
+
+    def close(self) -> None:
+        """Escribe los registros acumulados en un solo lote"""
+        with self._lock:
+            self._closed = True
+            commands, self._commands = self._commands, []
+            events, self._events = self._events, []
+        self.db_writer.add_batch(events=events, commands=commands)
 
 
 class GatewayCore:
@@ -47,18 +110,121 @@ class GatewayCore:
 
         # Inicializar gestor de eventos
         self.event_manager = get_event_manager()
+        self.metrics_collector.attach_event_manager(self.event_manager)
 
         # Inicializar base de datos
         self.database_manager = get_database_manager()
+        self.database_manager.metrics_collector = self.metrics_collector
+
+        # Cola de escritura diferida para eventos, comandos y métricas
+        write_behind_config = self.config_manager.get(
+            "database.write_behind", {})
+        if not isinstance(write_behind_config, dict):
+            write_behind_config = {}
+        self.db_writer = WriteBehindQueue(
+            self.database_manager,
+            max_queue_size=int(write_behind_config.get("max_queue_size", 10000)),
+            batch_size=int(write_behind_config.get("batch_size", 500)),
+            flush_interval=float(write_behind_config.get("flush_interval", 1.0)),
+            overflow_policy=write_behind_config.get("overflow_policy", "block"),
+            max_retries=int(write_behind_config.get("max_retries", 3)),
+            metrics_collector=self.metrics_collector
+        )
+        self.db_writer.start()
+
+        # Retención, agregación y archivado del histórico
+        retention_config = self.config_manager.get("database.retention", {})
+        self.retention_manager = RetentionManager(
+            self.database_manager,
+            retention_config if isinstance(retention_config, dict) else {})
+
+        # Series temporales de latencia, posición y errores por PLC
+        timeseries_config = self.config_manager.get("database.timeseries", {})
+        if not isinstance(timeseries_config, dict):
+            timeseries_config = {}
+        self.timeseries_store: Optional[TimeSeriesStore] = None
+        if timeseries_config.get("enabled", True):
+            self.timeseries_store = TimeSeriesStore(
+                self.database_manager,
+                chunk_seconds=int(timeseries_config.get("chunk_seconds", 3600)),
+                flush_interval=float(timeseries_config.get("flush_interval", 10.0)))
+            self.retention_manager.timeseries_store = self.timeseries_store
+
+        # Planificador de sondeo concurrente de PLCs
+        polling_config = self.config_manager.get("polling", {})
+        if not isinstance(polling_config, dict):
+            polling_config = {}
+        self.plc_scheduler = PLCPollScheduler(
+            on_status=self._handle_plc_status,
+            poll=self._poll_plc_status,
+            on_error=self._handle_plc_poll_error,
+            interval=float(polling_config.get("interval", 10)),
+            deadline=float(polling_config.get("deadline", 2.0)),
+            jitter=float(polling_config.get("jitter", 0.1)),
+            max_workers=int(polling_config.get("max_workers", 16)),
+            max_backoff=float(polling_config.get("max_backoff", 120)),
+            metrics_collector=self.metrics_collector
+        )
+
+        # Cola de comandos por PLC: un único escritor por socket
+        command_queue_config = self.config_manager.get("command_queue", {})
+        if not isinstance(command_queue_config, dict):
+            command_queue_config = {}
+        self.command_queue_timeout = float(command_queue_config.get("default_timeout", 10))
+        self.command_queue_max_depth = int(command_queue_config.get("max_depth", 1000))
+        self.command_queues: Dict[str, PLCCommandQueue] = {}
+        self._command_queues_lock = threading.Lock()
+
+        # Conexiones persistentes a los PLCs con reconexión y circuit breaker
+        connections_config = self.config_manager.get("connections", {})
+        if not isinstance(connections_config, dict):
+            connections_config = {}
+        self.connection_manager = PLCConnectionManager(
+            on_change=self._handle_connection_change,
+            probe_interval=float(connections_config.get("probe_interval", 5)),
+            backoff_base=float(connections_config.get("backoff_base", 1)),
+            backoff_max=float(connections_config.get("backoff_max", 60)),
+            jitter=float(connections_config.get("jitter", 0.2)),
+            failure_threshold=int(connections_config.get("failure_threshold", 3)),
+            reset_timeout=float(connections_config.get("reset_timeout", 30)),
+            max_workers=int(connections_config.get("max_workers", 8)),
+            metrics_collector=self.metrics_collector
+        )
+        self.connect_timeout = float(connections_config.get("connect_timeout", 10))
+
+        # Caché del último estado sondeado de cada PLC
+        status_cache_config = self.config_manager.get("status_cache", {})
+        if not isinstance(status_cache_config, dict):
+            status_cache_config = {}
+        self.status_cache = PLCStatusCache(
+            max_age=float(status_cache_config.get("max_age", 15)),
+            failure_max_age=float(status_cache_config.get("failure_max_age", 1)))
+
+        # Pool para ejecutar lotes de comandos en paralelo
+        commands_config = self.config_manager.get("commands", {})
+        if not isinstance(commands_config, dict):
+            commands_config = {}
+        self.command_batch_deadline = float(
+            commands_config.get("batch_deadline", 10))
+        self.command_workers = int(commands_config.get("max_workers", 16))
+        self._command_executor = self._create_command_executor()
+        self._command_batches_cancelled = threading.Event()
+
+        # Pool HTTP saliente compartido por WMS, túnel y telemetría
+        self.http_pool = self._create_http_pool()
 
         # Inicializar cliente WMS
         wms_config = self.config_manager.get("wms", {})
         self.wms_client: Optional[WMSClient] = None
+        self.telemetry_uplink: Optional[TelemetryUplink] = None
         if wms_config and isinstance(wms_config, dict):
             endpoint = wms_config.get("endpoint")
             auth_token = wms_config.get("auth_token")
             if endpoint and auth_token and isinstance(endpoint, str) and isinstance(auth_token, str):
-                self.wms_client = WMSClient(endpoint, auth_token)
+                self.telemetry_uplink = self._create_telemetry_uplink(endpoint, auth_token)
+                self.wms_client = WMSClient(endpoint, auth_token,
+                                            telemetry_uplink=self.telemetry_uplink,
+                                            http_pool=self.http_pool)
 
         # Inicializar túnel reverso
         self.reverse_tunnel: Optional[ReverseTunnel] = None
@@ -67,8 +233,21 @@ class GatewayCore:
             auth_token = wms_config.get("auth_token")
             gateway_id = self.config_manager.get("gateway.id", "unknown")
             if endpoint and auth_token and isinstance(gateway_id, str):
+                tunnel_config = self.config_manager.get("tunnel", {})
+                if not isinstance(tunnel_config, dict):
+                    tunnel_config = {}
                 self.reverse_tunnel = ReverseTunnel(
-                    endpoint, auth_token, gateway_id)
+                    endpoint, auth_token, gateway_id,
+                    metrics_collector=self.metrics_collector,
+                    telemetry_uplink=self.telemetry_uplink,
+                    mode=str(tunnel_config.get("mode", "long_poll")),
+                    long_poll_wait=float(tunnel_config.get("long_poll_wait", 25)),
+                    poll_interval=float(tunnel_config.get("poll_interval", 5)),
+                    max_workers=int(tunnel_config.get("max_workers", 8)),
+                    result_batch_size=int(tunnel_config.get("result_batch_size", 50)),
+                    idempotency_ttl=float(tunnel_config.get("idempotency_ttl", 600)),
+                    http_pool=self.http_pool,
+                    heartbeat_interval=float(wms_config.get("heartbeat_interval", 60)))
                 self.reverse_tunnel.set_command_callback(
                     self._handle_wms_command)
 
@@ -85,6 +264,61 @@ class GatewayCore:
         log_event(self.logger, "gateway.initialized",
                   "Gateway Local inicializado")
 
+    def _create_telemetry_uplink(self, endpoint: str,
+                                 auth_token: str) -> Optional[TelemetryUplink]:
+        """Crea el envío de telemetría por lotes a partir de "telemetry" """
+        telemetry_config = self.config_manager.get("telemetry", {})
+        if not isinstance(telemetry_config, dict) or not telemetry_config.get("enabled", False):
+            return None
+        gateway_id = self.config_manager.get("gateway.id", "unknown")
+        return TelemetryUplink(
+            endpoint, auth_token, str(gateway_id),
+            path=telemetry_config.get("path", "/api/v1/gateways/sensor-data/batch"),
+            batch_size=int(telemetry_config.get("batch_size", 500)),
+            flush_interval=float(telemetry_config.get("flush_interval", 5)),
+            max_buffer=int(telemetry_config.get("max_buffer", 10000)),
+            compression=telemetry_config.get("compression", "gzip"),
+            spool_dir=telemetry_config.get("spool_dir", "telemetry_spool"),
+            max_spool_bytes=int(telemetry_config.get("max_spool_bytes", 104857600)),
+            max_retries=int(telemetry_config.get("max_retries", 3)),
+            timeout=float(telemetry_config.get("timeout", 10)),
+            http_pool=self.http_pool,
+            metrics_collector=self.metrics_collector
+        )
+
+    def _create_command_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self.command_workers, thread_name_prefix="plc-command")
+
+    def _cancel_command_batches(self) -> None:
+        """Cancela los lotes de comandos pendientes y espera a los que están en curso
+
+        Los que están en curso terminan tras su comando actual. Se crea otro
+        pool para un posible reinicio del gateway.
+        """
+        self._command_batches_cancelled.set()
+        self._command_executor.shutdown(wait=True, cancel_futures=True)
+        self._command_executor = self._create_command_executor()
+        self._command_batches_cancelled.clear()
+
+    def _create_http_pool(self) -> HTTPClientPool:
+        """Configura el pool HTTP global a partir de la sección "http" """
+        http_config = self.config_manager.get("http", {})
+        if not isinstance(http_config, dict):
+            http_config = {}
+        host_maxsize = http_config.get("host_maxsize", {})
+        return configure_http_pool(
+            pool_connections=int(http_config.get("pool_connections", 10)),
+            pool_maxsize=int(http_config.get("pool_maxsize", 10)),
+            host_maxsize=host_maxsize if isinstance(host_maxsize, dict) else {},
+            max_retries=int(http_config.get("max_retries", 2)),
+            backoff_factor=float(http_config.get("backoff_factor", 0.5)),
+            backoff_max=float(http_config.get("backoff_max", 30)),
+            dns_ttl=float(http_config.get("dns_ttl", 300)),
+            http2=bool(http_config.get("http2", False)),
+            metrics_collector=self.metrics_collector
+        )
+
     def initialize_plcs(self) -> bool:
         """Inicializa todos los PLCs configurados"""
         try:
@@ -107,6 +341,12 @@ class GatewayCore:
                 try:
                     plc = PLCFactory.create_plc(plc_type, ip, port)
                     self.plcs[plc_id] = plc
+                    self.connection_manager.add_plc(plc_id, plc)
+                    self._command_queue(plc_id, plc)
+                    self.plc_scheduler.add_plc(
+                        plc_id, plc,
+                        interval=plc_config.get("poll_interval"),
+                        deadline=plc_config.get("poll_deadline"))
 
                     # Guardar PLC en la base de datos
                     self.database_manager.add_plc(
@@ -145,68 +385,52 @@ class GatewayCore:
             return False
 
     def connect_plcs(self) -> bool:
-        """Conecta todos los PLCs inicializados"""
-        success_count = 0
-        for plc_id, plc in self.plcs.items():
-            try:
-                if plc.connect():
-                    self.logger.info(f"PLC {plc_id} conectado exitosamente")
-                    self.metrics_collector.record_plc_connection(plc_id, True)
-                    success_count += 1
-
-                    # Obtener IP del PLC si está disponible
-                    plc_ip = getattr(plc, 'ip', 'unknown')
-                    # Emitir evento de conexión exitosa
-                    emit_event("plc.connected", {
-                        "plc_id": plc_id,
-                        "ip": plc_ip
-                    }, "gateway_core")
-
-                    # Registrar evento en la base de datos
-                    self.database_manager.add_event(
-                        event_type="plc.connected",
-                        source="gateway_core",
-                        data={"plc_id": plc_id, "ip": plc_ip}
-                    )
-                else:
-                    self.logger.error(f"Error conectando PLC {plc_id}")
-                    self.metrics_collector.record_connection_error(plc_id)
-
-                    # Emitir evento de error de conexión
-                    emit_event("plc.connection_error", {
-                        "plc_id": plc_id,
-                        "error": "Connection failed"
-                    }, "gateway_core")
-
-                    # Registrar evento en la base de datos
-                    self.database_manager.add_event(
-                        event_type="plc.connection_error",
-                        source="gateway_core",
-                        data={"plc_id": plc_id, "error": "Connection failed"}
-                    )
-            except Exception as e:
-                self.logger.error(f"Excepción conectando PLC {plc_id}: {e}")
-                self.metrics_collector.record_connection_error(plc_id)
+        """Conecta en paralelo todos los PLCs inicializados
+
+        Los PLCs que no respondan siguen reintentándose en segundo plano
+        mediante el gestor de conexiones.
+        """
+        connected = self.connection_manager.connect_all(timeout=self.connect_timeout)
+        return connected == len(self.plcs)
+
+    def _handle_connection_change(self, plc_id: str, change: str,
+                                  data: Dict[str, Any]) -> None:
+        """Publica las transiciones de conexión y de circuito de un PLC"""
+        plc = self.plcs.get(plc_id)
+        event_data = {"plc_id": plc_id, **data}
+
+        if change == "connected":
+            self.logger.info(f"PLC {plc_id} conectado exitosamente")
+            event_data["ip"] = getattr(plc, 'ip', 'unknown')
+            # Retomar el sondeo sin esperar al backoff acumulado
+            self.plc_scheduler.reset_backoff(plc_id)
+        elif change == "disconnected":
+            self.logger.warning(f"PLC {plc_id} desconectado: {data.get('error')}")
+            self.status_cache.invalidate(plc_id)
+        elif change == "connection_error":
+            self.logger.error(f"Error conectando PLC {plc_id}: {data.get('error')}")
+        elif change == "circuit_open":
+            self.logger.warning(
+                f"Circuito abierto para PLC {plc_id} tras {data.get('failures')} fallos")
+        else:
+            self.logger.info(f"PLC {plc_id}: {change}")
 
-                # Emitir evento de excepción de conexión
-                emit_event("plc.connection_exception", {
-                    "plc_id": plc_id,
-                    "error": str(e)
-                }, "gateway_core")
+        event_type = f"plc.{change}"
+        emit_event(event_type, event_data, "gateway_core")
 
-                # Registrar evento en la base de datos
-                self.database_manager.add_event(
-                    event_type="plc.connection_exception",
-                    source="gateway_core",
-                    data={"plc_id": plc_id, "error": str(e)}
-                )
-        return success_count == len(self.plcs)
+        # Registrar evento en la base de datos
+        self.db_writer.add_event(
+            event_type=event_type,
+            source="gateway_core",
+            data=event_data
+        )
 
     def disconnect_plcs(self) -> None:
         """Desconecta todos los PLCs"""
         for plc_id, plc in self.plcs.items():
             try:
                 plc.disconnect()
+                self.connection_manager.mark_disconnected(plc_id)
                 self.logger.info(f"PLC {plc_id} desconectado")
 
                 # Emitir evento de desconexión
@@ -215,7 +439,7 @@ class GatewayCore:
                 }, "gateway_core")
 
                 # Registrar evento en la base de datos
-                self.database_manager.add_event(
+                self.db_writer.add_event(
                     event_type="plc.disconnected",
                     source="gateway_core",
                     data={"plc_id": plc_id}
@@ -230,7 +454,7 @@ class GatewayCore:
                 }, "gateway_core")
 
                 # Registrar evento en la base de datos
-                self.database_manager.add_event(
+                self.db_writer.add_event(
                     event_type="plc.disconnection_error",
                     source="gateway_core",
                     data={"plc_id": plc_id, "error": str(e)}
@@ -245,23 +469,39 @@ class GatewayCore:
         try:
             self.logger.info("Iniciando Gateway Local...")
 
+            # Asegurar que la cola de escritura diferida esté activa
+            self.db_writer.start()
+
+            # Iniciar el despachador de eventos
+            self.event_manager.start()
+
             # Inicializar PLCs
             if not self.initialize_plcs():
                 self.logger.error("Error inicializando PLCs")
                 return False
 
-            # Conectar PLCs
+            # Conectar PLCs; los que fallen se reintentan en segundo plano
             if not self.connect_plcs():
-                self.logger.error("Error conectando PLCs")
-                return False
+                self.logger.warning(
+                    "No se pudieron conectar todos los PLCs; se reintentará")
+            self.connection_manager.start()
 
             # Iniciar túnel reverso si está configurado
             if self.reverse_tunnel:
                 self.reverse_tunnel.start()
 
+            # Envío de telemetría por lotes
+            if self.telemetry_uplink:
+                self.telemetry_uplink.start()
+
             # Iniciar hilos de monitoreo
             self._start_monitoring_threads()
 
+            # Iniciar mantenimiento periódico de la base de datos
+            self.retention_manager.start()
+            if self.timeseries_store:
+                self.timeseries_store.start()
+
             self.running = True
             self.logger.info("Gateway Local iniciado exitosamente")
 
@@ -269,7 +509,7 @@ class GatewayCore:
             emit_event("gateway.started", {}, "gateway_core")
 
             # Registrar evento en la base de datos
-            self.database_manager.add_event(
+            self.db_writer.add_event(
                 event_type="gateway.started",
                 source="gateway_core",
                 data={}
@@ -285,7 +525,7 @@ class GatewayCore:
             }, "gateway_core")
 
             # Registrar evento en la base de datos
-            self.database_manager.add_event(
+            self.db_writer.add_event(
                 event_type="gateway.start_error",
                 source="gateway_core",
                 data={"error": str(e)}
@@ -303,6 +543,12 @@ class GatewayCore:
         self.running = False
 
         # Detener hilos
+        self.plc_scheduler.stop()
+        self.connection_manager.stop()
+        # Los lotes de comandos no deben llegar a PLCs ya desconectados
+        self._cancel_command_batches()
+        for command_queue in list(self.command_queues.values()):
+            command_queue.stop()
         for thread in self.threads:
             if thread.is_alive():
                 thread.join(timeout=5)
@@ -311,6 +557,15 @@ class GatewayCore:
         if self.reverse_tunnel:
             self.reverse_tunnel.stop()
 
+        # Enviar (o guardar en disco) la telemetría pendiente
+        if self.telemetry_uplink:
+            self.telemetry_uplink.stop()
+
+        # Detener mantenimiento de la base de datos y volcar las series
+        self.retention_manager.stop()
+        if self.timeseries_store:
+            self.timeseries_store.stop()
+
         # Desconectar PLCs
         self.disconnect_plcs()
 
@@ -320,12 +575,15 @@ class GatewayCore:
         emit_event("gateway.stopped", {}, "gateway_core")
 
         # Registrar evento en la base de datos
-        self.database_manager.add_event(
+        self.db_writer.add_event(
             event_type="gateway.stopped",
             source="gateway_core",
             data={}
         )
 
+        # Escribir todo lo pendiente antes de terminar
+        self.db_writer.stop()
+
     def _start_monitoring_threads(self) -> None:
         """Inicia los hilos de monitoreo"""
         # Hilo de heartbeat
@@ -334,11 +592,8 @@ class GatewayCore:
         heartbeat_thread.start()
         self.threads.append(heartbeat_thread)
 
-        # Hilo de monitoreo de PLCs
-        plc_monitor_thread = threading.Thread(
-            target=self._plc_monitor_worker, daemon=True)
-        plc_monitor_thread.start()
-        self.threads.append(plc_monitor_thread)
+        # Sondeo concurrente de PLCs
+        self.plc_scheduler.start()
 
     def _heartbeat_worker(self) -> None:
         """Worker para enviar heartbeats al WMS"""
@@ -349,17 +604,17 @@ class GatewayCore:
                     self.wms_client.send_heartbeat(status)
 
                     # Registrar métrica
-                    self.metrics_collector.record_connection_error(
-                        "heartbeat")  # Usar método existente
+                    self.metrics_collector.record_heartbeat(True)
 
                     # Registrar evento en la base de datos
-                    self.database_manager.add_event(
+                    self.db_writer.add_event(
                         event_type="gateway.heartbeat",
                         source="gateway_core",
                         data={"status": status}
                     )
             except Exception as e:
                 self.logger.error(f"Error enviando heartbeat: {e}")
+                self.metrics_collector.record_heartbeat(False)
 
                 # Emitir evento de error de heartbeat
                 emit_event("gateway.heartbeat_error", {
@@ -367,7 +622,7 @@ class GatewayCore:
                 }, "gateway_core")
 
                 # Registrar evento en la base de datos
-                self.database_manager.add_event(
+                self.db_writer.add_event(
                     event_type="gateway.heartbeat_error",
                     source="gateway_core",
                     data={"error": str(e)}
@@ -375,75 +630,143 @@ class GatewayCore:
 
             time.sleep(self.heartbeat_interval)
 
-    def _plc_monitor_worker(self) -> None:
-        """Worker para monitorear el estado de los PLCs"""
-        while self.running:
-            try:
-                for plc_id, plc in self.plcs.items():
-                    if plc.is_connected():
-                        # Obtener estado del PLC
-                        status = plc.get_status()
-
-                        # Registrar métrica
-                        if "response_time" in status:
-                            self.metrics_collector.record_command(
-                                # Usar método existente
-                                plc_id, 0, status["response_time"])
-
-                        # Registrar comando en la base de datos
-                        self.database_manager.add_command(
-                            plc_id=plc_id,
-                            command=0,  # STATUS command
-                            result=status
-                        )
-
-                        # Emitir evento de estado de PLC
-                        emit_event("plc.status_update", {
-                            "plc_id": plc_id,
-                            "status": status
-                        }, "gateway_core")
-
-                        # Registrar evento en la base de datos
-                        self.database_manager.add_event(
-                            event_type="plc.status_update",
-                            source="gateway_core",
-                            data={"plc_id": plc_id, "status": status}
-                        )
-            except Exception as e:
-                self.logger.error(f"Error monitoreando PLCs: {e}")
+    def _command_queue(self, plc_id: str, plc: PLCInterface) -> PLCCommandQueue:
+        """Obtiene (o crea) la cola de comandos de un PLC"""
+        with self._command_queues_lock:
+            command_queue = self.command_queues.get(plc_id)
+            if command_queue is not None and command_queue.plc is plc:
+                return command_queue
+            if command_queue is not None:
+                command_queue.stop()  # El PLC fue reemplazado
+            command_queue = PLCCommandQueue(
+                plc_id, plc, default_timeout=self.command_queue_timeout,
+                max_depth=self.command_queue_max_depth,
+                metrics_collector=self.metrics_collector)
+            self.command_queues[plc_id] = command_queue
+            return command_queue
+
+    def _poll_plc_status(self, plc_id: str, plc: PLCInterface) -> Dict[str, Any]:
+        """Lee el estado de un PLC para el planificador con la prioridad más baja
+
+        Con el circuito abierto no se accede al PLC: el sondeo falla al
+        momento y el planificador aplica su backoff.
+        """
+        if not self.connection_manager.allow_request(plc_id):
+            return {"success": False, "error": "Circuito abierto: PLC no disponible",
+                    "circuit_open": True}
+        return self._command_queue(plc_id, plc).execute(
+            0, priority=PRIORITY_POLL, timeout=self.plc_scheduler.poll_timeout(plc_id))
+
+    def _handle_plc_status(self, plc_id: str, status: Dict[str, Any]) -> None:
+        """Procesa el estado obtenido por el planificador de sondeo"""
+        self.status_cache.update(plc_id, status)
+        # Un sondeo rechazado por el circuito no llegó al PLC: contarlo como
+        # fallo reabriría el circuito y lo mantendría abierto indefinidamente
+        sent = not status.get("circuit_open")
+        if sent:
+            self.connection_manager.record_result(
+                plc_id, bool(status.get("success")), status.get("error"))
+
+        # Telemetría: sólo viaja el último estado de cada PLC por lote
+        if self.telemetry_uplink and status.get("success"):
+            self.telemetry_uplink.submit(
+                {"plc_id": plc_id, "status": status, "timestamp": time.time()},
+                key=plc_id)
+
+        # Registrar métrica
+        if "response_time" in status:
+            self.metrics_collector.record_command(
+                plc_id, 0, status["response_time"])
+
+        # Series temporales: latencia, posición y tasa de errores
+        if self.timeseries_store:
+            now = time.time()
+            if "response_time" in status:
+                self.timeseries_store.append(
+                    "response_time", plc_id, status["response_time"], now)
+            if status.get("position") is not None:
+                self.timeseries_store.append("position", plc_id, status["position"], now)
+            self.timeseries_store.append(
+                "error", plc_id, 0.0 if status.get("success") else 1.0, now)
+
+        # Registrar comando en la base de datos
+        if sent:
+            self.db_writer.add_command(
+                plc_id=plc_id,
+                command=0,  # STATUS command
+                result=status
+            )
 
-                # Emitir evento de error de monitoreo
-                emit_event("gateway.plc_monitor_error", {
-                    "error": str(e)
-                }, "gateway_core")
+        # Emitir evento de estado de PLC
+        emit_event("plc.status_update", {
+            "plc_id": plc_id,
+            "status": status
+        }, "gateway_core")
 
-                # Registrar evento en la base de datos
-                self.database_manager.add_event(
-                    event_type="gateway.plc_monitor_error",
-                    source="gateway_core",
-                    data={"error": str(e)}
-                )
+        # Registrar evento en la base de datos (el estado completo ya va en
+        # la fila de commands)
+        self.db_writer.add_event(
+            event_type="plc.status_update",
+            source="gateway_core",
+            data={"plc_id": plc_id, "status": summarize_status(status)}
+        )
+
+    def _handle_plc_poll_error(self, plc_id: str, error: Exception) -> None:
+        """Procesa una excepción durante el sondeo de un PLC"""
+        self.logger.error(f"Error monitoreando PLC {plc_id}: {error}")
+        self.connection_manager.record_result(plc_id, False, str(error))
+        if self.timeseries_store:
+            self.timeseries_store.append("error", plc_id, 1.0)
+
+        # Emitir evento de error de monitoreo
+        emit_event("gateway.plc_monitor_error", {
+            "plc_id": plc_id,
+            "error": str(error)
+        }, "gateway_core")
 
-            time.sleep(10)  # Monitorear cada 10 segundos
+        # Registrar evento en la base de datos
+        self.db_writer.add_event(
+            event_type="gateway.plc_monitor_error",
+            source="gateway_core",
+            data={"plc_id": plc_id, "error": str(error)}
+        )
+
+    def get_status(self, plc_id: Optional[str] = None,
+                   max_age: Optional[float] = None) -> Dict[str, Any]:
+        """Obtiene el estado completo del gateway
+
+        El estado de cada PLC se sirve desde la caché de sondeo mientras su
+        edad no supere ``max_age``; sólo se lee el PLC si está caducado.
+
+        Args:
+            plc_id: Limitar el estado a un PLC (opcional)
+            max_age: Edad máxima aceptada en segundos (por defecto la configurada)
+        """
+        if plc_id is not None:
+            targets = [(plc_id, self.plcs[plc_id])] if plc_id in self.plcs else []
+        else:
+            targets = list(self.plcs.items())
 
-    def get_status(self) -> Dict[str, Any]:
-        """Obtiene el estado completo del gateway"""
         plc_statuses = {}
-        for plc_id, plc in self.plcs.items():
+        for target_id, plc in targets:
             try:
                 if plc.is_connected():
-                    status = plc.get_status()
-                    plc_statuses[plc_id] = {
+                    status, age, cached = self.status_cache.get(
+                        target_id, partial(self._command_queue(target_id, plc).execute, 0),
+                        max_age)
+                    plc_statuses[target_id] = {
                         "connected": True,
-                        "status": status
+                        "status": status,
+                        "age": round(age, 3),
+                        "cached": cached
                     }
                 else:
-                    plc_statuses[plc_id] = {
+                    plc_statuses[target_id] = {
                         "connected": False,
                         "error": "Not connected"
                     }
             except Exception as e:
-                plc_statuses[plc_id] = {
+                plc_statuses[target_id] = {
                     "connected": False,
                     "error": str(e)
                 }
@@ -460,116 +783,220 @@ class GatewayCore:
         }
 
     def send_command(self, command: str, argument: Optional[Any] = None,
-                     plc_id: Optional[str] = None) -> Dict[str, Any]:
-        """Envía un comando a uno o todos los PLCs"""
-        results = {}
+                     plc_id: Optional[str] = None,
+                     priority: int = PRIORITY_OPERATOR) -> Dict[str, Any]:
+        """Envía un comando a uno o todos los PLCs
 
+        Con ``plc_id=None`` el comando se difunde a todos los PLCs en
+        paralelo mediante ``send_commands``.
+        """
         # Determinar PLCs objetivo
-        target_plcs = []
         if plc_id:
-            if plc_id in self.plcs:
-                target_plcs = [(plc_id, self.plcs[plc_id])]
-            else:
+            if plc_id not in self.plcs:
                 return {"success": False, "error": f"PLC {plc_id} no encontrado"}
+            target_ids = [plc_id]
         else:
-            target_plcs = list(self.plcs.items())
+            target_ids = list(self.plcs.keys())
 
-        # Enviar comando a cada PLC
-        for target_id, plc in target_plcs:
-            try:
-                if not plc.is_connected():
-                    results[target_id] = {
-                        "success": False,
-                        "error": "PLC no conectado"
-                    }
-                    continue
-
-                # Mapear comando a código numérico
-                command_map = {
-                    "STATUS": 0,
-                    "MOVE": 1,
-                    "START": 2,
-                    "STOP": 3,
-                    "RESET": 4
-                }
+        batch = self.send_commands([
+            {"plc_id": target_id, "command": command, "argument": argument}
+            for target_id in target_ids
+        ], priority=priority)
 
-                if command not in command_map:
-                    results[target_id] = {
-                        "success": False,
-                        "error": f"Comando {command} no soportado"
-                    }
-                    continue
+        return {
+            "success": True,
+            "results": {item["plc_id"]: item["result"] for item in batch["results"]}
+        }
 
-                command_code = command_map[command]
+    def send_commands(self, items: List[Dict[str, Any]],
+                      deadline: Optional[float] = None,
+                      priority: int = PRIORITY_OPERATOR) -> Dict[str, Any]:
+        """Ejecuta un lote de comandos en paralelo
+
+        Args:
+            items: Lista de {"plc_id", "command", "argument"}
+            deadline: Plazo total del lote en segundos (por defecto
+                "commands.batch_deadline")
+            priority: Clase de prioridad en las colas de los PLCs
+
+        Returns:
+            Diccionario con los resultados en el orden de ``items``; los
+            comandos que no terminaron dentro del plazo se marcan como
+            ``timed_out``
+        """
+        start_time = time.time()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        for index, entry in self.iter_commands(items, deadline, priority):
+            results[index] = entry
+
+        timed_out = sum(1 for entry in results
+                        if entry and entry["result"].get("timed_out"))
+        return {
+            "success": True,
+            "results": results,
+            "completed": len(items) - timed_out,
+            "timed_out": timed_out,
+            "duration": time.time() - start_time
+        }
 
-                # Enviar comando
-                if argument is not None:
-                    result = plc.send_command(command_code, argument)
-                else:
-                    result = plc.send_command(command_code)
+    def iter_commands(self, items: List[Dict[str, Any]], deadline: Optional[float] = None,
+                      priority: int = PRIORITY_OPERATOR) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Ejecuta un lote de comandos y devuelve los resultados según terminan
+
+        Los comandos de un mismo PLC se ejecutan en orden en un único hilo;
+        los de distintos PLCs, en paralelo. Los comandos y eventos del lote
+        se registran en la base de datos de una sola vez.
+
+        Args:
+            items: Lista de {"plc_id", "command", "argument"}
+            deadline: Plazo total del lote en segundos
+            priority: Clase de prioridad en las colas de los PLCs
+
+        Yields:
+            Tuplas (índice en ``items``, {"plc_id", "command", "argument", "result"})
+        """
+        if deadline is None:
+            deadline = self.command_batch_deadline
+        cutoff = time.monotonic() + deadline
+
+        completed: "queue.Queue[Tuple[int, Dict[str, Any]]]" = queue.Queue()
+        recorder = _CommandBatchRecorder(self.db_writer)
+        groups: Dict[str, List[int]] = {}
+        pending = set()
+
+        for index, item in enumerate(items):
+            plc_id = item.get("plc_id")
+            if plc_id not in self.plcs:
+                yield index, self._command_entry(
+                    item, {"success": False, "error": f"PLC {plc_id} no encontrado"})
+                continue
+            groups.setdefault(plc_id, []).append(index)
+            pending.add(index)
+
+        for plc_id, indexes in groups.items():
+            self._command_executor.submit(
+                self._run_plc_commands, plc_id, [(i, items[i]) for i in indexes],
+                cutoff, completed, recorder, priority)
 
-                results[target_id] = result
+        try:
+            while pending:
+                remaining = cutoff - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    index, entry = completed.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.discard(index)
+                yield index, entry
+
+            for index in sorted(pending):
+                yield index, self._command_entry(items[index], {
+                    "success": False,
+                    "error": f"Plazo del lote agotado ({deadline}s)",
+                    "timed_out": True
+                })
+        finally:
+            # Registrar en un solo lote; lo que termine más tarde se registra al terminar
+            recorder.close()
+
+    def _command_entry(self, item: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Construye la entrada de resultado de un comando del lote"""
+        return {
+            "plc_id": item.get("plc_id"),
+            "command": item.get("command"),
+            "argument": item.get("argument"),
+            "result": result
+        }
 
-                # Registrar comando en la base de datos
-                self.database_manager.add_command(
-                    plc_id=target_id,
-                    command=command_code,
-                    argument=argument if isinstance(argument, int) else None,
-                    result=result,
-                    success=result.get("success", False)
-                )
+    def _run_plc_commands(self, plc_id: str, indexed_items: List[Tuple[int, Dict[str, Any]]],
+                          cutoff: float, completed: "queue.Queue",
+                          recorder: "_CommandBatchRecorder", priority: int) -> None:
+        """Ejecuta en orden los comandos de un PLC (en un hilo del pool)"""
+        plc = self.plcs.get(plc_id)
+        for index, item in indexed_items:
+            if self._command_batches_cancelled.is_set():
+                completed.put((index, self._command_entry(
+                    item, {"success": False, "error": "Gateway detenido"})))
+                continue
+            remaining = cutoff - time.monotonic()
+            if remaining <= 0:
+                break  # El lote ya devolvió estos comandos como vencidos
+            result = self._execute_command(
+                plc_id, plc, item.get("command"), item.get("argument"), recorder,
+                priority, remaining)
+            completed.put((index, self._command_entry(item, result)))
+
+    def _execute_command(self, plc_id: str, plc: Optional[PLCInterface], command: Any,
+                         argument: Optional[Any], recorder: "_CommandBatchRecorder",
+                         priority: int = PRIORITY_OPERATOR,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Envía un comando a un PLC a través de su cola y prepara su registro"""
+        try:
+            if plc is None or not plc.is_connected():
+                return {"success": False, "error": "PLC no conectado"}
+            if not self.connection_manager.allow_request(plc_id):
+                return {"success": False, "error": "Circuito abierto: PLC no disponible",
+                        "circuit_open": True}
+
+            # Mapear comando a código numérico
+            if isinstance(command, int) and command in COMMAND_MAP.values():
+                command_code = command
+            elif command in COMMAND_MAP:
+                command_code = COMMAND_MAP[command]
+            else:
+                return {"success": False, "error": f"Comando {command} no soportado"}
 
-                # Registrar métrica
-                if "response_time" in result:
-                    self.metrics_collector.record_command(
-                        target_id, command_code, result["response_time"])
+            # Enviar comando por la cola del PLC (un único escritor por socket)
+            result = self._command_queue(plc_id, plc).execute(
+                command_code, argument, priority=priority, timeout=timeout)
+            self.connection_manager.record_result(
+                plc_id, bool(result.get("success")), result.get("error"))
 
-                # Emitir evento de comando
-                emit_event("plc.command_sent", {
-                    "plc_id": target_id,
-                    "command": command,
-                    "argument": argument,
-                    "result": result
-                }, "gateway_core")
+            # Un comando puede cambiar el estado: refrescar o invalidar caché
+            if command_code == 0:
+                self.status_cache.update(plc_id, result)
+            else:
+                self.status_cache.invalidate(plc_id)
 
-                # Registrar evento en la base de datos
-                self.database_manager.add_event(
-                    event_type="plc.command_sent",
-                    source="gateway_core",
-                    data={
-                        "plc_id": target_id,
-                        "command": command,
-                        "argument": argument,
-                        "result": result
-                    }
-                )
-            except Exception as e:
-                error_msg = f"Error enviando comando {command} a PLC {target_id}: {e}"
-                self.logger.error(error_msg)
-                results[target_id] = {"success": False, "error": str(e)}
+            # Registrar métrica
+            if "response_time" in result:
+                self.metrics_collector.record_command(
+                    plc_id, command_code, result["response_time"])
 
-                # Emitir evento de error de comando
-                emit_event("plc.command_error", {
-                    "plc_id": target_id,
-                    "command": command,
-                    "error": str(e)
-                }, "gateway_core")
+            event_data = {
+                "plc_id": plc_id,
+                "command": command,
+                "argument": argument,
+                "result": result
+            }
+
+            # Emitir evento de comando
+            emit_event("plc.command_sent", event_data, "gateway_core")
+
+            # Registrar comando y evento en la base de datos
+            recorder.add(
+                command=(plc_id, command_code,
+                         argument if isinstance(argument, int) else None,
+                         result, result.get("success", False)),
+                event=("plc.command_sent", "gateway_core",
+                       dict(event_data, result=summarize_status(result))))
+            return result
+        except Exception as e:
+            error_msg = f"Error enviando comando {command} a PLC {plc_id}: {e}"
+            self.logger.error(error_msg)
+            error_data = {
+                "plc_id": plc_id,
+                "command": command,
+                "error": str(e)
+            }
 
-                # Registrar evento en la base de datos
-                self.database_manager.add_event(
-                    event_type="plc.command_error",
-                    source="gateway_core",
-                    data={
-                        "plc_id": target_id,
-                        "command": command,
-                        "error": str(e)
-                    }
-                )
+            # Emitir evento de error de comando
+            emit_event("plc.command_error", error_data, "gateway_core")
 
-        return {
-            "success": True,
-            "results": results
-        }
+            # Registrar evento en la base de datos
+            recorder.add(event=("plc.command_error", "gateway_core", error_data))
+            return {"success": False, "error": str(e)}
 
     def move_to_position(self, position: int, plc_id: Optional[str] = None) -> Dict[str, Any]:
         """Mueve uno o todos los PLCs a una posición específica"""
@@ -586,14 +1013,15 @@ class GatewayCore:
                 f"Comando recibido desde WMS: {command} ({argument}) para PLC {plc_id}")
 
             # Registrar evento en la base de datos
-            self.database_manager.add_event(
+            self.db_writer.add_event(
                 event_type="wms.command_received",
                 source="gateway_core",
                 data=command_data
             )
 
             # Ejecutar comando
-            result = self.send_command(command or "", argument, plc_id)
+            result = self.send_command(command or "", argument, plc_id,
+                                       priority=PRIORITY_WMS)
 
             # Emitir evento de comando WMS procesado
             emit_event("wms.command_processed", {
@@ -604,7 +1032,7 @@ class GatewayCore:
             }, "gateway_core")
 
             # Registrar evento en la base de datos
-            self.database_manager.add_event(
+            self.db_writer.add_event(
                 event_type="wms.command_processed",
                 source="gateway_core",
                 data={
@@ -627,7 +1055,7 @@ class GatewayCore:
             }, "gateway_core")
 
             # Registrar evento en la base de datos
-            self.database_manager.add_event(
+            self.db_writer.add_event(
                 event_type="wms.command_error",
                 source="gateway_core",
                 data={
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planificador de sondeo concurrente de PLCs para el Gateway Local
+"""
+
+import heapq
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.interfaces.plc_interface import PLCInterface
+
+
+class PLCPollState:
+    """Estado e instrumentación del sondeo de un PLC"""
+
+    def __init__(self, plc_id: str, interval: float, deadline: float,
+                 timeout: Optional[float] = None):
+        self.plc_id = plc_id
+        self.interval = interval
+        self.deadline = deadline
+        # Espera máxima de un sondeo: el plazo propio del PLC o su intervalo
+        self.timeout = timeout or interval
+        self.in_flight = False
+        self.next_due = 0.0
+        self.consecutive_failures = 0
+        self.polls = 0
+        self.errors = 0
+        self.skipped = 0
+        self.missed_deadlines = 0
+        self.last_duration = 0.0
+        self.max_duration = 0.0
+        self.last_poll_at: Optional[float] = None
+        self.last_success_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convierte el estado a diccionario"""
+        now = time.time()
+        return {
+            "interval": self.interval,
+            "deadline": self.deadline,
+            "in_flight": self.in_flight,
+            "consecutive_failures": self.consecutive_failures,
+            "polls": self.polls,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "missed_deadlines": self.missed_deadlines,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+            "status_age": (now - self.last_success_at
+                           if self.last_success_at else None)
+        }
+
+
+class PLCPollScheduler:
+    """Sondea los PLCs en paralelo con intervalos y plazos por PLC
+
+    Cada PLC tiene su propio instante de próximo sondeo en un heap. Un hilo
+    planificador despacha los sondeos vencidos a un pool de hilos, de forma
+    que un PLC que no responde sólo retrasa su propio sondeo. Los PLCs
+    desconectados o con fallos consecutivos se reintentan con backoff
+    exponencial.
+    """
+
+    def __init__(self, on_status: Callable[[str, Dict[str, Any]], None],
+                 on_error: Optional[Callable[[str, Exception], None]] = None,
+                 poll: Optional[Callable[[str, PLCInterface], Dict[str, Any]]] = None,
+                 interval: float = 10.0, deadline: float = 2.0, jitter: float = 0.1,
+                 max_workers: int = 16, max_backoff: float = 120.0,
+                 metrics_collector=None):
+        """Inicializa el planificador
+
+        Args:
+            on_status: Callback (plc_id, status) tras cada sondeo completado
+            on_error: Callback (plc_id, excepción) si el sondeo lanza una excepción
+            poll: Función (plc_id, plc) que lee el estado (por defecto
+                ``plc.get_status()``)
+            interval: Intervalo de sondeo por defecto (segundos)
+            deadline: Plazo por defecto para completar un sondeo (segundos)
+            jitter: Fracción aleatoria del intervalo para repartir los sondeos
+            max_workers: Número de hilos del pool de sondeo
+            max_backoff: Espera máxima entre reintentos de un PLC caído
+            metrics_collector: Colector donde publicar la instrumentación
+        """
+        self.on_status = on_status
+        self.on_error = on_error
+        self.poll = poll
+        self.interval = interval
+        self.deadline = deadline
+        self.jitter = jitter
+        self.max_workers = max_workers
+        self.max_backoff = max_backoff
+        self.metrics_collector = metrics_collector
+        self.logger = logging.getLogger(__name__)
+
+        self._plcs: Dict[str, PLCInterface] = {}
+        self._states: Dict[str, PLCPollState] = {}
+        self._schedule: List[Tuple[float, str]] = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def add_plc(self, plc_id: str, plc: PLCInterface, interval: Optional[float] = None,
+                deadline: Optional[float] = None) -> None:
+        """Registra un PLC para sondeo periódico
+
+        Args:
+            plc_id: Identificador del PLC
+            plc: Instancia del PLC
+            interval: Intervalo propio del PLC (opcional)
+            deadline: Plazo propio del PLC (opcional)
+        """
+        interval = float(interval or self.interval)
+        state = PLCPollState(plc_id, interval, float(deadline or self.deadline),
+                             timeout=float(deadline or interval))
+        with self._lock:
+            self._plcs[plc_id] = plc
+            self._states[plc_id] = state
+            # Primer sondeo repartido a lo largo del intervalo
+            state.next_due = time.monotonic() + random.uniform(0, state.interval)
+            heapq.heappush(self._schedule, (state.next_due, plc_id))
+            self._wakeup.notify()
+
+    def remove_plc(self, plc_id: str) -> None:
+        """Deja de sondear un PLC"""
+        with self._lock:
+            self._plcs.pop(plc_id, None)
+            self._states.pop(plc_id, None)
+
+    def poll_timeout(self, plc_id: str) -> float:
+        """Espera máxima de un sondeo del PLC: su plazo propio o su intervalo"""
+        with self._lock:
+            state = self._states.get(plc_id)
+            return state.timeout if state is not None else self.interval
+
+    def reset_backoff(self, plc_id: str) -> None:
+        """Olvida los fallos de un PLC y lo sondea cuanto antes (p. ej. tras reconectar)"""
+        with self._lock:
+            state = self._states.get(plc_id)
+            if state is None or state.consecutive_failures == 0:
+                return
+            state.consecutive_failures = 0
+            state.next_due = time.monotonic()
+            heapq.heappush(self._schedule, (state.next_due, plc_id))
+            self._wakeup.notify()
+
+    def start(self) -> None:
+        """Inicia el planificador"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="plc-poll")
+            self._thread = threading.Thread(
+                target=self._scheduler_loop, daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el planificador"""
+        with self._lock:
+            self._running = False
+            self._wakeup.notify_all()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _scheduler_loop(self) -> None:
+        """Bucle que despacha los sondeos vencidos al pool"""
+        while True:
+            with self._lock:
+                if not self._running:
+                    break
+                if not self._schedule:
+                    self._wakeup.wait()
+                    continue
+
+                due, plc_id = self._schedule[0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._wakeup.wait(delay)
+                    continue
+
+                heapq.heappop(self._schedule)
+                state = self._states.get(plc_id)
+                plc = self._plcs.get(plc_id)
+                if state is None or plc is None or due != state.next_due:
+                    continue  # PLC eliminado o entrada reprogramada
+
+                now = time.monotonic()
+                if state.in_flight:
+                    # El sondeo anterior sigue en curso: se pierde este ciclo
+                    # (el plazo incumplido se cuenta una vez, al terminar)
+                    state.skipped += 1
+                    self._reschedule(state, now)
+                    continue
+
+                if not plc.is_connected():
+                    state.skipped += 1
+                    state.consecutive_failures += 1
+                    self._reschedule(state, now)
+                    continue
+
+                state.in_flight = True
+                self._reschedule(state, now)
+                executor = self._executor
+
+            if executor:
+                executor.submit(self._poll, plc_id, plc, state)
+
+    def _backoff(self, state: PLCPollState) -> float:
+        """Calcula la espera hasta el próximo sondeo"""
+        if state.consecutive_failures == 0:
+            delay = state.interval
+        else:
+            delay = min(state.interval * (2 ** state.consecutive_failures),
+                        max(self.max_backoff, state.interval))
+        return delay + random.uniform(-self.jitter, self.jitter) * state.interval
+
+    def _reschedule(self, state: PLCPollState, reference: float) -> None:
+        """Programa el próximo sondeo de un PLC (con el lock tomado)
+
+        Una entrada anterior del mismo PLC queda obsoleta y se ignora.
+        """
+        state.next_due = reference + max(0.0, self._backoff(state))
+        heapq.heappush(self._schedule, (state.next_due, state.plc_id))
+        self._wakeup.notify()
+
+    def _poll(self, plc_id: str, plc: PLCInterface, state: PLCPollState) -> None:
+        """Ejecuta el sondeo de un PLC en un hilo del pool"""
+        started = time.monotonic()
+        status: Optional[Dict[str, Any]] = None
+        error: Optional[Exception] = None
+        try:
+            if self.poll:
+                status = self.poll(plc_id, plc)
+            else:
+                status = plc.get_status()
+        except Exception as e:
+            error = e
+
+        duration = time.monotonic() - started
+        missed = duration > state.deadline
+        success = error is None and bool(status and status.get("success", False))
+
+        with self._lock:
+            state.in_flight = False
+            state.polls += 1
+            state.last_duration = duration
+            state.max_duration = max(state.max_duration, duration)
+            state.last_poll_at = time.time()
+            if missed:
+                state.missed_deadlines += 1
+            recovered = success and state.consecutive_failures > 0
+            if success:
+                state.consecutive_failures = 0
+                state.last_success_at = state.last_poll_at
+            else:
+                state.errors += 1
+                state.consecutive_failures += 1
+            # Aplicar (o retirar) el backoff en cuanto cambia el resultado
+            if (recovered or not success) and plc_id in self._states:
+                self._reschedule(state, started)
+
+        self._record(plc_id, duration, missed)
+
+        try:
+            if error is not None:
+                if self.on_error:
+                    self.on_error(plc_id, error)
+            elif status is not None:
+                self.on_status(plc_id, status)
+        except Exception as e:
+            self.logger.error(f"Error procesando estado de PLC {plc_id}: {e}")
+
+    def _record(self, plc_id: str, duration: Optional[float], missed: bool) -> None:
+        """Publica la instrumentación del sondeo"""
+        if self.metrics_collector:
+            self.metrics_collector.record_plc_poll(plc_id, duration, missed)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Obtiene la instrumentación de sondeo por PLC"""
+        with self._lock:
+            return {plc_id: state.to_dict()
+                    for plc_id, state in self._states.items()}
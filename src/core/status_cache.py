@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché de estados de PLC con caducidad y coalescencia de lecturas
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _StatusEntry:
+    """Último estado conocido de un PLC"""
+
+    __slots__ = ("status", "success", "updated_at", "updated_wall")
+
+    def __init__(self, status: Dict[str, Any]):
+        self.status = status
+        self.success = bool(status.get("success", False))
+        self.updated_at = time.monotonic()
+        self.updated_wall = time.time()
+
+
+class _InFlightRead:
+    """Lectura en curso compartida por todas las peticiones concurrentes"""
+
+    __slots__ = ("done", "status", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.status: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+class PLCStatusCache:
+    """Sirve el último estado sondeado de cada PLC
+
+    El planificador de sondeo publica cada estado con ``update``. Las lecturas
+    con ``get`` devuelven ese estado si su edad no supera ``max_age``; si está
+    caducado, la primera petición lee el PLC y las concurrentes para el mismo
+    PLC esperan a ese mismo resultado (single-flight).
+
+    Las lecturas fallidas también se cachean, pero sólo ``failure_max_age``
+    segundos: un PLC caído no recibe una lectura por cada petición.
+    """
+
+    def __init__(self, max_age: float = 15.0, failure_max_age: float = 1.0):
+        """Inicializa la caché
+
+        Args:
+            max_age: Edad máxima (segundos) de un estado servido desde caché
+            failure_max_age: Edad máxima (segundos) de una lectura fallida,
+                limitada por ``max_age``
+        """
+        self.max_age = max_age
+        self.failure_max_age = failure_max_age
+        self._entries: Dict[str, _StatusEntry] = {}
+        self._in_flight: Dict[str, _InFlightRead] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def update(self, plc_id: str, status: Dict[str, Any]) -> None:
+        """Publica un estado recién leído del PLC (correcto o fallido)"""
+        entry = _StatusEntry(status)
+        with self._lock:
+            self._entries[plc_id] = entry
+
+    def invalidate(self, plc_id: Optional[str] = None) -> None:
+        """Descarta el estado de un PLC (o de todos)"""
+        with self._lock:
+            if plc_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(plc_id, None)
+
+    def peek(self, plc_id: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Devuelve el último estado y su edad sin leer nunca el PLC"""
+        entry = self._entries.get(plc_id)
+        if entry is None:
+            return None
+        return entry.status, time.monotonic() - entry.updated_at
+
+    def get(self, plc_id: str, loader: Callable[[], Dict[str, Any]],
+            max_age: Optional[float] = None) -> Tuple[Dict[str, Any], float, bool]:
+        """Obtiene el estado de un PLC
+
+        Args:
+            plc_id: Identificador del PLC
+            loader: Función que lee el estado del PLC si el de la caché caducó
+            max_age: Edad máxima aceptada (por defecto la de la caché)
+
+        Returns:
+            Tupla (estado, edad en segundos, servido desde caché)
+        """
+        if max_age is None:
+            max_age = self.max_age
+
+        with self._lock:
+            entry = self._entries.get(plc_id)
+            if entry is not None:
+                age = time.monotonic() - entry.updated_at
+                limit = max_age if entry.success else min(max_age, self.failure_max_age)
+                if age <= limit:
+                    self.hits += 1
+                    return entry.status, age, True
+
+            flight = self._in_flight.get(plc_id)
+            leader = flight is None
+            if leader:
+                flight = _InFlightRead()
+                self._in_flight[plc_id] = flight
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.status, 0.0, False
+
+        try:
+            flight.status = loader()
+            self.update(plc_id, flight.status)
+            return flight.status, 0.0, False
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(plc_id, None)
+            flight.done.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene las estadísticas de la caché"""
+        with self._lock:
+            return {
+                "max_age": self.max_age,
+                "failure_max_age": self.failure_max_age,
+                "entries": len(self._entries),
+                "in_flight": len(self._in_flight),
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced
+            }
@@ -5,8 +5,16 @@ Paquete de base de datos para el Gateway Local
 
 # Importaciones públicas
 from .database_manager import DatabaseManager, get_database_manager
+from .connection_pool import ConnectionPool
+from .write_behind import WriteBehindQueue
+from .retention import RetentionManager
+from .timeseries import TimeSeriesStore
 
 __all__ = [
     "DatabaseManager",
-    "get_database_manager"
+    "get_database_manager",
+    "ConnectionPool",
+    "WriteBehindQueue",
+    "RetentionManager",
+    "TimeSeriesStore"
 ]
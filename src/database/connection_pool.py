@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool de conexiones SQLite persistentes para el Gateway Local
+"""
+
+import queue
+import sqlite3
+import threading
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Union
+
+# Pragmas aplicados a cada conexión del pool (en este orden).
+# - auto_vacuum debe fijarse antes que WAL para que aplique a bases nuevas;
+#   en bases existentes sólo tiene efecto tras un VACUUM completo.
+# - WAL permite que los lectores no bloqueen al escritor (y viceversa).
+# - synchronous=NORMAL es seguro en WAL y evita un fsync por transacción.
+# - cache_size negativo se expresa en KiB (aquí ~16 MB por conexión).
+# - recursive_triggers hace que INSERT OR REPLACE dispare los triggers de
+#   borrado de la fila sustituida (contadores de row_counts).
+DEFAULT_PRAGMAS: Dict[str, Union[str, int]] = {
+    "auto_vacuum": "INCREMENTAL",
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -16000,
+    "temp_store": "MEMORY",
+    "busy_timeout": 5000,
+    "recursive_triggers": "ON",
+}
+
+
+class ConnectionPool:
+    """Pool acotado de conexiones SQLite de larga duración
+
+    Las conexiones se crean bajo demanda hasta ``pool_size`` y se reutilizan
+    entre hilos. Un hilo que no encuentra una conexión libre espera hasta
+    ``timeout`` segundos a que otro la devuelva.
+    """
+
+    def __init__(self, db_path: str, pool_size: int = 5, timeout: float = 30.0,
+                 pragmas: Optional[Dict[str, Union[str, int]]] = None):
+        """Inicializa el pool de conexiones
+
+        Args:
+            db_path: Ruta al archivo de base de datos SQLite
+            pool_size: Número máximo de conexiones abiertas
+            timeout: Tiempo máximo de espera por una conexión libre (segundos)
+            pragmas: Pragmas a aplicar a cada conexión (por defecto DEFAULT_PRAGMAS)
+        """
+        if pool_size < 1:
+            raise ValueError("pool_size debe ser mayor que 0")
+
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.logger = logging.getLogger(__name__)
+
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _create_connection(self) -> sqlite3.Connection:
+        """Abre una nueva conexión y aplica los pragmas configurados"""
+        conn = sqlite3.connect(
+            self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for pragma, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {pragma}={value}")
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """Obtiene una conexión del pool
+
+        Returns:
+            Conexión SQLite lista para usar
+
+        Raises:
+            RuntimeError: Si el pool está cerrado o se agota el tiempo de espera
+        """
+        if self._closed:
+            raise RuntimeError("El pool de conexiones está cerrado")
+
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if len(self._connections) < self.pool_size:
+                conn = self._create_connection()
+                self._connections.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError(
+                f"Tiempo de espera agotado obteniendo conexión a {self.db_path}")
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Devuelve una conexión al pool"""
+        if self._closed:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+            return
+
+        # No devolver nunca una conexión con una transacción abierta
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Context manager que presta una conexión del pool"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    @property
+    def size(self) -> int:
+        """Número de conexiones abiertas actualmente"""
+        return len(self._connections)
+
+    def close(self) -> None:
+        """Cierra todas las conexiones del pool"""
+        with self._lock:
+            self._closed = True
+            connections = self._connections
+            self._connections = []
+
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                self.logger.debug(f"Error cerrando conexión: {e}")
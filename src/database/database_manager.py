@@ -5,17 +5,78 @@ Gestor de base de datos SQLite para el Gateway Local
 """
 
 import sqlite3
+import base64
 import logging
 import os
 import json
-from typing import Dict, Any, List, Optional
-from datetime import datetime
+import time
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
+from datetime import datetime, timezone
+from contextlib import contextmanager
 import threading
 
+from .connection_pool import ConnectionPool
+from .event_codec import decode_event_data, encode_event_data
+
 # Instancia global del gestor de base de datos
 _database_manager_instance = None
 
 
+def encode_cursor(timestamp: str, row_id: int) -> str:
+    """Cursor opaco que apunta justo después de una fila (timestamp, id)"""
+    raw = json.dumps([timestamp, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Decodifica un cursor de paginación
+
+    Raises:
+        ValueError: Si el cursor no es válido
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, row_id = json.loads(raw)
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+    if not isinstance(timestamp, str) or not isinstance(row_id, int):
+        raise ValueError(f"Cursor inválido: {cursor}")
+    return timestamp, row_id
+
+
+def normalize_timestamp(value: Union[str, int, float, datetime]) -> str:
+    """Convierte una marca de tiempo al formato almacenado (UTC, "YYYY-MM-DD HH:MM:SS")
+
+    Acepta segundos epoch, ISO 8601 (con o sin zona; sin zona se asume UTC)
+    o datetime.
+
+    Raises:
+        ValueError: Si el valor no es una marca de tiempo válida
+    """
+    if isinstance(value, datetime):
+        moment = value
+    elif isinstance(value, (int, float)):
+        moment = datetime.fromtimestamp(value, timezone.utc)
+    else:
+        text = str(value).strip()
+        try:
+            moment = datetime.fromtimestamp(float(text), timezone.utc)
+        except ValueError:
+            try:
+                moment = datetime.fromisoformat(text.replace("Z", "+00:00"))
+            except ValueError:
+                raise ValueError(f"Marca de tiempo inválida: {value}")
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _event_data_json(plc_id, status_code, position, response_time, payload) -> Optional[str]:
+    """Función SQL event_data(): data de un evento como texto JSON"""
+    data = decode_event_data(plc_id, status_code, position, response_time, payload)
+    return None if data is None else json.dumps(data)
+
+
 def get_database_manager(db_path: str = "gateway.db") -> 'DatabaseManager':
     """Obtiene la instancia singleton del gestor de base de datos
 
@@ -34,24 +95,69 @@ def get_database_manager(db_path: str = "gateway.db") -> 'DatabaseManager':
 class DatabaseManager:
     """Gestor de base de datos SQLite para el Gateway Local"""
 
-    def __init__(self, db_path: str = "gateway.db"):
+    def __init__(self, db_path: str = "gateway.db", pool_size: int = 5):
         """Inicializa el gestor de base de datos
 
         Args:
             db_path: Ruta al archivo de base de datos SQLite
+            pool_size: Número máximo de conexiones persistentes
         """
         self.db_path = db_path
         self.logger = logging.getLogger(__name__)
+        # SQLite admite un único escritor: el lock serializa sólo las
+        # escrituras, las lecturas usan su propia conexión en modo WAL
         self._lock = threading.Lock()
+        self._pool = ConnectionPool(db_path, pool_size=pool_size)
+        # Colector donde publicar la latencia de las consultas (opcional)
+        self.metrics_collector = None
+        # Caché nombre -> id de los diccionarios de events (sólo crecen)
+        self._name_ids: Dict[str, Dict[str, int]] = {
+            dictionary: {} for dictionary in self.EVENT_DICTIONARIES}
         self._initialize_database()
 
+    def _record_query(self, operation: str, table: str, started: float) -> None:
+        """Publica la latencia de una lectura o escritura"""
+        if self.metrics_collector:
+            self.metrics_collector.record_db_query(
+                operation, table, time.perf_counter() - started)
+
+    @contextmanager
+    def _write(self, table: str = "other"):
+        """Transacción de escritura sobre una conexión del pool
+
+        Hace commit al salir y rollback si se produce una excepción. La
+        latencia medida incluye la espera por el lock de escritura.
+        """
+        started = time.perf_counter()
+        try:
+            with self._lock, self._pool.connection() as conn:
+                try:
+                    yield conn.cursor()
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+        finally:
+            self._record_query("write", table, started)
+
+    @contextmanager
+    def _read(self, table: str = "other"):
+        """Cursor de lectura sobre una conexión del pool (sin bloquear escritores)"""
+        started = time.perf_counter()
+        try:
+            with self._pool.connection() as conn:
+                yield conn.cursor()
+        finally:
+            self._record_query("read", table, started)
+
+    def close(self) -> None:
+        """Cierra las conexiones persistentes de la base de datos"""
+        self._pool.close()
+
     def _initialize_database(self):
         """Inicializa la base de datos y crea las tablas necesarias"""
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
+            with self._write("schema") as cursor:
                 # Crear tabla de PLCs
                 cursor.execute('''
                     CREATE TABLE IF NOT EXISTS plcs (
@@ -81,16 +187,18 @@ class DatabaseManager:
                     )
                 ''')
 
-                # Crear tabla de eventos
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS events (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        event_type TEXT NOT NULL,
-                        source TEXT NOT NULL,
-                        data TEXT,
-                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
+                # Crear diccionarios de tipos y fuentes de eventos
+                for dictionary in self.EVENT_DICTIONARIES:
+                    cursor.execute(f'''
+                        CREATE TABLE IF NOT EXISTS {dictionary} (
+                            id INTEGER PRIMARY KEY,
+                            name TEXT UNIQUE NOT NULL
+                        )
+                    ''')
+
+                # Crear tabla de eventos (migrando el formato anterior)
+                cursor.execute(f"CREATE TABLE IF NOT EXISTS events {self.EVENTS_SCHEMA}")
+                events_migrated = self._migrate_events(cursor)
 
                 # Crear tabla de configuraciones
                 cursor.execute('''
@@ -114,9 +222,16 @@ class DatabaseManager:
                     )
                 ''')
 
-                # Crear índices para mejorar el rendimiento
+                # Crear índices para mejorar el rendimiento. Los filtros por
+                # PLC y por tipo van siempre acompañados de orden o rango
+                # temporal: índices compuestos (el id va implícito al final)
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_commands_plc_timestamp
+                    ON commands (plc_id, timestamp)
+                ''')
+
                 cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_commands_plc_id ON commands (plc_id)
+                    DROP INDEX IF EXISTS idx_commands_plc_id
                 ''')
 
                 cursor.execute('''
@@ -124,7 +239,12 @@ class DatabaseManager:
                 ''')
 
                 cursor.execute('''
-                    CREATE INDEX IF NOT EXISTS idx_events_type ON events (event_type)
+                    CREATE INDEX IF NOT EXISTS idx_events_type_timestamp
+                    ON events (type_id, timestamp)
+                ''')
+
+                cursor.execute('''
+                    DROP INDEX IF EXISTS idx_events_type
                 ''')
 
                 cursor.execute('''
@@ -139,15 +259,272 @@ class DatabaseManager:
                     CREATE INDEX IF NOT EXISTS idx_metrics_plc_id ON metrics (plc_id)
                 ''')
 
-                conn.commit()
-                conn.close()
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_metrics_timestamp ON metrics (timestamp)
+                ''')
+
+                # Crear tabla de agregados de estado (por minuto y por hora)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS status_rollups (
+                        resolution TEXT NOT NULL,
+                        bucket TIMESTAMP NOT NULL,
+                        plc_id TEXT NOT NULL,
+                        samples INTEGER NOT NULL,
+                        successes INTEGER NOT NULL,
+                        sum_response_time REAL,
+                        min_response_time REAL,
+                        max_response_time REAL,
+                        PRIMARY KEY (resolution, bucket, plc_id)
+                    )
+                ''')
+
+                # Crear tabla de estado interno de mantenimiento
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS maintenance_state (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL
+                    )
+                ''')
+
+                # Crear tabla de dispositivos descubiertos (caché de descubrimiento)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS discovered_devices (
+                        ip_address TEXT NOT NULL,
+                        port INTEGER NOT NULL,
+                        type TEXT NOT NULL,
+                        fingerprint TEXT,
+                        online BOOLEAN NOT NULL DEFAULT 1,
+                        data TEXT,
+                        first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (ip_address, port)
+                    )
+                ''')
+
+                # Crear tabla de series temporales por bloques (ver TimeSeriesStore)
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS metric_chunks (
+                        metric_type TEXT NOT NULL,
+                        plc_id TEXT NOT NULL,
+                        chunk_start INTEGER NOT NULL,
+                        count INTEGER NOT NULL,
+                        payload BLOB NOT NULL,
+                        PRIMARY KEY (metric_type, plc_id, chunk_start)
+                    )
+                ''')
+
+                cursor.execute('''
+                    CREATE INDEX IF NOT EXISTS idx_metric_chunks_start
+                    ON metric_chunks (chunk_start)
+                ''')
+
+                # Crear tabla de contadores de filas mantenidos por triggers
+                cursor.execute('''
+                    CREATE TABLE IF NOT EXISTS row_counts (
+                        table_name TEXT NOT NULL,
+                        dimension TEXT NOT NULL,
+                        value TEXT NOT NULL,
+                        count INTEGER NOT NULL,
+                        PRIMARY KEY (table_name, dimension, value)
+                    )
+                ''')
+                self._create_count_triggers(cursor)
+
+                # Bases creadas antes de los contadores (o con events recién
+                # migrada): recuento en la misma transacción que crea los triggers
+                if events_migrated or self._get_state(cursor, "row_counts_reconciled", "") == "":
+                    self._reconcile_row_counts(cursor)
 
                 self.logger.info("Base de datos inicializada correctamente")
 
+            # Una base creada antes de auto_vacuum=INCREMENTAL no devuelve
+            # nunca las páginas que liberan la retención y el archivado: se
+            # convierte una vez (VACUUM completo, que también libera las de
+            # la tabla events anterior si se acaba de migrar)
+            self.enable_incremental_vacuum()
+            if events_migrated:
+                self.incremental_vacuum(0)
+
         except Exception as e:
             self.logger.error(f"Error inicializando base de datos: {e}")
             raise
 
+    # Diccionarios de events: tipos y fuentes se guardan como enteros
+    EVENT_DICTIONARIES = ("event_types", "event_sources")
+
+    # Columnas de events; data se reparte entre las columnas tipadas y
+    # payload (ver event_codec)
+    EVENTS_SCHEMA = '''(
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        type_id INTEGER NOT NULL REFERENCES event_types (id),
+                        source_id INTEGER NOT NULL REFERENCES event_sources (id),
+                        plc_id TEXT,
+                        status_code INTEGER,
+                        position INTEGER,
+                        response_time REAL,
+                        payload BLOB,
+                        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    )'''
+
+    # Filas convertidas por lote al migrar events
+    MIGRATION_BATCH_SIZE = 5000
+
+    def _migrate_events(self, cursor) -> bool:
+        """Convierte una tabla events del formato anterior al compacto
+
+        El formato anterior guardaba event_type y source como texto y data
+        como JSON. La conversión se hace por lotes en una transacción
+        explícita (el módulo sqlite3 no abre transacción antes de un CREATE
+        TABLE): si falla, la tabla queda como estaba y no se deja una
+        events_compact a medias.
+
+        Returns:
+            True si se migró la tabla
+        """
+        cursor.execute("PRAGMA table_info(events)")
+        if "event_type" not in [row["name"] for row in cursor.fetchall()]:
+            return False
+
+        started = time.perf_counter()
+        conn = cursor.connection
+        if conn.in_transaction:
+            conn.commit()
+        cursor.execute("BEGIN")
+        try:
+            migrated = self._copy_legacy_events(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        self.logger.info(
+            f"Tabla events migrada al formato compacto: {migrated} filas en "
+            f"{time.perf_counter() - started:.1f} s")
+        return True
+
+    def _copy_legacy_events(self, cursor) -> int:
+        """Copia events a events_compact y la sustituye (dentro de una transacción)"""
+        # Restos de una versión anterior de la migración que no era atómica
+        cursor.execute("DROP TABLE IF EXISTS events_compact")
+        cursor.execute(f"CREATE TABLE events_compact {self.EVENTS_SCHEMA}")
+        cursor.execute(
+            "INSERT OR IGNORE INTO event_types (name) SELECT DISTINCT event_type FROM events")
+        cursor.execute(
+            "INSERT OR IGNORE INTO event_sources (name) SELECT DISTINCT source FROM events")
+
+        reader = cursor.connection.execute('''
+            SELECT e.id, t.id, s.id, e.data, e.timestamp FROM events e
+            JOIN event_types t ON t.name = e.event_type
+            JOIN event_sources s ON s.name = e.source
+            ORDER BY e.id
+        ''')
+        migrated = 0
+        while True:
+            rows = reader.fetchmany(self.MIGRATION_BATCH_SIZE)
+            if not rows:
+                break
+            converted = []
+            for row_id, type_id, source_id, data, timestamp in rows:
+                if data:
+                    try:
+                        data = json.loads(data)
+                    except json.JSONDecodeError:
+                        pass  # Se conserva el texto original
+                converted.append((row_id, type_id, source_id,
+                                  *encode_event_data(data), timestamp))
+            cursor.executemany('''
+                INSERT INTO events_compact
+                (id, type_id, source_id, plc_id, status_code, position,
+                 response_time, payload, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', converted)
+            migrated += len(rows)
+
+        # Los triggers e índices de la tabla anterior desaparecen con ella
+        cursor.execute("DROP TABLE events")
+        cursor.execute("ALTER TABLE events_compact RENAME TO events")
+        return migrated
+
+    # Tablas con contador de filas y columna por la que se desglosa (o None)
+    COUNTED_TABLES = {
+        "plcs": None,
+        "commands": "plc_id",
+        "events": "type_id",
+        "configurations": None,
+        "metrics": None
+    }
+
+    def _create_count_triggers(self, cursor) -> None:
+        """Crea los triggers que mantienen row_counts en cada inserción y borrado
+
+        Los INSERT OR REPLACE disparan el trigger de borrado de la fila
+        sustituida porque el pool activa recursive_triggers.
+        """
+        for table, column in self.COUNTED_TABLES.items():
+            for event, row, sign in (("insert", "NEW", "+"), ("delete", "OLD", "-")):
+                keys = ["'', ''"]
+                if column:
+                    keys.append(f"'{column}', coalesce({row}.{column}, '')")
+                statements = "".join(f'''
+                        INSERT INTO row_counts (table_name, dimension, value, count)
+                        VALUES ('{table}', {key}, {sign}1)
+                        ON CONFLICT (table_name, dimension, value)
+                        DO UPDATE SET count = count {sign} 1;''' for key in keys)
+                cursor.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS trg_{table}_count_{event}
+                    AFTER {event.upper()} ON {table}
+                    BEGIN{statements}
+                    END
+                ''')
+
+    def _reconcile_row_counts(self, cursor) -> Dict[str, Tuple[int, int]]:
+        """Recalcula row_counts con COUNT(*) y devuelve las desviaciones"""
+        cursor.execute(
+            "SELECT table_name, count FROM row_counts WHERE dimension = ''")
+        before = {row[0]: row[1] for row in cursor.fetchall()}
+
+        cursor.execute("DELETE FROM row_counts")
+        for table, column in self.COUNTED_TABLES.items():
+            cursor.execute(f'''
+                INSERT INTO row_counts (table_name, dimension, value, count)
+                SELECT '{table}', '', '', COUNT(*) FROM {table}
+            ''')
+            if column:
+                cursor.execute(f'''
+                    INSERT INTO row_counts (table_name, dimension, value, count)
+                    SELECT '{table}', '{column}', coalesce({column}, ''), COUNT(*)
+                    FROM {table} GROUP BY 3
+                ''')
+
+        cursor.execute(
+            "SELECT table_name, count FROM row_counts WHERE dimension = ''")
+        drift = {table: (before[table], count) for table, count in cursor.fetchall()
+                 if table in before and before[table] != count}
+
+        cursor.execute('''
+            INSERT OR REPLACE INTO maintenance_state (key, value)
+            VALUES ('row_counts_reconciled', ?)
+        ''', (str(time.time()),))
+        return drift
+
+    def reconcile_row_counts(self) -> Dict[str, Tuple[int, int]]:
+        """Recalcula los contadores de filas recorriendo las tablas
+
+        Es una operación cara en tablas grandes; se ejecuta periódicamente
+        desde RetentionManager para corregir cualquier desviación.
+
+        Returns:
+            Tablas cuyo contador difería, con (valor anterior, valor real)
+        """
+        try:
+            with self._write("row_counts") as cursor:
+                drift = self._reconcile_row_counts(cursor)
+            if drift:
+                self.logger.warning(f"Contadores de filas corregidos: {drift}")
+            return drift
+        except Exception as e:
+            self.logger.error(f"Error recalculando contadores de filas: {e}")
+            return {}
+
     def add_plc(self, plc_id: str, name: str, ip_address: str, port: int,
                 plc_type: str, description: Optional[str] = None) -> bool:
         """Agrega un nuevo PLC a la base de datos
@@ -164,19 +541,13 @@ class DatabaseManager:
             True si se agregó correctamente, False en caso contrario
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
+            with self._write("plcs") as cursor:
                 cursor.execute('''
                     INSERT OR REPLACE INTO plcs 
                     (plc_id, name, ip_address, port, type, description, updated_at)
                     VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                 ''', (plc_id, name, ip_address, port, plc_type, description))
 
-                conn.commit()
-                conn.close()
-
                 self.logger.info(
                     f"PLC {plc_id} agregado/actualizado en la base de datos")
                 return True
@@ -201,10 +572,7 @@ class DatabaseManager:
             True si se actualizó correctamente, False en caso contrario
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
+            with self._write("plcs") as cursor:
                 cursor.execute('''
                     UPDATE plcs 
                     SET name = ?, ip_address = ?, port = ?, type = ?, description = ?, updated_at = CURRENT_TIMESTAMP
@@ -213,8 +581,6 @@ class DatabaseManager:
 
                 # Verificar si se actualizó algún registro
                 rows_affected = cursor.rowcount
-                conn.commit()
-                conn.close()
 
                 if rows_affected > 0:
                     self.logger.info(
@@ -239,17 +605,12 @@ class DatabaseManager:
             Diccionario con la información del PLC o None si no se encuentra
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-
+            with self._read("plcs") as cursor:
                 cursor.execute('''
                     SELECT * FROM plcs WHERE plc_id = ?
                 ''', (plc_id,))
 
                 row = cursor.fetchone()
-                conn.close()
 
                 if row:
                     return dict(row)
@@ -267,17 +628,12 @@ class DatabaseManager:
             Lista de diccionarios con la información de todos los PLCs
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-
+            with self._read("plcs") as cursor:
                 cursor.execute('''
                     SELECT * FROM plcs ORDER BY name
                 ''')
 
                 rows = cursor.fetchall()
-                conn.close()
 
                 return [dict(row) for row in rows]
 
@@ -295,10 +651,7 @@ class DatabaseManager:
             True si se eliminó correctamente, False en caso contrario
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
+            with self._write("plcs") as cursor:
                 # Eliminar comandos asociados al PLC
                 cursor.execute('''
                     DELETE FROM commands WHERE plc_id = ?
@@ -314,9 +667,6 @@ class DatabaseManager:
                     DELETE FROM plcs WHERE plc_id = ?
                 ''', (plc_id,))
 
-                conn.commit()
-                conn.close()
-
                 self.logger.info(f"PLC {plc_id} eliminado de la base de datos")
                 return True
 
@@ -341,19 +691,13 @@ class DatabaseManager:
         try:
             result_json = json.dumps(result) if result else None
 
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
+            with self._write("commands") as cursor:
                 cursor.execute('''
                     INSERT INTO commands 
                     (plc_id, command, argument, result, success, timestamp)
                     VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                 ''', (plc_id, command, argument, result_json, success))
 
-                conn.commit()
-                conn.close()
-
                 self.logger.debug(
                     f"Comando {command} registrado para PLC {plc_id}")
                 return True
@@ -363,57 +707,66 @@ class DatabaseManager:
                 f"Error registrando comando para PLC {plc_id}: {e}")
             return False
 
-    def get_commands(self, plc_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """Obtiene los comandos registrados
+    def get_commands(self, plc_id: Optional[str] = None, limit: int = 100,
+                     since: Optional[Union[str, float]] = None,
+                     until: Optional[Union[str, float]] = None,
+                     cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Obtiene los comandos registrados, del más reciente al más antiguo
 
         Args:
             plc_id: Filtrar por PLC específico (opcional)
             limit: Número máximo de registros a devolver
+            since: Sólo comandos desde esta fecha, incluida (opcional)
+            until: Sólo comandos anteriores a esta fecha (opcional)
+            cursor: Continuar tras la última fila de la página anterior
+                (ver page_cursor)
 
         Returns:
             Lista de diccionarios con los comandos registrados
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-
-                if plc_id:
-                    cursor.execute('''
-                        SELECT * FROM commands 
-                        WHERE plc_id = ? 
-                        ORDER BY timestamp DESC 
-                        LIMIT ?
-                    ''', (plc_id, limit))
-                else:
-                    cursor.execute('''
-                        SELECT * FROM commands 
-                        ORDER BY timestamp DESC 
-                        LIMIT ?
-                    ''', (limit,))
-
-                rows = cursor.fetchall()
-                conn.close()
-
-                # Convertir JSON de resultados
-                commands = []
-                for row in rows:
-                    command_dict = dict(row)
-                    if command_dict['result']:
-                        try:
-                            command_dict['result'] = json.loads(
-                                command_dict['result'])
-                        except json.JSONDecodeError:
-                            pass  # Mantener el valor original si no se puede parsear
-                    commands.append(command_dict)
-
-                return commands
+            rows = self._keyset_page("commands", plc_id, limit, since, until, cursor)
+
+            # Convertir JSON de resultados
+            commands = []
+            for row in rows:
+                command_dict = dict(row)
+                if command_dict['result']:
+                    try:
+                        command_dict['result'] = json.loads(
+                            command_dict['result'])
+                    except json.JSONDecodeError:
+                        pass  # Mantener el valor original si no se puede parsear
+                commands.append(command_dict)
+
+            return commands
 
         except Exception as e:
             self.logger.error(f"Error obteniendo comandos: {e}")
             return []
 
+    def _intern_names(self, dictionary: str, names: Iterable[str]) -> Dict[str, int]:
+        """Identificadores de tipos o fuentes de evento, creando los nuevos
+
+        Los nombres nuevos se insertan en su propia transacción, antes de la
+        escritura de los eventos: la caché sólo guarda identificadores ya
+        confirmados.
+        """
+        cache = self._name_ids[dictionary]
+        missing = {name for name in names if name not in cache}
+        if missing:
+            with self._write(dictionary) as cursor:
+                cursor.executemany(
+                    f"INSERT OR IGNORE INTO {dictionary} (name) VALUES (?)",
+                    [(name,) for name in missing])
+                placeholders = ", ".join("?" for _ in missing)
+                cursor.execute(
+                    f"SELECT name, id FROM {dictionary} WHERE name IN ({placeholders})",
+                    tuple(missing))
+                fetched = dict(cursor.fetchall())
+            cache.update(fetched)
+        return cache
+
     def add_event(self, event_type: str, source: str, data: Optional[Dict[str, Any]] = None) -> bool:
         """Agrega un registro de evento
 
@@ -426,20 +779,16 @@ class DatabaseManager:
             True si se registró correctamente, False en caso contrario
         """
         try:
-            data_json = json.dumps(data) if data else None
-
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
+            type_id = self._intern_names("event_types", [event_type])[event_type]
+            source_id = self._intern_names("event_sources", [source])[source]
 
+            with self._write("events") as cursor:
                 cursor.execute('''
-                    INSERT INTO events 
-                    (event_type, source, data, timestamp)
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (event_type, source, data_json))
-
-                conn.commit()
-                conn.close()
+                    INSERT INTO events
+                    (type_id, source_id, plc_id, status_code, position,
+                     response_time, payload, timestamp)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', (type_id, source_id, *encode_event_data(data)))
 
                 self.logger.debug(
                     f"Evento {event_type} registrado desde {source}")
@@ -449,55 +798,145 @@ class DatabaseManager:
             self.logger.error(f"Error registrando evento {event_type}: {e}")
             return False
 
-    def get_events(self, event_type: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
-        """Obtiene los eventos registrados
+    def get_events(self, event_type: Optional[str] = None, limit: int = 100,
+                   since: Optional[Union[str, float]] = None,
+                   until: Optional[Union[str, float]] = None,
+                   cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Obtiene los eventos registrados, del más reciente al más antiguo
 
         Args:
             event_type: Filtrar por tipo de evento (opcional)
             limit: Número máximo de registros a devolver
+            since: Sólo eventos desde esta fecha, incluida (opcional)
+            until: Sólo eventos anteriores a esta fecha (opcional)
+            cursor: Continuar tras la última fila de la página anterior
+                (ver page_cursor)
 
         Returns:
             Lista de diccionarios con los eventos registrados
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
+            rows = self._keyset_page("events", event_type, limit, since, until, cursor)
+            return [self._event_from_row(row) for row in rows]
 
-                if event_type:
-                    cursor.execute('''
-                        SELECT * FROM events 
-                        WHERE event_type = ? 
-                        ORDER BY timestamp DESC 
-                        LIMIT ?
-                    ''', (event_type, limit))
-                else:
-                    cursor.execute('''
-                        SELECT * FROM events 
-                        ORDER BY timestamp DESC 
-                        LIMIT ?
-                    ''', (limit,))
+        except Exception as e:
+            self.logger.error(f"Error obteniendo eventos: {e}")
+            return []
 
-                rows = cursor.fetchall()
-                conn.close()
+    @staticmethod
+    def _event_from_row(row: sqlite3.Row) -> Dict[str, Any]:
+        """Evento con la forma pública (id, event_type, source, data, timestamp)"""
+        (row_id, event_type, source, plc_id, status_code, position,
+         response_time, payload, timestamp) = row
+        return {
+            "id": row_id,
+            "event_type": event_type,
+            "source": source,
+            "data": decode_event_data(plc_id, status_code, position, response_time, payload),
+            "timestamp": timestamp,
+        }
+
+    def iter_events(self, event_type: Optional[str] = None,
+                    since: Optional[Union[str, float]] = None,
+                    until: Optional[Union[str, float]] = None,
+                    batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """Recorre los eventos por lotes, del más reciente al más antiguo
+
+        A diferencia de get_events no hay límite de filas y la columna data
+        se entrega como texto JSON. Cada lote se lee con una conexión del
+        pool que se libera antes de entregarlo, de modo que un consumidor
+        lento no retiene conexiones.
+
+        Raises:
+            sqlite3.Error: Si falla la lectura de un lote
+        """
+        for rows in self._iter_keyset("events", event_type, since, until, batch_size):
+            events = [self._event_from_row(row) for row in rows]
+            for event in events:
+                if event["data"] is not None:
+                    event["data"] = json.dumps(event["data"])
+            yield events
+
+    def iter_commands(self, plc_id: Optional[str] = None,
+                      since: Optional[Union[str, float]] = None,
+                      until: Optional[Union[str, float]] = None,
+                      batch_size: int = 500) -> Iterator[List[Dict[str, Any]]]:
+        """Recorre los comandos por lotes, del más reciente al más antiguo
+
+        Ver iter_events; la columna result se entrega sin decodificar.
+        """
+        for rows in self._iter_keyset("commands", plc_id, since, until, batch_size):
+            yield [dict(row) for row in rows]
+
+    def _iter_keyset(self, table: str, value: Optional[str],
+                     since: Optional[Union[str, float]], until: Optional[Union[str, float]],
+                     batch_size: int) -> Iterator[List[sqlite3.Row]]:
+        """Encadena páginas de _keyset_page hasta agotar el intervalo"""
+        cursor = None
+        while True:
+            rows = self._keyset_page(table, value, batch_size, since, until, cursor)
+            if rows:
+                yield rows
+            if len(rows) < batch_size:
+                return
+            cursor = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+
+    @staticmethod
+    def page_cursor(rows: List[Dict[str, Any]], limit: int) -> Optional[str]:
+        """Cursor de la página siguiente, o None si ``rows`` es la última"""
+        if not rows or len(rows) < limit:
+            return None
+        return encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+
+    # Consulta y filtro de _keyset_page por tabla: events resuelve tipo y
+    # fuente en los diccionarios y filtra por type_id
+    KEYSET_SOURCES = {
+        "commands": ("SELECT * FROM commands r", "r.plc_id = ?"),
+        "events": ('''
+            SELECT r.id, t.name AS event_type, s.name AS source, r.plc_id,
+                   r.status_code, r.position, r.response_time, r.payload, r.timestamp
+            FROM events r
+            JOIN event_types t ON t.id = r.type_id
+            JOIN event_sources s ON s.id = r.source_id''',
+                   "r.type_id = (SELECT id FROM event_types WHERE name = ?)"),
+    }
+
+    def _keyset_page(self, table: str, value: Optional[str], limit: int,
+                     since: Optional[Union[str, float]], until: Optional[Union[str, float]],
+                     cursor: Optional[str]) -> List[sqlite3.Row]:
+        """Página ordenada por (timestamp, id) descendente por búsqueda de clave
+
+        La página siguiente empieza tras la última fila devuelta en lugar de
+        saltar OFFSET filas, y el filtro (PLC o tipo) usa el índice compuesto
+        (columna, timestamp): cualquier página cuesta lo mismo sea cual sea
+        el tamaño de la tabla.
+        """
+        select, value_filter = self.KEYSET_SOURCES[table]
+        query = f"{select} WHERE 1 = 1"
+        params: List[Any] = []
 
-                # Convertir JSON de datos
-                events = []
-                for row in rows:
-                    event_dict = dict(row)
-                    if event_dict['data']:
-                        try:
-                            event_dict['data'] = json.loads(event_dict['data'])
-                        except json.JSONDecodeError:
-                            pass  # Mantener el valor original si no se puede parsear
-                    events.append(event_dict)
+        if value:
+            query += f" AND {value_filter}"
+            params.append(value)
 
-                return events
+        if since is not None:
+            query += " AND r.timestamp >= ?"
+            params.append(normalize_timestamp(since))
 
-        except Exception as e:
-            self.logger.error(f"Error obteniendo eventos: {e}")
-            return []
+        if until is not None:
+            query += " AND r.timestamp < ?"
+            params.append(normalize_timestamp(until))
+
+        if cursor:
+            query += " AND (r.timestamp, r.id) < (?, ?)"
+            params.extend(decode_cursor(cursor))
+
+        query += " ORDER BY r.timestamp DESC, r.id DESC LIMIT ?"
+        params.append(limit)
+
+        with self._read(table) as db_cursor:
+            db_cursor.execute(query, params)
+            return db_cursor.fetchall()
 
     def add_metric(self, metric_type: str, plc_id: Optional[str] = None,
                    value: float = 0.0) -> bool:
@@ -512,19 +951,13 @@ class DatabaseManager:
             True si se registró correctamente, False en caso contrario
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
+            with self._write("metrics") as cursor:
                 cursor.execute('''
                     INSERT INTO metrics 
                     (metric_type, plc_id, value, timestamp)
                     VALUES (?, ?, ?, CURRENT_TIMESTAMP)
                 ''', (metric_type, plc_id, value))
 
-                conn.commit()
-                conn.close()
-
                 self.logger.debug(
                     f"Métrica {metric_type} registrada para PLC {plc_id}: {value}")
                 return True
@@ -533,6 +966,65 @@ class DatabaseManager:
             self.logger.error(f"Error registrando métrica {metric_type}: {e}")
             return False
 
+    def write_batch(self, events: Optional[List[tuple]] = None,
+                    commands: Optional[List[tuple]] = None,
+                    metrics: Optional[List[tuple]] = None) -> bool:
+        """Registra un lote de eventos, comandos y métricas en una transacción
+
+        Args:
+            events: Tuplas (event_type, source, data, timestamp)
+            commands: Tuplas (plc_id, command, argument, result, success, timestamp)
+            metrics: Tuplas (metric_type, plc_id, value, timestamp)
+
+        Returns:
+            True si se registró correctamente, False en caso contrario
+        """
+        try:
+            events = events or []
+            type_ids = self._intern_names("event_types", {row[0] for row in events})
+            source_ids = self._intern_names("event_sources", {row[1] for row in events})
+            event_rows = [
+                (type_ids[event_type], source_ids[source], *encode_event_data(data), timestamp)
+                for event_type, source, data, timestamp in events
+            ]
+            command_rows = [
+                (plc_id, command, argument,
+                 json.dumps(result) if result else None, success, timestamp)
+                for plc_id, command, argument, result, success, timestamp in commands or []
+            ]
+
+            with self._write("batch") as cursor:
+                if event_rows:
+                    cursor.executemany('''
+                        INSERT INTO events
+                        (type_id, source_id, plc_id, status_code, position,
+                         response_time, payload, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', event_rows)
+
+                if command_rows:
+                    cursor.executemany('''
+                        INSERT INTO commands 
+                        (plc_id, command, argument, result, success, timestamp)
+                        VALUES (?, ?, ?, ?, ?, ?)
+                    ''', command_rows)
+
+                if metrics:
+                    cursor.executemany('''
+                        INSERT INTO metrics 
+                        (metric_type, plc_id, value, timestamp)
+                        VALUES (?, ?, ?, ?)
+                    ''', metrics)
+
+            self.logger.debug(
+                f"Lote registrado: {len(event_rows)} eventos, "
+                f"{len(command_rows)} comandos, {len(metrics or [])} métricas")
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error registrando lote: {e}")
+            return False
+
     def get_metrics(self, metric_type: Optional[str] = None,
                     plc_id: Optional[str] = None, hours: int = 24) -> List[Dict[str, Any]]:
         """Obtiene los registros de métricas
@@ -546,15 +1038,10 @@ class DatabaseManager:
             Lista de diccionarios con los registros de métricas
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-
+            with self._read("metrics") as cursor:
                 # Construir consulta con filtros
-                query = "SELECT * FROM metrics WHERE timestamp >= datetime('now', '-{} hours')".format(
-                    hours)
-                params = []
+                query = "SELECT * FROM metrics WHERE timestamp >= datetime('now', ?)"
+                params: List[Any] = [f"-{int(hours)} hours"]
 
                 if metric_type:
                     query += " AND metric_type = ?"
@@ -569,7 +1056,6 @@ class DatabaseManager:
                 cursor.execute(query, params)
 
                 rows = cursor.fetchall()
-                conn.close()
 
                 return [dict(row) for row in rows]
 
@@ -577,42 +1063,546 @@ class DatabaseManager:
             self.logger.error(f"Error obteniendo métricas: {e}")
             return []
 
-    def get_database_stats(self) -> Dict[str, int]:
-        """Obtiene estadísticas de la base de datos
+    def upsert_discovered_devices(self, devices: List[tuple]) -> bool:
+        """Registra dispositivos vistos en un descubrimiento
+
+        Args:
+            devices: Tuplas (ip_address, port, type, fingerprint, data)
 
         Returns:
-            Diccionario con las estadísticas de la base de datos
+            True si se registró correctamente, False en caso contrario
+        """
+        try:
+            rows = [
+                (ip_address, port, device_type, fingerprint,
+                 json.dumps(data) if data else None)
+                for ip_address, port, device_type, fingerprint, data in devices
+            ]
+            with self._write("discovered_devices") as cursor:
+                cursor.executemany('''
+                    INSERT INTO discovered_devices
+                    (ip_address, port, type, fingerprint, online, data)
+                    VALUES (?, ?, ?, ?, 1, ?)
+                    ON CONFLICT (ip_address, port) DO UPDATE SET
+                        type = excluded.type,
+                        fingerprint = excluded.fingerprint,
+                        online = 1,
+                        data = excluded.data,
+                        last_seen = CURRENT_TIMESTAMP
+                ''', rows)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error registrando dispositivos descubiertos: {e}")
+            return False
+
+    def mark_discovered_devices_offline(self, port: int, ip_addresses: List[str]) -> bool:
+        """Marca como desaparecidos dispositivos que ya no responden
+
+        Args:
+            port: Puerto de los dispositivos
+            ip_addresses: Direcciones IP que no respondieron
+
+        Returns:
+            True si se actualizó correctamente, False en caso contrario
+        """
+        try:
+            with self._write("discovered_devices") as cursor:
+                cursor.executemany('''
+                    UPDATE discovered_devices SET online = 0
+                    WHERE ip_address = ? AND port = ?
+                ''', [(ip_address, port) for ip_address in ip_addresses])
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error actualizando dispositivos descubiertos: {e}")
+            return False
+
+    def get_discovered_devices(self, port: Optional[int] = None,
+                               online_only: bool = False) -> List[Dict[str, Any]]:
+        """Obtiene los dispositivos de la caché de descubrimiento
+
+        Args:
+            port: Filtrar por puerto (opcional)
+            online_only: Devolver sólo los que respondieron la última vez
+
+        Returns:
+            Lista de diccionarios con los dispositivos descubiertos
+        """
+        try:
+            with self._read("discovered_devices") as cursor:
+                query = "SELECT * FROM discovered_devices WHERE 1 = 1"
+                params: List[Any] = []
+
+                if port is not None:
+                    query += " AND port = ?"
+                    params.append(port)
+
+                if online_only:
+                    query += " AND online = 1"
+
+                query += " ORDER BY last_seen DESC"
+                cursor.execute(query, params)
+
+                devices = []
+                for row in cursor.fetchall():
+                    device = dict(row)
+                    device["online"] = bool(device["online"])
+                    device["data"] = json.loads(device["data"]) if device["data"] else None
+                    devices.append(device)
+                return devices
+
+        except Exception as e:
+            self.logger.error(f"Error obteniendo dispositivos descubiertos: {e}")
+            return []
+
+    def get_discovery_sweep_time(self, scope: str) -> float:
+        """Obtiene el instante (epoch) del último barrido completo de un ámbito"""
+        try:
+            with self._read("maintenance_state") as cursor:
+                return float(self._get_state(cursor, f"discovery_sweep:{scope}"))
+        except Exception as e:
+            self.logger.error(f"Error obteniendo último barrido de {scope}: {e}")
+            return 0.0
+
+    def set_discovery_sweep_time(self, scope: str, timestamp: float) -> bool:
+        """Registra el instante (epoch) del último barrido completo de un ámbito"""
+        try:
+            with self._write("maintenance_state") as cursor:
+                cursor.execute('''
+                    INSERT OR REPLACE INTO maintenance_state (key, value)
+                    VALUES (?, ?)
+                ''', (f"discovery_sweep:{scope}", str(timestamp)))
+            return True
+        except Exception as e:
+            self.logger.error(f"Error registrando barrido de {scope}: {e}")
+            return False
+
+    def upsert_metric_chunks(self, chunks: List[tuple]) -> bool:
+        """Guarda (o sustituye) bloques de series temporales
+
+        Args:
+            chunks: Tuplas (metric_type, plc_id, chunk_start, count, payload)
+
+        Returns:
+            True si se guardó correctamente, False en caso contrario
+        """
+        try:
+            with self._write("metric_chunks") as cursor:
+                cursor.executemany('''
+                    INSERT OR REPLACE INTO metric_chunks
+                    (metric_type, plc_id, chunk_start, count, payload)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', chunks)
+            return True
+
+        except Exception as e:
+            self.logger.error(f"Error guardando bloques de series: {e}")
+            return False
+
+    def get_metric_chunks(self, metric_type: str, plc_id: Optional[str],
+                          start: int, end: int) -> List[Dict[str, Any]]:
+        """Obtiene los bloques de una serie que empiezan en [start, end)
+
+        Args:
+            metric_type: Tipo de métrica
+            plc_id: PLC de la serie (None para todos los PLCs)
+            start: Inicio del primer bloque (epoch, segundos)
+            end: Límite superior del inicio de bloque (epoch, segundos)
+
+        Returns:
+            Lista de diccionarios con metric_type, plc_id, chunk_start, count y payload
+        """
+        try:
+            with self._read("metric_chunks") as cursor:
+                query = '''
+                    SELECT metric_type, plc_id, chunk_start, count, payload
+                    FROM metric_chunks
+                    WHERE metric_type = ? AND chunk_start >= ? AND chunk_start < ?
+                '''
+                params: List[Any] = [metric_type, start, end]
+
+                if plc_id is not None:
+                    query += " AND plc_id = ?"
+                    params.append(plc_id)
+
+                cursor.execute(query, params)
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            self.logger.error(f"Error obteniendo bloques de {metric_type}: {e}")
+            return []
+
+    def prune_metric_chunks(self, cutoff: int, chunk_seconds: int) -> int:
+        """Elimina los bloques de series que terminan antes de ``cutoff`` (epoch)
+
+        Args:
+            cutoff: Instante límite (epoch, segundos)
+            chunk_seconds: Duración de cada bloque
+
+        Returns:
+            Número de bloques eliminados
+        """
+        try:
+            with self._write("metric_chunks") as cursor:
+                cursor.execute(
+                    "DELETE FROM metric_chunks WHERE chunk_start <= ?",
+                    (cutoff - chunk_seconds,))
+                return cursor.rowcount
+        except Exception as e:
+            self.logger.error(f"Error purgando bloques de series: {e}")
+            return 0
+
+    # Tablas sobre las que operan la retención y el archivado
+    RETENTION_TABLES = ("events", "commands", "metrics", "status_rollups")
+
+    # Formato de cubeta para cada resolución de agregado
+    ROLLUP_RESOLUTIONS = {
+        "minute": "%Y-%m-%d %H:%M:00",
+        "hour": "%Y-%m-%d %H:00:00"
+    }
+
+    def _get_state(self, cursor, key: str, default: str = "0") -> str:
+        """Lee un valor de maintenance_state con el cursor dado"""
+        cursor.execute(
+            "SELECT value FROM maintenance_state WHERE key = ?", (key,))
+        row = cursor.fetchone()
+        return row[0] if row else default
+
+    def rollup_status_samples(self, batch_size: int = 1000) -> int:
+        """Agrega el siguiente lote de muestras de estado en status_rollups
+
+        Procesa comandos STATUS (command = 0) posteriores a la última marca
+        de agua, acumulándolos en cubetas por minuto y por hora.
+
+        Args:
+            batch_size: Número máximo de muestras a procesar
+
+        Returns:
+            Número de muestras agregadas (0 si no hay pendientes)
+        """
+        try:
+            with self._write("status_rollups") as cursor:
+                last_id = int(self._get_state(cursor, "status_rollup_last_id"))
+
+                cursor.execute('''
+                    SELECT COUNT(*), MAX(id) FROM (
+                        SELECT id FROM commands
+                        WHERE command = 0 AND id > ?
+                        ORDER BY id LIMIT ?
+                    )
+                ''', (last_id, batch_size))
+                count, max_id = cursor.fetchone()
+                if not count:
+                    return 0
+
+                for resolution, bucket_format in self.ROLLUP_RESOLUTIONS.items():
+                    cursor.execute('''
+                        INSERT INTO status_rollups
+                        (resolution, bucket, plc_id, samples, successes,
+                         sum_response_time, min_response_time, max_response_time)
+                        SELECT ?, strftime(?, timestamp), plc_id, COUNT(*),
+                               SUM(CASE WHEN success THEN 1 ELSE 0 END),
+                               SUM(json_extract(result, '$.response_time')),
+                               MIN(json_extract(result, '$.response_time')),
+                               MAX(json_extract(result, '$.response_time'))
+                        FROM commands
+                        WHERE command = 0 AND id > ? AND id <= ?
+                        GROUP BY 2, 3
+                        ON CONFLICT (resolution, bucket, plc_id) DO UPDATE SET
+                            samples = samples + excluded.samples,
+                            successes = successes + excluded.successes,
+                            sum_response_time = coalesce(sum_response_time, 0)
+                                + coalesce(excluded.sum_response_time, 0),
+                            min_response_time = min(
+                                coalesce(min_response_time, excluded.min_response_time),
+                                coalesce(excluded.min_response_time, min_response_time)),
+                            max_response_time = max(
+                                coalesce(max_response_time, excluded.max_response_time),
+                                coalesce(excluded.max_response_time, max_response_time))
+                    ''', (resolution, bucket_format, last_id, max_id))
+
+                cursor.execute('''
+                    INSERT OR REPLACE INTO maintenance_state (key, value)
+                    VALUES ('status_rollup_last_id', ?)
+                ''', (str(max_id),))
+
+                self.logger.debug(f"{count} muestras de estado agregadas")
+                return count
+
+        except Exception as e:
+            self.logger.error(f"Error agregando muestras de estado: {e}")
+            return 0
+
+    def get_status_rollups(self, plc_id: Optional[str] = None, resolution: str = "minute",
+                           hours: int = 24) -> List[Dict[str, Any]]:
+        """Obtiene los agregados de estado
+
+        Args:
+            plc_id: Filtrar por PLC específico (opcional)
+            resolution: "minute" u "hour"
+            hours: Horas hacia atrás para filtrar (por defecto 24)
+
+        Returns:
+            Lista de diccionarios con los agregados, incluyendo el tiempo medio
+        """
+        try:
+            with self._read("status_rollups") as cursor:
+                query = '''
+                    SELECT resolution, bucket, plc_id, samples, successes,
+                           sum_response_time / samples AS avg_response_time,
+                           min_response_time, max_response_time
+                    FROM status_rollups
+                    WHERE resolution = ? AND bucket >= datetime('now', ?)
+                '''
+                params: List[Any] = [resolution, f"-{int(hours)} hours"]
+
+                if plc_id:
+                    query += " AND plc_id = ?"
+                    params.append(plc_id)
+
+                query += " ORDER BY bucket DESC"
+                cursor.execute(query, params)
+
+                return [dict(row) for row in cursor.fetchall()]
+
+        except Exception as e:
+            self.logger.error(f"Error obteniendo agregados de estado: {e}")
+            return []
+
+    def get_status_rollup_watermark(self) -> int:
+        """Obtiene el id del último comando STATUS ya agregado"""
+        try:
+            with self._read("maintenance_state") as cursor:
+                return int(self._get_state(cursor, "status_rollup_last_id"))
+        except Exception as e:
+            self.logger.error(f"Error obteniendo marca de agregación: {e}")
+            return 0
+
+    def _retention_filter(self, table: str, where: Optional[str]) -> str:
+        """Construye la subconsulta de rowids de un lote a purgar
+
+        La subconsulta espera los parámetros (cutoff, *params, batch_size).
+        """
+        if table not in self.RETENTION_TABLES:
+            raise ValueError(f"Tabla no soportada para retención: {table}")
+
+        time_column = "bucket" if table == "status_rollups" else "timestamp"
+        clause = f"{time_column} < ?"
+        if where:
+            clause += f" AND ({where})"
+        return f"SELECT rowid FROM main.{table} WHERE {clause} ORDER BY rowid LIMIT ?"
+
+    def prune_batch(self, table: str, cutoff: str, batch_size: int = 1000,
+                    where: Optional[str] = None, params: tuple = ()) -> int:
+        """Elimina un lote de filas anteriores a la fecha de corte
+
+        Cada lote se ejecuta en su propia transacción corta para no bloquear
+        a los escritores durante mucho tiempo.
+
+        Args:
+            table: Tabla a purgar (events, commands, metrics o status_rollups)
+            cutoff: Fecha de corte en formato 'YYYY-MM-DD HH:MM:SS' (UTC)
+            batch_size: Número máximo de filas a eliminar
+            where: Condición SQL adicional (opcional, con parámetros "?")
+            params: Parámetros de la condición adicional
+
+        Returns:
+            Número de filas eliminadas
+        """
+        try:
+            subquery = self._retention_filter(table, where)
+            with self._write(table) as cursor:
+                cursor.execute(
+                    f"DELETE FROM main.{table} WHERE rowid IN ({subquery})",
+                    (cutoff, *params, batch_size))
+                return cursor.rowcount
+
+        except Exception as e:
+            self.logger.error(f"Error purgando {table}: {e}")
+            return 0
+
+    def archive_batch(self, table: str, cutoff: str, archive_dir: str,
+                      batch_size: int = 1000, where: Optional[str] = None,
+                      params: tuple = ()) -> int:
+        """Mueve un lote de filas antiguas a una base de datos de archivo mensual
+
+        Las filas se copian a ``archive_dir/gateway-archive-YYYY-MM.db`` (una
+        base de datos adjunta por mes) y se eliminan de la base principal en
+        la misma transacción.
+
+        Args:
+            table: Tabla a archivar (events, commands o metrics)
+            cutoff: Fecha de corte en formato 'YYYY-MM-DD HH:MM:SS' (UTC)
+            archive_dir: Directorio de las bases de datos de archivo
+            batch_size: Número máximo de filas a mover
+            where: Condición SQL adicional (opcional, con parámetros "?")
+            params: Parámetros de la condición adicional
+
+        Returns:
+            Número de filas archivadas
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
+            if table == "status_rollups":
+                raise ValueError("Los agregados no se archivan")
+            subquery = self._retention_filter(table, where)
+
+            with self._lock, self._pool.connection() as conn:
+                clause = "timestamp < ?" + (f" AND ({where})" if where else "")
+                oldest = conn.execute(
+                    f"SELECT MIN(timestamp) FROM main.{table} WHERE {clause}",
+                    (cutoff, *params)).fetchone()[0]
+                if not oldest:
+                    return 0
+
+                # Limitar el lote al mes de la fila más antigua
+                year, month = int(oldest[:4]), int(oldest[5:7])
+                next_month = f"{year + month // 12:04d}-{month % 12 + 1:02d}-01 00:00:00"
+                upper = min(cutoff, next_month)
+
+                os.makedirs(archive_dir, exist_ok=True)
+                archive_path = os.path.join(
+                    archive_dir, f"gateway-archive-{oldest[:7]}.db")
+
+                conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+                try:
+                    query_params = (upper, *params, batch_size)
+                    if table == "events":
+                        self._archive_events(conn, subquery, query_params)
+                    else:
+                        conn.execute(
+                            f"CREATE TABLE IF NOT EXISTS archive.{table} "
+                            f"AS SELECT * FROM main.{table} WHERE 0")
+                        conn.execute(
+                            f"INSERT INTO archive.{table} SELECT * FROM main.{table} "
+                            f"WHERE rowid IN ({subquery})", query_params)
+                    moved = conn.execute(
+                        f"DELETE FROM main.{table} WHERE rowid IN ({subquery})",
+                        query_params).rowcount
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+                finally:
+                    conn.execute("DETACH DATABASE archive")
 
-                # Contar registros en cada tabla
-                cursor.execute("SELECT COUNT(*) FROM plcs")
-                plcs_count = cursor.fetchone()[0]
+                self.logger.debug(
+                    f"{moved} filas de {table} archivadas en {archive_path}")
+                return moved
 
-                cursor.execute("SELECT COUNT(*) FROM commands")
-                commands_count = cursor.fetchone()[0]
+        except Exception as e:
+            self.logger.error(f"Error archivando {table}: {e}")
+            return 0
 
-                cursor.execute("SELECT COUNT(*) FROM events")
-                events_count = cursor.fetchone()[0]
+    @staticmethod
+    def _archive_events(conn: sqlite3.Connection, subquery: str, params: tuple) -> None:
+        """Copia un lote de eventos al archivo con el formato anterior
 
-                cursor.execute("SELECT COUNT(*) FROM configurations")
-                configurations_count = cursor.fetchone()[0]
+        El archivo guarda event_type, source y data como texto, sin
+        depender de los diccionarios de la base principal.
+        """
+        conn.create_function("event_data", 5, _event_data_json, deterministic=True)
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS archive.events (
+                id INTEGER,
+                event_type TEXT,
+                source TEXT,
+                data TEXT,
+                timestamp TIMESTAMP
+            )
+        ''')
+        conn.execute(f'''
+            INSERT INTO archive.events (id, event_type, source, data, timestamp)
+            SELECT r.id, t.name, s.name,
+                   event_data(r.plc_id, r.status_code, r.position, r.response_time, r.payload),
+                   r.timestamp
+            FROM main.events r
+            JOIN main.event_types t ON t.id = r.type_id
+            JOIN main.event_sources s ON s.id = r.source_id
+            WHERE r.rowid IN ({subquery})
+        ''', params)
+
+    def incremental_vacuum(self, pages: int = 500) -> bool:
+        """Devuelve al sistema hasta ``pages`` páginas libres
+
+        Sólo tiene efecto si la base de datos usa auto_vacuum=INCREMENTAL
+        (por defecto en bases nuevas; ver enable_incremental_vacuum).
+
+        Args:
+            pages: Número máximo de páginas a liberar
 
-                cursor.execute("SELECT COUNT(*) FROM metrics")
-                metrics_count = cursor.fetchone()[0]
+        Returns:
+            True si se ejecutó correctamente, False en caso contrario
+        """
+        try:
+            with self._lock, self._pool.connection() as conn:
+                conn.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            return True
+        except Exception as e:
+            self.logger.error(f"Error ejecutando incremental_vacuum: {e}")
+            return False
 
-                conn.close()
+    def enable_incremental_vacuum(self) -> bool:
+        """Convierte una base de datos existente a auto_vacuum=INCREMENTAL
 
-                return {
-                    "plcs_count": plcs_count,
-                    "commands_count": commands_count,
-                    "events_count": events_count,
-                    "configurations_count": configurations_count,
-                    "metrics_count": metrics_count
-                }
+        Requiere un VACUUM completo que bloquea las escrituras mientras dura;
+        se ejecuta una sola vez, al inicializar la base de datos (en las
+        demás ocasiones sólo consulta el modo).
+
+        Returns:
+            True si la base de datos queda en modo incremental
+        """
+        try:
+            with self._lock, self._pool.connection() as conn:
+                mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+                if mode != 2:
+                    self.logger.info(
+                        "Convirtiendo la base de datos a auto_vacuum=INCREMENTAL (VACUUM)")
+                    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                    conn.execute("VACUUM")
+                    mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+            return mode == 2
+        except Exception as e:
+            self.logger.error(f"Error activando auto_vacuum incremental: {e}")
+            return False
+
+    def get_database_stats(self, breakdown: bool = False) -> Dict[str, Any]:
+        """Obtiene estadísticas de la base de datos
+
+        Lee los contadores mantenidos por triggers: el coste no depende del
+        tamaño de las tablas.
+
+        Args:
+            breakdown: Incluir comandos por PLC y eventos por tipo
+
+        Returns:
+            Diccionario con las estadísticas de la base de datos
+        """
+        try:
+            with self._read("stats") as cursor:
+                cursor.execute('''
+                    SELECT c.table_name, c.dimension, coalesce(t.name, c.value), c.count
+                    FROM row_counts c
+                    LEFT JOIN event_types t
+                        ON c.table_name = 'events' AND c.dimension = 'type_id'
+                        AND t.id = c.value
+                    WHERE c.dimension = '' OR ?
+                ''', (breakdown,))
+
+                stats: Dict[str, Any] = {
+                    f"{table}_count": 0 for table in self.COUNTED_TABLES}
+                if breakdown:
+                    stats["commands_by_plc"] = {}
+                    stats["events_by_type"] = {}
+
+                for table, dimension, value, count in cursor.fetchall():
+                    if not dimension:
+                        stats[f"{table}_count"] = count
+                    elif count > 0:
+                        key = "commands_by_plc" if table == "commands" else "events_by_type"
+                        stats[key][value] = count
+
+                return stats
 
         except Exception as e:
             self.logger.error(f"Error obteniendo estadísticas: {e}")
@@ -636,19 +1626,13 @@ class DatabaseManager:
             True si se guardó correctamente, False en caso contrario
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-
+            with self._write("configuration") as cursor:
                 cursor.execute('''
                     INSERT OR REPLACE INTO configurations 
                     (key, value, description, updated_at)
                     VALUES (?, ?, ?, CURRENT_TIMESTAMP)
                 ''', (key, value, description))
 
-                conn.commit()
-                conn.close()
-
                 self.logger.info(
                     f"Configuración {key} guardada en la base de datos")
                 return True
@@ -667,17 +1651,12 @@ class DatabaseManager:
             Valor de la configuración o None si no se encuentra
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-
+            with self._read("configuration") as cursor:
                 cursor.execute('''
                     SELECT value FROM configurations WHERE key = ?
                 ''', (key,))
 
                 row = cursor.fetchone()
-                conn.close()
 
                 if row:
                     return row['value']
@@ -695,17 +1674,12 @@ class DatabaseManager:
             Diccionario con todas las configuraciones
         """
         try:
-            with self._lock:
-                conn = sqlite3.connect(self.db_path)
-                conn.row_factory = sqlite3.Row
-                cursor = conn.cursor()
-
+            with self._read("configuration") as cursor:
                 cursor.execute('''
                     SELECT key, value FROM configurations ORDER BY key
                 ''')
 
                 rows = cursor.fetchall()
-                conn.close()
 
                 return {row['key']: row['value'] for row in rows}
 
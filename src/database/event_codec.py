@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Codificación compacta de los datos de los eventos
+
+Los campos más consultados de ``data`` se guardan en columnas tipadas de
+la tabla events (plc_id y, dentro de ``status``, status_code, position y
+response_time); el resto se serializa con msgpack si está instalado o como
+JSON compacto en caso contrario. La decodificación reconstruye el
+diccionario original.
+"""
+
+import json
+import math
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import msgpack
+except ImportError:  # Sin msgpack el resto se guarda como JSON compacto
+    msgpack = None
+
+# Columnas tipadas de events, en el orden en que las devuelve encode_event_data
+HOT_COLUMNS = ("plc_id", "status_code", "position", "response_time")
+
+# Campos de data["status"] extraídos y el tipo exacto que deben tener
+STATUS_FIELDS = (("status_code", int), ("position", int), ("response_time", float))
+
+# Campos del estado de un PLC que se conservan en sus eventos: el estado
+# completo ya se guarda en la fila de commands del mismo sondeo o comando
+EVENT_STATUS_FIELDS = ("success", "error") + tuple(name for name, _ in STATUS_FIELDS)
+
+# Rango de los enteros de SQLite
+_INT64_MIN, _INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+EncodedEvent = Tuple[Optional[str], Optional[int], Optional[int], Optional[float], Any]
+
+
+def _pack(value: Any) -> Any:
+    """Serializa el resto de los datos: BLOB msgpack o TEXT JSON"""
+    if msgpack is not None:
+        return msgpack.packb(value, use_bin_type=True)
+    return json.dumps(value, separators=(",", ":"))
+
+
+def _unpack(payload: Any) -> Any:
+    """Inverso de _pack; el tipo de la columna indica el formato"""
+    if isinstance(payload, str):
+        return json.loads(payload)
+    if msgpack is None:
+        raise ValueError("Datos de evento en msgpack y msgpack no está instalado")
+    return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+
+
+def summarize_status(status: Any) -> Any:
+    """Resumen de un estado de PLC para guardarlo en un evento
+
+    Conserva el resultado y los campos de las columnas tipadas; el resto
+    (marca de tiempo del PLC, campos propios de cada protocolo) sólo se
+    guarda en commands.
+    """
+    if not isinstance(status, dict):
+        return status
+    return {name: status[name] for name in EVENT_STATUS_FIELDS if name in status}
+
+
+def encode_event_data(data: Optional[Dict[str, Any]]) -> EncodedEvent:
+    """Separa los campos tipados de ``data``
+
+    Un campo sólo se extrae si tiene exactamente el tipo de su columna, de
+    modo que decode_event_data devuelve un diccionario igual al original.
+
+    Returns:
+        Tupla (plc_id, status_code, position, response_time, payload); todo
+        None si ``data`` está vacío
+    """
+    if not data:
+        return None, None, None, None, None
+    if not isinstance(data, dict):
+        return None, None, None, None, _pack(data)
+
+    rest = dict(data)
+    plc_id = rest.get("plc_id")
+    if isinstance(plc_id, str):
+        del rest["plc_id"]
+    else:
+        plc_id = None
+
+    hot = []
+    status = rest.get("status")
+    if isinstance(status, dict):
+        status = rest["status"] = dict(status)
+    for name, kind in STATUS_FIELDS:
+        value = status.get(name) if isinstance(status, dict) else None
+        # SQLite guarda NaN como NULL y no admite enteros de más de 64 bits
+        if type(value) is kind and (math.isfinite(value) if kind is float
+                                    else _INT64_MIN <= value <= _INT64_MAX):
+            del status[name]
+            hot.append(value)
+        else:
+            hot.append(None)
+
+    return (plc_id, *hot, _pack(rest))
+
+
+def decode_event_data(plc_id: Optional[str], status_code: Optional[int],
+                      position: Optional[int], response_time: Optional[float],
+                      payload: Any) -> Any:
+    """Reconstruye ``data`` a partir de las columnas de events
+
+    Raises:
+        ValueError: Si el payload no se puede decodificar
+    """
+    if payload is None:
+        return None
+    rest = json.loads(payload) if isinstance(payload, str) else _unpack(payload)
+    if not isinstance(rest, dict):
+        return rest
+
+    data = {"plc_id": plc_id, **rest} if plc_id is not None else rest
+    if status_code is not None or position is not None or response_time is not None:
+        status = data["status"]
+        if status_code is not None:
+            status["status_code"] = status_code
+        if position is not None:
+            status["position"] = position
+        if response_time is not None:
+            status["response_time"] = response_time
+    return data
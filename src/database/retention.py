@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Retención, agregación y archivado de datos históricos del Gateway Local
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Ventanas de retención por defecto (en días; 0 o None = conservar siempre)
+DEFAULT_WINDOWS: Dict[str, Optional[float]] = {
+    "events": 30,
+    "commands": 30,
+    "status_commands": 2,
+    "metrics": 30,
+    "rollups_minute": 30,
+    "rollups_hour": 365
+}
+
+# Ventanas específicas por tipo de evento (en días)
+DEFAULT_EVENT_TYPE_WINDOWS: Dict[str, float] = {
+    "plc.status_update": 2,
+    "gateway.heartbeat": 7
+}
+
+
+class RetentionManager:
+    """Aplica periódicamente las políticas de retención sobre la base de datos
+
+    En cada ciclo:
+    1. Agrega las muestras de estado pendientes en cubetas por minuto/hora.
+    2. Purga (o archiva) por lotes pequeños las filas fuera de su ventana.
+    3. Libera páginas con incremental_vacuum.
+    4. Cada ``reconcile_interval`` segundos, recalcula los contadores de filas.
+
+    Si se asigna ``timeseries_store``, sus bloques se purgan con la ventana
+    de "metrics".
+    """
+
+    def __init__(self, database_manager, config: Optional[Dict[str, Any]] = None):
+        """Inicializa el gestor de retención
+
+        Args:
+            database_manager: Gestor de base de datos sobre el que operar
+            config: Configuración de la sección "database.retention"
+        """
+        config = config or {}
+        self.database_manager = database_manager
+        self.logger = logging.getLogger(__name__)
+
+        self.enabled = bool(config.get("enabled", True))
+        self.interval = float(config.get("interval", 300))
+        self.batch_size = int(config.get("batch_size", 1000))
+        self.batch_pause = float(config.get("batch_pause", 0.05))
+        self.max_batches_per_run = int(config.get("max_batches_per_run", 200))
+        self.archive_dir = config.get("archive_dir") or None
+        self.vacuum_pages = int(config.get("vacuum_pages", 1000))
+        self.reconcile_interval = float(config.get("reconcile_interval", 86400))
+
+        self.windows = dict(DEFAULT_WINDOWS)
+        self.windows.update(config.get("windows", {}))
+        self.event_type_windows = dict(
+            config.get("event_types", DEFAULT_EVENT_TYPE_WINDOWS))
+
+        self.running = False
+        self._stop_event = threading.Event()
+        self._worker_thread: Optional[threading.Thread] = None
+        self.last_run: Dict[str, Any] = {}
+        self._last_reconcile = time.monotonic()
+        self.timeseries_store = None
+
+    def start(self) -> None:
+        """Inicia el hilo de mantenimiento periódico"""
+        if self.running or not self.enabled:
+            return
+        self.running = True
+        self._stop_event.clear()
+        self._worker_thread = threading.Thread(
+            target=self._retention_worker, daemon=True)
+        self._worker_thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo de mantenimiento"""
+        self.running = False
+        self._stop_event.set()
+        if self._worker_thread and self._worker_thread.is_alive():
+            self._worker_thread.join(timeout=5)
+
+    def _retention_worker(self) -> None:
+        """Worker que ejecuta un ciclo de retención cada ``interval`` segundos"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                self.logger.error(f"Error en ciclo de retención: {e}")
+
+    def _build_policies(self) -> List[Tuple[str, str, Optional[float], Optional[str], tuple]]:
+        """Construye las políticas (etiqueta, tabla, días, condición, parámetros)"""
+        policies = []
+
+        # Eventos: ventanas por tipo y ventana general para el resto
+        overridden = tuple(self.event_type_windows.keys())
+        for event_type, days in self.event_type_windows.items():
+            policies.append((f"events:{event_type}", "events", days,
+                             "type_id IN (SELECT id FROM event_types WHERE name = ?)",
+                             (event_type,)))
+        if overridden:
+            placeholders = ", ".join("?" for _ in overridden)
+            policies.append(("events", "events", self.windows.get("events"),
+                             "type_id NOT IN (SELECT id FROM event_types "
+                             f"WHERE name IN ({placeholders}))", overridden))
+        else:
+            policies.append(("events", "events", self.windows.get("events"),
+                             None, ()))
+
+        # Comandos: los STATUS sólo se purgan una vez agregados
+        watermark = self.database_manager.get_status_rollup_watermark()
+        status_days = self.windows.get("status_commands") or self.windows.get("commands")
+        policies.append(("commands:status", "commands", status_days,
+                         "command = 0 AND id <= ?", (watermark,)))
+        policies.append(("commands", "commands", self.windows.get("commands"),
+                         "command != 0", ()))
+
+        policies.append(("metrics", "metrics", self.windows.get("metrics"), None, ()))
+
+        policies.append(("rollups:minute", "status_rollups",
+                         self.windows.get("rollups_minute"), "resolution = 'minute'", ()))
+        policies.append(("rollups:hour", "status_rollups",
+                         self.windows.get("rollups_hour"), "resolution = 'hour'", ()))
+        return policies
+
+    def run_once(self) -> Dict[str, Any]:
+        """Ejecuta un ciclo completo de agregación, purga y vacuum
+
+        Returns:
+            Diccionario con las filas agregadas y purgadas por política
+        """
+        start_time = time.time()
+        summary: Dict[str, Any] = {"rolled_up": self._rollup(), "pruned": {}}
+
+        for label, table, days, where, params in self._build_policies():
+            if not days:
+                continue
+            removed = self._purge(table, float(days), where, params)
+            if removed:
+                summary["pruned"][label] = removed
+
+        metrics_days = self.windows.get("metrics")
+        if self.timeseries_store is not None and metrics_days:
+            removed = self.timeseries_store.prune(float(metrics_days))
+            if removed:
+                summary["pruned"]["metric_chunks"] = removed
+
+        if summary["pruned"] and self.vacuum_pages > 0:
+            self.database_manager.incremental_vacuum(self.vacuum_pages)
+
+        if (self.reconcile_interval > 0
+                and time.monotonic() - self._last_reconcile >= self.reconcile_interval):
+            summary["reconciled"] = self.database_manager.reconcile_row_counts()
+            self._last_reconcile = time.monotonic()
+
+        summary["duration"] = time.time() - start_time
+        self.last_run = summary
+        if summary["rolled_up"] or summary["pruned"]:
+            self.logger.info(f"Ciclo de retención completado: {summary}")
+        return summary
+
+    def _rollup(self) -> int:
+        """Agrega todas las muestras de estado pendientes por lotes"""
+        total = 0
+        for _ in range(self.max_batches_per_run):
+            count = self.database_manager.rollup_status_samples(self.batch_size)
+            total += count
+            if count < self.batch_size:
+                break
+            self._stop_event.wait(self.batch_pause)
+        return total
+
+    def _purge(self, table: str, days: float, where: Optional[str], params: tuple) -> int:
+        """Purga o archiva por lotes las filas anteriores a ``days`` días"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).strftime(
+            "%Y-%m-%d %H:%M:%S")
+        archive = self.archive_dir and table != "status_rollups"
+
+        total = 0
+        for _ in range(self.max_batches_per_run):
+            if archive:
+                removed = self.database_manager.archive_batch(
+                    table, cutoff, self.archive_dir, self.batch_size, where, params)
+            else:
+                removed = self.database_manager.prune_batch(
+                    table, cutoff, self.batch_size, where, params)
+            total += removed
+
+            # Un lote archivado puede quedar corto al cruzar de mes
+            if removed == 0 or (not archive and removed < self.batch_size):
+                break
+            # Ceder el lock de escritura entre lotes
+            if self._stop_event.wait(self.batch_pause) and not self.running:
+                break
+        return total
@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Almacén de series temporales por bloques para las métricas de los PLCs
+
+Cada serie (tipo de métrica, PLC) se guarda en bloques de ``chunk_seconds``:
+una fila de metric_chunks con dos columnas empaquetadas y comprimidas
+(desplazamientos en milisegundos desde el inicio del bloque y valores
+float64). Las consultas agregan en el servidor por cubetas (mínimo, máximo,
+media y percentiles) y devuelven como mucho ``points`` puntos por serie.
+"""
+
+import logging
+import math
+import sys
+import threading
+import time
+import zlib
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Sin NumPy se agrega en Python puro (mismo resultado)
+    np = None
+
+# Duración por defecto de cada bloque (segundos)
+DEFAULT_CHUNK_SECONDS = 3600
+
+# Percentiles calculados en cada cubeta
+PERCENTILES = (50, 95, 99)
+
+SeriesKey = Tuple[str, str, int]
+
+
+def encode_chunk(offsets: array, values: array) -> bytes:
+    """Empaqueta un bloque: desplazamientos uint32 (ms) y valores float64, little-endian"""
+    if sys.byteorder != "little":
+        offsets, values = array(offsets.typecode, offsets), array(values.typecode, values)
+        offsets.byteswap()
+        values.byteswap()
+    return zlib.compress(offsets.tobytes() + values.tobytes())
+
+
+def decode_chunk(payload: bytes, count: int) -> Tuple[array, array]:
+    """Desempaqueta un bloque en (desplazamientos en ms, valores)"""
+    raw = zlib.decompress(payload)
+    offsets = array("I")
+    values = array("d")
+    offsets.frombytes(raw[:4 * count])
+    values.frombytes(raw[4 * count:])
+    if sys.byteorder != "little":
+        offsets.byteswap()
+        values.byteswap()
+    return offsets, values
+
+
+class _Chunk:
+    """Bloque en memoria de una serie (el más reciente, aún abierto)"""
+
+    __slots__ = ("offsets", "values", "dirty", "loaded")
+
+    def __init__(self):
+        self.offsets = array("I")
+        self.values = array("d")
+        self.dirty = False
+        # False mientras no se haya fusionado con la versión persistida
+        self.loaded = False
+
+
+class TimeSeriesStore:
+    """Series temporales compactas de latencia, posición y errores por PLC
+
+    ``append`` sólo añade a los arrays del bloque abierto en memoria; un hilo
+    vuelca cada ``flush_interval`` segundos los bloques modificados. La
+    agregación usa NumPy si está instalado.
+    """
+
+    def __init__(self, database_manager, chunk_seconds: int = DEFAULT_CHUNK_SECONDS,
+                 flush_interval: float = 10.0, max_points: int = 2000):
+        """Inicializa el almacén
+
+        Args:
+            database_manager: Gestor de base de datos donde persistir los bloques
+            chunk_seconds: Duración de cada bloque (segundos, máximo 49 días)
+            flush_interval: Segundos entre volcados de los bloques abiertos
+            max_points: Número máximo de puntos por consulta
+        """
+        if not 0 < chunk_seconds < 2 ** 32 / 1000:
+            raise ValueError("chunk_seconds fuera de rango")
+
+        self.database_manager = database_manager
+        self.chunk_seconds = int(chunk_seconds)
+        self.flush_interval = flush_interval
+        self.max_points = max_points
+        self.logger = logging.getLogger(__name__)
+
+        self._chunks: Dict[SeriesKey, _Chunk] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._worker_thread: Optional[threading.Thread] = None
+
+        # Estadísticas
+        self.appended = 0
+        self.flushed_chunks = 0
+
+    def start(self) -> None:
+        """Inicia el hilo de volcado"""
+        if self._worker_thread and self._worker_thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._worker_thread = threading.Thread(target=self._flush_worker, daemon=True)
+        self._worker_thread.start()
+
+    def stop(self) -> None:
+        """Detiene el hilo de volcado y escribe los bloques pendientes"""
+        self._stop_event.set()
+        if self._worker_thread and self._worker_thread.is_alive():
+            self._worker_thread.join(timeout=5)
+        self.flush()
+
+    def append(self, metric_type: str, plc_id: str, value: float,
+               timestamp: Optional[float] = None) -> None:
+        """Añade una muestra a la serie (metric_type, plc_id)
+
+        Args:
+            metric_type: Tipo de métrica (p. ej. "response_time", "position")
+            plc_id: PLC de la serie
+            value: Valor de la muestra
+            timestamp: Instante de la muestra (epoch; por defecto ahora)
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        chunk_start = int(timestamp // self.chunk_seconds) * self.chunk_seconds
+        offset = int((timestamp - chunk_start) * 1000)
+
+        with self._lock:
+            key = (metric_type, plc_id, chunk_start)
+            chunk = self._chunks.get(key)
+            if chunk is None:
+                chunk = self._chunks[key] = _Chunk()
+            chunk.offsets.append(offset)
+            chunk.values.append(float(value))
+            chunk.dirty = True
+            self.appended += 1
+
+    def flush(self) -> int:
+        """Escribe los bloques modificados y libera los ya cerrados
+
+        Returns:
+            Número de bloques escritos
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = [(key, chunk) for key, chunk in self._chunks.items()
+                           if chunk.dirty]
+
+            # Bloques que ya existían en la base de datos (p. ej. tras reiniciar)
+            for key, chunk in pending:
+                if not chunk.loaded:
+                    offsets, values = self._load_chunk(key)
+                    with self._lock:
+                        chunk.offsets[0:0] = offsets
+                        chunk.values[0:0] = values
+                        chunk.loaded = True
+
+            rows = []
+            with self._lock:
+                for key, chunk in pending:
+                    rows.append(key + (len(chunk.values),
+                                       encode_chunk(chunk.offsets, chunk.values)))
+                    chunk.dirty = False
+
+            if rows and not self.database_manager.upsert_metric_chunks(rows):
+                with self._lock:
+                    for key, chunk in pending:
+                        chunk.dirty = True
+                return 0
+
+            self.flushed_chunks += len(rows)
+            self._evict_closed_chunks()
+            return len(rows)
+
+    def query(self, metric_type: str, plc_id: Optional[str] = None,
+              since: Optional[float] = None, until: Optional[float] = None,
+              points: int = 120) -> List[Dict[str, Any]]:
+        """Serie agregada en como mucho ``points`` cubetas de igual duración
+
+        Args:
+            metric_type: Tipo de métrica
+            plc_id: PLC de la serie (None agrega todos los PLCs)
+            since: Inicio del intervalo (epoch; por defecto una hora antes de until)
+            until: Fin del intervalo, excluido (epoch; por defecto ahora)
+            points: Número máximo de cubetas
+
+        Returns:
+            Lista de cubetas no vacías con start (epoch), count, min, max,
+            mean, p50, p95 y p99
+        """
+        until = time.time() if until is None else float(until)
+        since = until - 3600 if since is None else float(since)
+        if until <= since:
+            return []
+        points = max(1, min(int(points), self.max_points))
+        bucket_seconds = (until - since) / points
+
+        timestamps, values = self._collect(metric_type, plc_id, since, until)
+        aggregate = self._aggregate_numpy if np is not None else self._aggregate_python
+        return aggregate(timestamps, values, since, bucket_seconds)
+
+    def prune(self, days: float) -> int:
+        """Elimina los bloques anteriores a ``days`` días
+
+        Returns:
+            Número de bloques eliminados de la base de datos
+        """
+        cutoff = int(time.time() - days * 86400)
+        with self._lock:
+            for key in [key for key in self._chunks
+                        if key[2] + self.chunk_seconds <= cutoff]:
+                del self._chunks[key]
+        return self.database_manager.prune_metric_chunks(cutoff, self.chunk_seconds)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas del almacén"""
+        with self._lock:
+            open_chunks = len(self._chunks)
+            pending = sum(1 for chunk in self._chunks.values() if chunk.dirty)
+        return {
+            "appended": self.appended,
+            "flushed_chunks": self.flushed_chunks,
+            "open_chunks": open_chunks,
+            "pending_chunks": pending,
+            "numpy": np is not None
+        }
+
+    def _flush_worker(self) -> None:
+        """Worker que vuelca los bloques cada ``flush_interval`` segundos"""
+        while not self._stop_event.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                self.logger.error(f"Error volcando series temporales: {e}")
+
+    def _load_chunk(self, key: SeriesKey) -> Tuple[array, array]:
+        """Lee la versión persistida de un bloque (vacía si no existe)"""
+        metric_type, plc_id, chunk_start = key
+        for row in self.database_manager.get_metric_chunks(
+                metric_type, plc_id, chunk_start, chunk_start + 1):
+            return decode_chunk(row["payload"], row["count"])
+        return array("I"), array("d")
+
+    def _evict_closed_chunks(self) -> None:
+        """Libera de memoria los bloques cerrados ya persistidos
+
+        Se conserva el bloque anterior al actual para muestras que lleguen
+        con retraso.
+        """
+        horizon = time.time() - 2 * self.chunk_seconds
+        with self._lock:
+            for key in [key for key, chunk in self._chunks.items()
+                        if not chunk.dirty and key[2] < horizon]:
+                del self._chunks[key]
+
+    def _collect(self, metric_type: str, plc_id: Optional[str],
+                 since: float, until: float) -> Tuple[Sequence[float], Sequence[float]]:
+        """Muestras de [since, until) en memoria y en la base de datos"""
+        first_chunk = int(since // self.chunk_seconds) * self.chunk_seconds
+        parts: Dict[Tuple[str, int], List[Tuple[array, array]]] = {}
+
+        for row in self.database_manager.get_metric_chunks(
+                metric_type, plc_id, first_chunk, math.ceil(until)):
+            parts[(row["plc_id"], row["chunk_start"])] = [
+                decode_chunk(row["payload"], row["count"])]
+
+        with self._lock:
+            for (chunk_metric, chunk_plc, chunk_start), chunk in self._chunks.items():
+                if (chunk_metric != metric_type or (plc_id is not None and chunk_plc != plc_id)
+                        or not first_chunk <= chunk_start < until):
+                    continue
+                current = (array("I", chunk.offsets), array("d", chunk.values))
+                if chunk.loaded:
+                    # La copia en memoria ya incluye lo persistido
+                    parts[(chunk_plc, chunk_start)] = [current]
+                else:
+                    parts.setdefault((chunk_plc, chunk_start), []).append(current)
+
+        if np is not None:
+            timestamps = [chunk_start + np.frombuffer(offsets, dtype=np.uint32) / 1000.0
+                          for (_, chunk_start), chunk_parts in parts.items()
+                          for offsets, _ in chunk_parts]
+            values = [np.frombuffer(chunk_values, dtype=np.float64)
+                      for chunk_parts in parts.values() for _, chunk_values in chunk_parts]
+            if not timestamps:
+                return np.empty(0), np.empty(0)
+            timestamps = np.concatenate(timestamps)
+            values = np.concatenate(values)
+            selected = (timestamps >= since) & (timestamps < until)
+            return timestamps[selected], values[selected]
+
+        timestamps, values = [], []
+        for (_, chunk_start), chunk_parts in parts.items():
+            for offsets, chunk_values in chunk_parts:
+                for offset, value in zip(offsets, chunk_values):
+                    timestamp = chunk_start + offset / 1000.0
+                    if since <= timestamp < until:
+                        timestamps.append(timestamp)
+                        values.append(value)
+        return timestamps, values
+
+    @staticmethod
+    def _aggregate_numpy(timestamps, values, since: float,
+                         bucket_seconds: float) -> List[Dict[str, Any]]:
+        """Agregación vectorizada: una ordenación y reduceat por cubeta"""
+        if len(values) == 0:
+            return []
+        buckets = ((timestamps - since) // bucket_seconds).astype(np.int64)
+        order = np.lexsort((values, buckets))
+        buckets = buckets[order]
+        values = values[order]
+        ids, starts, counts = np.unique(buckets, return_index=True, return_counts=True)
+        ends = starts + counts - 1
+
+        stats = {
+            "count": counts,
+            "min": values[starts],
+            "max": values[ends],
+            "mean": np.add.reduceat(values, starts) / counts,
+        }
+        for percentile in PERCENTILES:
+            # Interpolación lineal entre los rangos vecinos (como np.percentile)
+            position = (counts - 1) * (percentile / 100.0)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            low_values = values[starts + lower]
+            stats[f"p{percentile}"] = low_values + (
+                values[starts + upper] - low_values) * (position - lower)
+
+        return [
+            {"start": since + int(bucket) * bucket_seconds,
+             **{name: column[i].item() for name, column in stats.items()}}
+            for i, bucket in enumerate(ids)
+        ]
+
+    @staticmethod
+    def _aggregate_python(timestamps, values, since: float,
+                          bucket_seconds: float) -> List[Dict[str, Any]]:
+        """Agregación en Python puro, equivalente a _aggregate_numpy"""
+        grouped: Dict[int, List[float]] = {}
+        for timestamp, value in zip(timestamps, values):
+            grouped.setdefault(int((timestamp - since) // bucket_seconds), []).append(value)
+
+        result = []
+        for bucket in sorted(grouped):
+            bucket_values = sorted(grouped[bucket])
+            count = len(bucket_values)
+            point = {
+                "start": since + bucket * bucket_seconds,
+                "count": count,
+                "min": bucket_values[0],
+                "max": bucket_values[-1],
+                "mean": math.fsum(bucket_values) / count,
+            }
+            for percentile in PERCENTILES:
+                position = (count - 1) * (percentile / 100.0)
+                lower = math.floor(position)
+                upper = math.ceil(position)
+                point[f"p{percentile}"] = bucket_values[lower] + (
+                    bucket_values[upper] - bucket_values[lower]) * (position - lower)
+            result.append(point)
+        return result
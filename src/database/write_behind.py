@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cola de escritura diferida (write-behind) para el Gateway Local
+
+Los llamadores sólo pagan el coste de encolar; un hilo dedicado agrupa
+eventos, comandos y métricas y los vuelca con executemany en una única
+transacción cuando se alcanza el tamaño de lote o el intervalo de vaciado.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+# Políticas cuando la cola está llena
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST)
+
+
+def utc_timestamp() -> str:
+    """Marca de tiempo en el mismo formato que CURRENT_TIMESTAMP de SQLite"""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _stamped(row: tuple, size: int, timestamp: str) -> tuple:
+    """Añade la marca de tiempo a una fila que no la trae"""
+    return row if len(row) > size else row + (timestamp,)
+
+
+class WriteBehindQueue:
+    """Cola acotada de escrituras diferidas delante de DatabaseManager"""
+
+    def __init__(self, database_manager, max_queue_size: int = 10000,
+                 batch_size: int = 500, flush_interval: float = 1.0,
+                 overflow_policy: str = OVERFLOW_BLOCK, block_timeout: float = 1.0,
+                 max_retries: int = 3, metrics_collector=None):
+        """Inicializa la cola de escritura diferida
+
+        Args:
+            database_manager: Gestor de base de datos destino
+            max_queue_size: Número máximo de filas pendientes
+            batch_size: Filas que disparan un vaciado inmediato
+            flush_interval: Segundos máximos entre vaciados
+            overflow_policy: "block", "drop_newest" o "drop_oldest"
+            block_timeout: Espera máxima con la política "block" (segundos)
+            max_retries: Reintentos de un lote fallido antes de descartarlo
+            metrics_collector: Colector donde publicar profundidad y latencia
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Política de desbordamiento no soportada: {overflow_policy}")
+
+        self.database_manager = database_manager
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.max_retries = max_retries
+        self.metrics_collector = metrics_collector
+        self.logger = logging.getLogger(__name__)
+
+        self._queue: Deque[Tuple[str, tuple]] = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._flush_lock = threading.Lock()
+        self._running = False
+        self._worker_thread: Optional[threading.Thread] = None
+        # Escrituras fallidas seguidas del lote en la cabeza de la cola
+        self._failed_attempts = 0
+
+        # Estadísticas
+        self.dropped = 0
+        self.flushed = 0
+        self.retried = 0
+        self.last_flush_duration = 0.0
+
+    def start(self) -> None:
+        """Inicia el hilo de vaciado"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._worker_thread = threading.Thread(
+                target=self._flush_worker, daemon=True)
+            self._worker_thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Detiene el hilo de vaciado y escribe todo lo pendiente"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+        if self._worker_thread and self._worker_thread.is_alive():
+            self._worker_thread.join(timeout=timeout)
+        self.flush()
+
+    @property
+    def depth(self) -> int:
+        """Número de filas pendientes de escribir"""
+        return len(self._queue)
+
+    def add_event(self, event_type: str, source: str,
+                  data: Optional[Dict[str, Any]] = None) -> bool:
+        """Encola un evento (misma firma que DatabaseManager.add_event)"""
+        return self._enqueue("events", (event_type, source, data, utc_timestamp()))
+
+    def add_command(self, plc_id: str, command: int, argument: Optional[int] = None,
+                    result: Optional[Dict[str, Any]] = None, success: bool = True) -> bool:
+        """Encola un comando (misma firma que DatabaseManager.add_command)"""
+        return self._enqueue(
+            "commands", (plc_id, command, argument, result, success, utc_timestamp()))
+
+    def add_metric(self, metric_type: str, plc_id: Optional[str] = None,
+                   value: float = 0.0) -> bool:
+        """Encola una métrica (misma firma que DatabaseManager.add_metric)"""
+        return self._enqueue("metrics", (metric_type, plc_id, value, utc_timestamp()))
+
+    def add_batch(self, events: Iterable[tuple] = (), commands: Iterable[tuple] = (),
+                  metrics: Iterable[tuple] = ()) -> int:
+        """Encola varias filas tomando el lock una sola vez
+
+        Las filas sin marca de tiempo reciben la del momento de encolarlas.
+
+        Args:
+            events: Tuplas (event_type, source, data[, timestamp])
+            commands: Tuplas (plc_id, command, argument, result, success[, timestamp])
+            metrics: Tuplas (metric_type, plc_id, value[, timestamp])
+
+        Returns:
+            Número de filas encoladas (o escritas)
+        """
+        timestamp = utc_timestamp()
+        rows = [("events", _stamped(row, 3, timestamp)) for row in events]
+        rows += [("commands", _stamped(row, 5, timestamp)) for row in commands]
+        rows += [("metrics", _stamped(row, 3, timestamp)) for row in metrics]
+        if not rows:
+            return 0
+
+        queued = 0
+        with self._lock:
+            if self._running:
+                for row in rows:
+                    if len(self._queue) >= self.max_queue_size and not self._make_room():
+                        self.dropped += 1
+                        self._record_drop()
+                        continue
+                    self._queue.append(row)
+                    queued += 1
+                if len(self._queue) >= self.batch_size:
+                    self._not_empty.notify()
+                return queued
+
+        # Sin hilo de vaciado: escribir todo en una transacción
+        return len(rows) if self._write_rows(rows) else 0
+
+    def _enqueue(self, table: str, row: tuple) -> bool:
+        """Añade una fila a la cola aplicando la política de desbordamiento
+
+        Returns:
+            True si la fila quedó encolada (o escrita), False si se descartó
+        """
+        with self._lock:
+            if not self._running:
+                # Sin hilo de vaciado: escribir de forma síncrona
+                direct = True
+            else:
+                direct = False
+                if len(self._queue) >= self.max_queue_size:
+                    if not self._make_room():
+                        self.dropped += 1
+                        self._record_drop()
+                        return False
+
+                self._queue.append((table, row))
+                if len(self._queue) >= self.batch_size:
+                    self._not_empty.notify()
+
+        if direct:
+            return self._write_rows([(table, row)])
+        return True
+
+    def _make_room(self) -> bool:
+        """Libera espacio en la cola llena (se llama con el lock tomado)"""
+        if self.overflow_policy == OVERFLOW_DROP_OLDEST:
+            self._queue.popleft()
+            self.dropped += 1
+            self._record_drop()
+            return True
+
+        if self.overflow_policy == OVERFLOW_BLOCK:
+            self._not_empty.notify()
+            deadline = time.monotonic() + self.block_timeout
+            while self._running and len(self._queue) >= self.max_queue_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._not_full.wait(remaining)
+            return len(self._queue) < self.max_queue_size
+
+        return False
+
+    def _flush_worker(self) -> None:
+        """Worker que vacía la cola por tamaño o por tiempo"""
+        while True:
+            with self._lock:
+                if self._running and len(self._queue) < self.batch_size:
+                    self._not_empty.wait(self.flush_interval)
+                if not self._running:
+                    break
+                batch = self._take_batch()
+
+            if batch and not self._write_queued(batch):
+                # La base de datos está fallando: esperar antes de reintentar
+                with self._lock:
+                    if self._running:
+                        self._not_empty.wait(self.flush_interval)
+
+    def _take_batch(self) -> List[Tuple[str, tuple]]:
+        """Extrae hasta batch_size filas (se llama con el lock tomado)"""
+        count = min(self.batch_size, len(self._queue))
+        batch = [self._queue.popleft() for _ in range(count)]
+        if batch:
+            self._not_full.notify_all()
+        return batch
+
+    def flush(self) -> None:
+        """Escribe de forma síncrona todas las filas pendientes
+
+        Si un lote falla, con el hilo de vaciado activo se deja en la cola
+        para que lo reintente el hilo; detenida la cola se reintenta aquí
+        hasta ``max_retries`` veces antes de descartarlo.
+        """
+        while True:
+            with self._lock:
+                batch = self._take_batch()
+            if not batch:
+                break
+            if not self._write_queued(batch) and self._running:
+                break
+
+    def _write_queued(self, batch: List[Tuple[str, tuple]]) -> bool:
+        """Escribe un lote extraído de la cola; si falla lo devuelve a la cabeza
+
+        Tras ``max_retries`` reintentos fallidos el lote se descarta.
+        """
+        if self._write_rows(batch):
+            with self._lock:
+                self._failed_attempts = 0
+            return True
+
+        with self._lock:
+            self._failed_attempts += 1
+            if self._failed_attempts <= self.max_retries:
+                self.retried += 1
+                self._queue.extendleft(reversed(batch))
+                return False
+            self._failed_attempts = 0
+            self.dropped += len(batch)
+
+        self.logger.error(
+            f"Descartado lote diferido de {len(batch)} filas tras "
+            f"{self.max_retries} reintentos")
+        for _ in batch:
+            self._record_drop()
+        return False
+
+    def _write_rows(self, rows: List[Tuple[str, tuple]]) -> bool:
+        """Escribe un lote de filas en una única transacción"""
+        grouped: Dict[str, List[tuple]] = {
+            "events": [], "commands": [], "metrics": []}
+        for table, row in rows:
+            grouped[table].append(row)
+
+        with self._flush_lock:
+            start_time = time.perf_counter()
+            success = self.database_manager.write_batch(**grouped)
+            duration = time.perf_counter() - start_time
+
+        if success:
+            self.flushed += len(rows)
+        else:
+            self.logger.error(
+                f"Error escribiendo lote diferido de {len(rows)} filas")
+
+        self.last_flush_duration = duration
+        if self.metrics_collector:
+            self.metrics_collector.record_db_flush(
+                duration, len(rows), self.depth, success)
+        return success
+
+    def _record_drop(self) -> None:
+        """Publica un descarte en el colector de métricas"""
+        if self.metrics_collector:
+            self.metrics_collector.record_write_queue_drop(self.overflow_policy)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas de la cola"""
+        return {
+            "depth": self.depth,
+            "max_queue_size": self.max_queue_size,
+            "dropped": self.dropped,
+            "flushed": self.flushed,
+            "retried": self.retried,
+            "last_flush_duration": self.last_flush_duration,
+            "overflow_policy": self.overflow_policy
+        }
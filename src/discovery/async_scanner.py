@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor de descubrimiento de PLCs sobre asyncio
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+import struct
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # No disponible en Windows
+    resource = None
+
+# Conexiones simultáneas por defecto (limitadas además por los descriptores)
+DEFAULT_CONCURRENCY = 1024
+
+# Conexiones nuevas por segundo por defecto
+DEFAULT_RATE = 5000.0
+
+Probe = Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[Optional[Dict[str, Any]]]]
+ResultBuilder = Callable[[str, int, Optional[Dict[str, Any]]], Optional[Dict[str, Any]]]
+
+
+def iter_ip_range(start_ip: str, end_ip: str) -> Iterator[str]:
+    """Genera las direcciones de un rango (ambos extremos incluidos) sin materializarlas"""
+    start = ipaddress.ip_address(start_ip)
+    end = ipaddress.ip_address(end_ip)
+    if type(start) != type(end):
+        raise ValueError("Las direcciones IP deben ser del mismo tipo")
+    address_type = type(start)
+    for value in range(int(start), int(end) + 1):
+        yield str(address_type(value))
+
+
+def iter_subnet_hosts(subnet: str) -> Iterator[str]:
+    """Genera las direcciones de host de una subred sin materializarlas"""
+    for host in ipaddress.ip_network(subnet, strict=False).hosts():
+        yield str(host)
+
+
+def count_ip_range(start_ip: str, end_ip: str) -> int:
+    """Número de direcciones de un rango"""
+    return max(0, int(ipaddress.ip_address(end_ip)) - int(ipaddress.ip_address(start_ip)) + 1)
+
+
+def count_subnet_hosts(subnet: str) -> int:
+    """Número de direcciones de host de una subred"""
+    network = ipaddress.ip_network(subnet, strict=False)
+    if network.num_addresses <= 2:
+        return network.num_addresses
+    return network.num_addresses - 2
+
+
+async def delta_status_probe(reader: asyncio.StreamReader,
+                             writer: asyncio.StreamWriter) -> Optional[Dict[str, Any]]:
+    """Envía un ESTADO Delta y devuelve la respuesta, o None si no es un PLC"""
+    # Importación diferida: src.plc importa este módulo al inicializarse
+    from src.plc.async_delta_plc import RESPONSE_FORMAT, RESPONSE_SIZE
+
+    writer.write(struct.pack('>H', 0))  # Comando 0 = ESTADO
+    await writer.drain()
+    try:
+        response = await reader.readexactly(RESPONSE_SIZE)
+    except asyncio.IncompleteReadError:
+        return None
+    status, position, timestamp = struct.unpack(RESPONSE_FORMAT, response)
+    return {"status_code": status, "position": position, "timestamp": timestamp}
+
+
+def _abort(sock: socket.socket) -> None:
+    """Cierra el socket con RST, sin pasar por TIME_WAIT"""
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack('ii', 1, 0))
+    except OSError:
+        pass
+    sock.close()
+
+
+class _RateLimiter:
+    """Limitador de conexiones por segundo (cubo de fichas) para un bucle"""
+
+    def __init__(self, rate: float, burst: int = 64):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self.burst = burst
+        self._next = 0.0
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        now = asyncio.get_running_loop().time()
+        self._next = max(self._next, now - self.burst * self.interval)
+        delay = self._next - now
+        self._next += self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class AsyncPLCScanner:
+    """Escáner de PLCs con miles de conexiones simultáneas en un bucle asyncio
+
+    Las direcciones se generan según se necesitan, de modo que la memoria no
+    depende del tamaño del rango. Cada dirección recibe una conexión TCP no
+    bloqueante; sólo en los puertos abiertos se ejecuta la sonda de
+    protocolo, y la conexión se cierra con RST para no dejar sockets en
+    TIME_WAIT. Los resultados se entregan por ``progress_callback`` según
+    llegan.
+    """
+
+    def __init__(self, port: int = 3200, connect_timeout: float = 1.0,
+                 probe_timeout: float = 1.0, concurrency: int = DEFAULT_CONCURRENCY,
+                 rate: float = DEFAULT_RATE, probe: Optional[Probe] = delta_status_probe):
+        """Inicializa el escáner
+
+        Args:
+            port: Puerto donde escuchan los PLCs
+            connect_timeout: Espera máxima de cada conexión (segundos)
+            probe_timeout: Espera máxima de la sonda de protocolo (segundos)
+            concurrency: Conexiones simultáneas como máximo
+            rate: Conexiones nuevas por segundo como máximo (0 = sin límite)
+            probe: Corrutina (reader, writer) que identifica el PLC; None
+                para informar de cualquier puerto abierto
+        """
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.probe_timeout = probe_timeout
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.probe = probe
+        self.logger = logging.getLogger(__name__)
+        self._stopped = False
+        self.stats: Dict[str, Any] = {"scanned": 0, "open": 0, "found": 0, "elapsed": 0.0}
+
+    def scan(self, targets: Iterable[str], total: Optional[int] = None,
+             progress_callback: Optional[Callable] = None,
+             build_result: Optional[ResultBuilder] = None) -> List[Dict[str, Any]]:
+        """Escanea las direcciones dadas en un bucle de eventos propio
+
+        Args:
+            targets: Direcciones IP (puede ser un generador)
+            total: Número de direcciones, para el progreso
+            progress_callback: Callback (escaneadas, total, dispositivo o None)
+            build_result: Función (ip, puerto, respuesta de la sonda) que
+                construye el dispositivo encontrado o None para descartarlo
+
+        Returns:
+            Lista de dispositivos encontrados
+        """
+        return asyncio.run(self.scan_async(targets, total, progress_callback, build_result))
+
+    async def scan_async(self, targets: Iterable[str], total: Optional[int] = None,
+                         progress_callback: Optional[Callable] = None,
+                         build_result: Optional[ResultBuilder] = None) -> List[Dict[str, Any]]:
+        """Versión asíncrona de ``scan`` para ejecutar en un bucle existente"""
+        self._stopped = False
+        self.stats = {"scanned": 0, "open": 0, "found": 0, "elapsed": 0.0}
+        build_result = build_result or self._default_result
+        limiter = _RateLimiter(self.rate)
+        iterator = iter(targets)
+        found: List[Dict[str, Any]] = []
+        started = time.perf_counter()
+
+        async def worker() -> None:
+            # Todos los workers comparten el generador: cada uno toma la
+            # siguiente dirección al terminar la anterior
+            for ip in iterator:
+                if self._stopped:
+                    return
+                await limiter.acquire()
+                device = None
+                try:
+                    details = await self._scan_host(ip)
+                    if details is not None:
+                        device = build_result(ip, self.port, details.get("probe"))
+                except Exception as e:
+                    self.logger.debug(f"Error escaneando {ip}: {e}")
+                self.stats["scanned"] += 1
+                if device:
+                    self.stats["found"] += 1
+                    found.append(device)
+                    self.logger.info(f"Dispositivo encontrado en {ip}:{self.port}")
+                if progress_callback:
+                    progress_callback(self.stats["scanned"], total, device)
+
+        workers = self._worker_count(total)
+        await asyncio.gather(*(worker() for _ in range(workers)))
+        self.stats["elapsed"] = time.perf_counter() - started
+        return found
+
+    def stop(self) -> None:
+        """Detiene el escaneo tras las conexiones en curso"""
+        self._stopped = True
+
+    async def _scan_host(self, ip: str) -> Optional[Dict[str, Any]]:
+        """Conecta a una dirección y, si el puerto está abierto, la sondea
+
+        La conexión se hace sobre un socket no bloqueante sin streams; sólo
+        los puertos abiertos pagan el coste de crear el transporte asyncio.
+        """
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET6 if ":" in ip else socket.AF_INET,
+                             socket.SOCK_STREAM)
+        sock.setblocking(False)
+        try:
+            await asyncio.wait_for(loop.sock_connect(sock, (ip, self.port)),
+                                   timeout=self.connect_timeout)
+        except (OSError, asyncio.TimeoutError):
+            sock.close()
+            return None
+
+        self.stats["open"] += 1
+        if self.probe is None:
+            _abort(sock)
+            return {"probe": None}
+
+        reader, writer = await asyncio.open_connection(sock=sock)
+        try:
+            try:
+                details = await asyncio.wait_for(
+                    self.probe(reader, writer), timeout=self.probe_timeout)
+            except (OSError, asyncio.TimeoutError, struct.error):
+                details = None
+            return {"probe": details}
+        finally:
+            writer.transport.abort()
+
+    def _worker_count(self, total: Optional[int]) -> int:
+        """Workers a lanzar según el rango y los descriptores disponibles"""
+        workers = self.concurrency
+        if total is not None:
+            workers = min(workers, max(1, total))
+        if resource is not None:
+            soft_limit = resource.getrlimit(resource.RLIMIT_NOFILE)[0]
+            if soft_limit != resource.RLIM_INFINITY:
+                workers = min(workers, max(16, soft_limit - 128))
+        return workers
+
+    def _default_result(self, ip: str, port: int,
+                        details: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if self.probe is not None and details is None:
+            return None
+        return {"ip": ip, "port": port, "probe": details}
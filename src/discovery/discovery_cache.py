@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché persistente del inventario de PLCs descubiertos
+"""
+
+import ipaddress
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+
+class DiscoveryScope:
+    """Conjunto de direcciones escaneado: un rango, una subred o toda la red
+
+    ``key`` identifica el ámbito en la base de datos (último barrido) y
+    ``contains`` decide si una dirección conocida pertenece a él.
+    """
+
+    def __init__(self, key: str, contains: Callable[[str], bool]):
+        self.key = key
+        self.contains = contains
+
+
+def subnet_scope(subnet: str) -> DiscoveryScope:
+    """Ámbito de una subred en formato CIDR"""
+    network = ipaddress.ip_network(subnet, strict=False)
+
+    def contains(ip: str) -> bool:
+        address = ipaddress.ip_address(ip)
+        return address.version == network.version and address in network
+
+    return DiscoveryScope(f"subnet:{network}", contains)
+
+
+def range_scope(start_ip: str, end_ip: str) -> DiscoveryScope:
+    """Ámbito de un rango de direcciones (ambos extremos incluidos)"""
+    start = ipaddress.ip_address(start_ip)
+    end = ipaddress.ip_address(end_ip)
+
+    def contains(ip: str) -> bool:
+        address = ipaddress.ip_address(ip)
+        return address.version == start.version and start <= address <= end
+
+    return DiscoveryScope(f"range:{start}-{end}", contains)
+
+
+def device_fingerprint(device: Dict[str, Any]) -> str:
+    """Huella de un dispositivo: el tipo que responde en el puerto
+
+    El estado y la posición cambian en cada lectura; un cambio de huella
+    indica que la dirección la ocupa otro dispositivo.
+    """
+    return str(device.get("type", "unknown"))
+
+
+class DiscoveryCache:
+    """Inventario de dispositivos descubiertos persistido en DatabaseManager
+
+    Permite devolver al instante los dispositivos conocidos, sondearlos
+    antes que el resto del rango y comparar cada escaneo con el anterior
+    (nuevos, desaparecidos, cambiados y sin cambios).
+    """
+
+    def __init__(self, db_manager, port: int = 3200,
+                 fingerprint: Callable[[Dict[str, Any]], str] = device_fingerprint):
+        """Inicializa la caché
+
+        Args:
+            db_manager: DatabaseManager donde se guarda el inventario
+            port: Puerto de los dispositivos
+            fingerprint: Función que calcula la huella de un dispositivo
+        """
+        self.db_manager = db_manager
+        self.port = port
+        self.fingerprint = fingerprint
+        self.logger = logging.getLogger(__name__)
+
+    def known(self, scope: Optional[DiscoveryScope] = None,
+              online_only: bool = True) -> List[Dict[str, Any]]:
+        """Dispositivos conocidos, tal como se descubrieron, sin escanear
+
+        Cada dispositivo incluye ``last_seen`` con la fecha del último escaneo
+        en que respondió.
+        """
+        devices = []
+        for row in self.db_manager.get_discovered_devices(self.port, online_only):
+            if scope is not None and not scope.contains(row["ip_address"]):
+                continue
+            device = dict(row["data"] or {"ip": row["ip_address"], "port": row["port"],
+                                          "type": row["type"]})
+            device["last_seen"] = row["last_seen"]
+            devices.append(device)
+        return devices
+
+    def known_first(self, targets: Iterable[str],
+                    scope: Optional[DiscoveryScope] = None) -> Iterator[str]:
+        """Direcciones a escanear con las conocidas del ámbito al principio"""
+        known_ips = [device["ip"] for device in self.known(scope, online_only=False)]
+        yield from known_ips
+        known_set = set(known_ips)
+        for ip in targets:
+            if ip not in known_set:
+                yield ip
+
+    def last_sweep(self, scope: DiscoveryScope) -> float:
+        """Instante (epoch) del último barrido completo del ámbito"""
+        return self.db_manager.get_discovery_sweep_time(scope.key)
+
+    def record(self, found: List[Dict[str, Any]], scope: Optional[DiscoveryScope] = None,
+               complete: bool = True, sweep: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """Guarda el resultado de un escaneo y lo compara con el anterior
+
+        Args:
+            found: Dispositivos que respondieron
+            scope: Ámbito escaneado; los conocidos fuera de él no cambian
+            complete: False si el escaneo se detuvo antes de terminar, en cuyo
+                caso no se da ningún dispositivo por desaparecido
+            sweep: True si se barrió el ámbito completo (no sólo los conocidos)
+
+        Returns:
+            Diccionario con las listas ``added``, ``removed``, ``changed`` y
+            ``unchanged``
+        """
+        previous = {device["ip"]: device for device in self.known(scope)}
+        diff: Dict[str, List[Dict[str, Any]]] = {
+            "added": [], "removed": [], "changed": [], "unchanged": []}
+
+        rows = []
+        for device in found:
+            fingerprint = self.fingerprint(device)
+            rows.append((device["ip"], device.get("port", self.port),
+                         device.get("type", "unknown"), fingerprint, device))
+            before = previous.pop(device["ip"], None)
+            if before is None:
+                diff["added"].append(device)
+            elif self.fingerprint(before) != fingerprint:
+                diff["changed"].append(device)
+            else:
+                diff["unchanged"].append(device)
+
+        if complete:
+            diff["removed"] = list(previous.values())
+
+        if rows:
+            self.db_manager.upsert_discovered_devices(rows)
+        if diff["removed"]:
+            self.db_manager.mark_discovered_devices_offline(
+                self.port, [device["ip"] for device in diff["removed"]])
+        if sweep and complete and scope is not None:
+            self.db_manager.set_discovery_sweep_time(scope.key, time.time())
+
+        self.logger.info(
+            f"Descubrimiento: {len(diff['added'])} nuevos, {len(diff['removed'])} "
+            f"desaparecidos, {len(diff['changed'])} cambiados, "
+            f"{len(diff['unchanged'])} sin cambios")
+        return diff
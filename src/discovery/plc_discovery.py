@@ -7,21 +7,38 @@ Módulo de descubrimiento automático de PLCs en la red
 import socket
 import threading
 import time
-import ipaddress
 from typing import List, Dict, Optional, Callable, Any
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from src.discovery.async_scanner import (AsyncPLCScanner, DEFAULT_CONCURRENCY,
+                                         count_ip_range, count_subnet_hosts,
+                                         iter_ip_range, iter_subnet_hosts)
+from src.discovery.discovery_cache import (DiscoveryCache, DiscoveryScope,
+                                           range_scope, subnet_scope)
 
-class PLCDetector:
-    """Detector de PLCs en la red"""
 
-    def __init__(self, port: int = 3200, timeout: int = 2):
+class PLCDetector:
+    """Detector de PLCs en la red
+
+    Los rangos y subredes se escanean con AsyncPLCScanner: miles de
+    conexiones simultáneas en un único bucle asyncio y una sonda de ESTADO
+    sólo en los puertos abiertos. Con una DiscoveryCache los dispositivos
+    conocidos se sondean primero y cada escaneo deja en ``last_diff`` los
+    cambios respecto al anterior.
+    """
+
+    def __init__(self, port: int = 3200, timeout: int = 2,
+                 concurrency: int = DEFAULT_CONCURRENCY,
+                 cache: Optional[DiscoveryCache] = None):
         self.port = port
         self.timeout = timeout
+        self.concurrency = concurrency
+        self.cache = cache
         self.logger = logging.getLogger(__name__)
         self.found_devices = []
+        self.last_diff: Optional[Dict[str, List[Dict[str, Any]]]] = None
         self.is_scanning = False
+        self._scanner: Optional[AsyncPLCScanner] = None
 
     def scan_single_ip(self, ip: str) -> Optional[Dict[str, Any]]:
         """Escanear una única dirección IP para detectar PLC"""
@@ -52,109 +69,104 @@ class PLCDetector:
     def scan_ip_range(self, start_ip: str, end_ip: str,
                       progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
         """Escanear un rango de direcciones IP"""
-        self.is_scanning = True
-        self.found_devices = []
-
         try:
-            # Convertir IPs a objetos ipaddress
-            start = ipaddress.IPv4Address(start_ip)
-            end = ipaddress.IPv4Address(end_ip)
-
-            # Generar lista de IPs
-            ips = [str(ipaddress.IPv4Address(int(start) + i))
-                   for i in range(int(end) - int(start) + 1)]
-
-            total_ips = len(ips)
-            scanned = 0
-
-            # Usar ThreadPoolExecutor para escaneo paralelo
-            with ThreadPoolExecutor(max_workers=50) as executor:
-                # Crear tareas para cada IP
-                future_to_ip = {executor.submit(
-                    self.scan_single_ip, ip): ip for ip in ips}
-
-                # Procesar resultados a medida que se completan
-                for future in as_completed(future_to_ip):
-                    ip = future_to_ip[future]
-                    try:
-                        result = future.result()
-                        if result:
-                            self.found_devices.append(result)
-
-                        scanned += 1
-                        if progress_callback:
-                            progress_callback(scanned, total_ips, result)
-
-                    except Exception as e:
-                        self.logger.error(f"Error procesando {ip}: {e}")
-                        scanned += 1
-                        if progress_callback:
-                            progress_callback(scanned, total_ips, None)
-
-            self.is_scanning = False
-            return self.found_devices
-
+            return self._scan(iter_ip_range(start_ip, end_ip),
+                              count_ip_range(start_ip, end_ip), progress_callback,
+                              range_scope(start_ip, end_ip))
         except Exception as e:
             self.logger.error(f"Error en escaneo de rango: {e}")
-            self.is_scanning = False
             return []
 
     def scan_subnet(self, subnet: str,
                     progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
         """Escanear una subred completa"""
         try:
-            network = ipaddress.IPv4Network(subnet, strict=False)
-            hosts = list(network.hosts())
-
-            # Convertir a strings
-            ip_list = [str(ip) for ip in hosts]
-
-            total_ips = len(ip_list)
-            scanned = 0
-            self.found_devices = []
-
-            # Usar ThreadPoolExecutor para escaneo paralelo
-            with ThreadPoolExecutor(max_workers=50) as executor:
-                # Crear tareas para cada IP
-                future_to_ip = {executor.submit(
-                    self.scan_single_ip, ip): ip for ip in ip_list}
-
-                # Procesar resultados a medida que se completan
-                for future in as_completed(future_to_ip):
-                    ip = future_to_ip[future]
-                    try:
-                        result = future.result()
-                        if result:
-                            self.found_devices.append(result)
-
-                        scanned += 1
-                        if progress_callback:
-                            progress_callback(scanned, total_ips, result)
-
-                    except Exception as e:
-                        self.logger.error(f"Error procesando {ip}: {e}")
-                        scanned += 1
-                        if progress_callback:
-                            progress_callback(scanned, total_ips, None)
+            return self._scan(iter_subnet_hosts(subnet), count_subnet_hosts(subnet),
+                              progress_callback, subnet_scope(subnet))
+        except Exception as e:
+            self.logger.error(f"Error en escaneo de subred: {e}")
+            return []
 
-            return self.found_devices
+    def rescan_known(self, scope: Optional[DiscoveryScope] = None,
+                     progress_callback: Optional[Callable] = None) -> List[Dict[str, Any]]:
+        """Vuelve a sondear sólo los dispositivos conocidos del ámbito
 
+        Incluye los que no respondieron la última vez. Requiere caché.
+        """
+        if self.cache is None:
+            return []
+        ips = [device["ip"] for device in self.cache.known(scope, online_only=False)]
+        try:
+            return self._scan(iter(ips), len(ips), progress_callback, scope, sweep=False)
         except Exception as e:
-            self.logger.error(f"Error en escaneo de subred: {e}")
+            self.logger.error(f"Error sondeando dispositivos conocidos: {e}")
             return []
 
+    def _scan(self, targets, total: int, progress_callback: Optional[Callable],
+              scope: Optional[DiscoveryScope] = None,
+              sweep: bool = True) -> List[Dict[str, Any]]:
+        """Escanea las direcciones con el motor asíncrono"""
+        self.is_scanning = True
+        self.found_devices = []
+        self._scanner = AsyncPLCScanner(
+            port=self.port, connect_timeout=self.timeout, probe_timeout=self.timeout,
+            concurrency=self.concurrency)
+        if self.cache is not None and sweep:
+            targets = self.cache.known_first(targets, scope)
+        try:
+            self.found_devices = self._scanner.scan(
+                targets, total, progress_callback, build_result=self._build_device)
+            if self.cache is not None:
+                self.last_diff = self.cache.record(
+                    self.found_devices, scope,
+                    complete=self._scanner.stats["scanned"] >= total, sweep=sweep)
+            return self.found_devices
+        finally:
+            self.is_scanning = False
+
+    def _build_device(self, ip: str, port: int,
+                      details: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Dispositivo encontrado: sólo los que responden al ESTADO de Delta
+
+        Un puerto abierto que no contesta (otro servicio, o un PLC que no
+        respondió a tiempo) no se informa: no se podría añadir como PLC.
+        """
+        if details is None:
+            return None
+        return {
+            "ip": ip,
+            "port": port,
+            "type": "delta",
+            "status": "online"
+        }
+
     def stop_scan(self):
         """Detener el escaneo"""
         self.is_scanning = False
+        if self._scanner:
+            self._scanner.stop()
 
 
 class PLCDiscoveryService:
-    """Servicio de descubrimiento de PLCs"""
+    """Servicio de descubrimiento de PLCs
 
-    def __init__(self):
+    Con un DatabaseManager el inventario descubierto se conserva entre
+    ejecuciones: get_known_devices responde sin escanear, refresh_known
+    sondea sólo los conocidos y el resto del espacio de direcciones se barre
+    en segundo plano cada ``sweep_interval`` segundos.
+    """
+
+    def __init__(self, db_manager=None, port: int = 3200, sweep_interval: float = 3600):
         self.logger = logging.getLogger(__name__)
-        self.detector = PLCDetector()
+        self.cache = DiscoveryCache(db_manager, port) if db_manager is not None else None
+        self.detector = PLCDetector(port=port, cache=self.cache)
+        self.sweep_interval = sweep_interval
         self.is_discovering = False
+        # Un único escaneo a la vez: el detector es compartido
+        self._scan_lock = threading.Lock()
+        self._sweep_thread: Optional[threading.Thread] = None
+        self._sweep_stop = threading.Event()
+        self._sweeping = False
 
     def discover_plcs(self, target: str = "192.168.1.0/24",
                       discovery_type: str = "subnet",
@@ -169,7 +181,13 @@ class PLCDiscoveryService:
         Returns:
             Lista de dispositivos encontrados
         """
+        with self._scan_lock:
+            return self._discover(target, discovery_type, progress_callback)
+
+    def _discover(self, target: str, discovery_type: str,
+                  progress_callback: Optional[Callable]) -> List[Dict[str, Any]]:
         self.is_discovering = True
+        self.detector.last_diff = None
 
         try:
             if discovery_type == "subnet":
@@ -201,6 +219,101 @@ class PLCDiscoveryService:
         self.is_discovering = False
         self.detector.stop_scan()
 
+    @property
+    def last_diff(self) -> Optional[Dict[str, List[Dict[str, Any]]]]:
+        """Cambios detectados en el último escaneo (None sin caché)"""
+        return self.detector.last_diff
+
+    def get_known_devices(self, target: str = "192.168.1.0/24",
+                          discovery_type: str = "subnet") -> List[Dict[str, Any]]:
+        """Dispositivos conocidos del objetivo, al instante y sin escanear"""
+        if self.cache is None:
+            return []
+        try:
+            return self.cache.known(self._scope(target, discovery_type))
+        except ValueError as e:
+            self.logger.error(f"Objetivo de descubrimiento inválido {target}: {e}")
+            return []
+
+    def refresh_known(self, target: str = "192.168.1.0/24", discovery_type: str = "subnet",
+                      progress_callback: Optional[Callable] = None
+                      ) -> Dict[str, List[Dict[str, Any]]]:
+        """Sondea los dispositivos conocidos del objetivo y devuelve los cambios"""
+        empty = {"added": [], "removed": [], "changed": [], "unchanged": []}
+        if self.cache is None:
+            return empty
+        try:
+            scope = self._scope(target, discovery_type)
+        except ValueError as e:
+            self.logger.error(f"Objetivo de descubrimiento inválido {target}: {e}")
+            return empty
+        with self._scan_lock:
+            self.detector.last_diff = None
+            self.detector.rescan_known(scope, progress_callback)
+            return self.detector.last_diff or empty
+
+    def start_background_sweep(self, target: str = "192.168.1.0/24",
+                               discovery_type: str = "subnet",
+                               diff_callback: Optional[Callable] = None) -> bool:
+        """Barre el objetivo completo en segundo plano cada ``sweep_interval``
+
+        El primer barrido se hace cuando vence el intervalo desde el último
+        barrido completo registrado en la caché.
+
+        Args:
+            target: Rango de IPs o subred a barrer
+            discovery_type: Tipo de descubrimiento ("subnet", "range")
+            diff_callback: Callback con los cambios de cada barrido
+
+        Returns:
+            True si se inició el barrido, False si ya estaba en marcha
+        """
+        if self.cache is None or (self._sweep_thread and self._sweep_thread.is_alive()):
+            return False
+        scope = self._scope(target, discovery_type)
+        self._sweep_stop.clear()
+        self._sweep_thread = threading.Thread(
+            target=self._sweep_loop, args=(target, discovery_type, scope, diff_callback),
+            name="PLCDiscoverySweep", daemon=True)
+        self._sweep_thread.start()
+        return True
+
+    def stop_background_sweep(self):
+        """Detiene el barrido en segundo plano"""
+        self._sweep_stop.set()
+        if self._sweeping:
+            self.detector.stop_scan()
+        if self._sweep_thread and self._sweep_thread is not threading.current_thread():
+            self._sweep_thread.join(timeout=5)
+        self._sweep_thread = None
+
+    def _sweep_loop(self, target: str, discovery_type: str, scope: DiscoveryScope,
+                    diff_callback: Optional[Callable]):
+        """Bucle del barrido en segundo plano"""
+        while not self._sweep_stop.is_set():
+            delay = self.cache.last_sweep(scope) + self.sweep_interval - time.time()
+            if self._sweep_stop.wait(max(0.0, delay)):
+                break
+            with self._scan_lock:
+                self._sweeping = True
+                try:
+                    self._discover(target, discovery_type, None)
+                    diff = self.detector.last_diff
+                finally:
+                    self._sweeping = False
+            if diff is not None and diff_callback and not self._sweep_stop.is_set():
+                diff_callback(diff)
+            if self.cache.last_sweep(scope) + self.sweep_interval <= time.time():
+                # Barrido incompleto (detenido o fallido): no reintentar en bucle
+                self._sweep_stop.wait(self.sweep_interval)
+
+    def _scope(self, target: str, discovery_type: str) -> DiscoveryScope:
+        """Ámbito de la caché correspondiente a un objetivo de descubrimiento"""
+        if discovery_type == "range":
+            start_ip, end_ip = target.split("-")
+            return range_scope(start_ip.strip(), end_ip.strip())
+        return subnet_scope(target)
+
 
 def main():
     """Función de prueba para el descubrimiento de PLCs"""
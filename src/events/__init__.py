@@ -9,6 +9,8 @@ __version__ = "1.0.0"
 
 # Importaciones públicas
 from .event_manager import EventManager, Event, get_event_manager, emit_event, subscribe_event, unsubscribe_event
+from .event_stream import EventStreamBroker, StreamSubscriber
 
 __all__ = ["EventManager", "Event", "get_event_manager",
-           "emit_event", "subscribe_event", "unsubscribe_event"]
+           "emit_event", "subscribe_event", "unsubscribe_event",
+           "EventStreamBroker", "StreamSubscriber"]
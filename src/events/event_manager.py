@@ -5,8 +5,9 @@ Sistema de gestión de eventos para el Gateway Local
 """
 
 import threading
-import time
-from typing import Dict, List, Callable, Any, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Callable, Any, Optional, Deque, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
@@ -20,21 +21,73 @@ class Event:
     source: str
 
 
+# Políticas cuando la cola de eventos está llena
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_BLOCK = "block"
+OVERFLOW_POLICIES = (OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_NEWEST, OVERFLOW_BLOCK)
+
+
 class EventManager:
-    """Gestor de eventos del sistema"""
+    """Gestor de eventos del sistema
+
+    Los eventos se encolan en una cola acotada y un único hilo los despacha
+    por lotes. Los listeners se guardan como instantáneas inmutables por tipo
+    de evento que se reconstruyen al suscribir/desuscribir (copy-on-write),
+    de modo que el despacho no necesita tomar ningún lock.
+    """
+
+    def __init__(self, max_queue_size: int = 10000, batch_size: int = 256,
+                 overflow_policy: str = OVERFLOW_DROP_OLDEST, block_timeout: float = 0.5,
+                 listener_workers: int = 4):
+        """Inicializa el gestor de eventos
+
+        Args:
+            max_queue_size: Número máximo de eventos pendientes
+            batch_size: Eventos despachados por cada vuelta del worker
+            overflow_policy: "drop_oldest", "drop_newest" o "block"
+            block_timeout: Espera máxima con la política "block" (segundos)
+            listener_workers: Hilos del pool para listeners lentos
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Política de desbordamiento no soportada: {overflow_policy}")
+
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.listener_workers = listener_workers
+
+        # Suscripciones: tipo -> [(callback, threaded)]
+        self._listeners: Dict[str, List[Tuple[Callable, bool]]] = {}
+        # Instantáneas de despacho: tipo -> ((callback, threaded), ...)
+        self._dispatch_table: Dict[str, Tuple[Tuple[Callable, bool], ...]] = {}
+        self._wildcard_listeners: Tuple[Tuple[Callable, bool], ...] = ()
 
-    def __init__(self):
-        self._listeners: Dict[str, List[Callable]] = {}
         self._lock = threading.RLock()
-        self._event_queue: List[Event] = []
+        self._queue_lock = threading.Lock()
+        self._not_empty = threading.Condition(self._queue_lock)
+        self._not_full = threading.Condition(self._queue_lock)
+        self._event_queue: Deque[Event] = deque()
         self._running = False
         self._worker_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Estadísticas
+        self.emitted = 0
+        self.dispatched = 0
+        self.dropped = 0
+        self.last_dispatch_lag = 0.0
 
     def start(self) -> None:
         """Inicia el gestor de eventos"""
         with self._lock:
             if not self._running:
                 self._running = True
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.listener_workers,
+                    thread_name_prefix="event-listener")
                 self._worker_thread = threading.Thread(
                     target=self._event_worker, daemon=True)
                 self._worker_thread.start()
@@ -43,24 +96,53 @@ class EventManager:
         """Detiene el gestor de eventos"""
         with self._lock:
             self._running = False
+            with self._queue_lock:
+                self._not_empty.notify_all()
+                self._not_full.notify_all()
             if self._worker_thread and self._worker_thread.is_alive():
                 self._worker_thread.join(timeout=5)
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
 
-    def subscribe(self, event_type: str, callback: Callable[[Event], None]) -> None:
-        """Suscribe un callback a un tipo de evento"""
+    def subscribe(self, event_type: str, callback: Callable[[Event], None],
+                  threaded: bool = False) -> None:
+        """Suscribe un callback a un tipo de evento
+
+        Args:
+            event_type: Tipo de evento ("*" para todos)
+            callback: Función que recibe el evento
+            threaded: Ejecutar el callback en el pool de listeners (para
+                listeners lentos que no deben frenar el despacho)
+        """
         with self._lock:
             if event_type not in self._listeners:
                 self._listeners[event_type] = []
-            self._listeners[event_type].append(callback)
+            self._listeners[event_type].append((callback, threaded))
+            self._rebuild_dispatch_table()
 
     def unsubscribe(self, event_type: str, callback: Callable[[Event], None]) -> None:
         """Elimina la suscripción de un callback a un tipo de evento"""
         with self._lock:
             if event_type in self._listeners:
-                try:
-                    self._listeners[event_type].remove(callback)
-                except ValueError:
-                    pass
+                entries = self._listeners[event_type]
+                for index, (registered, _) in enumerate(entries):
+                    if registered == callback:
+                        del entries[index]
+                        break
+                if not entries:
+                    del self._listeners[event_type]
+                self._rebuild_dispatch_table()
+
+    def _rebuild_dispatch_table(self) -> None:
+        """Reconstruye las instantáneas de listeners (con el lock tomado)"""
+        wildcard = tuple(self._listeners.get("*", []))
+        self._dispatch_table = {
+            event_type: tuple(entries) + wildcard
+            for event_type, entries in self._listeners.items()
+            if event_type != "*"
+        }
+        self._wildcard_listeners = wildcard
 
     def emit(self, event_type: str, data: Dict[str, Any], source: str = "system") -> None:
         """Emite un evento"""
@@ -71,46 +153,83 @@ class EventManager:
             source=source
         )
 
-        with self._lock:
+        with self._queue_lock:
+            if len(self._event_queue) >= self.max_queue_size:
+                if self.overflow_policy == OVERFLOW_DROP_OLDEST:
+                    self._event_queue.popleft()
+                    self.dropped += 1
+                elif self.overflow_policy == OVERFLOW_BLOCK and self._running:
+                    self._not_full.wait_for(
+                        lambda: len(self._event_queue) < self.max_queue_size
+                        or not self._running,
+                        timeout=self.block_timeout)
+                if len(self._event_queue) >= self.max_queue_size:
+                    self.dropped += 1
+                    return
+
             self._event_queue.append(event)
+            self.emitted += 1
+            self._not_empty.notify()
+
+    @property
+    def queue_depth(self) -> int:
+        """Número de eventos pendientes de despachar"""
+        return len(self._event_queue)
 
     def _event_worker(self) -> None:
-        """Worker para procesar eventos en cola"""
-        while self._running:
-            try:
-                event = None
-                with self._lock:
-                    if self._event_queue:
-                        event = self._event_queue.pop(0)
-
-                if event:
+        """Worker para procesar eventos en cola por lotes"""
+        while True:
+            with self._queue_lock:
+                while self._running and not self._event_queue:
+                    self._not_empty.wait()
+                if not self._running:
+                    break
+                count = min(self.batch_size, len(self._event_queue))
+                batch = [self._event_queue.popleft() for _ in range(count)]
+                self._not_full.notify_all()
+
+            for event in batch:
+                try:
                     self._process_event(event)
+                except Exception as e:
+                    print(f"Error en worker de eventos: {e}")
 
-                time.sleep(0.01)  # Pequeña pausa para no consumir CPU
-            except Exception as e:
-                print(f"Error en worker de eventos: {e}")
-                time.sleep(1)
+            self.dispatched += len(batch)
+            self.last_dispatch_lag = (
+                datetime.now() - batch[-1].timestamp).total_seconds()
 
     def _process_event(self, event: Event) -> None:
         """Procesa un evento"""
-        # Notificar a los listeners específicos del tipo de evento
-        with self._lock:
-            listeners = self._listeners.get(event.event_type, []).copy()
+        # Instantánea inmutable: listeners específicos + generales
+        listeners = self._dispatch_table.get(
+            event.event_type, self._wildcard_listeners)
 
-        # Notificar a los listeners generales
-        with self._lock:
-            general_listeners = self._listeners.get("*", []).copy()
+        # Notificar a todos los listeners
+        for listener, threaded in listeners:
+            if threaded and self._executor:
+                self._executor.submit(self._notify, listener, event)
+            else:
+                self._notify(listener, event)
 
-        # Combinar listeners
-        all_listeners = listeners + general_listeners
+    def _notify(self, listener: Callable[[Event], None], event: Event) -> None:
+        """Notifica un evento a un listener capturando sus errores"""
+        try:
+            listener(event)
+        except Exception as e:
+            print(
+                f"Error notificando listener para evento {event.event_type}: {e}")
 
-        # Notificar a todos los listeners
-        for listener in all_listeners:
-            try:
-                listener(event)
-            except Exception as e:
-                print(
-                    f"Error notificando listener para evento {event.event_type}: {e}")
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas del despachador de eventos"""
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_size": self.max_queue_size,
+            "emitted": self.emitted,
+            "dispatched": self.dispatched,
+            "dropped": self.dropped,
+            "last_dispatch_lag": self.last_dispatch_lag,
+            "overflow_policy": self.overflow_policy
+        }
 
 
 # Instancia global del gestor de eventos
@@ -127,9 +246,10 @@ def emit_event(event_type: str, data: Dict[str, Any], source: str = "system") ->
     _event_manager.emit(event_type, data, source)
 
 
-def subscribe_event(event_type: str, callback: Callable[[Event], None]) -> None:
+def subscribe_event(event_type: str, callback: Callable[[Event], None],
+                    threaded: bool = False) -> None:
     """Suscribe un callback a un tipo de evento globalmente"""
-    _event_manager.subscribe(event_type, callback)
+    _event_manager.subscribe(event_type, callback, threaded)
 
 
 def unsubscribe_event(event_type: str, callback: Callable[[Event], None]) -> None:
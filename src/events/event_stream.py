@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Difusión de eventos en tiempo real (Server-Sent Events) para el Gateway Local
+"""
+
+import itertools
+import json
+import logging
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.events.event_manager import Event, EventManager
+
+# Tipos de evento enviados por defecto a los clientes del stream
+DEFAULT_STREAM_EVENT_TYPES = (
+    "plc.status_update",
+    "plc.command_sent",
+    "plc.command_error",
+    "plc.connected",
+    "plc.disconnected",
+    "plc.connection_error",
+    "plc.circuit_open",
+    "plc.circuit_closed",
+    "gateway.started",
+    "gateway.stopped"
+)
+
+
+def _matches(event_type: str, patterns: Tuple[str, ...]) -> bool:
+    """Comprueba un tipo de evento contra filtros exactos o "prefijo.*" """
+    for pattern in patterns:
+        if pattern == "*" or pattern == event_type:
+            return True
+        if pattern.endswith(".*") and event_type.startswith(pattern[:-1]):
+            return True
+    return False
+
+
+class StreamSubscriber:
+    """Cliente del stream con un buffer acotado propio"""
+
+    def __init__(self, subscriber_id: int, event_types: Tuple[str, ...],
+                 buffer_size: int):
+        self.subscriber_id = subscriber_id
+        self.event_types = event_types
+        self.buffer_size = buffer_size
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        self.delivered = 0
+
+        self._buffer: Deque[Tuple[int, Event]] = deque()
+        self._condition = threading.Condition()
+
+    def wants(self, event_type: str) -> bool:
+        """Indica si el cliente está suscrito a un tipo de evento"""
+        return _matches(event_type, self.event_types)
+
+    def offer(self, sequence: int, event: Event) -> bool:
+        """Encola un evento; devuelve False si el buffer está lleno"""
+        with self._condition:
+            if self.closed:
+                return True
+            if len(self._buffer) >= self.buffer_size:
+                return False
+            self._buffer.append((sequence, event))
+            self._condition.notify()
+            return True
+
+    def close(self, reason: str) -> None:
+        """Cierra el cliente y despierta al hilo que lo atiende"""
+        with self._condition:
+            if not self.closed:
+                self.closed = True
+                self.close_reason = reason
+            self._condition.notify_all()
+
+    def poll(self, timeout: float) -> List[Tuple[int, Event]]:
+        """Espera hasta ``timeout`` segundos y devuelve los eventos pendientes"""
+        with self._condition:
+            if not self._buffer and not self.closed:
+                self._condition.wait(timeout)
+            batch = list(self._buffer)
+            self._buffer.clear()
+        self.delivered += len(batch)
+        return batch
+
+    @property
+    def pending(self) -> int:
+        """Eventos pendientes de enviar"""
+        return len(self._buffer)
+
+
+class EventStreamBroker:
+    """Reparte los eventos del EventManager a los clientes del stream
+
+    Un único listener del EventManager copia cada evento en el buffer acotado
+    de los clientes interesados. Un cliente cuyo buffer se llena (consumidor
+    lento) se desconecta en lugar de frenar al resto o al despacho.
+    """
+
+    def __init__(self, event_manager: EventManager, buffer_size: int = 256,
+                 max_clients: int = 32, keepalive: float = 15.0,
+                 event_types: Optional[Iterable[str]] = None):
+        """Inicializa el broker
+
+        Args:
+            event_manager: Gestor de eventos del que recibir los eventos
+            buffer_size: Eventos pendientes máximos por cliente
+            max_clients: Número máximo de clientes simultáneos
+            keepalive: Segundos sin eventos tras los que se envía un keepalive
+            event_types: Tipos de evento por defecto (DEFAULT_STREAM_EVENT_TYPES)
+        """
+        self.event_manager = event_manager
+        self.buffer_size = buffer_size
+        self.max_clients = max_clients
+        self.keepalive = keepalive
+        self.event_types = tuple(event_types or DEFAULT_STREAM_EVENT_TYPES)
+        self.logger = logging.getLogger(__name__)
+
+        # Instantánea inmutable de clientes (copy-on-write)
+        self._subscribers: Tuple[StreamSubscriber, ...] = ()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count(1)
+        self._listening = False
+        self.evicted = 0
+
+    def subscribe(self, event_types: Optional[Iterable[str]] = None) -> Optional[StreamSubscriber]:
+        """Registra un cliente
+
+        Args:
+            event_types: Filtro de tipos ("plc.*" admite prefijos); por
+                defecto los del broker
+
+        Returns:
+            Cliente registrado, o None si se alcanzó ``max_clients``
+        """
+        types = tuple(event_types) if event_types else self.event_types
+        with self._lock:
+            if len(self._subscribers) >= self.max_clients:
+                return None
+            subscriber = StreamSubscriber(next(self._ids), types, self.buffer_size)
+            self._subscribers = self._subscribers + (subscriber,)
+            if not self._listening:
+                self.event_manager.subscribe("*", self._on_event)
+                self._listening = True
+        return subscriber
+
+    def unsubscribe(self, subscriber: StreamSubscriber) -> None:
+        """Elimina un cliente"""
+        subscriber.close("unsubscribed")
+        with self._lock:
+            self._subscribers = tuple(
+                s for s in self._subscribers if s is not subscriber)
+            if not self._subscribers and self._listening:
+                self.event_manager.unsubscribe("*", self._on_event)
+                self._listening = False
+
+    def close_all(self, reason: str = "shutdown") -> None:
+        """Cierra todos los clientes (por ejemplo al detener el servidor)"""
+        for subscriber in self._subscribers:
+            subscriber.close(reason)
+
+    def _on_event(self, event: Event) -> None:
+        """Listener del EventManager: copia el evento a cada cliente"""
+        sequence = next(self._sequence)
+        for subscriber in self._subscribers:
+            if subscriber.closed or not subscriber.wants(event.event_type):
+                continue
+            if not subscriber.offer(sequence, event):
+                self.evicted += 1
+                self.logger.warning(
+                    f"Cliente de stream {subscriber.subscriber_id} desconectado "
+                    f"por consumidor lento ({subscriber.buffer_size} eventos pendientes)")
+                subscriber.close("slow_consumer")
+
+    @staticmethod
+    def format_event(sequence: int, event: Event) -> str:
+        """Serializa un evento en formato Server-Sent Events"""
+        payload = json.dumps({
+            "event_type": event.event_type,
+            "source": event.source,
+            "timestamp": event.timestamp.isoformat(),
+            "data": event.data
+        }, default=str)
+        return f"id: {sequence}\nevent: {event.event_type}\ndata: {payload}\n\n"
+
+    def stream(self, subscriber: StreamSubscriber) -> Iterator[str]:
+        """Generador de mensajes SSE para un cliente
+
+        Envía un comentario de keepalive cada ``keepalive`` segundos sin
+        eventos y termina cuando el cliente se cierra (por ejemplo al ser
+        desconectado como consumidor lento).
+        """
+        try:
+            yield f"retry: 3000\n: conectado {subscriber.subscriber_id}\n\n"
+            while True:
+                batch = subscriber.poll(self.keepalive)
+                if batch:
+                    yield "".join(self.format_event(sequence, event)
+                                  for sequence, event in batch)
+                elif subscriber.closed:
+                    break
+                else:
+                    yield ": keepalive\n\n"
+                if subscriber.closed and not subscriber.pending:
+                    break
+
+            if subscriber.close_reason == "slow_consumer":
+                yield "event: stream.evicted\ndata: {\"reason\": \"slow_consumer\"}\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene estadísticas de los clientes del stream"""
+        subscribers = self._subscribers
+        return {
+            "clients": len(subscribers),
+            "max_clients": self.max_clients,
+            "buffer_size": self.buffer_size,
+            "evicted": self.evicted,
+            "pending": {s.subscriber_id: s.pending for s in subscribers}
+        }
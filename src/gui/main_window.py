@@ -14,6 +14,19 @@ from src.database.database_manager import DatabaseManager
 from src.core.gateway_core import GatewayCore
 from src.gui.dialogs import show_plc_dialog, show_scan_progress_dialog
 from src.discovery.plc_discovery import PLCDiscoveryService
+from src.events import subscribe_event, unsubscribe_event
+
+# Eventos que actualizan el dashboard y lo que suma cada uno a los
+# contadores (comandos, eventos) según lo que el gateway registra
+DASHBOARD_EVENT_COUNTS = {
+    "plc.status_update": (1, 1),
+    "plc.command_sent": (1, 1),
+    "plc.connected": (0, 1),
+    "plc.disconnected": (0, 1),
+    "plc.connection_error": (0, 1),
+    "gateway.started": (0, 1),
+    "gateway.stopped": (0, 1)
+}
 
 
 class GatewayGUI:
@@ -33,9 +46,11 @@ class GatewayGUI:
         # Variables de la interfaz
         self.plc_vars = {}
         self.config_vars = {}
+        self.commands_count = 0
+        self.events_count = 0
 
-        # Servicio de descubrimiento
-        self.discovery_service = PLCDiscoveryService()
+        # Servicio de descubrimiento (con la caché de PLCs conocidos)
+        self.discovery_service = PLCDiscoveryService(db_manager=self.db_manager)
 
         # Inicializar la interfaz
         self.setup_ui()
@@ -43,6 +58,13 @@ class GatewayGUI:
         # Cargar datos iniciales
         self.load_initial_data()
 
+        # Actualizar con los eventos del gateway en lugar de sondear
+        self._pending_lock = threading.Lock()
+        self._pending_counts = [0, 0]
+        self._refresh_pending = False
+        for event_type in DASHBOARD_EVENT_COUNTS:
+            subscribe_event(event_type, self._on_gateway_event)
+
     def setup_ui(self):
         """Configurar la interfaz de usuario"""
         # Crear el notebook (pestañas)
@@ -299,11 +321,11 @@ class GatewayGUI:
             stats = self.db_manager.get_database_stats()
 
             # Actualizar contadores
-            self.plc_count_label.config(text=str(stats.get("plc_count", 0)))
-            self.commands_count_label.config(
-                text=str(stats.get("command_count", 0)))
-            self.events_count_label.config(
-                text=str(stats.get("event_count", 0)))
+            self.commands_count = stats.get("commands_count", 0)
+            self.events_count = stats.get("events_count", 0)
+            self.plc_count_label.config(text=str(stats.get("plcs_count", 0)))
+            self.commands_count_label.config(text=str(self.commands_count))
+            self.events_count_label.config(text=str(self.events_count))
 
             # Actualizar estado del sistema
             if self.is_running:
@@ -541,6 +563,17 @@ class GatewayGUI:
                 else:
                     subnet = "192.168.1.0/24"
 
+            # PLCs conocidos: se muestran al instante, se vuelven a sondear
+            # y el resto de la subred se barre en segundo plano
+            known = self.discovery_service.get_known_devices(subnet)
+            if known:
+                self.root.after(0, self._handle_scan_results, known, progress_dialog)
+                diff = self.discovery_service.refresh_known(subnet)
+                self._queue_discovery_diff(diff)
+                self.discovery_service.start_background_sweep(
+                    subnet, diff_callback=self._queue_discovery_diff)
+                return
+
             # Callback para actualizar el progreso
             def progress_callback(current, total, device):
                 if not progress_dialog.is_cancelled:
@@ -557,15 +590,33 @@ class GatewayGUI:
                 progress_callback=progress_callback
             )
 
-            # Si no se canceló, mostrar resultados
+            # Si no se canceló, mostrar resultados y mantener el inventario al día
             if not progress_dialog.is_cancelled:
                 self.root.after(0, self._handle_scan_results,
                                 devices, progress_dialog)
+                self.discovery_service.start_background_sweep(
+                    subnet, diff_callback=self._queue_discovery_diff)
 
         except Exception as e:
             self.root.after(0, self.show_error,
                             f"Error durante el escaneo: {e}")
 
+    def _queue_discovery_diff(self, diff):
+        """Mostrar los cambios del inventario desde el hilo de escaneo"""
+        self.root.after(0, self._show_discovery_diff, diff)
+
+    def _show_discovery_diff(self, diff):
+        """Mostrar los cambios del inventario respecto al escaneo anterior"""
+        self.status_label.config(
+            text=f"Descubrimiento: {len(diff['added'])} nuevos, "
+                 f"{len(diff['removed'])} desaparecidos, {len(diff['changed'])} cambiados")
+        new_devices = diff["added"] + diff["changed"]
+        if new_devices and messagebox.askyesno(
+                "PLCs nuevos",
+                f"Se encontraron {len(new_devices)} PLC(s) nuevos o cambiados.\n\n"
+                "¿Desea agregarlos a la configuración?"):
+            self._add_discovered_plcs(new_devices)
+
     def _handle_scan_results(self, devices, progress_dialog):
         """Manejar los resultados del escaneo"""
         # Cerrar el diálogo de progreso
@@ -690,9 +741,41 @@ class GatewayGUI:
         messagebox.showerror("Error", message)
         self.status_label.config(text=f"Error: {message}")
 
+    def _on_gateway_event(self, event):
+        """Acumular un evento para el dashboard (hilo de eventos)"""
+        commands, events = DASHBOARD_EVENT_COUNTS.get(event.event_type, (0, 0))
+        with self._pending_lock:
+            self._pending_counts[0] += commands
+            self._pending_counts[1] += events
+            # Las ráfagas de eventos se agrupan en una sola actualización
+            if self._refresh_pending:
+                return
+            self._refresh_pending = True
+        self.root.after(1000, self._apply_gateway_events)
+
+    def _apply_gateway_events(self):
+        """Sumar los eventos acumulados a los contadores (hilo de la interfaz)
+
+        No consulta la base de datos: el gateway emite un evento por PLC en
+        cada sondeo. Los contadores se recalculan desde la base de datos con
+        refresh_dashboard (al iniciar, detener o pulsar Actualizar).
+        """
+        with self._pending_lock:
+            commands, events = self._pending_counts
+            self._pending_counts = [0, 0]
+            self._refresh_pending = False
+        self.commands_count += commands
+        self.events_count += events
+        self.commands_count_label.config(text=str(self.commands_count))
+        self.events_count_label.config(text=str(self.events_count))
+
     def run(self):
         """Ejecutar la aplicación"""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            for event_type in DASHBOARD_EVENT_COUNTS:
+                unsubscribe_event(event_type, self._on_gateway_event)
 
 
 def main():
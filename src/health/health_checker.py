@@ -31,13 +31,10 @@ class HealthChecker:
         }
 
     def _check_plc_connections(self) -> Dict[str, Any]:
-        """Verifica las conexiones a PLCs"""
-        connected_plcs = 0
-        total_plcs = len(self.gateway_core.plcs)
-
-        for plc in self.gateway_core.plcs.values():
-            if plc.is_connected():
-                connected_plcs += 1
+        """Verifica las conexiones a PLCs (estado en memoria del gestor de conexiones)"""
+        summary = self.gateway_core.connection_manager.get_summary()
+        connected_plcs = summary['connected']
+        total_plcs = summary['total']
 
         status = 'healthy' if connected_plcs == total_plcs else 'degraded'
         message = f'{connected_plcs}/{total_plcs} PLCs connected'
@@ -48,7 +45,8 @@ class HealthChecker:
             'message': message,
             'details': {
                 'connected': connected_plcs,
-                'total': total_plcs
+                'total': total_plcs,
+                'open_circuits': summary['open_circuits']
             },
             'timestamp': datetime.now().isoformat()
         }
@@ -58,7 +56,8 @@ class HealthChecker:
         try:
             import psutil
 
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Uso desde la llamada anterior: no bloquea la petición
+            cpu_percent = psutil.cpu_percent(interval=None)
             memory = psutil.virtual_memory()
             disk = psutil.disk_usage('/')
 
@@ -97,29 +96,20 @@ class HealthChecker:
             }
 
     def _check_network_connectivity(self) -> Dict[str, Any]:
-        """Verifica la conectividad de red"""
-        try:
-            import socket
-
-            # Verificar conectividad con algunos PLCs configurados
-            plc_configs = self.gateway_core.config_manager.get_plc_list()
-            reachable_count = 0
-            total_count = len(plc_configs)
-
-            for plc_config in plc_configs:
-                ip = plc_config.get('ip')
-                port = plc_config.get('port', 3200)
+        """Verifica la conectividad de red
 
-                try:
-                    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-                    sock.settimeout(5)
-                    result = sock.connect_ex((ip, port))
-                    sock.close()
-
-                    if result == 0:
-                        reachable_count += 1
-                except:
-                    pass
+        Usa el estado que mantiene el gestor de conexiones (keepalive,
+        comprobaciones de vida y circuit breaker) en lugar de abrir sockets,
+        de modo que no añade carga a la red de los PLCs.
+        """
+        try:
+            stats = self.gateway_core.connection_manager.get_stats()
+            total_count = len(stats)
+            reachable_count = sum(1 for state in stats.values() if state['connected'])
+            unreachable = {
+                plc_id: {'circuit': state['circuit'], 'last_error': state['last_error']}
+                for plc_id, state in stats.items() if not state['connected']
+            }
 
             status = 'healthy' if reachable_count == total_count else 'degraded'
             message = f'{reachable_count}/{total_count} PLCs reachable'
@@ -130,7 +120,8 @@ class HealthChecker:
                 'message': message,
                 'details': {
                     'reachable': reachable_count,
-                    'total': total_count
+                    'total': total_count,
+                    'unreachable': unreachable
                 },
                 'timestamp': datetime.now().isoformat()
             }
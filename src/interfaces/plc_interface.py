@@ -34,6 +34,17 @@ class PLCInterface(ABC):
         """
         pass
 
+    def probe(self) -> bool:
+        """Comprobación de vida barata de la conexión
+
+        No debe bloquear ni generar tráfico de aplicación hacia el PLC. Por
+        defecto se limita al estado de conexión conocido.
+
+        Returns:
+            True si la conexión sigue viva
+        """
+        return self.is_connected()
+
     @abstractmethod
     def send_command(self, command: int, argument: Optional[int] = None) -> Dict[str, Any]:
         """Envía un comando al PLC y devuelve la respuesta
@@ -60,7 +60,8 @@ def run_standalone():
         print("Gateway Local detenido")
 
 
-def run_with_api(host: Optional[str] = None, port: Optional[int] = None, debug: bool = False):
+def run_with_api(host: Optional[str] = None, port: Optional[int] = None, debug: bool = False,
+                 production: bool = False):
     """Ejecuta el gateway con API REST"""
     try:
         # Importar la API (solo si se necesita)
@@ -71,6 +72,19 @@ def run_with_api(host: Optional[str] = None, port: Optional[int] = None, debug:
         # Crear la API
         api = GatewayAPI()
 
+        if production:
+            # Parada ordenada: drenar peticiones y detener el gateway
+            def shutdown_handler(sig, frame):
+                print("\nRecibida señal de interrupción. Deteniendo API...")
+                api.shutdown()
+
+            signal.signal(signal.SIGINT, shutdown_handler)
+            signal.signal(signal.SIGTERM, shutdown_handler)
+
+            # Iniciar la API con el servidor de producción
+            api.serve(host, port)
+            return
+
         # Registrar manejador de señales
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
@@ -81,6 +95,8 @@ def run_with_api(host: Optional[str] = None, port: Optional[int] = None, debug:
     except ImportError as e:
         print(f"Error importando API: {e}")
         print("Asegúrese de tener Flask instalado: pip install flask")
+        if production:
+            print("El modo producción requiere waitress: pip install waitress")
         sys.exit(1)
     except Exception as e:
         print(f"Error fatal: {e}")
@@ -99,12 +115,15 @@ def main():
                         help="Puerto para la API")
     parser.add_argument("--debug", action="store_true",
                         help="Modo debug para la API")
+    parser.add_argument("--production", action="store_true",
+                        help="Servir la API con el servidor de producción")
 
     args = parser.parse_args()
 
     if args.api:
         run_with_api(args.host if args.host else None,
-                     args.port if args.port else None, args.debug)
+                     args.port if args.port else None, args.debug,
+                     args.production)
     else:
         run_standalone()
 
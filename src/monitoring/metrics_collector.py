@@ -4,12 +4,82 @@
 Colector de métricas para el Gateway Local
 """
 
-import time
+import gc
+import os
 import threading
 from typing import Dict, Any, List, Optional
 from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST, CollectorRegistry, REGISTRY
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 import json
 
+# Buckets para viajes de ida y vuelta a PLCs en red local (0.5 ms a 5 s)
+PLC_LATENCY_BUCKETS = (0.0005, 0.001, 0.002, 0.003, 0.005, 0.0075, 0.01, 0.025,
+                       0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# Buckets para consultas SQLite (0.1 ms a 1 s)
+DB_LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                      0.025, 0.05, 0.1, 0.25, 1.0)
+
+# Buckets para peticiones HTTP (API local, túnel y clientes salientes)
+HTTP_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+                        0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _RuntimeCollector:
+    """Métricas calculadas en cada lectura (scrape) de Prometheus
+
+    Expone el estado del despachador de eventos y del proceso sin necesidad
+    de un hilo de actualización periódica.
+    """
+
+    def __init__(self):
+        self.event_manager = None
+        try:
+            import psutil
+            self._process = psutil.Process(os.getpid())
+        except ImportError:
+            self._process = None
+
+    def collect(self):
+        event_manager = self.event_manager
+        if event_manager is not None:
+            yield GaugeMetricFamily(
+                'event_queue_depth', 'Eventos pendientes de despachar',
+                value=event_manager.queue_depth)
+            yield GaugeMetricFamily(
+                'event_dispatch_lag_seconds',
+                'Retraso entre la emisión y el despacho del último lote de eventos',
+                value=event_manager.last_dispatch_lag)
+            events = CounterMetricFamily(
+                'events', 'Eventos procesados por el despachador', labels=['result'])
+            events.add_metric(['emitted'], event_manager.emitted)
+            events.add_metric(['dispatched'], event_manager.dispatched)
+            events.add_metric(['dropped'], event_manager.dropped)
+            yield events
+
+        if self._process is not None:
+            try:
+                yield GaugeMetricFamily(
+                    'gateway_process_resident_memory_bytes',
+                    'Memoria residente del proceso', value=self._process.memory_info().rss)
+            except Exception:
+                pass
+        yield GaugeMetricFamily(
+            'gateway_process_threads', 'Hilos activos del proceso',
+            value=threading.active_count())
+
+        collections = CounterMetricFamily(
+            'gateway_gc_collections', 'Recolecciones del recolector de basura',
+            labels=['generation'])
+        objects = GaugeMetricFamily(
+            'gateway_gc_objects', 'Objetos rastreados por generación',
+            labels=['generation'])
+        for generation, (stats, count) in enumerate(zip(gc.get_stats(), gc.get_count())):
+            collections.add_metric([str(generation)], stats['collections'])
+            objects.add_metric([str(generation)], count)
+        yield collections
+        yield objects
+
 
 class MetricsCollector:
     """Colector de métricas para el Gateway Local"""
@@ -39,10 +109,27 @@ class MetricsCollector:
             'plc_connections', 'Número de conexiones PLC activas', registry=self.registry)
         self.plc_connection_errors = Counter(
             'plc_connection_errors', 'Número de errores de conexión a PLCs', registry=self.registry)
+        self.plc_circuit_state = Gauge(
+            'plc_circuit_state', 'Circuit breaker de cada PLC (0=cerrado, 1=semiabierto, 2=abierto)',
+            ['plc_id'], registry=self.registry)
         self.commands_sent = Counter(
             'commands_sent', 'Número de comandos enviados', ['plc_id', 'command'], registry=self.registry)
-        self.command_duration = Histogram(
-            'command_duration', 'Duración de comandos enviados', ['plc_id'], registry=self.registry)
+        self.plc_round_trip = Histogram(
+            'plc_round_trip_seconds', 'Tiempo de ida y vuelta de cada comando al PLC',
+            ['plc_id', 'command'], buckets=PLC_LATENCY_BUCKETS, registry=self.registry)
+        self.wms_heartbeats = Counter(
+            'wms_heartbeats', 'Heartbeats enviados al WMS', ['result'], registry=self.registry)
+
+        # Métricas de las colas de comandos por PLC
+        self.command_queue_depth = Gauge(
+            'plc_command_queue_depth', 'Peticiones pendientes en la cola de cada PLC',
+            ['plc_id'], registry=self.registry)
+        self.command_queue_wait = Histogram(
+            'plc_command_queue_wait_seconds', 'Espera en cola antes de enviar al PLC',
+            ['priority'], buckets=PLC_LATENCY_BUCKETS, registry=self.registry)
+        self.command_queue_outcomes = Counter(
+            'plc_command_queue_outcomes', 'Peticiones fusionadas, vencidas o rechazadas',
+            ['plc_id', 'outcome'], registry=self.registry)
 
         # Métricas de negocio
         self.position_changes = Counter(
@@ -50,9 +137,50 @@ class MetricsCollector:
         self.current_positions = Gauge(
             'current_positions', 'Posición actual de cada PLC', ['plc_id'], registry=self.registry)
 
+        # Métricas del planificador de sondeo de PLCs
+        self.plc_poll_duration = Histogram(
+            'plc_poll_duration_seconds', 'Duración del sondeo de estado de cada PLC', ['plc_id'],
+            buckets=PLC_LATENCY_BUCKETS, registry=self.registry)
+        self.plc_poll_missed_deadlines = Counter(
+            'plc_poll_missed_deadlines', 'Sondeos de PLC que superaron su plazo', ['plc_id'], registry=self.registry)
+
+        # Métricas de la cola de escritura diferida
+        self.db_write_queue_depth = Gauge(
+            'db_write_queue_depth', 'Filas pendientes en la cola de escritura diferida', registry=self.registry)
+        self.db_write_queue_dropped = Counter(
+            'db_write_queue_dropped', 'Filas descartadas por cola llena', ['policy'], registry=self.registry)
+        self.db_flush_duration = Histogram(
+            'db_flush_duration_seconds', 'Duración de cada vaciado por lotes a la base de datos',
+            buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+            registry=self.registry)
+        self.db_flushed_rows = Counter(
+            'db_flushed_rows', 'Filas escritas por la cola de escritura diferida', ['result'], registry=self.registry)
+        self.db_query_duration = Histogram(
+            'db_query_duration_seconds', 'Duración de las consultas a la base de datos',
+            ['operation', 'table'], buckets=DB_LATENCY_BUCKETS, registry=self.registry)
+
+        # Métricas de la API REST y del túnel inverso
+        self.http_request_duration = Histogram(
+            'http_request_duration_seconds', 'Duración de las peticiones a la API REST',
+            ['method', 'route', 'status'], buckets=HTTP_LATENCY_BUCKETS, registry=self.registry)
+        self.http_client_request_duration = Histogram(
+            'http_client_request_duration_seconds',
+            'Duración de las peticiones HTTP salientes por cliente y destino',
+            ['client', 'host', 'method', 'status'], buckets=HTTP_LATENCY_BUCKETS,
+            registry=self.registry)
+        self.telemetry_readings = Counter(
+            'telemetry_readings', 'Lecturas de telemetría por resultado del envío al WMS',
+            ['result'], registry=self.registry)
+        self.tunnel_poll_duration = Histogram(
+            'tunnel_poll_duration_seconds', 'Duración de cada consulta de comandos al WMS',
+            ['result'], buckets=HTTP_LATENCY_BUCKETS, registry=self.registry)
+
+        # Métricas del despachador de eventos y del proceso (en cada lectura)
+        self._runtime = _RuntimeCollector()
+        self.registry.register(self._runtime)
+
         # Estado interno
         self.running = False
-        self.metrics_thread = None
         self._initialized = True
 
     def start(self) -> None:
@@ -60,28 +188,14 @@ class MetricsCollector:
         self.running = True
         self.gateway_status.set(1)
 
-        # Iniciar hilo de actualización de métricas
-        self.metrics_thread = threading.Thread(
-            target=self._metrics_worker, daemon=True)
-        self.metrics_thread.start()
-
     def stop(self) -> None:
         """Detiene el colector de métricas"""
         self.running = False
         self.gateway_status.set(0)
 
-        if self.metrics_thread and self.metrics_thread.is_alive():
-            self.metrics_thread.join(timeout=5)
-
-    def _metrics_worker(self) -> None:
-        """Worker para actualización periódica de métricas"""
-        while self.running:
-            try:
-                # Aquí se podrían actualizar métricas del sistema
-                time.sleep(10)
-            except Exception as e:
-                print(f"Error en worker de métricas: {e}")
-                time.sleep(5)
+    def attach_event_manager(self, event_manager) -> None:
+        """Expone la profundidad de cola y el retraso de un EventManager"""
+        self._runtime.event_manager = event_manager
 
     def record_plc_connection(self, plc_id: str, connected: bool) -> None:
         """Registra el estado de conexión de un PLC"""
@@ -94,16 +208,78 @@ class MetricsCollector:
         """Registra un error de conexión"""
         self.plc_connection_errors.inc()
 
+    def record_circuit_state(self, plc_id: str, state: str) -> None:
+        """Registra el estado del circuit breaker de un PLC"""
+        value = {"closed": 0, "half_open": 1, "open": 2}.get(state, 0)
+        self.plc_circuit_state.labels(plc_id=plc_id).set(value)
+
+    def record_heartbeat(self, success: bool) -> None:
+        """Registra un heartbeat enviado al WMS"""
+        self.wms_heartbeats.labels(result="ok" if success else "error").inc()
+
     def record_command(self, plc_id: str, command: int, duration: float) -> None:
-        """Registra un comando enviado"""
+        """Registra un comando enviado y su tiempo de ida y vuelta"""
         self.commands_sent.labels(plc_id=plc_id, command=str(command)).inc()
-        self.command_duration.labels(plc_id=plc_id).observe(duration)
+        self.plc_round_trip.labels(plc_id=plc_id, command=str(command)).observe(duration)
+
+    def record_command_queue_depth(self, plc_id: str, depth: int) -> None:
+        """Registra la profundidad de la cola de comandos de un PLC"""
+        self.command_queue_depth.labels(plc_id=plc_id).set(depth)
+
+    def record_command_queue_wait(self, priority: str, wait: float) -> None:
+        """Registra la espera en cola de una petición"""
+        self.command_queue_wait.labels(priority=priority).observe(wait)
+
+    def record_command_queue_outcome(self, plc_id: str, outcome: str) -> None:
+        """Registra una petición fusionada, vencida o rechazada"""
+        self.command_queue_outcomes.labels(plc_id=plc_id, outcome=outcome).inc()
 
     def record_position_change(self, plc_id: str, new_position: int) -> None:
         """Registra un cambio de posición"""
         self.position_changes.labels(plc_id=plc_id).inc()
         self.current_positions.labels(plc_id=plc_id).set(new_position)
 
+    def record_plc_poll(self, plc_id: str, duration: Optional[float], missed: bool = False) -> None:
+        """Registra un sondeo de estado de un PLC (duration=None si no se ejecutó)"""
+        if duration is not None:
+            self.plc_poll_duration.labels(plc_id=plc_id).observe(duration)
+        if missed:
+            self.plc_poll_missed_deadlines.labels(plc_id=plc_id).inc()
+
+    def record_db_flush(self, duration: float, rows: int, queue_depth: int, success: bool = True) -> None:
+        """Registra un vaciado de la cola de escritura diferida"""
+        self.db_flush_duration.observe(duration)
+        self.db_flushed_rows.labels(
+            result="ok" if success else "error").inc(rows)
+        self.db_write_queue_depth.set(queue_depth)
+
+    def record_write_queue_drop(self, policy: str) -> None:
+        """Registra una fila descartada por la cola de escritura diferida"""
+        self.db_write_queue_dropped.labels(policy=policy).inc()
+
+    def record_db_query(self, operation: str, table: str, duration: float) -> None:
+        """Registra la duración de una consulta (operation = "read" o "write")"""
+        self.db_query_duration.labels(operation=operation, table=table).observe(duration)
+
+    def record_http_request(self, method: str, route: str, status: int, duration: float) -> None:
+        """Registra una petición a la API REST (route es la plantilla de la ruta)"""
+        self.http_request_duration.labels(
+            method=method, route=route, status=str(status)).observe(duration)
+
+    def record_http_client_request(self, client: str, host: str, method: str,
+                                   status: int, duration: float) -> None:
+        """Registra una petición HTTP saliente (WMS, túnel, microservicios)"""
+        self.http_client_request_duration.labels(
+            client=client, host=host, method=method, status=str(status)).observe(duration)
+
+    def record_tunnel_poll(self, result: str, duration: float) -> None:
+        """Registra una consulta de comandos al WMS (result = ok, empty o error)"""
+        self.tunnel_poll_duration.labels(result=result).observe(duration)
+
+    def record_telemetry(self, result: str, count: int = 1) -> None:
+        """Registra lecturas de telemetría (sent, spooled, coalesced, dropped o rejected)"""
+        self.telemetry_readings.labels(result=result).inc(count)
+
     def get_metrics_text(self) -> str:
         """Obtiene las métricas en formato texto para Prometheus"""
         return generate_latest(self.registry).decode('utf-8')
@@ -117,6 +293,7 @@ class MetricsCollector:
             "plc_connections": self.plc_connections._value.get(),
             "plc_connection_errors": self.plc_connection_errors._value.get(),
             "commands_sent": sum([child._value.get() for child in self.commands_sent._metrics.values()]),
+            "wms_heartbeats": sum([child._value.get() for child in self.wms_heartbeats._metrics.values()]),
             "position_changes": sum([child._value.get() for child in self.position_changes._metrics.values()])
         }
 
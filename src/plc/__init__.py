@@ -5,12 +5,14 @@ Paquete PLC para el Gateway Local
 
 # Importaciones públicas
 from .delta_plc import DeltaPLC
+from .async_delta_plc import AsyncDeltaPLC
 from .plc_factory import PLCFactory
 from .plc_simulator import PLCSimulator
 from .plc_discovery import PLCDiscovery, discover_plcs_on_network
 
 __all__ = [
     "DeltaPLC",
+    "AsyncDeltaPLC",
     "PLCFactory",
     "PLCSimulator",
     "PLCDiscovery",
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Implementación asíncrona (asyncio) para PLC Delta AS Series
+"""
+
+import asyncio
+import concurrent.futures
+import struct
+import threading
+import time
+import logging
+from typing import Any, Coroutine, Dict, Optional
+
+from src.interfaces.plc_interface import PLCInterface
+from src.plc.delta_plc import enable_tcp_keepalive
+
+# Respuesta del PLC: 2 bytes de estado + 2 de posición + 4 de tiempo
+RESPONSE_FORMAT = '>HHI'
+RESPONSE_SIZE = struct.calcsize(RESPONSE_FORMAT)
+
+# Comandos que pueden repetirse sin efectos secundarios tras reconectar
+IDEMPOTENT_COMMANDS = frozenset({0})  # 0 = ESTADO
+
+
+class _EventLoopThread:
+    """Bucle de eventos compartido que ejecuta la E/S de todos los PLCs"""
+
+    _instance: Optional["_EventLoopThread"] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run, name="plc-asyncio", daemon=True)
+        self._thread.start()
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    @property
+    def thread(self) -> threading.Thread:
+        return self._thread
+
+    @classmethod
+    def get(cls) -> "_EventLoopThread":
+        """Obtiene (o crea) el bucle compartido"""
+        with cls._instance_lock:
+            if cls._instance is None or not cls._instance.thread.is_alive():
+                cls._instance = cls()
+            return cls._instance
+
+
+def get_plc_event_loop() -> asyncio.AbstractEventLoop:
+    """Obtiene el bucle de eventos compartido por los AsyncDeltaPLC"""
+    return _EventLoopThread.get().loop
+
+
+class AsyncDeltaPLC(PLCInterface):
+    """Implementación para PLC Delta AS Series sobre streams de asyncio
+
+    Usa el mismo formato de tramas que DeltaPLC, pero lee la respuesta con
+    ``readexactly`` para no corromperla con lecturas parciales. Las
+    peticiones de una misma conexión se serializan con un ``asyncio.Lock``.
+
+    Las corrutinas ``*_async`` se pueden usar directamente desde un bucle de
+    eventos propio. Los métodos síncronos de PLCInterface las ejecutan en un
+    bucle compartido en segundo plano, de forma que un único hilo atiende a
+    todos los PLCs.
+    """
+
+    def __init__(self, ip: str, port: int = 3200, connect_timeout: float = 3.0,
+                 read_timeout: float = 2.0, reconnect: bool = True):
+        """Inicializa el PLC
+
+        Args:
+            ip: Dirección IP del PLC
+            port: Puerto del PLC (por defecto 3200)
+            connect_timeout: Tiempo máximo para establecer la conexión (segundos)
+            read_timeout: Tiempo máximo de espera de cada respuesta (segundos)
+            reconnect: Reconectar automáticamente al enviar si se perdió la conexión
+        """
+        self.ip = ip
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.reconnect = reconnect
+        self.connected = False
+        self.logger = logging.getLogger(__name__)
+
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _request_lock(self) -> asyncio.Lock:
+        """Lock de peticiones ligado al bucle en ejecución"""
+        loop = asyncio.get_running_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    # --- API asíncrona -------------------------------------------------
+
+    async def _open(self) -> bool:
+        """Abre la conexión TCP (sin tomar el lock)"""
+        await self._close()
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.ip, self.port),
+                timeout=self.connect_timeout)
+            sock = self._writer.get_extra_info("socket")
+            if sock is not None:
+                enable_tcp_keepalive(sock)
+            self.connected = True
+            return True
+        except (OSError, asyncio.TimeoutError) as e:
+            self.logger.warning(
+                f"Error conectando a PLC {self.ip}:{self.port} - {e}")
+            self.connected = False
+            return False
+
+    def _drop(self) -> Optional[asyncio.StreamWriter]:
+        """Descarta la conexión TCP sin esperar a que se cierre"""
+        writer = self._writer
+        self._reader = None
+        self._writer = None
+        self.connected = False
+        if writer is not None:
+            writer.close()
+        return writer
+
+    async def _close(self) -> None:
+        """Cierra la conexión TCP (sin tomar el lock)"""
+        writer = self._drop()
+        if writer is not None:
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def connect_async(self) -> bool:
+        """Establece conexión con el PLC"""
+        async with self._request_lock():
+            return await self._open()
+
+    async def disconnect_async(self) -> None:
+        """Cierra la conexión con el PLC"""
+        async with self._request_lock():
+            await self._close()
+
+    async def send_command_async(self, command: int,
+                                 argument: Optional[int] = None) -> Dict[str, Any]:
+        """Envía un comando al PLC y devuelve la respuesta
+
+        Si la conexión se pierde se reabre una vez. Los comandos no
+        idempotentes (MUEVETE) sólo se reintentan si el fallo ocurrió antes
+        de enviar la trama.
+
+        Args:
+            command: Código del comando (0=ESTADO, 1=MUEVETE)
+            argument: Argumento opcional del comando (posición para MUEVETE)
+
+        Returns:
+            Diccionario con la respuesta del PLC
+        """
+        if argument is not None:
+            message = struct.pack('>HH', command, argument)
+        else:
+            message = struct.pack('>H', command)
+
+        async with self._request_lock():
+            attempts = 2 if self.reconnect else 1
+            error = "PLC no conectado"
+
+            for _ in range(attempts):
+                if self._writer is None:
+                    if not self.reconnect or not await self._open():
+                        return {"success": False, "error": error}
+
+                sent = False
+                start_time = time.time()
+                try:
+                    self._writer.write(message)
+                    await self._writer.drain()
+                    sent = True
+                    response = await asyncio.wait_for(
+                        self._reader.readexactly(RESPONSE_SIZE),
+                        timeout=self.read_timeout)
+                except asyncio.TimeoutError:
+                    # Una respuesta tardía desincronizaría la siguiente petición
+                    error = f"Sin respuesta del PLC en {self.read_timeout}s"
+                    await self._close()
+                    return {"success": False, "error": error}
+                except asyncio.CancelledError:
+                    # Cancelada desde _run: por el mismo motivo se descarta la
+                    # conexión si la trama ya se había enviado
+                    if sent:
+                        self._drop()
+                    raise
+                except (asyncio.IncompleteReadError, OSError) as e:
+                    error = str(e) or "Conexión cerrada por el PLC"
+                    await self._close()
+                    if sent and command not in IDEMPOTENT_COMMANDS:
+                        return {"success": False, "error": error}
+                    continue
+
+                status, position, timestamp = struct.unpack(RESPONSE_FORMAT, response)
+                return {
+                    "success": True,
+                    "status_code": status,
+                    "position": position,
+                    "timestamp": timestamp,
+                    "response_time": time.time() - start_time
+                }
+
+            return {"success": False, "error": error}
+
+    async def get_status_async(self) -> Dict[str, Any]:
+        """Obtiene el estado actual del PLC"""
+        return await self.send_command_async(0)  # Comando 0 = ESTADO
+
+    async def move_to_position_async(self, position: int) -> Dict[str, Any]:
+        """Mueve el carrusel a una posición específica"""
+        return await self.send_command_async(1, position)  # Comando 1 = MUEVETE
+
+    # --- API síncrona (PLCInterface) -----------------------------------
+
+    @property
+    def sync_timeout(self) -> float:
+        """Espera máxima de los métodos síncronos (segundos)
+
+        Cubre una petición con todos sus intentos (apertura de la conexión y
+        lectura de la respuesta) más otra igual que ocupe el lock antes.
+        """
+        attempts = 2 if self.reconnect else 1
+        return 2 * attempts * (self.connect_timeout + self.read_timeout) + 1.0
+
+    def _run(self, coro: Coroutine, timeout_result: Any = None) -> Any:
+        """Ejecuta una corrutina en el bucle compartido y espera el resultado
+
+        Si no termina en ``sync_timeout`` se cancela (un MUEVETE que aún
+        esperaba el lock ya no se envía) y se devuelve ``timeout_result``.
+        """
+        runner = _EventLoopThread.get()
+        if threading.current_thread() is runner.thread:
+            coro.close()
+            raise RuntimeError(
+                "Use los métodos *_async desde el bucle de eventos de los PLCs")
+        future = asyncio.run_coroutine_threadsafe(coro, runner.loop)
+        try:
+            return future.result(self.sync_timeout)
+        except concurrent.futures.TimeoutError:
+            if not future.cancel():
+                # Terminó justo al agotarse la espera
+                return future.result()
+            self.logger.warning(
+                f"PLC {self.ip}:{self.port} sin respuesta en {self.sync_timeout:.1f}s")
+            return timeout_result
+
+    def _command_timeout(self) -> Dict[str, Any]:
+        return {"success": False,
+                "error": f"Sin respuesta del PLC en {self.sync_timeout:.1f}s"}
+
+    def connect(self) -> bool:
+        """Establece conexión con el PLC"""
+        return self._run(self.connect_async(), False)
+
+    def disconnect(self) -> None:
+        """Cierra la conexión con el PLC"""
+        self._run(self.disconnect_async())
+
+    def is_connected(self) -> bool:
+        """Verifica si hay conexión con el PLC"""
+        return self.connected
+
+    def probe(self) -> bool:
+        """Comprueba la conexión sin enviar tráfico al PLC"""
+        reader = self._reader
+        return self.connected and reader is not None and not reader.at_eof()
+
+    def send_command(self, command: int, argument: Optional[int] = None) -> Dict[str, Any]:
+        """Envía un comando al PLC y devuelve la respuesta"""
+        return self._run(self.send_command_async(command, argument),
+                         self._command_timeout())
+
+    def get_status(self) -> Dict[str, Any]:
+        """Obtiene el estado actual del PLC"""
+        return self._run(self.get_status_async(), self._command_timeout())
+
+    def move_to_position(self, position: int) -> Dict[str, Any]:
+        """Mueve el carrusel a una posición específica"""
+        return self._run(self.move_to_position_async(position),
+                         self._command_timeout())
@@ -4,13 +4,58 @@
 Implementación específica para PLC Delta AS Series
 """
 
+import select
 import socket
+import sys
+import threading
 import time
 import struct
 from typing import Dict, Any, Optional
 from src.interfaces.plc_interface import PLCInterface
 
 
+def enable_tcp_keepalive(sock: socket.socket, idle: int = 10, interval: int = 5,
+                         count: int = 3) -> None:
+    """Activa TCP keepalive para detectar PLCs caídos sin tráfico de aplicación
+
+    Con los valores por defecto una conexión muerta se detecta en unos
+    ``idle + interval * count`` = 25 segundos.
+
+    Args:
+        sock: Socket TCP conectado
+        idle: Inactividad antes del primer sondeo (segundos)
+        interval: Tiempo entre sondeos sin respuesta (segundos)
+        count: Sondeos sin respuesta antes de cerrar la conexión
+    """
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+    if sys.platform == "win32" and hasattr(socket, "SIO_KEEPALIVE_VALS"):
+        sock.ioctl(socket.SIO_KEEPALIVE_VALS, (1, idle * 1000, interval * 1000))
+        return
+    if hasattr(socket, "TCP_KEEPIDLE"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, idle)
+    elif hasattr(socket, "TCP_KEEPALIVE"):  # macOS
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPALIVE, idle)
+    if hasattr(socket, "TCP_KEEPINTVL"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, interval)
+    if hasattr(socket, "TCP_KEEPCNT"):
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_KEEPCNT, count)
+
+
+def socket_is_alive(sock: socket.socket) -> bool:
+    """Comprueba sin bloquear ni enviar datos si el extremo cerró la conexión
+
+    Un socket legible sin datos pendientes indica que el PLC cerró la
+    conexión (o que el keepalive la dio por muerta).
+    """
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+        if not readable:
+            return True
+        return sock.recv(1, socket.MSG_PEEK) != b""
+    except (OSError, ValueError):
+        return False
+
+
 class DeltaPLC(PLCInterface):
     """Implementación específica para PLC Delta AS Series"""
 
@@ -25,6 +70,8 @@ class DeltaPLC(PLCInterface):
         self.port = port
         self.socket: Optional[socket.socket] = None
         self.connected = False
+        # Una única petición en vuelo por socket
+        self._io_lock = threading.Lock()
 
     def connect(self) -> bool:
         """Establece conexión con el PLC"""
@@ -35,6 +82,7 @@ class DeltaPLC(PLCInterface):
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.settimeout(5)  # 5 segundos de timeout
             self.socket.connect((self.ip, self.port))
+            enable_tcp_keepalive(self.socket)
             self.connected = True
             return True
         except Exception as e:
@@ -56,6 +104,12 @@ class DeltaPLC(PLCInterface):
         """Verifica si hay conexión con el PLC"""
         return self.connected
 
+    def probe(self) -> bool:
+        """Comprueba la conexión sin enviar tráfico al PLC"""
+        if not self.connected or self.socket is None:
+            return False
+        return socket_is_alive(self.socket)
+
     def send_command(self, command: int, argument: Optional[int] = None) -> Dict[str, Any]:
         """Envía un comando al PLC y devuelve la respuesta
 
@@ -66,6 +120,11 @@ class DeltaPLC(PLCInterface):
         Returns:
             Diccionario con la respuesta del PLC
         """
+        with self._io_lock:
+            return self._send_command(command, argument)
+
+    def _send_command(self, command: int, argument: Optional[int]) -> Dict[str, Any]:
+        """Envía un comando y lee su respuesta (con el lock de E/S tomado)"""
         if not self.connected or self.socket is None:
             return {"success": False, "error": "PLC no conectado"}
 
@@ -81,10 +140,10 @@ class DeltaPLC(PLCInterface):
                 message = struct.pack('>H', command)
 
             # Enviar comando
-            self.socket.send(message)
+            self.socket.sendall(message)
 
             # Recibir respuesta (8 bytes: 2 de estado + 2 de posición + 4 de tiempo)
-            response = self.socket.recv(8)
+            response = self._recv_exact(8)
             status, position, timestamp = struct.unpack('>HHI', response)
 
             end_time = time.time()
@@ -97,9 +156,24 @@ class DeltaPLC(PLCInterface):
                 "timestamp": timestamp,
                 "response_time": response_time
             }
+        except (OSError, struct.error) as e:
+            # La conexión quedó inservible (o desincronizada): cerrarla para
+            # que el gestor de conexiones la restablezca
+            self.disconnect()
+            return {"success": False, "error": str(e) or type(e).__name__}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def _recv_exact(self, size: int) -> bytes:
+        """Lee exactamente ``size`` bytes (TCP puede fragmentar la respuesta)"""
+        buffer = bytearray()
+        while len(buffer) < size:
+            chunk = self.socket.recv(size - len(buffer))
+            if not chunk:
+                raise ConnectionError("Conexión cerrada por el PLC")
+            buffer += chunk
+        return bytes(buffer)
+
     def get_status(self) -> Dict[str, Any]:
         """Obtiene el estado actual del PLC"""
         return self.send_command(0)  # Comando 0 = ESTADO
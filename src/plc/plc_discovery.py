@@ -9,26 +9,36 @@ import threading
 import time
 import logging
 from typing import List, Dict, Any, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import ipaddress
 
 from .delta_plc import DeltaPLC
+from src.discovery.async_scanner import (AsyncPLCScanner, DEFAULT_CONCURRENCY,
+                                         count_ip_range, count_subnet_hosts,
+                                         iter_ip_range, iter_subnet_hosts)
+from src.discovery.discovery_cache import (DiscoveryCache, DiscoveryScope,
+                                           range_scope, subnet_scope)
 
 
 class PLCDiscovery:
     """Clase para descubrir automáticamente PLCs en la red"""
 
-    def __init__(self, port: int = 3200, timeout: int = 2):
+    def __init__(self, port: int = 3200, timeout: int = 2,
+                 cache: Optional[DiscoveryCache] = None):
         """Inicializa el descubridor de PLCs
 
         Args:
             port: Puerto donde escuchan los PLCs (por defecto 3200)
             timeout: Tiempo de espera para conexiones en segundos
+            cache: Caché de descubrimiento; con ella los PLCs conocidos se
+                sondean primero y ``last_diff`` recoge los cambios de cada
+                escaneo
         """
         self.port = port
         self.timeout = timeout
+        self.cache = cache
         self.logger = logging.getLogger(__name__)
         self.discovered_plcs: List[Dict[str, Any]] = []
+        self.last_diff: Optional[Dict[str, List[Dict[str, Any]]]] = None
 
     def scan_single_ip(self, ip: str) -> Optional[Dict[str, Any]]:
         """Escanea una única dirección IP en busca de un PLC
@@ -70,53 +80,103 @@ class PLCDiscovery:
                 f"IP {ip} no responde en puerto {self.port}: {e}")
             return None
 
-    def scan_ip_range(self, start_ip: str, end_ip: str, max_workers: int = 50) -> List[Dict[str, Any]]:
+    def scan_ip_range(self, start_ip: str, end_ip: str,
+                      max_workers: int = DEFAULT_CONCURRENCY) -> List[Dict[str, Any]]:
         """Escanea un rango de direcciones IP en busca de PLCs
 
         Args:
             start_ip: Dirección IP inicial del rango
             end_ip: Dirección IP final del rango
-            max_workers: Número máximo de hilos para el escaneo paralelo
+            max_workers: Número máximo de conexiones simultáneas
 
         Returns:
             Lista de diccionarios con información de PLCs encontrados
         """
         self.logger.info(f"Iniciando escaneo de rango {start_ip} - {end_ip}")
+        try:
+            total = count_ip_range(start_ip, end_ip)
+            targets = iter_ip_range(start_ip, end_ip)
+        except ValueError as e:
+            self.logger.error(
+                f"Error generando rango de IPs {start_ip} - {end_ip}: {e}")
+            return []
+        self.logger.info(f"Escaneando {total} direcciones IP")
 
-        # Generar lista de IPs en el rango
-        ip_list = self._generate_ip_range(start_ip, end_ip)
-        self.logger.info(f"Escaneando {len(ip_list)} direcciones IP")
-
-        discovered_plcs = []
-
-        # Usar ThreadPoolExecutor para escaneo paralelo
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Enviar todas las tareas
-            future_to_ip = {
-                executor.submit(self.scan_single_ip, ip): ip
-                for ip in ip_list
-            }
-
-            # Recolectar resultados
-            for future in as_completed(future_to_ip):
-                ip = future_to_ip[future]
-                try:
-                    result = future.result()
-                    if result:
-                        discovered_plcs.append(result)
-                        self.logger.info(f"PLC encontrado en {ip}")
-                except Exception as e:
-                    self.logger.error(f"Error escaneando {ip}: {e}")
+        discovered_plcs = self._scan(targets, total, max_workers,
+                                     range_scope(start_ip, end_ip))
 
         self.logger.info(
             f"Escaneo completado. {len(discovered_plcs)} PLCs encontrados")
         return discovered_plcs
 
-    def scan_local_network(self, max_workers: int = 50) -> List[Dict[str, Any]]:
+    def known_plcs(self, scope: Optional[DiscoveryScope] = None) -> List[Dict[str, Any]]:
+        """PLCs conocidos de la caché, sin escanear
+
+        Args:
+            scope: Limitar a un rango o subred (ver range_scope y subnet_scope)
+
+        Returns:
+            Lista de PLCs que respondieron en el último escaneo
+        """
+        if self.cache is None:
+            return []
+        return self.cache.known(scope)
+
+    def refresh_known(self, scope: Optional[DiscoveryScope] = None,
+                      max_workers: int = DEFAULT_CONCURRENCY) -> Dict[str, List[Dict[str, Any]]]:
+        """Vuelve a sondear sólo los PLCs conocidos y devuelve los cambios
+
+        Args:
+            scope: Limitar a un rango o subred (ver range_scope y subnet_scope)
+            max_workers: Número máximo de conexiones simultáneas
+
+        Returns:
+            Diccionario con las listas ``added``, ``removed``, ``changed`` y
+            ``unchanged``
+        """
+        if self.cache is None:
+            return {"added": [], "removed": [], "changed": [], "unchanged": []}
+        ips = [plc["ip"] for plc in self.cache.known(scope, online_only=False)]
+        self._scan(iter(ips), len(ips), max_workers, scope, sweep=False)
+        return self.last_diff
+
+    def _scan(self, targets, total: int, max_workers: int,
+              scope: Optional[DiscoveryScope] = None,
+              sweep: bool = True) -> List[Dict[str, Any]]:
+        """Escanea las direcciones con el motor asíncrono de descubrimiento"""
+        scanner = AsyncPLCScanner(port=self.port, connect_timeout=self.timeout,
+                                  probe_timeout=self.timeout, concurrency=max_workers)
+        if self.cache is not None and sweep:
+            targets = self.cache.known_first(targets, scope)
+        plcs = scanner.scan(targets, total, build_result=self._build_plc_info)
+        if self.cache is not None:
+            self.last_diff = self.cache.record(
+                plcs, scope, complete=scanner.stats["scanned"] >= total, sweep=sweep)
+        return plcs
+
+    def _build_plc_info(self, ip: str, port: int,
+                        status: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Información del PLC a partir de la respuesta al ESTADO
+
+        Un puerto abierto que no responde al protocolo Delta se descarta.
+        """
+        if status is None:
+            return None
+        return {
+            'ip': ip,
+            'port': port,
+            'connected': True,
+            'status': dict(status, success=True),
+            'position': status['position'],
+            'type': 'Delta AS Series',
+            'model': 'Unknown'  # Podría obtenerse con comandos adicionales
+        }
+
+    def scan_local_network(self, max_workers: int = DEFAULT_CONCURRENCY) -> List[Dict[str, Any]]:
         """Escanea la red local en busca de PLCs
 
         Args:
-            max_workers: Número máximo de hilos para el escaneo paralelo
+            max_workers: Número máximo de conexiones simultáneas
 
         Returns:
             Lista de diccionarios con información de PLCs encontrados
@@ -149,42 +209,6 @@ class PLCDiscovery:
             f"Escaneo de red local completado. {len(all_discovered_plcs)} PLCs encontrados")
         return all_discovered_plcs
 
-    def _generate_ip_range(self, start_ip: str, end_ip: str) -> List[str]:
-        """Genera una lista de direcciones IP en un rango
-
-        Args:
-            start_ip: Dirección IP inicial
-            end_ip: Dirección IP final
-
-        Returns:
-            Lista de direcciones IP en formato string
-        """
-        try:
-            start = ipaddress.ip_address(start_ip)
-            end = ipaddress.ip_address(end_ip)
-
-            # Verificar que ambas IPs sean del mismo tipo (IPv4 o IPv6)
-            if type(start) != type(end):
-                raise ValueError("Las direcciones IP deben ser del mismo tipo")
-
-            # Generar rango de IPs
-            ip_list = []
-            current_int = int(start)
-            end_int = int(end)
-
-            while current_int <= end_int:
-                if isinstance(start, ipaddress.IPv4Address):
-                    ip_list.append(str(ipaddress.IPv4Address(current_int)))
-                else:
-                    ip_list.append(str(ipaddress.IPv6Address(current_int)))
-                current_int += 1
-
-            return ip_list
-        except Exception as e:
-            self.logger.error(
-                f"Error generando rango de IPs {start_ip} - {end_ip}: {e}")
-            return []
-
     def _get_local_networks(self) -> List[str]:
         """Obtiene las redes locales del sistema
 
@@ -246,12 +270,13 @@ class PLCDiscovery:
         self.logger.info("Usando redes locales comunes para escaneo")
         return common_networks
 
-    def quick_scan_subnet(self, subnet: str, max_workers: int = 50) -> List[Dict[str, Any]]:
+    def quick_scan_subnet(self, subnet: str,
+                          max_workers: int = DEFAULT_CONCURRENCY) -> List[Dict[str, Any]]:
         """Escaneo rápido de una subred específica
 
         Args:
             subnet: Subred en formato CIDR (ej: 192.168.1.0/24)
-            max_workers: Número máximo de hilos para el escaneo paralelo
+            max_workers: Número máximo de conexiones simultáneas
 
         Returns:
             Lista de diccionarios con información de PLCs encontrados
@@ -259,32 +284,10 @@ class PLCDiscovery:
         self.logger.info(f"Iniciando escaneo rápido de subred {subnet}")
 
         try:
-            # Convertir subred a rango de IPs
-            network = ipaddress.ip_network(subnet, strict=False)
-
-            # Generar lista de IPs (excluyendo red y broadcast)
-            ip_list = [str(ip) for ip in network.hosts()]
-
-            discovered_plcs = []
-
-            # Usar ThreadPoolExecutor para escaneo paralelo
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                # Enviar todas las tareas
-                future_to_ip = {
-                    executor.submit(self.scan_single_ip, ip): ip
-                    for ip in ip_list
-                }
-
-                # Recolectar resultados
-                for future in as_completed(future_to_ip):
-                    ip = future_to_ip[future]
-                    try:
-                        result = future.result()
-                        if result:
-                            discovered_plcs.append(result)
-                            self.logger.info(f"PLC encontrado en {ip}")
-                    except Exception as e:
-                        self.logger.error(f"Error escaneando {ip}: {e}")
+            # Direcciones de host (excluyendo red y broadcast), generadas al vuelo
+            total = count_subnet_hosts(subnet)
+            discovered_plcs = self._scan(iter_subnet_hosts(subnet), total, max_workers,
+                                         subnet_scope(subnet))
 
             self.logger.info(
                 f"Escaneo de subred {subnet} completado. {len(discovered_plcs)} PLCs encontrados")
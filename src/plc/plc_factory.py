@@ -7,10 +7,12 @@ Fábrica para crear instancias de PLCs
 from typing import Dict, Type
 from src.interfaces.plc_interface import PLCInterface
 from src.plc.delta_plc import DeltaPLC
+from src.plc.async_delta_plc import AsyncDeltaPLC
 
 # Registro de tipos de PLCs disponibles
 PLC_TYPES: Dict[str, Type[PLCInterface]] = {
     "delta": DeltaPLC,
+    "delta_async": AsyncDeltaPLC,
     # Se pueden añadir más tipos de PLCs aquí
 }
 
@@ -12,12 +12,26 @@ import logging
 from typing import Dict, Any, Optional
 
 
+# Protocolos soportados por el simulador:
+# - "byte": 1 byte de comando + 1 de argumento, respuesta de 2 bytes (BB)
+# - "delta": tramas de DeltaPLC, 2 bytes de comando (+2 de argumento en
+#   MUEVETE) y respuesta de 8 bytes (>HHI: estado, posición, timestamp)
+PROTOCOL_BYTE = "byte"
+PROTOCOL_DELTA = "delta"
+
+
 class PLCSimulator:
     """Simulador de PLC Delta AS Series para pruebas locales"""
 
-    def __init__(self, host: str = "127.0.0.1", port: int = 3200):
+    def __init__(self, host: str = "127.0.0.1", port: int = 3200,
+                 protocol: str = PROTOCOL_BYTE, response_delay: float = 0.0):
+        if protocol not in (PROTOCOL_BYTE, PROTOCOL_DELTA):
+            raise ValueError(f"Protocolo no soportado: {protocol}")
+
         self.host = host
         self.port = port
+        self.protocol = protocol
+        self.response_delay = response_delay
         self.socket: Optional[socket.socket] = None
         self.running = False
         self.position = 0
@@ -31,7 +45,9 @@ class PLCSimulator:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
             self.socket.bind((self.host, self.port))
-            self.socket.listen(5)
+            # Permite port=0 para que el sistema asigne un puerto libre
+            self.port = self.socket.getsockname()[1]
+            self.socket.listen(64)
             self.running = True
 
             self.server_thread = threading.Thread(
@@ -98,6 +114,10 @@ class PLCSimulator:
         """Maneja las comunicaciones con un cliente"""
         self.clients.append(client_socket)
 
+        if self.protocol == PROTOCOL_DELTA:
+            self._delta_client_loop(client_socket, address)
+            return
+
         try:
             while self.running:
                 # Recibir comando
@@ -130,6 +150,52 @@ class PLCSimulator:
             except:
                 pass
 
+    def _recv_exact(self, client_socket: socket.socket, size: int) -> Optional[bytes]:
+        """Recibe exactamente ``size`` bytes o None si se cierra la conexión"""
+        data = b""
+        while len(data) < size:
+            chunk = client_socket.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+    def _delta_client_loop(self, client_socket: socket.socket, address: tuple) -> None:
+        """Atiende a un cliente con las tramas de DeltaPLC"""
+        try:
+            while self.running:
+                header = self._recv_exact(client_socket, 2)
+                if header is None:
+                    break
+                command = struct.unpack('>H', header)[0]
+
+                argument = None
+                if command == 1:  # MUEVETE lleva argumento de 2 bytes
+                    payload = self._recv_exact(client_socket, 2)
+                    if payload is None:
+                        break
+                    argument = struct.unpack('>H', payload)[0]
+
+                self.logger.debug(
+                    f"Comando recibido: {command}, Argumento: {argument}")
+
+                status = self._process_command(command, argument)[0]
+                if self.response_delay:
+                    time.sleep(self.response_delay)
+                client_socket.sendall(struct.pack(
+                    '>HHI', status, self.position, int(time.time()) & 0xFFFFFFFF))
+
+        except Exception as e:
+            if self.running:
+                self.logger.error(f"Error manejando cliente {address}: {e}")
+        finally:
+            if client_socket in self.clients:
+                self.clients.remove(client_socket)
+            try:
+                client_socket.close()
+            except:
+                pass
+
     def _process_command(self, command: int, argument: Optional[int] = None) -> bytes:
         """Procesa un comando y retorna la respuesta"""
         try:
@@ -168,13 +234,16 @@ def main():
                         help="Dirección IP para escuchar")
     parser.add_argument("--port", type=int, default=3200,
                         help="Puerto para escuchar")
+    parser.add_argument("--protocol", default=PROTOCOL_BYTE,
+                        choices=[PROTOCOL_BYTE, PROTOCOL_DELTA],
+                        help="Formato de tramas del simulador")
 
     args = parser.parse_args()
 
     print(f"Iniciando simulador de PLC en {args.host}:{args.port}")
     print("Presione Ctrl+C para detener")
 
-    simulator = PLCSimulator(args.host, args.port)
+    simulator = PLCSimulator(args.host, args.port, args.protocol)
 
     try:
         if not simulator.start():
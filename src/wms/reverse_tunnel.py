@@ -8,22 +8,48 @@ import asyncio
 import json
 import logging
 import time
-from typing import Dict, Any, Optional, Callable
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Deque, Dict, Any, List, Optional, Callable, Tuple
 from urllib.parse import urljoin
-import requests
-from threading import Thread
+from threading import Condition, Event, Lock, Thread
+
+from src.communication.http_pool import HTTPClientPool, get_http_pool
 
 
 class ReverseTunnel:
     """Túnel HTTP reverso para comunicación con WMS"""
 
-    def __init__(self, wms_endpoint: str, auth_token: str, gateway_id: str):
+    def __init__(self, wms_endpoint: str, auth_token: str, gateway_id: str,
+                 metrics_collector=None, telemetry_uplink=None,
+                 mode: str = "long_poll", long_poll_wait: float = 25.0,
+                 poll_interval: float = 5.0, heartbeat_interval: float = 60.0,
+                 max_workers: int = 8, result_batch_size: int = 50,
+                 result_linger: float = 0.05, idempotency_ttl: float = 600.0,
+                 idempotency_size: int = 10000,
+                 http_pool: Optional[HTTPClientPool] = None):
         """Inicializa el túnel reverso
 
         Args:
             wms_endpoint: URL base del WMS
             auth_token: Token de autenticación
             gateway_id: ID único del gateway
+            metrics_collector: Colector de métricas opcional
+            telemetry_uplink: TelemetryUplink para enviar los datos de
+                sensores por lotes (opcional)
+            mode: "long_poll" (el WMS retiene la consulta hasta que haya
+                comandos) o "poll" (consulta cada poll_interval segundos)
+            long_poll_wait: Segundos que el WMS puede retener cada consulta
+            poll_interval: Intervalo de sondeo cuando el WMS no retiene
+            heartbeat_interval: Intervalo entre heartbeats (segundos)
+            max_workers: Comandos de PLCs distintos ejecutados a la vez
+            result_batch_size: Resultados máximos por envío al WMS
+            result_linger: Segundos que se esperan más resultados antes de
+                enviar un lote
+            idempotency_ttl: Segundos que se recuerda un ID de comando para
+                descartar reentregas
+            idempotency_size: IDs de comando recordados como máximo
+            http_pool: Pool HTTP compartido (por defecto, el global)
         """
         self.wms_endpoint = wms_endpoint.rstrip('/')
         self.auth_token = auth_token
@@ -31,9 +57,46 @@ class ReverseTunnel:
         self.logger = logging.getLogger(__name__)
         self.running = False
         self.reconnect_interval = 30  # segundos
-        self.heartbeat_interval = 60  # segundos
+        self.heartbeat_interval = heartbeat_interval
+        self.mode = mode
+        self.long_poll_wait = long_poll_wait
+        self.poll_interval = poll_interval
         self.command_callback: Optional[Callable] = None
         self.worker_thread: Optional[Thread] = None
+        self.heartbeat_thread: Optional[Thread] = None
+        self._stop_event = Event()
+        # Sesiones sobre el pool compartido, una por hilo: canal de comandos,
+        # resultados y heartbeat (también datos de sensores sin uplink)
+        self.http_pool = http_pool or get_http_pool()
+        self.session = self.http_pool.session("tunnel")
+        self._result_session = self.http_pool.session("tunnel")
+        self._heartbeat_session = self.http_pool.session("tunnel")
+        self.metrics_collector = metrics_collector
+        self.telemetry_uplink = telemetry_uplink
+
+        # Ejecución concurrente: una "vía" por PLC conserva el orden de sus
+        # comandos mientras los de PLCs distintos avanzan en paralelo
+        self.max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lanes: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._lanes_lock = Lock()
+
+        # Caché de idempotencia: ID de comando -> (caducidad, resultado o
+        # None mientras se ejecuta)
+        self.idempotency_ttl = idempotency_ttl
+        self.idempotency_size = idempotency_size
+        self._seen: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+
+        # Confirmación de resultados por lotes
+        self.result_batch_size = result_batch_size
+        self.result_linger = result_linger
+        self._results: List[Dict[str, Any]] = []
+        self._results_ready = Condition()
+        self._batch_results = True
+        self.result_thread: Optional[Thread] = None
+
+        self.stats = {"dispatched": 0, "duplicates": 0, "results_sent": 0,
+                      "result_batches": 0, "results_dropped": 0}
 
     def set_command_callback(self, callback: Callable):
         """Establece el callback para manejar comandos entrantes"""
@@ -55,7 +118,7 @@ class ReverseTunnel:
                 'X-Gateway-ID': self.gateway_id
             }
 
-            response = requests.post(
+            response = self.session.post(
                 tunnel_url,
                 json=register_data,
                 headers=headers,
@@ -77,6 +140,7 @@ class ReverseTunnel:
     def start(self):
         """Inicia el túnel reverso"""
         self.running = True
+        self._stop_event.clear()
         self.logger.info("Iniciando túnel reverso...")
 
         # Conectar inicialmente
@@ -85,29 +149,80 @@ class ReverseTunnel:
                 "No se pudo establecer conexión inicial con el túnel")
             return
 
-        # Iniciar workers en un hilo separado
-        self.worker_thread = Thread(target=self._worker_loop, daemon=True)
+        # Canal de comandos, heartbeat y resultados en hilos separados
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="tunnel-command")
+        self.result_thread = Thread(target=self._result_loop, daemon=True,
+                                    name="tunnel-results")
+        self.result_thread.start()
+        self.worker_thread = Thread(target=self._worker_loop, daemon=True,
+                                    name="tunnel-commands")
         self.worker_thread.start()
+        self.heartbeat_thread = Thread(target=self._heartbeat_loop, daemon=True,
+                                       name="tunnel-heartbeat")
+        self.heartbeat_thread.start()
 
     def stop(self):
-        """Detiene el túnel reverso"""
+        """Detiene el túnel reverso
+
+        Una consulta larga en curso no se interrumpe: el hilo termina al
+        responder el WMS (como máximo long_poll_wait segundos). Los comandos
+        en ejecución no se esperan; los resultados ya disponibles se envían
+        antes de cerrar.
+        """
         self.running = False
-        if self.worker_thread and self.worker_thread.is_alive():
-            self.worker_thread.join(timeout=5)
+        self._stop_event.set()
+        for thread in (self.worker_thread, self.heartbeat_thread):
+            if thread and thread.is_alive():
+                thread.join(timeout=5)
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        with self._lanes_lock:
+            self._lanes.clear()
+        with self._results_ready:
+            self._results_ready.notify_all()
+        if self.result_thread and self.result_thread.is_alive():
+            self.result_thread.join(timeout=5)
         self.logger.info("Túnel reverso detenido")
 
     def _worker_loop(self):
-        """Bucle principal de workers"""
-        import time
+        """Bucle del canal de comandos
+
+        En modo long_poll cada consulta queda retenida en el WMS hasta que
+        haya comandos o venza long_poll_wait, y se vuelve a abrir en cuanto
+        responde. Si el WMS contesta sin retener la consulta (no admite
+        long-poll), las consultas vacías se espacian poll_interval segundos
+        como en el sondeo clásico.
+        """
+        failures = 0
         while self.running:
+            wait = self.long_poll_wait if self.mode == "long_poll" else 0
+            started = time.monotonic()
             try:
-                # Ejecutar heartbeat y verificación de comandos
-                self._send_heartbeat()
-                self._check_commands()
-                time.sleep(5)  # Ciclo cada 5 segundos
+                received = self._check_commands(wait)
             except Exception as e:
                 self.logger.error(f"Error en bucle de workers: {e}")
-                time.sleep(5)
+                received = None
+
+            if received is None:
+                # Error: reintentar con backoff sin saturar al WMS
+                failures += 1
+                delay = self.http_pool.backoff(
+                    failures, self.poll_interval, self.reconnect_interval)
+            else:
+                failures = 0
+                elapsed = time.monotonic() - started
+                held = wait > 0 and elapsed >= min(1.0, wait / 2)
+                delay = 0 if received or held else max(0.0, self.poll_interval - elapsed)
+            if delay:
+                self._stop_event.wait(delay)
+
+    def _heartbeat_loop(self):
+        """Envía heartbeats con su propio temporizador"""
+        while self.running:
+            self._send_heartbeat()
+            self._stop_event.wait(self.heartbeat_interval)
 
     def _send_heartbeat(self):
         """Envía heartbeat periódico"""
@@ -125,7 +240,7 @@ class ReverseTunnel:
                 'timestamp': time.time()
             }
 
-            response = requests.post(
+            response = self._heartbeat_session.post(
                 heartbeat_url,
                 json=heartbeat_data,
                 headers=headers,
@@ -139,8 +254,20 @@ class ReverseTunnel:
         except Exception as e:
             self.logger.error(f"Error en heartbeat: {e}")
 
-    def _check_commands(self):
-        """Verifica comandos pendientes del WMS"""
+    def _check_commands(self, wait: float = 0) -> Optional[bool]:
+        """Verifica comandos pendientes del WMS
+
+        Args:
+            wait: Segundos que el WMS puede retener la consulta esperando
+                comandos (0 = responder de inmediato)
+
+        Returns:
+            True si se recibieron comandos, False si no había y None si la
+            consulta falló
+        """
+        started = time.perf_counter()
+        polled = False
+        received: Optional[bool] = None
         try:
             headers = {
                 'Authorization': f'Bearer {self.auth_token}',
@@ -149,25 +276,101 @@ class ReverseTunnel:
 
             commands_url = urljoin(
                 self.wms_endpoint, '/api/v1/tunnel/commands')
-            response = requests.get(commands_url, headers=headers, timeout=30)
+            params = {'wait': wait} if wait > 0 else None
+            response = self.session.get(commands_url, headers=headers, params=params,
+                                        timeout=(10, wait + 30))
+            self._record_poll(started, "ok" if response.status_code == 200
+                              else "empty" if response.status_code == 204 else "error")
+            polled = True
 
             if response.status_code == 200:
+                received = False
                 try:
                     commands = response.json()
                     if commands and isinstance(commands, list):
+                        received = True
                         for command in commands:
-                            self._handle_command(command)
+                            self._dispatch_command(command)
                 except json.JSONDecodeError:
                     # 204 = No content (no commands)
                     if response.status_code != 204:
                         self.logger.warning(
                             f"Error decodificando comandos: {response.status_code}")
-            elif response.status_code != 204:  # 204 = No content (no commands)
+            elif response.status_code == 204:  # 204 = No content (no commands)
+                received = False
+            else:
                 self.logger.warning(
                     f"Error obteniendo comandos: {response.status_code}")
 
         except Exception as e:
+            if not polled:
+                self._record_poll(started, "error")
             self.logger.error(f"Error verificando comandos: {e}")
+        return received
+
+    def _record_poll(self, started: float, result: str) -> None:
+        """Registra la latencia de una consulta de comandos"""
+        if self.metrics_collector:
+            self.metrics_collector.record_tunnel_poll(
+                result, time.perf_counter() - started)
+
+    def _dispatch_command(self, command: Dict[str, Any]) -> None:
+        """Encola un comando en la vía de su PLC
+
+        Las reentregas de un comando ya recibido se descartan; si ya había
+        terminado se vuelve a confirmar su resultado, por si se perdió la
+        confirmación anterior.
+        """
+        command_id = command.get('id')
+        if command_id is not None:
+            command_id = str(command_id)
+            now = time.monotonic()
+            with self._lanes_lock:
+                self._expire_seen(now)
+                seen = self._seen.get(command_id)
+                if seen is None:
+                    self._seen[command_id] = (now + self.idempotency_ttl, None)
+                    while len(self._seen) > self.idempotency_size:
+                        self._seen.popitem(last=False)
+            if seen is not None:
+                self.stats["duplicates"] += 1
+                self.logger.info(f"Comando {command_id} repetido, se descarta")
+                if seen[1] is not None:
+                    self._queue_result(command_id, seen[1])
+                return
+
+        lane = str(command.get('plc_id') or '')
+        with self._lanes_lock:
+            self.stats["dispatched"] += 1
+            pending = self._lanes.get(lane)
+            if pending is not None:
+                pending.append(command)
+                return
+            self._lanes[lane] = deque([command])
+        executor = self._executor
+        if executor is None:
+            self._drain_lane(lane)
+        else:
+            executor.submit(self._drain_lane, lane)
+
+    def _drain_lane(self, lane: str) -> None:
+        """Ejecuta en orden los comandos pendientes de una vía"""
+        while True:
+            with self._lanes_lock:
+                pending = self._lanes.get(lane)
+                if not pending:
+                    self._lanes.pop(lane, None)
+                    return
+                command = pending.popleft()
+            self._handle_command(command)
+
+    def _expire_seen(self, now: float) -> None:
+        """Olvida los IDs de comando caducados (con el lock tomado)"""
+        while self._seen:
+            command_id, (expires_at, _) = next(iter(self._seen.items()))
+            if expires_at > now:
+                break
+            del self._seen[command_id]
 
     def _handle_command(self, command: Dict[str, Any]):
         """Maneja un comando recibido del WMS"""
@@ -180,7 +383,7 @@ class ReverseTunnel:
 
                 # Enviar resultado de vuelta al WMS
                 if 'id' in command:
-                    self._send_command_result(command['id'], result)
+                    self._queue_result(str(command['id']), result)
             else:
                 self.logger.warning(
                     "No hay callback registrado para manejar comandos")
@@ -188,12 +391,97 @@ class ReverseTunnel:
         except Exception as e:
             self.logger.error(f"Error manejando comando: {e}")
             if 'id' in command:
-                self._send_command_result(
-                    command['id'],
+                self._queue_result(
+                    str(command['id']),
                     {'success': False, 'error': str(e)}
                 )
 
-    def _send_command_result(self, command_id: str, result: Dict[str, Any]):
+    def _queue_result(self, command_id: str, result: Dict[str, Any]) -> None:
+        """Guarda el resultado en la caché de idempotencia y lo encola para el WMS"""
+        with self._lanes_lock:
+            if command_id in self._seen:
+                self._seen[command_id] = (self._seen[command_id][0], result)
+        with self._results_ready:
+            self._results.append({
+                'command_id': command_id,
+                'result': result,
+                'timestamp': time.time()
+            })
+            self._results_ready.notify()
+
+    def _result_loop(self):
+        """Envía los resultados al WMS agrupados en lotes"""
+        while True:
+            with self._results_ready:
+                self._results_ready.wait_for(
+                    lambda: self._results or not self.running)
+                if not self._results:
+                    return
+            if self.running and len(self._results) < self.result_batch_size:
+                # Dar margen a que terminen otros comandos del mismo lote
+                self._stop_event.wait(self.result_linger)
+            with self._results_ready:
+                batch = self._results[:self.result_batch_size]
+                del self._results[:len(batch)]
+            self._send_results(batch)
+
+    def _send_results(self, batch: List[Dict[str, Any]]) -> None:
+        """Envía un lote de resultados; si el WMS no admite lotes, uno a uno
+
+        Un lote que no se pudo entregar no se reintenta: el WMS volverá a
+        entregar esos comandos y la caché de idempotencia responderá con el
+        resultado guardado sin ejecutarlos de nuevo.
+        """
+        if self._batch_results:
+            try:
+                headers = {
+                    'Authorization': f'Bearer {self.auth_token}',
+                    'Content-Type': 'application/json',
+                    'X-Gateway-ID': self.gateway_id
+                }
+                results_url = urljoin(
+                    self.wms_endpoint, '/api/v1/tunnel/commands/results')
+                response = self._result_session.post(
+                    results_url,
+                    json={'gateway_id': self.gateway_id, 'results': batch},
+                    headers=headers,
+                    timeout=30
+                )
+                if response.status_code == 200:
+                    self.stats["results_sent"] += len(batch)
+                    self.stats["result_batches"] += 1
+                    return
+                if response.status_code in (404, 405):
+                    self.logger.info(
+                        "El WMS no admite resultados por lotes, se envían uno a uno")
+                    self._batch_results = False
+                else:
+                    self.logger.error(
+                        f"Error enviando lote de resultados: {response.status_code}")
+                    self.stats["results_dropped"] += len(batch)
+                    return
+            except Exception as e:
+                self.logger.error(f"Error enviando lote de resultados: {e}")
+                self.stats["results_dropped"] += len(batch)
+                return
+
+        for item in batch:
+            if self._send_command_result(item['command_id'], item['result']):
+                self.stats["results_sent"] += 1
+            else:
+                self.stats["results_dropped"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene la instrumentación del canal de comandos"""
+        with self._lanes_lock:
+            active_lanes = len(self._lanes)
+            remembered = len(self._seen)
+        with self._results_ready:
+            pending_results = len(self._results)
+        return dict(self.stats, active_lanes=active_lanes,
+                    remembered_ids=remembered, pending_results=pending_results)
+
+    def _send_command_result(self, command_id: str, result: Dict[str, Any]) -> bool:
         """Envía el resultado de un comando al WMS"""
         try:
             headers = {
@@ -212,7 +500,7 @@ class ReverseTunnel:
                 'timestamp': time.time()
             }
 
-            response = requests.post(
+            response = self._result_session.post(
                 result_url,
                 json=result_data,
                 headers=headers,
@@ -222,12 +510,21 @@ class ReverseTunnel:
             if response.status_code != 200:
                 self.logger.error(
                     f"Error enviando resultado de comando: {response.status_code}")
+                return False
+            return True
 
         except Exception as e:
             self.logger.error(f"Error enviando resultado de comando: {e}")
+            return False
 
     def send_sensor_data(self, sensor_data: Dict[str, Any]) -> bool:
-        """Envía datos de sensores al WMS a través del túnel"""
+        """Envía datos de sensores al WMS a través del túnel
+
+        Con un TelemetryUplink los datos se encolan para el próximo lote.
+        """
+        if self.telemetry_uplink is not None:
+            self.telemetry_uplink.submit(sensor_data)
+            return True
         try:
             headers = {
                 'Authorization': f'Bearer {self.auth_token}',
@@ -243,7 +540,7 @@ class ReverseTunnel:
                 'timestamp': time.time()
             }
 
-            response = requests.post(
+            response = self._heartbeat_session.post(
                 sensor_url,
                 json=data,
                 headers=headers,
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Envío de telemetría al WMS por lotes comprimidos con cola local en disco
+"""
+
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from urllib.parse import urljoin
+
+import requests
+
+from src.communication.http_pool import (HTTPClientPool, RETRYABLE_STATUS,
+                                         backoff_delay, get_http_pool)
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional
+    zstandard = None
+
+_EXTENSIONS = {"gzip": ".gz", "zstd": ".zst"}
+
+
+class TelemetryUplink:
+    """Agrupa lecturas de sensores y las envía al WMS en lotes comprimidos
+
+    Las lecturas se acumulan en memoria y se envían al alcanzar
+    ``batch_size`` o cada ``flush_interval`` segundos, en una sola petición
+    comprimida sobre una sesión HTTP keep-alive. Las lecturas con la misma
+    clave se fusionan dentro del lote (sólo viaja la última).
+
+    Si el WMS no responde tras los reintentos, el lote se guarda en un
+    directorio local y se reenvía, en orden, en cuanto vuelve la
+    conectividad; mientras queden lotes en disco los nuevos se encolan
+    detrás de ellos.
+    """
+
+    def __init__(self, base_url: str, auth_token: str, gateway_id: str,
+                 path: str = "/api/v1/gateways/sensor-data/batch",
+                 batch_size: int = 500, flush_interval: float = 5.0,
+                 max_buffer: int = 10000, compression: str = "gzip",
+                 spool_dir: str = "telemetry_spool",
+                 max_spool_bytes: int = 100 * 1024 * 1024,
+                 max_retries: int = 3, backoff_base: float = 1.0,
+                 backoff_max: float = 60.0, timeout: float = 10.0,
+                 session: Optional[requests.Session] = None,
+                 http_pool: Optional[HTTPClientPool] = None,
+                 metrics_collector=None):
+        """Inicializa el envío de telemetría
+
+        Args:
+            base_url: URL base del WMS
+            auth_token: Token de autenticación
+            gateway_id: ID único del gateway
+            path: Ruta del endpoint de lotes
+            batch_size: Lecturas por lote
+            flush_interval: Tiempo máximo de una lectura en memoria (segundos)
+            max_buffer: Lecturas máximas en memoria (se descartan las más antiguas)
+            compression: "gzip" o "zstd" (requiere el paquete zstandard)
+            spool_dir: Directorio de la cola local en disco
+            max_spool_bytes: Tamaño máximo de la cola en disco
+            max_retries: Reintentos de cada envío antes de guardarlo en disco
+            backoff_base: Espera tras el primer fallo (segundos)
+            backoff_max: Espera máxima entre reintentos (segundos)
+            timeout: Timeout de cada petición HTTP (segundos)
+            session: Sesión HTTP a reutilizar (opcional)
+            http_pool: Pool HTTP compartido del que tomar la sesión si no se
+                indica una (por defecto, el global)
+            metrics_collector: Colector donde publicar la instrumentación
+        """
+        self.url = urljoin(base_url.rstrip('/') + '/', path.lstrip('/'))
+        self.gateway_id = gateway_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self.spool_dir = spool_dir
+        self.max_spool_bytes = max_spool_bytes
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.metrics_collector = metrics_collector
+        self.logger = logging.getLogger(__name__)
+
+        if compression == "zstd" and zstandard is None:
+            self.logger.warning("zstandard no está instalado; se usará gzip")
+            compression = "gzip"
+        if compression not in _EXTENSIONS:
+            raise ValueError(f"Compresión no soportada: {compression}")
+        self.compression = compression
+
+        if session is None:
+            session = (http_pool or get_http_pool()).session("telemetry")
+        self.session = session
+        self.headers = {
+            'Authorization': f'Bearer {auth_token}',
+            'Content-Type': 'application/json',
+            'Content-Encoding': compression,
+            'X-Gateway-ID': gateway_id
+        }
+
+        self._buffer: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self._oldest_at: Optional[float] = None
+        self._unkeyed = 0
+        spooled = self._spool_files()
+        self._spool_count = len(spooled)
+        # Numeración creciente también entre reinicios del gateway
+        self._sequence = int(time.time() * 1000)
+        if spooled:
+            self._sequence = max(self._sequence, int(spooled[-1].split(".")[0]))
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._flush_requested = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._next_attempt = 0.0
+        self._failures = 0
+
+        self.stats = {
+            "submitted": 0, "coalesced": 0, "dropped": 0, "sent": 0,
+            "batches_sent": 0, "batches_spooled": 0, "batches_rejected": 0,
+            "spool_dropped": 0
+        }
+
+    # --- API pública ---------------------------------------------------
+
+    def submit(self, reading: Dict[str, Any], key: Optional[Hashable] = None) -> None:
+        """Añade una lectura al lote en curso sin bloquear
+
+        Args:
+            reading: Lectura serializable a JSON
+            key: Clave de fusión; una lectura pendiente con la misma clave se
+                reemplaza por ésta
+        """
+        with self._lock:
+            self.stats["submitted"] += 1
+            if key is not None and key in self._buffer:
+                del self._buffer[key]
+                self.stats["coalesced"] += 1
+                self._record("coalesced")
+            elif len(self._buffer) >= self.max_buffer:
+                self._buffer.popitem(last=False)
+                self.stats["dropped"] += 1
+                self._record("dropped")
+            if key is None:
+                self._unkeyed += 1
+                key = ("_", self._unkeyed)
+            self._buffer[key] = reading
+            if self._oldest_at is None:
+                self._oldest_at = time.monotonic()
+                self._wakeup.notify()  # Empieza a contar flush_interval
+            elif len(self._buffer) >= self.batch_size:
+                self._wakeup.notify()
+
+    def start(self) -> None:
+        """Inicia el hilo de envío"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(
+                target=self._uplink_worker, name="telemetry-uplink", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Detiene el envío; lo pendiente se envía o se guarda en disco"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._wakeup.notify_all()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+
+    def flush(self) -> None:
+        """Solicita el envío inmediato del lote en curso"""
+        with self._lock:
+            self._flush_requested = True
+            self._wakeup.notify()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Obtiene la instrumentación del envío"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats["buffered"] = len(self._buffer)
+            stats["spooled_batches"] = self._spool_count
+        return stats
+
+    # --- Hilo de envío -------------------------------------------------
+
+    def _uplink_worker(self) -> None:
+        """Forma los lotes y los envía o los guarda en disco"""
+        while True:
+            with self._lock:
+                while self._running and not self._batch_ready():
+                    self._wakeup.wait(self._wait_time())
+                running = self._running
+                # Al detenerse se envía (o se guarda) todo lo pendiente
+                readings = self._take_batch(everything=not running)
+
+            if readings:
+                self._deliver(self._encode(readings), len(readings), final=not running)
+            elif running and time.monotonic() >= self._next_attempt:
+                self._replay_spool()
+
+            if not running:
+                break
+
+    def _batch_ready(self) -> bool:
+        """Indica si hay que cerrar el lote (con el lock tomado)"""
+        if self._flush_requested or len(self._buffer) >= self.batch_size:
+            return True
+        if self._oldest_at is not None:
+            return time.monotonic() - self._oldest_at >= self.flush_interval
+        # Sin lecturas: despertar para reenviar la cola en disco
+        return self._spool_count > 0 and time.monotonic() >= self._next_attempt
+
+    def _wait_time(self) -> Optional[float]:
+        """Tiempo hasta el próximo motivo para despertar (con el lock tomado)"""
+        if self._oldest_at is not None:
+            return max(0.01, self._oldest_at + self.flush_interval - time.monotonic())
+        if self._spool_count:
+            return max(0.01, self._next_attempt - time.monotonic())
+        return None
+
+    def _take_batch(self, everything: bool = False) -> List[Dict[str, Any]]:
+        """Extrae las lecturas del próximo lote (con el lock tomado)"""
+        self._flush_requested = False
+        count = len(self._buffer) if everything else min(self.batch_size, len(self._buffer))
+        readings = [self._buffer.popitem(last=False)[1] for _ in range(count)]
+        self._oldest_at = time.monotonic() if self._buffer else None
+        return readings
+
+    def _encode(self, readings: List[Dict[str, Any]]) -> bytes:
+        """Serializa y comprime un lote"""
+        self._sequence += 1
+        payload = json.dumps({
+            "gateway_id": self.gateway_id,
+            "sequence": self._sequence,
+            "created_at": time.time(),
+            "readings": readings
+        }, separators=(",", ":"), default=str).encode("utf-8")
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor().compress(payload)
+        return gzip.compress(payload, compresslevel=6)
+
+    def _deliver(self, body: bytes, count: int, final: bool = False) -> None:
+        """Envía un lote respetando el orden de la cola en disco"""
+        if self._spool_count:
+            # Con lotes en disco, el nuevo va detrás para conservar el orden
+            self._spool(body, count)
+            if not final and time.monotonic() >= self._next_attempt:
+                self._replay_spool()
+            return
+
+        result = self._post(body, retries=0 if final else self.max_retries)
+        if result == "sent":
+            self._sent(count)
+        elif result == "rejected":
+            self._rejected(count)
+        else:
+            self._spool(body, count)
+
+    def _replay_spool(self) -> bool:
+        """Reenvía en orden los lotes guardados en disco
+
+        Returns:
+            True si la cola en disco quedó vacía
+        """
+        for filename in self._spool_files():
+            path = os.path.join(self.spool_dir, filename)
+            try:
+                with open(path, "rb") as f:
+                    body = f.read()
+            except OSError:
+                continue
+            result = self._post(body, retries=0)
+            if result == "error":
+                return False
+            if result == "sent":
+                self.logger.info(f"Lote de telemetría {filename} reenviado desde disco")
+                self.stats["batches_sent"] += 1
+            else:
+                self.stats["batches_rejected"] += 1
+            self._remove_spooled(filename)
+        return True
+
+    def _post(self, body: bytes, retries: int) -> str:
+        """Envía un lote con reintentos; devuelve "sent", "rejected" o "error" """
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(self._backoff(attempt))
+            try:
+                response = self.session.post(
+                    self.url, data=body, headers=self.headers, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                self.logger.warning(f"Error enviando telemetría al WMS: {e}")
+                continue
+            if response.status_code < 300:
+                self._failures = 0
+                self._next_attempt = 0.0
+                return "sent"
+            if response.status_code not in RETRYABLE_STATUS:
+                # Un lote rechazado bloquearía la cola: se descarta (un 404
+                # suele indicar un WMS sin el endpoint de lotes)
+                self.logger.warning(
+                    f"WMS rechazó el lote de telemetría ({response.status_code} en "
+                    f"{self.url}); se descarta")
+                return "rejected"
+            self.logger.warning(f"WMS no disponible: {response.status_code}")
+
+        self._failures += 1
+        self._next_attempt = time.monotonic() + self._backoff(self._failures)
+        return "error"
+
+    def _backoff(self, failures: int) -> float:
+        """Espera con jitter tras ``failures`` fallos"""
+        return backoff_delay(failures, self.backoff_base, self.backoff_max)
+
+    # --- Cola en disco -------------------------------------------------
+
+    def _spool_files(self) -> List[str]:
+        """Ficheros de la cola en disco, del más antiguo al más reciente"""
+        try:
+            names = os.listdir(self.spool_dir)
+        except OSError:
+            return []
+        return sorted(name for name in names
+                      if name.endswith(_EXTENSIONS[self.compression]))
+
+    def _remove_spooled(self, filename: str) -> None:
+        """Elimina un lote de la cola en disco"""
+        try:
+            os.remove(os.path.join(self.spool_dir, filename))
+        except OSError:
+            pass
+        with self._lock:
+            self._spool_count = max(0, self._spool_count - 1)
+
+    def _spool(self, body: bytes, count: int) -> None:
+        """Guarda un lote en disco (escritura atómica)"""
+        try:
+            os.makedirs(self.spool_dir, exist_ok=True)
+            name = f"{self._sequence:016d}{_EXTENSIONS[self.compression]}"
+            path = os.path.join(self.spool_dir, name)
+            with open(path + ".tmp", "wb") as f:
+                f.write(body)
+            os.replace(path + ".tmp", path)
+            with self._lock:
+                self._spool_count += 1
+            self.stats["batches_spooled"] += 1
+            self._record("spooled", count)
+            self._trim_spool()
+        except OSError as e:
+            self.logger.error(f"Error guardando telemetría en disco: {e}")
+            self.stats["dropped"] += count
+            self._record("dropped", count)
+
+    def _trim_spool(self) -> None:
+        """Descarta los lotes más antiguos si la cola supera su tamaño máximo"""
+        files = self._spool_files()
+        sizes: List[Tuple[str, int]] = []
+        for name in files:
+            try:
+                sizes.append((name, os.path.getsize(os.path.join(self.spool_dir, name))))
+            except OSError:
+                pass
+        total = sum(size for _, size in sizes)
+        for name, size in sizes[:-1]:
+            if total <= self.max_spool_bytes:
+                break
+            self._remove_spooled(name)
+            total -= size
+            self.stats["spool_dropped"] += 1
+            self.logger.warning(f"Cola de telemetría llena: descartado {name}")
+
+    # --- Instrumentación -----------------------------------------------
+
+    def _sent(self, count: int) -> None:
+        self.stats["sent"] += count
+        self.stats["batches_sent"] += 1
+        self._record("sent", count)
+
+    def _rejected(self, count: int) -> None:
+        self.stats["batches_rejected"] += 1
+        self._record("rejected", count)
+
+    def _record(self, result: str, count: int = 1) -> None:
+        if self.metrics_collector:
+            self.metrics_collector.record_telemetry(result, count)
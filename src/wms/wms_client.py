@@ -10,22 +10,28 @@ import logging
 from typing import Dict, Any, Optional
 from urllib.parse import urljoin
 
+from src.communication.http_pool import HTTPClientPool, get_http_pool
+
 
 class WMSClient:
     """Cliente para comunicación con el WMS Cloud"""
 
-    def __init__(self, base_url: str, auth_token: str):
+    def __init__(self, base_url: str, auth_token: str, telemetry_uplink=None,
+                 http_pool: Optional[HTTPClientPool] = None):
         """Inicializa el cliente WMS
 
         Args:
             base_url: URL base del WMS Cloud
             auth_token: Token de autenticación
+            telemetry_uplink: TelemetryUplink para enviar los datos de
+                sensores por lotes (opcional)
+            http_pool: Pool HTTP compartido (por defecto, el global)
         """
         self.base_url = base_url.rstrip('/')
         self.auth_token = auth_token
+        self.telemetry_uplink = telemetry_uplink
         self.logger = logging.getLogger(__name__)
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.session = (http_pool or get_http_pool()).session("wms", headers={
             'Authorization': f'Bearer {auth_token}',
             'Content-Type': 'application/json'
         })
@@ -70,12 +76,17 @@ class WMSClient:
     def send_sensor_data(self, sensor_data: Dict[str, Any]) -> bool:
         """Envía datos de sensores al WMS
 
+        Con un TelemetryUplink los datos se encolan para el próximo lote.
+
         Args:
             sensor_data: Datos de sensores de PLCs
 
         Returns:
-            bool: True si los datos fueron enviados exitosamente
+            bool: True si los datos fueron enviados (o encolados) exitosamente
         """
+        if self.telemetry_uplink is not None:
+            self.telemetry_uplink.submit(sensor_data)
+            return True
         try:
             url = urljoin(self.base_url, '/api/v1/gateways/sensor-data')
             response = self.session.post(url, json=sensor_data, timeout=10)
@@ -8,7 +8,7 @@ REM Cambiar al directorio src
 cd src
 
 REM Iniciar el gateway con API REST
-python main.py --api --host 0.0.0.0 --port 8080
+python main.py --api --production --host 0.0.0.0 --port 8080
 
 REM Volver al directorio anterior
 cd ..
\ No newline at end of file
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Utilidades compartidas por las pruebas
+"""
+
+import threading
+import time
+
+from src.interfaces.plc_interface import PLCInterface
+
+
+def wait_until(predicate, timeout: float = 3.0, interval: float = 0.01) -> bool:
+    """Espera hasta que se cumpla una condición o se agote el tiempo"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(interval)
+    return predicate()
+
+
+class FakePLC(PLCInterface):
+    """PLC falso cuya latencia, disponibilidad y avance controla la prueba
+
+    Registra los comandos recibidos (``received``), las llamadas
+    (``calls``), los intentos de conexión y la concurrencia máxima
+    (``max_active``).
+    """
+
+    def __init__(self, delay: float = 0.0, connected: bool = True,
+                 available: bool = True, gated: bool = False):
+        """Inicializa el PLC falso
+
+        Args:
+            delay: Latencia de cada comando (segundos)
+            connected: Estado de conexión inicial
+            available: Si es False, las conexiones y los comandos fallan
+            gated: Los comandos esperan (hasta 2 s) a que la prueba abra ``gate``
+        """
+        self.delay = delay
+        self.connected = connected
+        self.available = available
+        self.gate = threading.Event()
+        if not gated:
+            self.gate.set()
+        self.received = []
+        self.calls = 0
+        self.connect_attempts = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def connect(self) -> bool:
+        self.connect_attempts += 1
+        self.connected = self.available
+        return self.connected
+
+    def disconnect(self) -> None:
+        self.connected = False
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def send_command(self, command, argument=None):
+        with self._lock:
+            self.calls += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        self.gate.wait(2)
+        with self._lock:
+            self.active -= 1
+            self.received.append((command, argument))
+        return {"success": self.available, "status_code": 0,
+                "position": argument or 0, "response_time": self.delay}
+
+    def get_status(self):
+        return self.send_command(0)
+
+    def move_to_position(self, position):
+        return self.send_command(1, position)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el transporte asyncio de PLC Delta
+"""
+
+import sys
+import os
+import asyncio
+import socket
+import struct
+import threading
+import unittest
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.plc.async_delta_plc import AsyncDeltaPLC, get_plc_event_loop  # noqa: E402
+from src.plc.plc_factory import PLCFactory  # noqa: E402
+from src.plc.plc_simulator import PLCSimulator, PROTOCOL_DELTA  # noqa: E402
+
+
+class TestAsyncDeltaPLC(unittest.TestCase):
+    """Pruebas para AsyncDeltaPLC contra el simulador"""
+
+    def setUp(self):
+        self.simulator = PLCSimulator(port=0, protocol=PROTOCOL_DELTA)
+        self.assertTrue(self.simulator.start())
+        self.plc = AsyncDeltaPLC("127.0.0.1", self.simulator.port,
+                                 connect_timeout=1.0, read_timeout=1.0)
+
+    def tearDown(self):
+        self.plc.disconnect()
+        self.simulator.stop()
+
+    def test_sync_interface(self):
+        """Verifica la interfaz síncrona sobre el bucle compartido"""
+        self.assertTrue(self.plc.connect())
+        self.assertTrue(self.plc.is_connected())
+
+        status = self.plc.get_status()
+        self.assertTrue(status["success"])
+        self.assertEqual(status["position"], 0)
+
+        result = self.plc.move_to_position(7)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["position"], 7)
+
+    def test_concurrent_requests_are_serialized(self):
+        """Verifica que peticiones concurrentes no mezclen respuestas"""
+        async def scenario():
+            plc = AsyncDeltaPLC("127.0.0.1", self.simulator.port)
+            await plc.connect_async()
+            results = await asyncio.gather(
+                *(plc.get_status_async() for _ in range(50)))
+            await plc.disconnect_async()
+            return results
+
+        results = asyncio.run(scenario())
+        self.assertTrue(all(r["success"] for r in results))
+
+    def test_reconnects_after_connection_loss(self):
+        """Verifica la reconexión automática tras perder la conexión"""
+        self.assertTrue(self.plc.connect())
+        self.assertTrue(self.plc.get_status()["success"])
+
+        # El PLC cierra la conexión por su lado
+        for client_socket in list(self.simulator.clients):
+            client_socket.shutdown(socket.SHUT_RDWR)
+            client_socket.close()
+
+        status = self.plc.get_status()
+        self.assertTrue(status["success"])
+        self.assertTrue(self.plc.is_connected())
+
+    def test_read_timeout(self):
+        """Verifica el timeout de lectura ante un PLC que no responde"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        accepted = []
+        threading.Thread(target=lambda: accepted.append(server.accept()),
+                         daemon=True).start()
+
+        plc = AsyncDeltaPLC("127.0.0.1", server.getsockname()[1],
+                            read_timeout=0.2, reconnect=False)
+        try:
+            self.assertTrue(plc.connect())
+            result = plc.get_status()
+            self.assertFalse(result["success"])
+            self.assertFalse(plc.is_connected())
+        finally:
+            for conn, _ in accepted:
+                conn.close()
+            server.close()
+
+    def test_sync_timeout_cancels_request(self):
+        """Verifica que una petición que agota la espera se cancele"""
+        plc = AsyncDeltaPLC("127.0.0.1", self.simulator.port,
+                            connect_timeout=0.1, read_timeout=0.1)
+        self.assertTrue(plc.connect())
+        release = threading.Event()
+
+        async def hold_lock():
+            async with plc._request_lock():
+                while not release.is_set():
+                    await asyncio.sleep(0.01)
+
+        # Otra petición ocupa la conexión más de lo previsto
+        holder = asyncio.run_coroutine_threadsafe(hold_lock(), get_plc_event_loop())
+        try:
+            result = plc.move_to_position(9)
+            self.assertEqual(result["success"], False)
+            self.assertIn("error", result)
+        finally:
+            release.set()
+            holder.result(5)
+
+        # El MUEVETE cancelado no llega a enviarse
+        status = plc.get_status()
+        self.assertTrue(status["success"])
+        self.assertEqual(status["position"], 0)
+        plc.disconnect()
+
+    def test_partial_response_is_reassembled(self):
+        """Verifica que una respuesta fragmentada se lea completa"""
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+
+        def serve():
+            conn, _ = server.accept()
+            conn.recv(2)
+            response = struct.pack('>HHI', 0, 42, 123)
+            conn.sendall(response[:3])
+            threading.Event().wait(0.05)
+            conn.sendall(response[3:])
+            conn.close()
+
+        threading.Thread(target=serve, daemon=True).start()
+        plc = AsyncDeltaPLC("127.0.0.1", server.getsockname()[1])
+        try:
+            self.assertTrue(plc.connect())
+            status = plc.get_status()
+            self.assertTrue(status["success"])
+            self.assertEqual(status["position"], 42)
+            self.assertEqual(status["timestamp"], 123)
+        finally:
+            plc.disconnect()
+            server.close()
+
+    def test_factory_registration(self):
+        """Verifica que la fábrica cree el PLC asíncrono"""
+        plc = PLCFactory.create_plc("DELTA_ASYNC", "127.0.0.1", 3200)
+        self.assertIsInstance(plc, AsyncDeltaPLC)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el envío de lotes de comandos del GatewayCore
+"""
+
+import sys
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.gateway_core import GatewayCore  # noqa: E402
+from src.database.database_manager import DatabaseManager  # noqa: E402
+from tests.helpers import FakePLC  # noqa: E402
+
+
+class TestCommandBatch(unittest.TestCase):
+    """Pruebas para GatewayCore.send_commands"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        config_file = os.path.join(self.temp_dir, "gateway_config.json")
+        with open(config_file, "w") as f:
+            json.dump({"logging": {"file": os.path.join(self.temp_dir, "gateway.log")}}, f)
+
+        self.database = DatabaseManager(os.path.join(self.temp_dir, "gateway.db"))
+        with patch("src.core.gateway_core.get_database_manager",
+                   return_value=self.database):
+            self.core = GatewayCore(config_file)
+
+    def tearDown(self):
+        self.core.db_writer.stop()
+        self.database.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_fan_out_is_concurrent(self):
+        """Verifica que los comandos a distintos PLCs se envíen en paralelo"""
+        for index in range(8):
+            self.core.plcs[f"PLC-{index}"] = FakePLC(delay=0.2)
+
+        start = time.time()
+        result = self.core.send_command("STATUS")
+        elapsed = time.time() - start
+
+        self.assertEqual(len(result["results"]), 8)
+        self.assertTrue(all(r["success"] for r in result["results"].values()))
+        self.assertLess(elapsed, 1.0)
+
+    def test_per_plc_order_is_preserved(self):
+        """Verifica el orden de los comandos de un mismo PLC"""
+        plc = FakePLC(delay=0.01)
+        self.core.plcs["PLC-1"] = plc
+
+        items = [{"plc_id": "PLC-1", "command": "MOVE", "argument": position}
+                 for position in range(10)]
+        result = self.core.send_commands(items)
+
+        self.assertEqual(result["completed"], 10)
+        self.assertEqual([argument for _, argument in plc.received], list(range(10)))
+        self.assertEqual(plc.max_active, 1)
+
+    def test_deadline_returns_partial_results(self):
+        """Verifica que el plazo devuelva los resultados parciales"""
+        self.core.plcs["FAST"] = FakePLC()
+        self.core.plcs["SLOW"] = FakePLC(delay=0.5)
+
+        result = self.core.send_commands([
+            {"plc_id": "FAST", "command": "STATUS"},
+            {"plc_id": "SLOW", "command": "STATUS"},
+            {"plc_id": "MISSING", "command": "STATUS"}
+        ], deadline=0.2)
+
+        fast, slow, missing = [entry["result"] for entry in result["results"]]
+        self.assertTrue(fast["success"])
+        self.assertTrue(slow["timed_out"])
+        self.assertIn("no encontrado", missing["error"])
+        self.assertEqual(result["timed_out"], 1)
+
+    def test_commands_are_recorded(self):
+        """Verifica que los comandos y eventos del lote queden registrados"""
+        self.core.plcs["PLC-1"] = FakePLC()
+        self.core.send_commands([
+            {"plc_id": "PLC-1", "command": "MOVE", "argument": 3},
+            {"plc_id": "PLC-1", "command": "NOPE"}
+        ])
+        self.core.db_writer.flush()
+
+        commands = self.database.get_commands(plc_id="PLC-1")
+        self.assertEqual(len(commands), 1)
+        self.assertEqual(commands[0]["argument"], 3)
+
+    def test_commands_keep_their_own_timestamp(self):
+        """Verifica que cada comando del lote conserve su marca de tiempo"""
+        self.core.plcs["PLC-1"] = FakePLC()
+        stamps = (f"2026-01-01 00:00:{second:02d}" for second in range(60))
+        with patch("src.core.gateway_core.utc_timestamp", side_effect=lambda: next(stamps)):
+            self.core.send_commands([
+                {"plc_id": "PLC-1", "command": "MOVE", "argument": 1},
+                {"plc_id": "PLC-1", "command": "MOVE", "argument": 2}
+            ])
+        self.core.db_writer.flush()
+
+        commands = self.database.get_commands(plc_id="PLC-1")
+        self.assertEqual(sorted((c["argument"], c["timestamp"]) for c in commands),
+                         [(1, "2026-01-01 00:00:00"), (2, "2026-01-01 00:00:01")])
+
+    def test_open_circuit_skips_scheduled_poll(self):
+        """Verifica que el sondeo no acceda al PLC con el circuito abierto"""
+        plc = FakePLC()
+        self.core.plcs["PLC-1"] = plc
+        manager = self.core.connection_manager
+        manager.reset_timeout = 0.2
+        manager.add_plc("PLC-1", plc)
+        for _ in range(manager.failure_threshold):
+            manager.record_result("PLC-1", False, "timeout")
+
+        status = self.core._poll_plc_status("PLC-1", plc)
+        self.assertTrue(status["circuit_open"])
+        self.core._handle_plc_status("PLC-1", status)
+        self.assertEqual(plc.received, [])
+        self.assertEqual(manager.get_stats()["PLC-1"]["consecutive_failures"],
+                         manager.failure_threshold)
+
+        # El sondeo rechazado no prolonga el circuito abierto
+        time.sleep(0.25)
+        status = self.core._poll_plc_status("PLC-1", plc)
+        self.assertTrue(status["success"])
+        self.assertEqual(plc.received, [(0, None)])
+
+    def test_stop_cancels_running_batch(self):
+        """Verifica que al detener el gateway no se envíen más comandos del lote"""
+        plc = FakePLC(delay=0.05)
+        self.core.plcs["PLC-1"] = plc
+        items = [{"plc_id": "PLC-1", "command": "MOVE", "argument": position}
+                 for position in range(20)]
+        results = []
+        batch = threading.Thread(
+            target=lambda: results.append(self.core.send_commands(items)))
+        batch.start()
+        time.sleep(0.12)
+
+        self.core.running = True
+        self.core.stop()
+        sent = len(plc.received)
+        batch.join(5)
+
+        self.assertLess(sent, 20)
+        time.sleep(0.1)
+        self.assertEqual(len(plc.received), sent)
+        entries = [entry["result"] for entry in results[0]["results"]]
+        self.assertEqual(entries[-1]["error"], "Gateway detenido")
+
+        # Tras detenerlo (stop() desconecta los PLCs) los lotes vuelven a funcionar
+        self.assertTrue(plc.connect())
+        self.assertTrue(self.core.send_commands(items[:1])["results"][0]["result"]["success"])
+
+
+if __name__ == "__main__":
+    unittest.main()
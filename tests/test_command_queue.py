@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para la cola de comandos por PLC
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.command_queue import (PLCCommandQueue, PRIORITY_OPERATOR,  # noqa: E402
+                                    PRIORITY_WMS, PRIORITY_POLL)
+from src.plc.delta_plc import DeltaPLC  # noqa: E402
+from src.plc.plc_simulator import PLCSimulator, PROTOCOL_DELTA  # noqa: E402
+from tests.helpers import FakePLC  # noqa: E402
+
+
+class TestPLCCommandQueue(unittest.TestCase):
+    """Pruebas para PLCCommandQueue"""
+
+    def setUp(self):
+        self.plc = FakePLC(gated=True)
+        self.queue = PLCCommandQueue("PLC-1", self.plc)
+
+    def tearDown(self):
+        self.plc.gate.set()
+        self.queue.stop()
+
+    def block_writer(self):
+        """Ocupa el hilo escritor con un primer comando"""
+        first = self.queue.submit(1, 99)
+        deadline = time.time() + 2
+        while self.plc.active == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        return first
+
+    def test_priorities(self):
+        """Verifica que el operador y el WMS adelanten a los sondeos"""
+        first = self.block_writer()
+        futures = [
+            self.queue.submit(0, priority=PRIORITY_POLL),
+            self.queue.submit(1, 5, priority=PRIORITY_WMS),
+            self.queue.submit(1, 7, priority=PRIORITY_OPERATOR),
+        ]
+        self.plc.gate.set()
+        for future in [first] + futures:
+            self.assertTrue(future.result(2)["success"])
+
+        self.assertEqual(self.plc.received, [(1, 99), (1, 7), (1, 5), (0, None)])
+        self.assertEqual(self.plc.max_active, 1)
+
+    def test_pending_status_requests_are_merged(self):
+        """Verifica que los ESTADO pendientes se fusionen en una petición"""
+        self.block_writer()
+        futures = [self.queue.submit(0, priority=PRIORITY_POLL) for _ in range(5)]
+        # Un ESTADO del operador adelanta al sondeo ya encolado
+        futures.append(self.queue.submit(0, priority=PRIORITY_OPERATOR))
+        self.queue.submit(1, 3, priority=PRIORITY_WMS)
+        self.assertEqual(self.queue.depth, 2)
+
+        self.plc.gate.set()
+        for future in futures:
+            self.assertTrue(future.result(2)["success"])
+        time.sleep(0.05)
+        self.assertEqual(self.plc.received, [(1, 99), (0, None), (1, 3)])
+        self.assertEqual(self.queue.get_stats()["merged"], 5)
+
+    def test_expired_requests_are_not_sent(self):
+        """Verifica que una petición vencida en cola no llegue al PLC"""
+        self.block_writer()
+        result = self.queue.execute(1, 4, timeout=0.1)
+        self.assertTrue(result["timed_out"])
+
+        self.plc.gate.set()
+        self.assertTrue(self.queue.execute(0)["success"])
+        self.assertNotIn((1, 4), self.plc.received)
+        self.assertEqual(self.queue.get_stats()["expired"], 1)
+
+
+class TestCommandQueueFraming(unittest.TestCase):
+    """Pruebas de la cola contra el simulador con DeltaPLC"""
+
+    def test_concurrent_callers_get_their_own_responses(self):
+        """Verifica que llamantes concurrentes no mezclen tramas"""
+        simulator = PLCSimulator(port=0, protocol=PROTOCOL_DELTA)
+        self.assertTrue(simulator.start())
+        plc = DeltaPLC("127.0.0.1", simulator.port)
+        command_queue = PLCCommandQueue("PLC-1", plc)
+        try:
+            self.assertTrue(plc.connect())
+            errors = []
+
+            def caller(position):
+                for _ in range(20):
+                    result = command_queue.execute(1, position)
+                    if not result["success"] or result["position"] != position:
+                        errors.append(result)
+                    if not command_queue.execute(0, priority=PRIORITY_POLL)["success"]:
+                        errors.append("status")
+
+            threads = [threading.Thread(target=caller, args=(position,))
+                       for position in range(1, 9)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertTrue(plc.is_connected())
+        finally:
+            command_queue.stop()
+            plc.disconnect()
+            simulator.stop()
+
+
+if __name__ == "__main__":
+    unittest.main()
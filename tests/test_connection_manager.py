@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el gestor de conexiones a PLCs
+"""
+
+import sys
+import os
+import socket
+import threading
+import time
+import unittest
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.connection_manager import PLCConnectionManager  # noqa: E402
+from src.plc.delta_plc import DeltaPLC  # noqa: E402
+from src.plc.plc_simulator import PLCSimulator, PROTOCOL_DELTA  # noqa: E402
+from tests.helpers import FakePLC, wait_until  # noqa: E402
+
+
+class TestPLCConnectionManager(unittest.TestCase):
+    """Pruebas para PLCConnectionManager"""
+
+    def setUp(self):
+        self.changes = []
+        self.manager = PLCConnectionManager(
+            on_change=lambda plc_id, change, data: self.changes.append((plc_id, change)),
+            probe_interval=0.05, backoff_base=0.05, backoff_max=0.2, jitter=0.0,
+            failure_threshold=2, reset_timeout=0.3)
+
+    def tearDown(self):
+        self.manager.stop()
+
+    def test_reconnects_dropped_connection(self):
+        """Verifica que una conexión cerrada por el PLC se detecte y restablezca"""
+        simulator = PLCSimulator(port=0, protocol=PROTOCOL_DELTA)
+        self.assertTrue(simulator.start())
+        plc = DeltaPLC("127.0.0.1", simulator.port)
+        try:
+            self.manager.add_plc("PLC-1", plc)
+            self.assertEqual(self.manager.connect_all(timeout=2), 1)
+            self.manager.start()
+
+            # El PLC cierra la conexión sin que el gateway envíe nada
+            self.assertTrue(wait_until(lambda: simulator.clients))
+            for client_socket in list(simulator.clients):
+                client_socket.shutdown(socket.SHUT_RDWR)
+                client_socket.close()
+
+            self.assertTrue(wait_until(lambda: ("PLC-1", "disconnected") in self.changes))
+            self.assertTrue(wait_until(lambda: self.manager.is_connected("PLC-1")))
+            self.assertTrue(plc.get_status()["success"])
+            self.assertEqual(self.manager.get_stats()["PLC-1"]["drops"], 1)
+        finally:
+            plc.disconnect()
+            simulator.stop()
+
+    def test_backoff_and_recovery(self):
+        """Verifica los reintentos con backoff de un PLC caído"""
+        plc = FakePLC(connected=False, available=False)
+        self.manager.add_plc("PLC-1", plc)
+        self.manager.connect_all(timeout=1)
+        self.manager.start()
+
+        time.sleep(0.3)
+        attempts = plc.connect_attempts
+        self.assertGreater(attempts, 1)
+        self.assertLess(attempts, 8)  # Sin backoff serían cientos
+        self.assertEqual(self.changes.count(("PLC-1", "connection_error")), 1)
+
+        plc.available = True
+        self.assertTrue(wait_until(lambda: self.manager.is_connected("PLC-1"), 2))
+        self.assertEqual(self.manager.get_summary(),
+                         {"total": 1, "connected": 1, "open_circuits": 0})
+
+    def test_circuit_breaker(self):
+        """Verifica la apertura, el rechazo y el cierre del circuito"""
+        plc = FakePLC(connected=False)
+        self.manager.add_plc("PLC-1", plc)
+        self.manager.connect_all(timeout=1)
+
+        self.manager.record_result("PLC-1", False, "timeout")
+        self.assertTrue(self.manager.allow_request("PLC-1"))
+        self.manager.record_result("PLC-1", False, "timeout")
+        self.assertFalse(self.manager.allow_request("PLC-1"))
+        self.assertEqual(self.manager.get_summary()["open_circuits"], 1)
+
+        # Tras reset_timeout se permite una única petición de prueba
+        time.sleep(0.35)
+        self.assertTrue(self.manager.allow_request("PLC-1"))
+        self.assertFalse(self.manager.allow_request("PLC-1"))
+        self.manager.record_result("PLC-1", True)
+        self.assertTrue(self.manager.allow_request("PLC-1"))
+        self.assertEqual(
+            [change for _, change in self.changes],
+            ["connected", "circuit_open", "circuit_half_open", "circuit_closed"])
+
+    def test_stop_discards_inflight_reconnect(self):
+        """Verifica que una reconexión en curso al detener no deje el PLC abierto"""
+        release = threading.Event()
+
+        class SlowPLC(FakePLC):
+            def connect(self):
+                release.wait(2)
+                return super().connect()
+
+        plc = SlowPLC(connected=False)
+        self.manager.add_plc("PLC-1", plc)
+        self.manager.connect_all(timeout=0.05)
+
+        threading.Timer(0.1, release.set).start()
+        self.manager.stop()
+        self.assertEqual(plc.connect_attempts, 1)
+        self.assertFalse(plc.connected)
+        self.assertFalse(self.manager.is_connected("PLC-1"))
+        self.assertEqual(self.changes, [])
+
+        # Se puede volver a conectar e iniciar tras detenerlo
+        self.assertEqual(self.manager.connect_all(timeout=1), 1)
+
+    def test_requested_disconnect_is_not_a_drop(self):
+        """Verifica que mark_disconnected no cuente una caída"""
+        self.manager.add_plc("PLC-1", FakePLC(connected=False))
+        self.manager.connect_all(timeout=1)
+        self.manager.mark_disconnected("PLC-1")
+        stats = self.manager.get_stats()["PLC-1"]
+        self.assertFalse(stats["connected"])
+        self.assertEqual(stats["drops"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
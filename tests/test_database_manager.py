@@ -0,0 +1,696 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el gestor de base de datos del Gateway Local
+"""
+
+import sys
+import os
+import csv
+import gzip
+import io
+import json
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+from datetime import datetime, timedelta, timezone
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database.database_manager import DatabaseManager  # noqa: E402
+from src.database.connection_pool import ConnectionPool  # noqa: E402
+from src.database.write_behind import WriteBehindQueue  # noqa: E402
+from src.database.retention import RetentionManager  # noqa: E402
+from src.database import timeseries  # noqa: E402
+from src.database.event_codec import encode_event_data, summarize_status  # noqa: E402
+from src.database.timeseries import TimeSeriesStore  # noqa: E402
+from src.api.routes.export_routes import register_export_routes  # noqa: E402
+from flask import Flask  # noqa: E402
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Pruebas para el pool de conexiones SQLite"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "pool.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_wal_mode_enabled(self):
+        """Verifica que las conexiones se abran en modo WAL"""
+        pool = ConnectionPool(self.db_path, pool_size=2)
+        with pool.connection() as conn:
+            mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        pool.close()
+        self.assertEqual(mode.lower(), "wal")
+
+    def test_connections_are_reused(self):
+        """Verifica que las conexiones se reutilicen entre préstamos"""
+        pool = ConnectionPool(self.db_path, pool_size=2)
+        with pool.connection() as first:
+            pass
+        with pool.connection() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertEqual(pool.size, 1)
+        pool.close()
+
+    def test_pool_is_bounded(self):
+        """Verifica que el pool no supere su tamaño máximo"""
+        pool = ConnectionPool(self.db_path, pool_size=1, timeout=0.1)
+        conn = pool.acquire()
+        with self.assertRaises(RuntimeError):
+            pool.acquire()
+        pool.release(conn)
+        pool.close()
+
+
+class TestDatabaseManager(unittest.TestCase):
+    """Pruebas para DatabaseManager"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "gateway.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_add_and_get_events(self):
+        """Verifica el registro y la lectura de eventos"""
+        self.assertTrue(self.db.add_event(
+            "plc.status_update", "test", {"plc_id": "PLC-001"}))
+        events = self.db.get_events("plc.status_update")
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["data"], {"plc_id": "PLC-001"})
+
+    def test_failed_write_is_rolled_back(self):
+        """Verifica que una escritura fallida no deje la transacción abierta"""
+        self.assertFalse(self.db.add_plc(
+            "PLC-001", None, "127.0.0.1", 3200, "delta"))
+        self.assertTrue(self.db.add_plc(
+            "PLC-002", "PLC 2", "127.0.0.1", 3200, "delta"))
+        self.assertEqual(self.db.get_database_stats()["plcs_count"], 1)
+
+    def test_concurrent_writers(self):
+        """Verifica que escrituras concurrentes desde varios hilos no se pierdan"""
+        def writer(worker_id):
+            for i in range(50):
+                self.db.add_command(f"PLC-{worker_id}", 0, result={"i": i})
+
+        threads = [threading.Thread(target=writer, args=(n,))
+                   for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.db.get_database_stats()["commands_count"], 400)
+
+    def test_row_counters(self):
+        """Verifica los contadores mantenidos por triggers y su recálculo"""
+        self.db.add_plc("PLC-001", "PLC 1", "127.0.0.1", 3200, "delta")
+        self.db.add_plc("PLC-001", "PLC 1 renombrado", "127.0.0.1", 3200, "delta")
+        self.db.write_batch(
+            events=[("plc.connected", "test", None, "2000-01-01 00:00:00")] * 3 +
+                   [("plc.status_update", "test", None, "2000-01-01 00:00:00")],
+            commands=[("PLC-001", 0, None, None, True, "2000-01-01 00:00:00")] * 2 +
+                     [("PLC-002", 0, None, None, True, "2000-01-01 00:00:00")])
+        self.assertEqual(self.db.prune_batch(
+            "events", "2999-01-01 00:00:00", 2,
+            "type_id IN (SELECT id FROM event_types WHERE name = ?)", ("plc.connected",)), 2)
+
+        stats = self.db.get_database_stats(breakdown=True)
+        self.assertEqual(stats["plcs_count"], 1)
+        self.assertEqual(stats["events_count"], 2)
+        self.assertEqual(stats["commands_count"], 3)
+        self.assertEqual(stats["events_by_type"], {"plc.connected": 1, "plc.status_update": 1})
+        self.assertEqual(stats["commands_by_plc"], {"PLC-001": 2, "PLC-002": 1})
+        self.assertNotIn("events_by_type", self.db.get_database_stats())
+
+        # Una desviación (p. ej. escrituras sin triggers) se corrige al recalcular
+        with self.db._write() as cursor:
+            cursor.execute("UPDATE row_counts SET count = 99 WHERE table_name = 'events' "
+                           "AND dimension = ''")
+        self.assertEqual(self.db.reconcile_row_counts(), {"events": (99, 2)})
+        self.assertEqual(self.db.get_database_stats()["events_count"], 2)
+
+    def test_row_counters_on_existing_database(self):
+        """Verifica el recuento inicial de una base creada sin contadores"""
+        self.db.add_event("test", "test")
+        with self.db._write() as cursor:
+            cursor.execute("DROP TABLE row_counts")
+            cursor.execute("DELETE FROM maintenance_state")
+        self.db.close()
+
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "gateway.db"))
+        self.assertEqual(self.db.get_database_stats()["events_count"], 1)
+        self.db.add_event("test", "test")
+        self.assertEqual(self.db.get_database_stats()["events_count"], 2)
+
+    def test_compact_event_encoding(self):
+        """Verifica que los campos tipados se extraigan y data se reconstruya igual"""
+        samples = [
+            {"plc_id": "PLC-001", "status": {"success": True, "status_code": 2, "position": 40,
+                                             "timestamp": 1234, "response_time": 0.0042}},
+            {"plc_id": "PLC-001", "status": {"success": False, "error": "timeout"}},
+            {"plc_id": 7, "status": {"status_code": True, "position": 1.5,
+                                     "response_time": 3}},
+            {"status": "ok", "items": [1, 2, {"a": None}]},
+            None,
+        ]
+        self.db.write_batch(events=[("plc.status_update", "gateway_core", data,
+                                     f"2025-01-01 10:00:0{i}")
+                                    for i, data in enumerate(samples)])
+        events = self.db.get_events("plc.status_update")
+        self.assertEqual([event["data"] for event in reversed(events)], samples)
+        self.assertEqual({event["source"] for event in events}, {"gateway_core"})
+
+        with self.db._pool.connection() as conn:
+            row = conn.execute("SELECT * FROM events ORDER BY id LIMIT 1").fetchone()
+            dictionaries = conn.execute("SELECT COUNT(*) FROM event_sources").fetchone()[0]
+        self.assertEqual((row["plc_id"], row["status_code"], row["position"],
+                          row["response_time"]), ("PLC-001", 2, 40, 0.0042))
+        self.assertEqual(dictionaries, 1)
+
+    def test_status_summary_for_events(self):
+        """Verifica que los eventos guarden sólo el resumen del estado"""
+        status = {"success": True, "status_code": 2, "position": 40, "timestamp": 1234,
+                  "response_time": 0.0042, "raw": "0002002800000004d2"}
+        summary = summarize_status(status)
+        self.assertEqual(summary, {"success": True, "status_code": 2, "position": 40,
+                                   "response_time": 0.0042})
+        # Todo el resumen cabe en las columnas tipadas salvo success
+        self.assertEqual(encode_event_data({"plc_id": "PLC-001", "status": summary}),
+                         ("PLC-001", 2, 40, 0.0042, encode_event_data({"status": {"success": True}})[4]))
+        self.assertEqual(summarize_status({"success": False, "error": "timeout"}),
+                         {"success": False, "error": "timeout"})
+
+    def test_legacy_events_table_is_migrated(self):
+        """Verifica la migración en el sitio del formato de eventos anterior"""
+        self.db.close()
+        path = os.path.join(self.tmp_dir, "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("""CREATE TABLE events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, event_type TEXT NOT NULL,
+            source TEXT NOT NULL, data TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+        conn.execute("CREATE INDEX idx_events_type_timestamp ON events (event_type, timestamp)")
+        status = {"plc_id": "PLC-001", "status": {"success": True, "status_code": 1,
+                                                  "position": 5, "response_time": 0.01}}
+        conn.executemany(
+            "INSERT INTO events (event_type, source, data, timestamp) VALUES (?, ?, ?, ?)",
+            [("plc.status_update", "gateway_core", json.dumps(status), "2025-01-01 10:00:00"),
+             ("gateway.started", "gateway_core", None, "2025-01-01 10:00:01"),
+             ("gateway.error", "api", "no es JSON", "2025-01-01 10:00:02")])
+        conn.commit()
+        conn.close()
+
+        self.db = DatabaseManager(path)
+        events = self.db.get_events()
+        self.assertEqual([(e["id"], e["event_type"], e["source"], e["data"]) for e in events], [
+            (3, "gateway.error", "api", "no es JSON"),
+            (2, "gateway.started", "gateway_core", None),
+            (1, "plc.status_update", "gateway_core", status)])
+
+        stats = self.db.get_database_stats(breakdown=True)
+        self.assertEqual(stats["events_count"], 3)
+        self.assertEqual(stats["events_by_type"]["plc.status_update"], 1)
+
+        # Las nuevas filas continúan la secuencia y actualizan los contadores
+        self.db.add_event("gateway.started", "gateway_core")
+        self.assertEqual(self.db.get_events(limit=1)[0]["id"], 4)
+        self.assertEqual(self.db.get_database_stats()["events_count"], 4)
+
+    def _create_legacy_events_db(self, path, rows=3):
+        """Base de datos con la tabla events del formato anterior (auto_vacuum=0)"""
+        conn = sqlite3.connect(path)
+        conn.execute("""CREATE TABLE events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, event_type TEXT NOT NULL,
+            source TEXT NOT NULL, data TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""")
+        conn.executemany(
+            "INSERT INTO events (event_type, source, data) VALUES (?, ?, ?)",
+            [("plc.status_update", "gateway_core",
+              json.dumps({"plc_id": "PLC-001", "status": {
+                  "success": True, "status_code": 0, "position": i, "response_time": 0.01}}))
+             for i in range(rows)])
+        conn.commit()
+        conn.close()
+
+    def test_failed_events_migration_is_rolled_back(self):
+        """Verifica que una migración fallida deje la tabla anterior intacta"""
+        self.db.close()
+        path = os.path.join(self.tmp_dir, "legacy.db")
+        self._create_legacy_events_db(path)
+
+        with patch("src.database.database_manager.encode_event_data",
+                   side_effect=RuntimeError("fallo simulado")):
+            with self.assertRaises(RuntimeError):
+                DatabaseManager(path)
+
+        conn = sqlite3.connect(path)
+        tables = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        self.assertNotIn("events_compact", tables)
+        self.assertEqual(conn.execute("SELECT COUNT(*) FROM events").fetchone()[0], 3)
+        conn.close()
+
+        # El siguiente arranque migra sin problemas
+        self.db = DatabaseManager(path)
+        self.assertEqual(len(self.db.get_events()), 3)
+
+    def test_leftover_events_compact_is_replaced(self):
+        """Verifica que una events_compact abandonada no bloquee la migración"""
+        self.db.close()
+        path = os.path.join(self.tmp_dir, "legacy.db")
+        self._create_legacy_events_db(path)
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE events_compact (id INTEGER PRIMARY KEY)")
+        conn.commit()
+        conn.close()
+
+        self.db = DatabaseManager(path)
+        self.assertEqual(len(self.db.get_events()), 3)
+
+    def test_events_migration_releases_space(self):
+        """Verifica que migrar una base con auto_vacuum=0 no la haga crecer"""
+        self.db.close()
+        path = os.path.join(self.tmp_dir, "legacy.db")
+        self._create_legacy_events_db(path, rows=5000)
+        size_before = os.path.getsize(path)
+
+        self.db = DatabaseManager(path)
+        with self.db._read() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+            self.assertEqual(cursor.execute("PRAGMA freelist_count").fetchone()[0], 0)
+        self.db.close()
+        self.assertLess(os.path.getsize(path), size_before)
+        self.db = DatabaseManager(path)
+
+    def test_existing_database_is_converted_to_incremental_vacuum(self):
+        """Verifica que una base con auto_vacuum=0 pase a INCREMENTAL al abrirla"""
+        self.db.close()
+        path = os.path.join(self.tmp_dir, "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE plcs (id INTEGER PRIMARY KEY)")
+        conn.commit()
+        self.assertEqual(conn.execute("PRAGMA auto_vacuum").fetchone()[0], 0)
+        conn.close()
+
+        self.db = DatabaseManager(path)
+        with self.db._read() as cursor:
+            self.assertEqual(cursor.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+
+    def test_keyset_pagination_and_time_range(self):
+        """Verifica la paginación por cursor y los filtros since/until"""
+        # Varias filas por segundo: el id desempata dentro del mismo timestamp
+        self.db.write_batch(
+            events=[("a" if i % 2 else "b", "test", {"i": i},
+                     f"2026-01-01 00:00:{i // 3:02d}") for i in range(30)],
+            commands=[("PLC-1", 0, None, None, True, f"2026-01-01 00:00:{i:02d}")
+                      for i in range(10)])
+
+        seen = []
+        cursor = None
+        while True:
+            page = self.db.get_events("a", limit=4, cursor=cursor)
+            seen.extend(event["data"]["i"] for event in page)
+            cursor = self.db.page_cursor(page, 4)
+            if cursor is None:
+                break
+        self.assertEqual(seen, list(range(29, 0, -2)))
+
+        events = self.db.get_events(since="2026-01-01T00:00:02Z", until="2026-01-01 00:00:04")
+        self.assertEqual([e["data"]["i"] for e in events], [11, 10, 9, 8, 7, 6])
+
+        commands = self.db.get_commands("PLC-1", limit=3, since="2026-01-01 00:00:05")
+        self.assertEqual([c["timestamp"] for c in commands],
+                         ["2026-01-01 00:00:09", "2026-01-01 00:00:08", "2026-01-01 00:00:07"])
+        commands = self.db.get_commands("PLC-1", limit=3, since="2026-01-01 00:00:05",
+                                        cursor=self.db.page_cursor(commands, 3))
+        self.assertEqual(len(commands), 2)
+
+    def test_filtered_pages_use_composite_indexes(self):
+        """Verifica que filtro, rango y cursor se resuelvan con un índice compuesto"""
+        plans = []
+        with self.db._pool.connection() as conn:
+            for table in ("events", "commands"):
+                select, value_filter = DatabaseManager.KEYSET_SOURCES[table]
+                plan = conn.execute(
+                    f"EXPLAIN QUERY PLAN {select} WHERE {value_filter} "
+                    "AND r.timestamp >= ? AND (r.timestamp, r.id) < (?, ?) "
+                    "ORDER BY r.timestamp DESC, r.id DESC LIMIT 10",
+                    ("x", "2026-01-01", "2026-02-01", 5)).fetchall()
+                plans.append(" ".join(row[3] for row in plan))
+        self.assertIn("idx_events_type_timestamp", plans[0])
+        self.assertIn("idx_commands_plc_timestamp", plans[1])
+        self.assertFalse(any("TEMP B-TREE" in plan for plan in plans))
+
+
+class TestWriteBehindQueue(unittest.TestCase):
+    """Pruebas para la cola de escritura diferida"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "gateway.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_stop_flushes_pending_rows(self):
+        """Verifica que stop() escriba todas las filas pendientes"""
+        writer = WriteBehindQueue(self.db, batch_size=1000, flush_interval=60)
+        writer.start()
+        for i in range(10):
+            writer.add_event("plc.status_update", "test", {"i": i})
+            writer.add_command("PLC-001", 0, result={"i": i})
+        writer.add_metric("response_time", "PLC-001", 0.01)
+        writer.stop()
+
+        stats = self.db.get_database_stats()
+        self.assertEqual(stats["events_count"], 10)
+        self.assertEqual(stats["commands_count"], 10)
+        self.assertEqual(stats["metrics_count"], 1)
+        self.assertEqual(writer.depth, 0)
+
+    def test_drop_newest_when_full(self):
+        """Verifica la política drop_newest con la cola llena"""
+        writer = WriteBehindQueue(self.db, max_queue_size=5, batch_size=1000,
+                                  flush_interval=60, overflow_policy="drop_newest")
+        writer.start()
+        results = [writer.add_event("test", "test", {"i": i}) for i in range(8)]
+        writer.stop()
+
+        self.assertEqual(results.count(False), 3)
+        self.assertEqual(writer.dropped, 3)
+        events = self.db.get_events("test")
+        self.assertEqual(sorted(e["data"]["i"] for e in events), [0, 1, 2, 3, 4])
+
+    def test_drop_oldest_when_full(self):
+        """Verifica la política drop_oldest con la cola llena"""
+        writer = WriteBehindQueue(self.db, max_queue_size=5, batch_size=1000,
+                                  flush_interval=60, overflow_policy="drop_oldest")
+        writer.start()
+        for i in range(8):
+            writer.add_event("test", "test", {"i": i})
+        writer.stop()
+
+        events = self.db.get_events("test")
+        self.assertEqual(sorted(e["data"]["i"] for e in events), [3, 4, 5, 6, 7])
+
+    def test_failed_batch_is_retried_then_dropped(self):
+        """Verifica que un lote fallido vuelva a la cola y se descarte al agotar reintentos"""
+        writer = WriteBehindQueue(self.db, batch_size=1000, flush_interval=60,
+                                  max_retries=2)
+        writer.start()
+        for i in range(3):
+            writer.add_event("test", "test", {"i": i})
+
+        with patch.object(self.db, "write_batch", return_value=False) as write_batch:
+            writer.flush()
+            # Con el hilo activo el lote queda en la cola, en su orden
+            self.assertEqual(writer.depth, 3)
+            self.assertEqual(write_batch.call_count, 1)
+        writer.flush()
+        self.assertEqual(sorted(e["data"]["i"] for e in self.db.get_events("test")),
+                         [0, 1, 2])
+
+        writer.add_event("test", "test", {"i": 3})
+        with patch.object(self.db, "write_batch", return_value=False) as write_batch:
+            writer.stop()
+            # Detenida la cola: un intento y dos reintentos antes de descartar
+            self.assertEqual(write_batch.call_count, 3)
+        self.assertEqual(writer.depth, 0)
+        self.assertEqual(writer.dropped, 1)
+        self.assertEqual(writer.get_stats()["retried"], 3)
+
+    def test_writes_directly_when_stopped(self):
+        """Verifica la escritura síncrona cuando el hilo no está activo"""
+        writer = WriteBehindQueue(self.db)
+        self.assertTrue(writer.add_event("test", "test"))
+        self.assertEqual(self.db.get_database_stats()["events_count"], 1)
+
+
+class TestRetentionManager(unittest.TestCase):
+    """Pruebas para la retención y agregación del histórico"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "gateway.db"))
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _insert(self, table, rows):
+        """Inserta filas con marca de tiempo explícita"""
+        self.db.write_batch(**{table: rows})
+
+    def test_rollup_is_incremental(self):
+        """Verifica que la agregación no cuente dos veces las muestras"""
+        rows = [("PLC-001", 0, None, {"success": True, "response_time": rt}, True,
+                 "2025-01-01 10:00:30") for rt in (0.002, 0.004)]
+        self._insert("commands", rows)
+        self.assertEqual(self.db.rollup_status_samples(), 2)
+        self.assertEqual(self.db.rollup_status_samples(), 0)
+
+        self._insert("commands", [("PLC-001", 0, None, {"response_time": 0.006},
+                                   False, "2025-01-01 10:00:45")])
+        self.assertEqual(self.db.rollup_status_samples(), 1)
+
+        rollups = self.db.get_status_rollups(
+            "PLC-001", "minute", hours=24 * 365 * 100)
+        self.assertEqual(len(rollups), 1)
+        self.assertEqual(rollups[0]["samples"], 3)
+        self.assertEqual(rollups[0]["successes"], 2)
+        self.assertAlmostEqual(rollups[0]["avg_response_time"], 0.004)
+        self.assertAlmostEqual(rollups[0]["min_response_time"], 0.002)
+        self.assertAlmostEqual(rollups[0]["max_response_time"], 0.006)
+
+    def test_prune_respects_event_type_windows(self):
+        """Verifica las ventanas por tipo de evento y la purga por lotes"""
+        old, recent = "2000-01-01 00:00:00", "2999-01-01 00:00:00"
+        self._insert("events", [("plc.status_update", "test", None, old)] * 25 +
+                     [("plc.connected", "test", None, old)] * 5 +
+                     [("plc.status_update", "test", None, recent)])
+
+        retention = RetentionManager(self.db, {
+            "batch_size": 10, "batch_pause": 0,
+            "windows": {"events": None},
+            "event_types": {"plc.status_update": 1}
+        })
+        summary = retention.run_once()
+
+        self.assertEqual(summary["pruned"]["events:plc.status_update"], 25)
+        stats = self.db.get_database_stats()
+        self.assertEqual(stats["events_count"], 6)
+
+    def test_status_commands_pruned_only_after_rollup(self):
+        """Verifica que no se purguen muestras de estado sin agregar"""
+        old = (datetime.now(timezone.utc) - timedelta(days=10)).strftime(
+            "%Y-%m-%d %H:%M:%S")
+        self._insert("commands", [("PLC-001", 0, None, {"response_time": 0.01},
+                                   True, old)] * 3)
+
+        retention = RetentionManager(self.db, {"batch_pause": 0})
+        summary = retention.run_once()
+
+        self.assertEqual(summary["rolled_up"], 3)
+        self.assertEqual(summary["pruned"]["commands:status"], 3)
+        rollups = self.db.get_status_rollups(resolution="hour", hours=24 * 30)
+        self.assertEqual(rollups[0]["samples"], 3)
+
+    def test_archive_moves_rows_to_monthly_database(self):
+        """Verifica el archivado en bases de datos mensuales"""
+        self._insert("metrics", [("response_time", "PLC-001", 1.0, "2000-01-15 00:00:00"),
+                                 ("response_time", "PLC-001", 2.0, "2000-02-15 00:00:00")])
+        archive_dir = os.path.join(self.tmp_dir, "archive")
+
+        retention = RetentionManager(self.db, {
+            "batch_pause": 0, "archive_dir": archive_dir})
+        summary = retention.run_once()
+
+        self.assertEqual(summary["pruned"]["metrics"], 2)
+        self.assertEqual(sorted(os.listdir(archive_dir)), [
+            "gateway-archive-2000-01.db", "gateway-archive-2000-02.db"])
+        self.assertEqual(self.db.get_database_stats()["metrics_count"], 0)
+
+    def test_archived_events_keep_text_format(self):
+        """Verifica que los eventos se archiven con tipo, fuente y data en texto"""
+        data = {"plc_id": "PLC-001", "status": {"success": True, "position": 3}}
+        self._insert("events", [("plc.status_update", "gateway_core", data,
+                                 "2000-01-15 00:00:00")])
+        archive_dir = os.path.join(self.tmp_dir, "archive")
+        RetentionManager(self.db, {"batch_pause": 0, "archive_dir": archive_dir}).run_once()
+
+        conn = sqlite3.connect(os.path.join(archive_dir, "gateway-archive-2000-01.db"))
+        rows = conn.execute("SELECT event_type, source, data FROM events").fetchall()
+        conn.close()
+        self.assertEqual([(t, s, json.loads(d)) for t, s, d in rows],
+                         [("plc.status_update", "gateway_core", data)])
+        self.assertEqual(self.db.get_database_stats()["events_count"], 0)
+
+
+
+class TestTimeSeriesStore(unittest.TestCase):
+    """Pruebas para el almacén de series temporales por bloques"""
+
+    # 2025-01-01 10:00:00 UTC
+    BASE = 1735725600
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmp_dir, "gateway.db")
+        self.db = DatabaseManager(self.db_path)
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_downsampled_percentiles(self):
+        """Verifica min, max, media y percentiles por cubeta"""
+        store = TimeSeriesStore(self.db, chunk_seconds=600)
+        # 0..99 en el primer minuto, 100 muestras de 5.0 en el segundo
+        for i in range(100):
+            store.append("response_time", "PLC-001", float(99 - i), self.BASE + i * 0.5)
+            store.append("response_time", "PLC-001", 5.0, self.BASE + 60 + i * 0.5)
+        store.append("response_time", "PLC-002", 1000.0, self.BASE + 1)
+
+        series = store.query("response_time", "PLC-001", self.BASE, self.BASE + 120, points=2)
+        self.assertEqual([point["start"] for point in series], [self.BASE, self.BASE + 60])
+        first, second = series
+        self.assertEqual((first["count"], first["min"], first["max"]), (100, 0.0, 99.0))
+        self.assertAlmostEqual(first["mean"], 49.5)
+        self.assertAlmostEqual(first["p50"], 49.5)
+        self.assertAlmostEqual(first["p95"], 94.05)
+        self.assertAlmostEqual(first["p99"], 98.01)
+        self.assertEqual((second["p50"], second["p99"], second["mean"]), (5.0, 5.0, 5.0))
+
+        # Sin plc_id se agregan todos los PLCs
+        merged = store.query("response_time", None, self.BASE, self.BASE + 60, points=1)
+        self.assertEqual((merged[0]["count"], merged[0]["max"]), (101, 1000.0))
+
+    def test_numpy_and_python_paths_agree(self):
+        """Verifica que la agregación sin NumPy dé el mismo resultado"""
+        timestamps = [self.BASE + i * 0.7 for i in range(500)]
+        values = [(i * 37) % 101 / 3.0 for i in range(500)]
+        expected = TimeSeriesStore._aggregate_python(timestamps, values, self.BASE, 30.0)
+        self.assertEqual(sum(point["count"] for point in expected), 500)
+        if timeseries.np is None:
+            self.skipTest("NumPy no instalado")
+        result = TimeSeriesStore._aggregate_numpy(
+            timeseries.np.array(timestamps), timeseries.np.array(values), self.BASE, 30.0)
+        self.assertEqual(len(result), len(expected))
+        for got, want in zip(result, expected):
+            for key in want:
+                self.assertAlmostEqual(got[key], want[key])
+
+    def test_flush_and_reload_after_restart(self):
+        """Verifica la persistencia de los bloques y la fusión tras reiniciar"""
+        store = TimeSeriesStore(self.db, chunk_seconds=3600)
+        for i in range(10):
+            store.append("position", "PLC-001", i, self.BASE + i)
+        # Antes de volcar la consulta ya ve las muestras en memoria
+        self.assertEqual(store.query("position", "PLC-001", self.BASE, self.BASE + 3600,
+                                     points=1)[0]["count"], 10)
+        self.assertEqual(store.flush(), 1)
+        self.assertEqual(store.flush(), 0)
+
+        # Un almacén nuevo (reinicio) sigue escribiendo en el mismo bloque
+        restarted = TimeSeriesStore(self.db, chunk_seconds=3600)
+        restarted.append("position", "PLC-001", 100, self.BASE + 20)
+        series = restarted.query("position", "PLC-001", self.BASE, self.BASE + 3600, points=1)
+        self.assertEqual((series[0]["count"], series[0]["max"]), (11, 100.0))
+        restarted.flush()
+
+        chunks = self.db.get_metric_chunks("position", "PLC-001", self.BASE, self.BASE + 1)
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0]["count"], 11)
+        offsets, values = timeseries.decode_chunk(chunks[0]["payload"], chunks[0]["count"])
+        self.assertEqual(list(values), [float(i) for i in range(10)] + [100.0])
+        self.assertEqual(offsets[-1], 20000)
+
+    def test_prune_through_retention(self):
+        """Verifica que la retención de métricas purgue los bloques antiguos"""
+        store = TimeSeriesStore(self.db, chunk_seconds=3600)
+        store.append("error", "PLC-001", 1.0, self.BASE)
+        store.append("error", "PLC-001", 0.0)
+        store.flush()
+
+        retention = RetentionManager(self.db, {"windows": {"metrics": 30}})
+        retention.timeseries_store = store
+        summary = retention.run_once()
+        self.assertEqual(summary["pruned"]["metric_chunks"], 1)
+        self.assertEqual(self.db.get_metric_chunks("error", None, 0, self.BASE + 3600), [])
+        self.assertEqual(len(store.query("error", "PLC-001")), 1)
+
+
+
+class TestHistoryExport(unittest.TestCase):
+    """Pruebas para la exportación en streaming del histórico"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "gateway.db"))
+        self.db.write_batch(
+            events=[("plc.status_update" if i % 2 else "gateway.heartbeat", "test",
+                     {"i": i, "texto": "coma, \"comillas\""},
+                     f"2025-01-01 10:{i // 60:02d}:{i % 60:02d}") for i in range(1200)],
+            commands=[("PLC-001", 1, i, {"success": True}, True,
+                       f"2025-01-01 11:00:{i:02d}") for i in range(10)])
+        app = Flask(__name__)
+        register_export_routes(app, self.db)
+        self.client = app.test_client()
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def test_iter_events_in_batches(self):
+        """Verifica que el recorrido por lotes cubra todas las filas una vez"""
+        batches = list(self.db.iter_events(batch_size=500))
+        self.assertEqual([len(rows) for rows in batches], [500, 500, 200])
+        ids = [row["id"] for rows in batches for row in rows]
+        self.assertEqual(ids, sorted(set(ids), reverse=True))
+
+    def test_ndjson_export_with_filters(self):
+        """Verifica la exportación NDJSON filtrada por tipo e intervalo"""
+        response = self.client.get(
+            "/api/v1/export/events?type=gateway.heartbeat"
+            "&since=2025-01-01T10:00:00Z&until=2025-01-01T10:10:00Z")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertTrue(response.is_streamed)
+
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(events), 300)
+        self.assertEqual(events[0]["data"], {"i": 598, "texto": 'coma, "comillas"'})
+        self.assertTrue(all(event["event_type"] == "gateway.heartbeat" for event in events))
+
+    def test_csv_gzip_export(self):
+        """Verifica la exportación CSV comprimida de comandos"""
+        response = self.client.get("/api/v1/export/commands?format=csv&gzip=1&plc_id=PLC-001")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("commands.csv.gz", response.headers["Content-Disposition"])
+
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.data).decode())))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(json.loads(rows[0]["result"]), {"success": True})
+        self.assertEqual(rows[0]["argument"], "9")
+
+    def test_invalid_parameters(self):
+        """Verifica que los parámetros inválidos se rechacen antes de exportar"""
+        self.assertEqual(self.client.get("/api/v1/export/events?format=xml").status_code, 400)
+        self.assertEqual(self.client.get("/api/v1/export/events?since=ayer").status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
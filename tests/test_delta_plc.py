@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el transporte síncrono de PLC Delta
+"""
+
+import sys
+import os
+import socket
+import struct
+import threading
+import unittest
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.plc.delta_plc import DeltaPLC  # noqa: E402
+
+
+class TestDeltaPLC(unittest.TestCase):
+    """Pruebas para DeltaPLC contra un servidor que fragmenta las respuestas"""
+
+    def setUp(self):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(("127.0.0.1", 0))
+        self.server.listen(1)
+        self.plc = DeltaPLC("127.0.0.1", self.server.getsockname()[1])
+
+    def tearDown(self):
+        self.plc.disconnect()
+        self.server.close()
+
+    def serve(self, *chunks: bytes) -> None:
+        """Responde a un comando enviando la respuesta en varios fragmentos"""
+        def handler():
+            conn, _ = self.server.accept()
+            conn.recv(2)
+            for chunk in chunks:
+                conn.sendall(chunk)
+                threading.Event().wait(0.05)
+            conn.close()
+
+        threading.Thread(target=handler, daemon=True).start()
+
+    def test_partial_response_is_reassembled(self):
+        """Verifica que una respuesta fragmentada se lea completa"""
+        response = struct.pack('>HHI', 0, 42, 123)
+        self.serve(response[:1], response[1:5], response[5:])
+
+        self.assertTrue(self.plc.connect())
+        status = self.plc.get_status()
+        self.assertTrue(status["success"])
+        self.assertEqual(status["position"], 42)
+        self.assertEqual(status["timestamp"], 123)
+        self.assertTrue(self.plc.is_connected())
+
+    def test_truncated_response_drops_connection(self):
+        """Verifica que una respuesta incompleta cierre la conexión"""
+        self.serve(struct.pack('>HHI', 0, 42, 123)[:5])
+
+        self.assertTrue(self.plc.connect())
+        status = self.plc.get_status()
+        self.assertFalse(status["success"])
+        self.assertFalse(self.plc.is_connected())
+
+
+if __name__ == "__main__":
+    unittest.main()
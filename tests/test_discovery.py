@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el motor asíncrono de descubrimiento de PLCs
+"""
+
+import sys
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import types
+import unittest
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database.database_manager import DatabaseManager  # noqa: E402
+from src.discovery.async_scanner import AsyncPLCScanner, iter_ip_range  # noqa: E402
+from src.discovery.discovery_cache import DiscoveryCache, subnet_scope  # noqa: E402
+from src.discovery.plc_discovery import PLCDetector, PLCDiscoveryService  # noqa: E402
+from src.plc.plc_discovery import PLCDiscovery  # noqa: E402
+from src.plc.plc_simulator import PLCSimulator, PROTOCOL_DELTA  # noqa: E402
+
+PLC_HOSTS = ["127.0.0.2", "127.0.0.5", "127.0.0.9"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestDiscovery(unittest.TestCase):
+    """Descubrimiento contra simuladores en varias direcciones de loopback"""
+
+    def setUp(self):
+        self.port = free_port()
+        self.simulators = []
+        for host in PLC_HOSTS:
+            simulator = PLCSimulator(host=host, port=self.port, protocol=PROTOCOL_DELTA)
+            self.assertTrue(simulator.start())
+            self.simulators.append(simulator)
+        # Un puerto abierto que no habla el protocolo Delta
+        self.other = socket.socket()
+        self.other.bind(("127.0.0.12", self.port))
+        self.other.listen(8)
+
+    def tearDown(self):
+        self.other.close()
+        for simulator in self.simulators:
+            simulator.stop()
+
+    def test_detector_streams_progress(self):
+        """Verifica el escaneo de una subred y el progreso por dirección"""
+        progress = []
+        detector = PLCDetector(port=self.port, timeout=0.5)
+        devices = detector.scan_subnet(
+            "127.0.0.0/28", lambda scanned, total, device: progress.append((scanned, total, device)))
+
+        # El puerto abierto que no responde al ESTADO no se informa
+        self.assertEqual(sorted(d["ip"] for d in devices), PLC_HOSTS)
+        self.assertTrue(all(d["type"] == "delta" for d in devices))
+        self.assertEqual([(scanned, total) for scanned, total, _ in progress],
+                         [(i, 14) for i in range(1, 15)])
+        self.assertEqual(len([device for _, _, device in progress if device]), 3)
+        self.assertFalse(detector.is_scanning)
+
+    def test_discovery_probes_only_delta_plcs(self):
+        """Verifica que sólo se informe de los PLCs que responden al ESTADO"""
+        discovery = PLCDiscovery(port=self.port, timeout=0.5)
+        plcs = discovery.scan_ip_range("127.0.0.1", "127.0.0.20")
+
+        self.assertEqual(sorted(plc["ip"] for plc in plcs), PLC_HOSTS)
+        self.assertTrue(all(plc["status"]["success"] for plc in plcs))
+        self.assertTrue(all(plc["type"] == "Delta AS Series" for plc in plcs))
+
+    def test_large_range_is_generated_lazily(self):
+        """Verifica que un rango grande no se materialice y que stop() lo corte"""
+        targets = iter_ip_range("127.1.0.0", "127.1.255.255")
+        self.assertIsInstance(targets, types.GeneratorType)
+
+        scanner = AsyncPLCScanner(port=self.port, concurrency=256, rate=0)
+
+        def stop_after(scanned, total, device):
+            if scanned == 2000:
+                scanner.stop()
+
+        started = time.monotonic()
+        scanner.scan(targets, 65536, stop_after)
+        self.assertLess(time.monotonic() - started, 5)
+        self.assertLess(scanner.stats["scanned"], 2300)
+        self.assertEqual(next(targets).split(".")[:2], ["127", "1"])
+
+
+class TestDiscoveryCache(unittest.TestCase):
+    """Redescubrimiento incremental con la caché en la base de datos"""
+
+    def setUp(self):
+        self.port = free_port()
+        self.tmp_dir = tempfile.mkdtemp()
+        self.db = DatabaseManager(os.path.join(self.tmp_dir, "gateway.db"))
+        self.simulators = {}
+        for host in PLC_HOSTS:
+            simulator = PLCSimulator(host=host, port=self.port, protocol=PROTOCOL_DELTA)
+            self.assertTrue(simulator.start())
+            self.simulators[host] = simulator
+        self.service = PLCDiscoveryService(db_manager=self.db, port=self.port)
+        self.service.detector.timeout = 0.5
+
+    def tearDown(self):
+        self.service.stop_background_sweep()
+        for simulator in self.simulators.values():
+            simulator.stop()
+        self.db.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def listen(self, host: str) -> socket.socket:
+        """Puerto abierto que no habla el protocolo Delta"""
+        sock = socket.socket()
+        sock.bind((host, self.port))
+        sock.listen(8)
+        self.addCleanup(sock.close)
+        return sock
+
+    def test_known_devices_and_diff(self):
+        """Verifica el inventario conocido y los cambios entre escaneos"""
+        self.listen("127.0.0.12")
+
+        self.assertEqual(self.service.get_known_devices("127.0.0.0/28"), [])
+        self.service.discover_plcs("127.0.0.0/28")
+        self.assertEqual(sorted(d["ip"] for d in self.service.last_diff["added"]),
+                         PLC_HOSTS)
+
+        known = self.service.get_known_devices("127.0.0.0/28")
+        self.assertEqual(len(known), 3)
+        self.assertTrue(all(d["last_seen"] for d in known))
+        self.assertEqual(self.service.get_known_devices("127.0.1.0/24"), [])
+
+        # Sólo se sondean los conocidos: uno desaparece
+        self.simulators.pop("127.0.0.9").stop()
+
+        diff = self.service.refresh_known("127.0.0.0/28")
+        self.assertEqual([d["ip"] for d in diff["removed"]], ["127.0.0.9"])
+        self.assertEqual(sorted(d["ip"] for d in diff["unchanged"]),
+                         ["127.0.0.2", "127.0.0.5"])
+        self.assertEqual(diff["added"], [])
+        self.assertEqual(diff["changed"], [])
+        self.assertNotIn("127.0.0.9",
+                         [d["ip"] for d in self.service.get_known_devices("127.0.0.0/28")])
+
+        # Vuelve a responder: se informa como nuevo
+        simulator = PLCSimulator(host="127.0.0.9", port=self.port, protocol=PROTOCOL_DELTA)
+        self.assertTrue(simulator.start())
+        self.simulators["127.0.0.9"] = simulator
+        diff = self.service.refresh_known("127.0.0.0/28")
+        self.assertEqual([(d["ip"], d["type"]) for d in diff["added"]],
+                         [("127.0.0.9", "delta")])
+
+    def test_known_hosts_are_probed_first(self):
+        """Verifica que el barrido empiece por los dispositivos conocidos"""
+        cache = DiscoveryCache(self.db, port=self.port)
+        cache.record([{"ip": "127.0.0.9", "port": self.port, "type": "delta"}],
+                     subnet_scope("127.0.0.0/28"))
+        targets = cache.known_first(iter(["127.0.0.1", "127.0.0.9", "127.0.0.10"]),
+                                    subnet_scope("127.0.0.0/28"))
+        self.assertEqual(list(targets), ["127.0.0.9", "127.0.0.1", "127.0.0.10"])
+
+    def test_background_sweep(self):
+        """Verifica el barrido periódico del espacio desconocido"""
+        diffs = []
+        received = threading.Event()
+
+        def on_diff(diff):
+            diffs.append(diff)
+            received.set()
+
+        self.service.sweep_interval = 0.2
+        self.assertTrue(self.service.start_background_sweep("127.0.0.0/28", diff_callback=on_diff))
+        self.assertFalse(self.service.start_background_sweep("127.0.0.0/28"))
+        self.assertTrue(received.wait(5))
+        self.service.stop_background_sweep()
+
+        self.assertEqual(sorted(d["ip"] for d in diffs[0]["added"]), PLC_HOSTS)
+        self.assertGreater(self.db.get_discovery_sweep_time("subnet:127.0.0.0/28"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el gestor de eventos del Gateway Local
+"""
+
+import sys
+import os
+import threading
+import unittest
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.events.event_manager import EventManager  # noqa: E402
+from tests.helpers import wait_until  # noqa: E402
+
+
+class TestEventManager(unittest.TestCase):
+    """Pruebas para el despachador de eventos"""
+
+    def setUp(self):
+        self.manager = EventManager()
+
+    def tearDown(self):
+        self.manager.stop()
+
+    def test_dispatch_in_order(self):
+        """Verifica que los eventos se entreguen en orden"""
+        received = []
+        self.manager.subscribe(
+            "plc.status_update", lambda e: received.append(e.data["i"]))
+        self.manager.start()
+
+        for i in range(1000):
+            self.manager.emit("plc.status_update", {"i": i})
+
+        self.assertTrue(wait_until(lambda: len(received) == 1000))
+        self.assertEqual(received, list(range(1000)))
+
+    def test_wildcard_listeners(self):
+        """Verifica que los listeners '*' reciban todos los tipos"""
+        specific, general = [], []
+        self.manager.subscribe("plc.connected", specific.append)
+        self.manager.subscribe("*", general.append)
+        self.manager.start()
+
+        self.manager.emit("plc.connected", {})
+        self.manager.emit("gateway.started", {})
+
+        self.assertTrue(wait_until(lambda: len(general) == 2))
+        self.assertEqual(len(specific), 1)
+
+    def test_unsubscribe(self):
+        """Verifica que un listener desuscrito deje de recibir eventos"""
+        received = []
+        self.manager.subscribe("test", received.append)
+        self.manager.unsubscribe("test", received.append)
+        self.manager.start()
+        self.manager.emit("test", {})
+
+        self.assertTrue(wait_until(lambda: self.manager.dispatched == 1))
+        self.assertEqual(received, [])
+
+    def test_drop_oldest_when_full(self):
+        """Verifica que la cola esté acotada y descarte los más antiguos"""
+        manager = EventManager(max_queue_size=10)
+        received = []
+        manager.subscribe("test", lambda e: received.append(e.data["i"]))
+
+        for i in range(25):
+            manager.emit("test", {"i": i})
+        self.assertEqual(manager.queue_depth, 10)
+        self.assertEqual(manager.dropped, 15)
+
+        manager.start()
+        self.assertTrue(wait_until(lambda: len(received) == 10))
+        manager.stop()
+        self.assertEqual(received, list(range(15, 25)))
+
+    def test_threaded_listener_does_not_block_dispatch(self):
+        """Verifica que un listener lento en el pool no frene a los demás"""
+        release = threading.Event()
+        fast = []
+        self.manager.subscribe("test", lambda e: release.wait(2), threaded=True)
+        self.manager.subscribe("test", fast.append)
+        self.manager.start()
+
+        for _ in range(50):
+            self.manager.emit("test", {})
+
+        self.assertTrue(wait_until(lambda: len(fast) == 50, timeout=1.0))
+        release.set()
+
+
+if __name__ == "__main__":
+    unittest.main()
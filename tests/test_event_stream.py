@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el stream de eventos en tiempo real
+"""
+
+import sys
+import os
+import json
+import time
+import unittest
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.events.event_stream import EventStreamBroker  # noqa: E402
+from src.events.event_manager import EventManager  # noqa: E402
+
+
+class TestEventStreamBroker(unittest.TestCase):
+    """Pruebas para EventStreamBroker"""
+
+    def setUp(self):
+        self.event_manager = EventManager()
+        self.event_manager.start()
+        self.broker = EventStreamBroker(
+            self.event_manager, buffer_size=5, max_clients=2, keepalive=0.05)
+
+    def tearDown(self):
+        self.event_manager.stop()
+
+    def wait_dispatched(self):
+        deadline = time.time() + 2
+        while self.event_manager.queue_depth and time.time() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.05)
+
+    def test_event_type_filters(self):
+        """Verifica que cada cliente reciba sólo sus tipos de evento"""
+        status_only = self.broker.subscribe(["plc.status_update"])
+        all_plc = self.broker.subscribe(["plc.*"])
+
+        self.event_manager.emit("plc.status_update", {"plc_id": "PLC-001"})
+        self.event_manager.emit("plc.command_sent", {"plc_id": "PLC-001"})
+        self.event_manager.emit("gateway.heartbeat", {})
+        self.wait_dispatched()
+
+        self.assertEqual([e.event_type for _, e in status_only.poll(0)],
+                         ["plc.status_update"])
+        self.assertEqual([e.event_type for _, e in all_plc.poll(0)],
+                         ["plc.status_update", "plc.command_sent"])
+
+    def test_slow_consumer_is_evicted(self):
+        """Verifica que un cliente con el buffer lleno se desconecte"""
+        slow = self.broker.subscribe()
+        for i in range(10):
+            self.event_manager.emit("plc.status_update", {"i": i})
+        self.wait_dispatched()
+
+        self.assertTrue(slow.closed)
+        self.assertEqual(slow.close_reason, "slow_consumer")
+        self.assertEqual(self.broker.evicted, 1)
+
+        messages = list(self.broker.stream(slow))
+        self.assertIn("stream.evicted", messages[-1])
+        self.assertEqual(self.broker.get_stats()["clients"], 0)
+
+    def test_max_clients(self):
+        """Verifica el límite de clientes simultáneos"""
+        self.assertIsNotNone(self.broker.subscribe())
+        self.assertIsNotNone(self.broker.subscribe())
+        self.assertIsNone(self.broker.subscribe())
+
+    def test_stream_format_and_keepalive(self):
+        """Verifica el formato SSE y los keepalives"""
+        subscriber = self.broker.subscribe()
+        stream = self.broker.stream(subscriber)
+        self.assertTrue(next(stream).startswith("retry:"))
+        self.assertEqual(next(stream), ": keepalive\n\n")
+
+        self.event_manager.emit("plc.command_sent", {"plc_id": "PLC-001"})
+        self.wait_dispatched()
+        message = next(stream)
+        lines = message.strip().split("\n")
+        self.assertTrue(lines[0].startswith("id: "))
+        self.assertEqual(lines[1], "event: plc.command_sent")
+        payload = json.loads(lines[2][len("data: "):])
+        self.assertEqual(payload["data"], {"plc_id": "PLC-001"})
+
+        stream.close()
+        self.assertEqual(self.broker.get_stats()["clients"], 0)
+        self.assertNotIn("*", self.event_manager._listeners)
+
+
+if __name__ == "__main__":
+    unittest.main()
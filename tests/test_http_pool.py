@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para la capa HTTP saliente compartida
+"""
+
+import sys
+import os
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from urllib3.util import connection as urllib3_connection
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.communication.http_pool import HTTPClientPool, _BackoffRetry, backoff_delay  # noqa: E402
+from src.communication.service_client import ServiceClient  # noqa: E402
+from src.wms.wms_client import WMSClient  # noqa: E402
+
+
+class FakeServer:
+    """Servidor HTTP que registra las conexiones y puede fallar a demanda"""
+
+    def __init__(self):
+        self.connections = set()
+        self.requests = []
+        self.failures = 0
+        self.close_connections = False
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                fake.connections.add(self.client_address)
+                fake.requests.append((self.command, self.path))
+                status = 200
+                if fake.failures:
+                    fake.failures -= 1
+                    status = 503
+                body = b'{"status": "healthy"}'
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                if status == 503:
+                    self.send_header("Retry-After", "0")
+                if fake.close_connections:
+                    self.send_header("Connection", "close")
+                    self.close_connection = True
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RecordingMetrics:
+    def __init__(self):
+        self.requests = []
+
+    def record_http_client_request(self, client, host, method, status, duration):
+        self.requests.append((client, host, method, status))
+
+
+class TestHTTPClientPool(unittest.TestCase):
+    """Pruebas para HTTPClientPool"""
+
+    def setUp(self):
+        self.server = FakeServer()
+        self.metrics = RecordingMetrics()
+        self.pool = HTTPClientPool(backoff_factor=0.01, metrics_collector=self.metrics)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.close()
+
+    def test_clients_share_keep_alive_connections(self):
+        """Verifica que distintos clientes reutilicen la misma conexión"""
+        wms = WMSClient(self.server.url, "token", http_pool=self.pool)
+        service = ServiceClient(self.server.url, http_pool=self.pool)
+        for _ in range(3):
+            self.assertTrue(wms.send_heartbeat({"status": "ok"}))
+            self.assertEqual(service.get_health(), {"status": "healthy"})
+
+        self.assertEqual(len(self.server.requests), 6)
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_retry_policy(self):
+        """Verifica los reintentos de GET y que los POST no se repitan"""
+        session = self.pool.session("test")
+        self.server.failures = 2
+        self.assertEqual(session.get(self.server.url + "/health", timeout=5).status_code, 200)
+        self.assertEqual(len(self.server.requests), 3)
+
+        self.server.failures = 1
+        self.assertEqual(session.post(self.server.url + "/data", json={}, timeout=5).status_code, 503)
+        self.assertEqual(len(self.server.requests), 4)
+
+    def test_dns_cache(self):
+        """Verifica que las conexiones nuevas no vuelvan a resolver el host"""
+        self.server.close_connections = True
+        session = self.pool.session("test")
+        url = f"http://localhost:{self.server.port}/health"
+        for _ in range(3):
+            self.assertEqual(session.get(url, timeout=5).status_code, 200)
+
+        stats = self.pool.get_stats()
+        self.assertEqual(stats["dns_cache_misses"], 1)
+        self.assertEqual(stats["dns_cache_hits"], 2)
+        self.assertEqual(len(self.server.connections), 3)
+        # La caché es del pool: la resolución global de urllib3 no cambia
+        self.assertEqual(urllib3_connection.create_connection.__module__,
+                         "urllib3.util.connection")
+
+    def test_host_maxsize_and_metrics(self):
+        """Verifica el tamaño de pool por host y la latencia por destino"""
+        pool = HTTPClientPool(pool_maxsize=4, host_maxsize={"127.0.0.1": 2},
+                              dns_ttl=0, metrics_collector=self.metrics)
+        self.addCleanup(pool.close)
+        session = pool.session("wms")
+        session.get(self.server.url + "/health", timeout=5)
+
+        connection_pool = pool.adapter.poolmanager.connection_from_url(self.server.url)
+        self.assertEqual(connection_pool.pool.maxsize, 2)
+        other_pool = pool.adapter.poolmanager.connection_from_url(
+            f"http://localhost:{self.server.port}")
+        self.assertEqual(other_pool.pool.maxsize, 4)
+        self.assertEqual(self.metrics.requests,
+                         [("wms", f"127.0.0.1:{self.server.port}", "GET", 200)])
+
+    def test_retry_backoff_cap(self):
+        """Verifica la espera acotada entre reintentos del adaptador"""
+        retry = _BackoffRetry(total=10, backoff_factor=1.0, backoff_cap=3.0, jitter=0.5)
+        for _ in range(6):
+            retry = retry.increment("GET", "/health")
+        self.assertIsInstance(retry, _BackoffRetry)
+        self.assertEqual(retry.get_backoff_time(), 3.0)
+        retry = _BackoffRetry(total=10, backoff_factor=1.0, backoff_cap=60.0, jitter=0.5)
+        retry = retry.increment("GET", "/health").increment("GET", "/health")
+        self.assertTrue(2.0 <= retry.get_backoff_time() <= 2.5)
+
+    def test_backoff_delay(self):
+        """Verifica la espera exponencial acotada con jitter"""
+        self.assertTrue(0.5 <= backoff_delay(1, 1.0, 60.0) <= 1.0)
+        self.assertTrue(4.0 <= backoff_delay(4, 1.0, 60.0) <= 8.0)
+        self.assertTrue(30.0 <= backoff_delay(20, 1.0, 60.0) <= 60.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
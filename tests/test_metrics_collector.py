@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el colector de métricas del Gateway Local
+"""
+
+import sys
+import os
+import shutil
+import tempfile
+import unittest
+
+from flask import Flask
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.monitoring.metrics_collector import get_metrics_collector  # noqa: E402
+from src.api.middleware.metrics_middleware import MetricsMiddleware  # noqa: E402
+from src.database.database_manager import DatabaseManager  # noqa: E402
+from src.events.event_manager import EventManager  # noqa: E402
+
+
+class TestMetricsCollector(unittest.TestCase):
+    """Pruebas para MetricsCollector"""
+
+    def setUp(self):
+        self.collector = get_metrics_collector()
+        self.registry = self.collector.registry
+
+    def sample(self, name, labels=None):
+        return self.registry.get_sample_value(name, labels or {}) or 0
+
+    def test_plc_round_trip_buckets(self):
+        """Verifica que los viajes de ida y vuelta usen buckets sub-10 ms"""
+        labels = {"plc_id": "PLC-RTT", "command": "0"}
+        before = self.sample("plc_round_trip_seconds_bucket", dict(labels, le="0.002"))
+        self.collector.record_command("PLC-RTT", 0, 0.0015)
+        self.assertEqual(
+            self.sample("plc_round_trip_seconds_bucket", dict(labels, le="0.002")),
+            before + 1)
+
+    def test_heartbeats_do_not_count_as_errors(self):
+        """Verifica que los heartbeats tengan su propio contador"""
+        errors = self.sample("plc_connection_errors_total")
+        ok = self.sample("wms_heartbeats_total", {"result": "ok"})
+        self.collector.record_heartbeat(True)
+        self.assertEqual(self.sample("wms_heartbeats_total", {"result": "ok"}), ok + 1)
+        self.assertEqual(self.sample("plc_connection_errors_total"), errors)
+
+    def test_event_manager_and_process_metrics(self):
+        """Verifica las métricas calculadas en cada lectura"""
+        event_manager = EventManager()
+        event_manager.emit("test.event", {})
+        self.collector.attach_event_manager(event_manager)
+
+        self.assertEqual(self.sample("event_queue_depth"), 1)
+        self.assertEqual(self.sample("events_total", {"result": "emitted"}), 1)
+        self.assertGreater(self.sample("gateway_process_threads"), 0)
+        self.assertIn("gateway_gc_collections_total", self.collector.get_metrics_text())
+
+    def test_db_queries_are_timed_per_table(self):
+        """Verifica la latencia de consultas por tabla y operación"""
+        temp_dir = tempfile.mkdtemp()
+        database = DatabaseManager(os.path.join(temp_dir, "gateway.db"))
+        database.metrics_collector = self.collector
+        try:
+            labels = {"operation": "write", "table": "events"}
+            before = self.sample("db_query_duration_seconds_count", labels)
+            database.add_event("test.event", "test", {})
+            database.get_events()
+            self.assertEqual(
+                self.sample("db_query_duration_seconds_count", labels), before + 1)
+            self.assertGreater(self.sample(
+                "db_query_duration_seconds_count",
+                {"operation": "read", "table": "events"}), 0)
+        finally:
+            database.close()
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def test_http_requests_use_route_template(self):
+        """Verifica que las peticiones se etiqueten con la plantilla de ruta"""
+        app = Flask(__name__)
+
+        @app.route("/items/<item_id>")
+        def item(item_id):
+            return item_id
+
+        MetricsMiddleware(self.collector).init_app(app)
+        client = app.test_client()
+        labels = {"method": "GET", "route": "/items/<item_id>", "status": "200"}
+        before = self.sample("http_request_duration_seconds_count", labels)
+        client.get("/items/1")
+        client.get("/items/2")
+        client.get("/missing")
+
+        self.assertEqual(
+            self.sample("http_request_duration_seconds_count", labels), before + 2)
+        self.assertGreater(self.sample(
+            "http_request_duration_seconds_count",
+            {"method": "GET", "route": "unmatched", "status": "404"}), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
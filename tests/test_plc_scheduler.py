@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el planificador de sondeo concurrente de PLCs
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.plc_scheduler import PLCPollScheduler  # noqa: E402
+from tests.helpers import FakePLC  # noqa: E402
+
+
+class TestPLCPollScheduler(unittest.TestCase):
+    """Pruebas para PLCPollScheduler"""
+
+    def setUp(self):
+        self.statuses = []
+        self.lock = threading.Lock()
+
+        def on_status(plc_id, status):
+            with self.lock:
+                self.statuses.append(plc_id)
+
+        self.scheduler = PLCPollScheduler(
+            on_status, interval=0.05, deadline=0.1, jitter=0.0, max_workers=8)
+
+    def tearDown(self):
+        self.scheduler.stop()
+
+    def test_slow_plc_does_not_stall_others(self):
+        """Verifica que un PLC lento no retrase el sondeo del resto"""
+        slow = FakePLC(delay=0.6)
+        fast = [FakePLC() for _ in range(5)]
+        self.scheduler.add_plc("SLOW", slow)
+        for index, plc in enumerate(fast):
+            self.scheduler.add_plc(f"FAST-{index}", plc)
+
+        self.scheduler.start()
+        time.sleep(0.5)
+
+        for plc in fast:
+            self.assertGreaterEqual(plc.calls, 5)
+        self.assertEqual(slow.calls, 1)
+
+    def test_missed_deadlines_are_counted(self):
+        """Verifica la instrumentación de plazos incumplidos"""
+        self.scheduler.add_plc("SLOW", FakePLC(delay=0.3), deadline=0.1)
+        self.scheduler.start()
+        time.sleep(0.5)
+
+        stats = self.scheduler.get_stats()["SLOW"]
+        self.assertGreaterEqual(stats["missed_deadlines"], 1)
+        self.assertGreaterEqual(stats["skipped"], 1)
+        # Cada sondeo lento cuenta una sola vez aunque haga saltar ciclos
+        self.assertEqual(stats["missed_deadlines"], stats["polls"])
+
+    def test_disconnected_plc_backs_off(self):
+        """Verifica que un PLC desconectado no se sondee y aplique backoff"""
+        offline = FakePLC(connected=False)
+        self.scheduler.add_plc("OFFLINE", offline)
+        self.scheduler.start()
+        time.sleep(0.5)
+
+        stats = self.scheduler.get_stats()["OFFLINE"]
+        self.assertEqual(offline.calls, 0)
+        # Con backoff exponencial se comprueba muchas menos veces que cada 50 ms
+        self.assertLessEqual(stats["skipped"], 4)
+
+    def test_per_plc_interval(self):
+        """Verifica los intervalos de sondeo propios de cada PLC"""
+        frequent, rare = FakePLC(), FakePLC()
+        self.scheduler.add_plc("FREQUENT", frequent, interval=0.02)
+        self.scheduler.add_plc("RARE", rare, interval=10)
+        self.scheduler.start()
+        time.sleep(0.4)
+
+        self.assertGreater(frequent.calls, 5)
+        self.assertLessEqual(rare.calls, 1)
+
+    def test_poll_timeout_per_plc(self):
+        """Verifica la espera máxima de sondeo: plazo propio o intervalo del PLC"""
+        self.scheduler.add_plc("DEADLINE", FakePLC(), interval=10, deadline=0.5)
+        self.scheduler.add_plc("INTERVAL", FakePLC(), interval=3)
+
+        self.assertEqual(self.scheduler.poll_timeout("DEADLINE"), 0.5)
+        self.assertEqual(self.scheduler.poll_timeout("INTERVAL"), 3)
+        self.assertEqual(self.scheduler.poll_timeout("UNKNOWN"), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
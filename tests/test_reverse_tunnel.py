@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el canal de comandos del túnel reverso
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.wms.reverse_tunnel import ReverseTunnel  # noqa: E402
+from tests.helpers import wait_until  # noqa: E402
+
+
+class FakeTunnelWMS:
+    """WMS de pruebas que retiene las consultas de comandos (long-poll)"""
+
+    def __init__(self, hold: bool = True, batch_results: bool = True):
+        self.hold = hold
+        self.batch_results = batch_results
+        self.pending = []
+        self.requests = {"register": 0, "heartbeat": 0, "commands": 0, "result": 0,
+                         "results": 0}
+        self.results = []
+        self.condition = threading.Condition()
+        self.closing = False
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/api/v1/tunnel/commands":
+                    return self.reply(404)
+                wait = float(parse_qs(url.query).get("wait", ["0"])[0])
+                fake.count("commands")
+                with fake.condition:
+                    if fake.hold:
+                        fake.condition.wait_for(
+                            lambda: fake.pending or fake.closing, timeout=wait)
+                    commands, fake.pending = fake.pending, []
+                if commands:
+                    self.reply(200, commands)
+                else:
+                    self.reply(204)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if self.path.endswith("/result"):
+                    fake.count("result")
+                    fake.results.append((time.monotonic(), body))
+                elif self.path.endswith("/results"):
+                    if not fake.batch_results:
+                        return self.reply(404)
+                    fake.count("results")
+                    received = time.monotonic()
+                    fake.results.extend((received, item) for item in body["results"])
+                else:
+                    fake.count(self.path.rsplit("/", 1)[-1])
+                self.reply(200, {})
+
+            def reply(self, status, payload=None):
+                body = json.dumps(payload).encode() if payload is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def count(self, name):
+        with self.condition:
+            self.requests[name] = self.requests.get(name, 0) + 1
+
+    def push(self, *commands):
+        with self.condition:
+            self.pending.extend(commands)
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closing = True
+            self.condition.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestReverseTunnel(unittest.TestCase):
+    """Pruebas para ReverseTunnel"""
+
+    def start_tunnel(self, wms, **kwargs):
+        tunnel = ReverseTunnel(wms.url, "token", "GW-TEST", **kwargs)
+        tunnel.set_command_callback(lambda command: {"success": True})
+        tunnel.start()
+        self.addCleanup(tunnel.stop)
+        self.addCleanup(wms.close)
+        return tunnel
+
+    def test_long_poll_picks_up_commands_immediately(self):
+        """Verifica la entrega de comandos en menos de 100 ms sin sondeo"""
+        wms = FakeTunnelWMS()
+        self.start_tunnel(wms, long_poll_wait=5, poll_interval=5)
+        self.assertTrue(wait_until(lambda: wms.requests["commands"] == 1))
+        time.sleep(0.2)
+
+        for i in range(3):
+            sent = time.monotonic()
+            wms.push({"id": f"cmd-{i}", "command": "status"})
+            self.assertTrue(wait_until(lambda: len(wms.results) == i + 1))
+            self.assertLess(wms.results[-1][0] - sent, 0.1)
+
+        self.assertEqual([body["command_id"] for _, body in wms.results],
+                         ["cmd-0", "cmd-1", "cmd-2"])
+
+    def test_idle_gateway_keeps_a_single_request_open(self):
+        """Verifica que un gateway inactivo no genere consultas periódicas"""
+        wms = FakeTunnelWMS()
+        self.start_tunnel(wms, long_poll_wait=0.5, poll_interval=0.05,
+                          heartbeat_interval=60)
+        time.sleep(1.2)
+        # Una consulta cada long_poll_wait y un único heartbeat
+        self.assertLessEqual(wms.requests["commands"], 4)
+        self.assertEqual(wms.requests["heartbeat"], 1)
+
+    def test_falls_back_to_polling(self):
+        """Verifica el sondeo periódico si el WMS no retiene las consultas"""
+        wms = FakeTunnelWMS(hold=False)
+        self.start_tunnel(wms, long_poll_wait=5, poll_interval=0.2)
+        time.sleep(1.0)
+        self.assertLessEqual(wms.requests["commands"], 7)
+
+        wms.push({"id": "cmd-1", "command": "status"})
+        self.assertTrue(wait_until(lambda: wms.results, timeout=1))
+
+    def test_heartbeat_has_its_own_timer(self):
+        """Verifica que el heartbeat no dependa del canal de comandos"""
+        wms = FakeTunnelWMS()
+        self.start_tunnel(wms, long_poll_wait=5, heartbeat_interval=0.2)
+        self.assertTrue(wait_until(lambda: wms.requests["heartbeat"] >= 4, timeout=2))
+        self.assertEqual(wms.requests["commands"], 1)
+
+
+class TestTunnelCommandExecution(unittest.TestCase):
+    """Pruebas de la ejecución concurrente de comandos del túnel"""
+
+    def setUp(self):
+        self.executed = []
+        self.lock = threading.Lock()
+
+    def slow_callback(self, command):
+        time.sleep(0.1)
+        with self.lock:
+            self.executed.append((command["plc_id"], command["argument"]))
+        return {"success": True, "position": command["argument"]}
+
+    def start_tunnel(self, wms, **kwargs):
+        tunnel = ReverseTunnel(wms.url, "token", "GW-TEST", long_poll_wait=5, **kwargs)
+        tunnel.set_command_callback(self.slow_callback)
+        tunnel.start()
+        self.addCleanup(tunnel.stop)
+        self.addCleanup(wms.close)
+        return tunnel
+
+    def test_plcs_run_concurrently_in_order(self):
+        """Verifica el paralelismo entre PLCs y el orden dentro de cada PLC"""
+        wms = FakeTunnelWMS()
+        self.start_tunnel(wms)
+        commands = [{"id": f"cmd-{i}", "command": "move", "plc_id": f"PLC-{i % 4}",
+                     "argument": i} for i in range(20)]
+        started = time.monotonic()
+        wms.push(*commands)
+
+        self.assertTrue(wait_until(lambda: len(wms.results) == 20))
+        # En serie serían 2 s (20 x 0.1 s); con 4 PLCs en paralelo, ~0.5 s
+        self.assertLess(time.monotonic() - started, 1.2)
+        for plc in range(4):
+            self.assertEqual([argument for plc_id, argument in self.executed
+                              if plc_id == f"PLC-{plc}"],
+                             list(range(plc, 20, 4)))
+        # Los resultados viajan agrupados
+        self.assertLess(wms.requests["results"], 20)
+        self.assertEqual(wms.requests["result"], 0)
+        self.assertEqual({item["command_id"] for _, item in wms.results},
+                         {command["id"] for command in commands})
+
+    def test_redelivered_commands_run_once(self):
+        """Verifica que las reentregas no se ejecuten dos veces"""
+        wms = FakeTunnelWMS()
+        tunnel = self.start_tunnel(wms)
+        command = {"id": "cmd-1", "command": "move", "plc_id": "PLC-1", "argument": 3}
+        wms.push(command, dict(command))
+        self.assertTrue(wait_until(lambda: len(wms.results) == 1))
+
+        # Reentrega tras terminar: se confirma de nuevo el resultado guardado
+        wms.push(dict(command))
+        self.assertTrue(wait_until(lambda: len(wms.results) == 2))
+        self.assertEqual(self.executed, [("PLC-1", 3)])
+        self.assertEqual(wms.results[1][1]["result"], {"success": True, "position": 3})
+        self.assertEqual(tunnel.get_stats()["duplicates"], 2)
+
+    def test_results_fall_back_to_single_acks(self):
+        """Verifica el envío uno a uno si el WMS no admite lotes"""
+        wms = FakeTunnelWMS(batch_results=False)
+        self.start_tunnel(wms)
+        wms.push(*[{"id": f"cmd-{i}", "command": "move", "plc_id": f"PLC-{i}",
+                    "argument": i} for i in range(3)])
+        self.assertTrue(wait_until(lambda: len(wms.results) == 3))
+        self.assertEqual(wms.requests["result"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el registro de microservicios
+"""
+
+import sys
+import os
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.communication.service_client import ServiceRegistry  # noqa: E402
+
+
+class FakeService:
+    """Microservicio de pruebas con retardo y estado configurables"""
+
+    def __init__(self, status: str = "healthy", delay: float = 0.0):
+        self.status = status
+        self.delay = delay
+        self.health_checks = 0
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def handle_request(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                if self.path == "/health":
+                    fake.health_checks += 1
+                time.sleep(fake.delay)
+                body = json.dumps({"status": fake.status, "path": self.path}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = handle_request
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TestServiceRegistry(unittest.TestCase):
+    """Pruebas para ServiceRegistry"""
+
+    def setUp(self):
+        self.registry = ServiceRegistry(health_ttl=0.3, deadline=0.5)
+        self.services = {
+            "fast": FakeService(),
+            "degraded": FakeService(status="degraded"),
+            "hung": FakeService(delay=1.5),
+        }
+        for service_id, service in self.services.items():
+            self.registry.register_service(service_id, service.url, timeout=5)
+
+    def tearDown(self):
+        self.registry.stop()
+        for service in self.services.values():
+            service.close()
+
+    def test_hung_service_only_costs_the_deadline(self):
+        """Verifica que un servicio colgado no bloquee la comprobación"""
+        started = time.monotonic()
+        healthy = self.registry.get_healthy_services()
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(list(healthy), ["fast"])
+
+    def test_broadcast_streams_partial_results(self):
+        """Verifica que las respuestas lleguen según responden los servicios"""
+        results = list(self.registry.iter_broadcast_command("reload", {"a": 1}))
+        self.assertEqual(results[-1][0], "hung")
+        self.assertTrue(results[-1][1]["timed_out"])
+        self.assertEqual({service_id for service_id, _ in results[:2]}, {"fast", "degraded"})
+        self.assertEqual(results[0][1]["path"], "/api/v1/commands/reload")
+
+    def test_health_is_cached_and_refreshed_in_background(self):
+        """Verifica la caché de salud con refresco en segundo plano"""
+        self.registry.unregister_service("hung")
+        self.registry.get_healthy_services()
+        self.registry.get_healthy_services()
+        self.assertEqual(self.services["fast"].health_checks, 1)
+
+        # Caducada: se responde con la caché y se refresca sin esperar
+        time.sleep(0.35)
+        self.services["fast"].status = "degraded"
+        started = time.monotonic()
+        self.assertIn("fast", self.registry.get_healthy_services())
+        self.assertLess(time.monotonic() - started, 0.2)
+        time.sleep(0.2)
+        self.assertEqual(self.services["fast"].health_checks, 2)
+        self.assertNotIn("fast", self.registry.get_healthy_services())
+
+
+if __name__ == "__main__":
+    unittest.main()
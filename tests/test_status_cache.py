@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para la caché de estados de PLC
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.core.status_cache import PLCStatusCache  # noqa: E402
+
+
+class TestPLCStatusCache(unittest.TestCase):
+    """Pruebas para PLCStatusCache"""
+
+    def setUp(self):
+        self.cache = PLCStatusCache(max_age=0.2)
+        self.reads = 0
+
+    def loader(self, delay: float = 0.0, success: bool = True):
+        def load():
+            self.reads += 1
+            time.sleep(delay)
+            return {"success": success, "position": self.reads}
+        return load
+
+    def test_polled_status_is_served_without_reading(self):
+        """Verifica que un estado sondeado se sirva sin leer el PLC"""
+        self.cache.update("PLC-001", {"success": True, "position": 3})
+
+        status, age, cached = self.cache.get("PLC-001", self.loader())
+        self.assertTrue(cached)
+        self.assertEqual(status["position"], 3)
+        self.assertLess(age, 0.2)
+        self.assertEqual(self.reads, 0)
+
+    def test_stale_status_is_reloaded(self):
+        """Verifica que un estado caducado se vuelva a leer"""
+        self.cache.update("PLC-001", {"success": True, "position": 3})
+        time.sleep(0.25)
+
+        status, age, cached = self.cache.get("PLC-001", self.loader())
+        self.assertFalse(cached)
+        self.assertEqual(status["position"], 1)
+        self.assertEqual(self.reads, 1)
+
+        # La lectura queda en caché para las siguientes peticiones
+        _, _, cached = self.cache.get("PLC-001", self.loader())
+        self.assertTrue(cached)
+        self.assertEqual(self.reads, 1)
+
+    def test_concurrent_reads_are_coalesced(self):
+        """Verifica que lecturas concurrentes compartan una sola petición"""
+        results = []
+
+        def request():
+            results.append(self.cache.get("PLC-001", self.loader(delay=0.1)))
+
+        threads = [threading.Thread(target=request) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.reads, 1)
+        self.assertEqual(len(results), 10)
+        self.assertEqual(self.cache.get_stats()["coalesced"], 9)
+
+    def test_failed_reads_are_cached_briefly(self):
+        """Verifica que las lecturas fallidas se cacheen con un plazo corto"""
+        self.cache.failure_max_age = 0.05
+        self.cache.get("PLC-001", self.loader(success=False))
+        status, _, cached = self.cache.get("PLC-001", self.loader(success=False))
+        self.assertTrue(cached)
+        self.assertFalse(status["success"])
+        self.assertEqual(self.reads, 1)
+
+        time.sleep(0.1)
+        _, _, cached = self.cache.get("PLC-001", self.loader())
+        self.assertFalse(cached)
+        self.assertEqual(self.reads, 2)
+
+    def test_invalidate(self):
+        """Verifica la invalidación tras un comando"""
+        self.cache.update("PLC-001", {"success": True, "position": 3})
+        self.cache.invalidate("PLC-001")
+        self.assertIsNone(self.cache.peek("PLC-001"))
+
+
+if __name__ == "__main__":
+    unittest.main()
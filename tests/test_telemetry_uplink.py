@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el envío de telemetría por lotes al WMS
+"""
+
+import sys
+import os
+import gzip
+import json
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.wms.telemetry_uplink import TelemetryUplink  # noqa: E402
+from tests.helpers import wait_until  # noqa: E402
+
+
+class FakeWMS:
+    """Servidor HTTP que registra los lotes recibidos"""
+
+    def __init__(self):
+        self.batches = []
+        self.status = 200
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if fake.status == 200:
+                    assert self.headers["Content-Encoding"] == "gzip"
+                    fake.batches.append(json.loads(gzip.decompress(body)))
+                self.send_response(fake.status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    @property
+    def readings(self):
+        return [r for batch in self.batches for r in batch["readings"]]
+
+
+class TestTelemetryUplink(unittest.TestCase):
+    """Pruebas para TelemetryUplink"""
+
+    def setUp(self):
+        self.wms = FakeWMS()
+        self.spool_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.wms.close()
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def create_uplink(self, **kwargs):
+        options = dict(batch_size=10, flush_interval=0.1, spool_dir=self.spool_dir,
+                       max_retries=0, backoff_base=0.05, backoff_max=0.1, timeout=1)
+        options.update(kwargs)
+        uplink = TelemetryUplink(self.wms.url, "token", "GW-TEST", **options)
+        self.addCleanup(uplink.stop)
+        return uplink
+
+    def test_readings_are_batched(self):
+        """Verifica el envío por tamaño de lote y por tiempo"""
+        uplink = self.create_uplink()
+        uplink.start()
+        for i in range(25):
+            uplink.submit({"i": i})
+
+        self.assertTrue(wait_until(lambda: len(self.wms.readings) == 25))
+        self.assertEqual([len(b["readings"]) for b in self.wms.batches], [10, 10, 5])
+        self.assertEqual([r["i"] for r in self.wms.readings], list(range(25)))
+        self.assertEqual(self.wms.batches[0]["gateway_id"], "GW-TEST")
+
+    def test_keyed_readings_are_coalesced(self):
+        """Verifica que sólo viaje la última lectura de cada clave"""
+        uplink = self.create_uplink(flush_interval=0.3)
+        uplink.start()
+        for position in range(5):
+            uplink.submit({"plc_id": "PLC-1", "position": position}, key="PLC-1")
+        uplink.submit({"plc_id": "PLC-2", "position": 9}, key="PLC-2")
+
+        self.assertTrue(wait_until(lambda: len(self.wms.readings) == 2))
+        self.assertEqual(self.wms.readings, [{"plc_id": "PLC-1", "position": 4},
+                                             {"plc_id": "PLC-2", "position": 9}])
+        self.assertEqual(uplink.get_stats()["coalesced"], 4)
+
+    def test_spool_is_replayed_in_order(self):
+        """Verifica la cola en disco mientras el WMS no está disponible"""
+        self.wms.status = 503
+        uplink = self.create_uplink(batch_size=5)
+        uplink.start()
+        for i in range(15):
+            uplink.submit({"i": i})
+            time.sleep(0.01)
+
+        self.assertTrue(wait_until(lambda: uplink.get_stats()["spooled_batches"] >= 3))
+        self.assertEqual(self.wms.batches, [])
+
+        self.wms.status = 200
+        uplink.submit({"i": 15})
+        self.assertTrue(wait_until(lambda: len(self.wms.readings) == 16, timeout=5))
+        self.assertEqual([r["i"] for r in self.wms.readings], list(range(16)))
+        sequences = [b["sequence"] for b in self.wms.batches]
+        self.assertEqual(sequences, sorted(sequences))
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_rejected_batch_is_discarded_with_warning(self):
+        """Verifica que un lote rechazado se descarte avisando en el log"""
+        self.wms.status = 404
+        uplink = self.create_uplink()
+        uplink.start()
+        with self.assertLogs("src.wms.telemetry_uplink", level="WARNING") as logs:
+            uplink.submit({"i": 1})
+            self.assertTrue(wait_until(lambda: uplink.get_stats()["batches_rejected"] == 1))
+        self.assertIn("404", logs.output[0])
+        self.assertEqual(os.listdir(self.spool_dir), [])
+
+    def test_stop_spools_pending_readings(self):
+        """Verifica que al detenerse sin WMS lo pendiente quede en disco"""
+        self.wms.status = 503
+        uplink = self.create_uplink(flush_interval=60)
+        uplink.start()
+        uplink.submit({"i": 1})
+        uplink.stop()
+        self.assertEqual(len(os.listdir(self.spool_dir)), 1)
+
+        # Un nuevo proceso reenvía la cola al arrancar
+        self.wms.status = 200
+        replay = self.create_uplink()
+        replay.start()
+        self.assertTrue(wait_until(lambda: self.wms.readings == [{"i": 1}]))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas para el servidor WSGI de producción de la API
+"""
+
+import sys
+import os
+import http.client
+import threading
+import time
+import unittest
+
+from flask import Flask
+
+# Añadir el directorio raíz al path para importaciones
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.api.wsgi_server import GatewayWSGIServer  # noqa: E402
+
+
+def create_test_app() -> Flask:
+    app = Flask(__name__)
+
+    @app.route('/fast')
+    def fast():
+        return "ok"
+
+    @app.route('/slow')
+    def slow():
+        time.sleep(0.3)
+        return "done"
+
+    return app
+
+
+class TestGatewayWSGIServer(unittest.TestCase):
+    """Pruebas para GatewayWSGIServer"""
+
+    def setUp(self):
+        self.server = GatewayWSGIServer(
+            create_test_app(), "127.0.0.1", 0, threads=8, idle_timeout=2)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        if not self.server.draining:
+            self.server.drain(timeout=2)
+
+    def request(self, path: str) -> str:
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        try:
+            conn.request("GET", path)
+            return conn.getresponse().read().decode()
+        finally:
+            conn.close()
+
+    def test_requests_are_served_concurrently(self):
+        """Verifica que peticiones lentas se atiendan en paralelo"""
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.request("/slow")))
+                   for _ in range(6)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["done"] * 6)
+        self.assertLess(time.time() - start, 1.0)
+
+    def test_keepalive_reuses_connection(self):
+        """Verifica que varias peticiones compartan la conexión HTTP/1.1"""
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        try:
+            for _ in range(3):
+                conn.request("GET", "/fast")
+                response = conn.getresponse()
+                self.assertEqual(response.read(), b"ok")
+                self.assertFalse(response.will_close)
+        finally:
+            conn.close()
+
+    def test_drain_waits_for_in_flight_requests(self):
+        """Verifica que el drenado espere a las peticiones en curso"""
+        results = []
+        client = threading.Thread(target=lambda: results.append(self.request("/slow")))
+        client.start()
+        time.sleep(0.1)
+
+        self.assertTrue(self.server.drain(timeout=2))
+        client.join()
+        self.assertEqual(results, ["done"])
+        self.assertEqual(self.server.in_flight, 0)
+        self.thread.join(timeout=2)
+        self.assertFalse(self.thread.is_alive())
+
+    def test_drain_rejects_new_requests_and_closes_connections(self):
+        """Verifica el 503 durante el drenado y el cierre de las conexiones"""
+        conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+        try:
+            conn.request("GET", "/fast")
+            self.assertEqual(conn.getresponse().read(), b"ok")
+
+            conn.request("GET", "/slow")
+            time.sleep(0.1)
+            drained = []
+            drainer = threading.Thread(
+                target=lambda: drained.append(self.server.drain(timeout=2)))
+            drainer.start()
+            time.sleep(0.05)
+            # Las peticiones nuevas se rechazan mientras se drena
+            rejected = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+            rejected.request("GET", "/fast")
+            self.assertEqual(rejected.getresponse().status, 503)
+            rejected.close()
+
+            response = conn.getresponse()
+            self.assertEqual(response.read(), b"done")
+            drainer.join()
+            self.assertEqual(drained, [True])
+            self.thread.join(timeout=2)
+            self.assertFalse(self.thread.is_alive())
+
+            # La conexión keep-alive quedó cerrada por el servidor
+            with self.assertRaises(OSError):
+                conn.request("GET", "/fast")
+                conn.getresponse()
+        finally:
+            conn.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -21,8 +21,8 @@ document.addEventListener("DOMContentLoaded", function () {
   // Configurar eventos
   setupEventListeners();
 
-  // Actualizar datos periódicamente
-  setInterval(loadDashboardData, 30000); // Cada 30 segundos
+  // Actualizar datos con el stream de eventos (o sondeo si no está disponible)
+  startEventStream();
 
   // Cargar configuración y PLCs automáticamente al iniciar
   setTimeout(() => {
@@ -186,6 +186,155 @@ function showNotification(message, type = "info") {
   }, 3000);
 }
 
+// Stream de eventos en tiempo real (Server-Sent Events)
+const STREAM_EVENT_TYPES = [
+  "plc.status_update",
+  "plc.command_sent",
+  "plc.command_error",
+  "plc.connected",
+  "plc.disconnected",
+  "plc.connection_error",
+];
+// Eventos del stream que el gateway registra también como comando
+const COMMAND_EVENT_TYPES = ["plc.status_update", "plc.command_sent"];
+const RECENT_EVENTS_LIMIT = 4;
+const RESPONSE_TIME_POINTS = 30;
+let eventStream = null;
+let pollingTimer = null;
+let renderTimer = null;
+
+// Estado del dashboard que actualizan los eventos del stream sin volver a
+// consultar la API (se recarga completo al conectar y en stream.evicted)
+const dashboardState = {
+  loaded: false,
+  commandCount: 0,
+  eventCount: 0,
+  recentEvents: [],
+  plcStates: {},
+  responseTimes: [],
+};
+
+// Aplicar un evento del stream al estado del dashboard
+function applyStreamEvent(message) {
+  if (!dashboardState.loaded) {
+    return;
+  }
+  const event = JSON.parse(message.data);
+  const data = event.data || {};
+
+  dashboardState.eventCount++;
+  if (COMMAND_EVENT_TYPES.includes(event.event_type)) {
+    dashboardState.commandCount++;
+  }
+  dashboardState.recentEvents.unshift(event);
+  dashboardState.recentEvents.length = Math.min(
+    dashboardState.recentEvents.length,
+    RECENT_EVENTS_LIMIT
+  );
+
+  if (data.plc_id) {
+    if (event.event_type === "plc.status_update") {
+      const status = data.status || {};
+      dashboardState.plcStates[data.plc_id] = status.success
+        ? "online"
+        : "error";
+      if (status.response_time !== undefined) {
+        dashboardState.responseTimes.push(status.response_time);
+      }
+    } else if (event.event_type === "plc.connected") {
+      dashboardState.plcStates[data.plc_id] = "online";
+    } else if (event.event_type === "plc.disconnected") {
+      dashboardState.plcStates[data.plc_id] = "offline";
+    } else if (event.event_type === "plc.connection_error") {
+      dashboardState.plcStates[data.plc_id] = "error";
+    }
+  }
+  scheduleDashboardRender();
+}
+
+// Agrupar ráfagas de eventos en un solo repintado del dashboard
+function scheduleDashboardRender() {
+  if (renderTimer) {
+    return;
+  }
+  renderTimer = setTimeout(() => {
+    renderTimer = null;
+    renderDashboardState();
+  }, 2000);
+}
+
+function renderDashboardState() {
+  document.getElementById("command-count").textContent =
+    dashboardState.commandCount;
+  document.getElementById("event-count").textContent =
+    dashboardState.eventCount;
+  renderRecentEvents(dashboardState.recentEvents);
+  renderPLCStatusChart();
+
+  // Los tiempos recibidos desde el último repintado forman un punto nuevo
+  const samples = dashboardState.responseTimes.splice(0);
+  if (responseTimeChart && samples.length > 0) {
+    const chartData = responseTimeChart.data;
+    chartData.labels.push(new Date().toLocaleTimeString());
+    chartData.datasets[0].data.push(
+      samples.reduce((total, value) => total + value, 0) / samples.length
+    );
+    if (chartData.labels.length > RESPONSE_TIME_POINTS) {
+      chartData.labels.shift();
+      chartData.datasets[0].data.shift();
+    }
+    responseTimeChart.update();
+  }
+}
+
+// Sondeo periódico de respaldo
+function startPolling() {
+  if (!pollingTimer) {
+    pollingTimer = setInterval(loadDashboardData, 30000); // Cada 30 segundos
+  }
+}
+
+function stopPolling() {
+  if (pollingTimer) {
+    clearInterval(pollingTimer);
+    pollingTimer = null;
+  }
+}
+
+function startEventStream() {
+  if (!window.EventSource) {
+    startPolling();
+    return;
+  }
+
+  eventStream = new EventSource(
+    `${API_BASE_URL}/stream?types=${STREAM_EVENT_TYPES.join(",")}`
+  );
+
+  // Al conectar (y al reconectar) se recarga todo: los eventos perdidos
+  // mientras tanto no llegan por el stream
+  eventStream.onopen = function () {
+    console.log("Stream de eventos conectado");
+    stopPolling();
+    loadDashboardData();
+  };
+
+  STREAM_EVENT_TYPES.forEach((eventType) => {
+    eventStream.addEventListener(eventType, applyStreamEvent);
+  });
+
+  // Desconectado por consumidor lento: recargar todo y reconectar
+  eventStream.addEventListener("stream.evicted", function () {
+    loadDashboardData();
+  });
+
+  // EventSource reconecta solo; mientras tanto se sondea
+  eventStream.onerror = function () {
+    console.warn("Stream de eventos no disponible, usando sondeo");
+    startPolling();
+  };
+}
+
 // Funciones para interactuar con la API REST
 
 // Obtener datos del dashboard
@@ -196,10 +345,10 @@ async function loadDashboardData() {
     const stats = await statsResponse.json();
 
     // Actualizar contadores
-    document.getElementById("plc-count").textContent = stats.plc_count || 0;
+    document.getElementById("plc-count").textContent = stats.plcs_count || 0;
     document.getElementById("command-count").textContent =
-      stats.command_count || 0;
-    document.getElementById("event-count").textContent = stats.event_count || 0;
+      stats.commands_count || 0;
+    document.getElementById("event-count").textContent = stats.events_count || 0;
 
     // Actualizar estado del sistema
     document.getElementById("system-status-content").innerHTML = `
@@ -210,27 +359,17 @@ async function loadDashboardData() {
         `;
 
     // Actualizar eventos recientes
-    const eventsResponse = await fetch(`${API_BASE_URL}/events?limit=4`);
+    const eventsResponse = await fetch(
+      `${API_BASE_URL}/events?limit=${RECENT_EVENTS_LIMIT}`
+    );
     const events = await eventsResponse.json();
 
-    let eventsHtml = "";
-    if (events && events.length > 0) {
-      events.forEach((event) => {
-        const eventTime = new Date(event.timestamp).toLocaleTimeString();
-        eventsHtml += `<p><i class="fas fa-bell text-${
-          event.event_type === "ERROR"
-            ? "danger"
-            : event.event_type === "WARNING"
-            ? "warning"
-            : event.event_type === "INFO"
-            ? "info"
-            : "secondary"
-        }"></i> ${event.data} - ${eventTime}</p>`;
-      });
-    } else {
-      eventsHtml = "<p>No hay eventos recientes</p>";
-    }
-    document.getElementById("recent-events-content").innerHTML = eventsHtml;
+    dashboardState.commandCount = stats.commands_count || 0;
+    dashboardState.eventCount = stats.events_count || 0;
+    dashboardState.recentEvents = events || [];
+    dashboardState.responseTimes = [];
+    dashboardState.loaded = true;
+    renderRecentEvents(dashboardState.recentEvents);
 
     // Actualizar gráficos
     updateCharts();
@@ -240,6 +379,47 @@ async function loadDashboardData() {
   }
 }
 
+function renderRecentEvents(events) {
+  let eventsHtml = "";
+  if (events && events.length > 0) {
+    events.forEach((event) => {
+      const eventTime = new Date(event.timestamp).toLocaleTimeString();
+      eventsHtml += `<p><i class="fas fa-bell text-${
+        event.event_type === "ERROR"
+          ? "danger"
+          : event.event_type === "WARNING"
+          ? "warning"
+          : event.event_type === "INFO"
+          ? "info"
+          : "secondary"
+      }"></i> ${event.data} - ${eventTime}</p>`;
+    });
+  } else {
+    eventsHtml = "<p>No hay eventos recientes</p>";
+  }
+  document.getElementById("recent-events-content").innerHTML = eventsHtml;
+}
+
+function renderPLCStatusChart() {
+  if (!plcStatusChart) {
+    return;
+  }
+  let online = 0,
+    offline = 0,
+    error = 0;
+  Object.values(dashboardState.plcStates).forEach((status) => {
+    if (status === "online") {
+      online++;
+    } else if (status === "offline") {
+      offline++;
+    } else {
+      error++;
+    }
+  });
+  plcStatusChart.data.datasets[0].data = [online, offline, error];
+  plcStatusChart.update();
+}
+
 // Actualizar gráficos
 async function updateCharts() {
   try {
@@ -249,32 +429,18 @@ async function updateCharts() {
       const plcsResponse = await fetch(`${API_BASE_URL}/plcs`);
       const plcs = await plcsResponse.json();
 
-      let online = 0,
-        offline = 0,
-        error = 0;
-      if (plcs && plcs.length > 0) {
-        plcs.forEach((plc) => {
-          // En una implementación real, aquí se verificaría el estado real del PLC
-          // Por ahora, simulamos basado en algún campo
-          if (plc.status === "online") {
-            online++;
-          } else if (plc.status === "offline") {
-            offline++;
-          } else {
-            error++;
-          }
-        });
-      }
-
-      plcStatusChart.data.datasets[0].data = [online, offline, error];
-      plcStatusChart.update();
+      dashboardState.plcStates = {};
+      (plcs || []).forEach((plc) => {
+        dashboardState.plcStates[plc.plc_id || plc.id] = plc.status;
+      });
+      renderPLCStatusChart();
     }
 
     // Actualizar gráfico de tiempo de respuesta
     if (responseTimeChart) {
       // Obtener métricas de respuesta
       const metricsResponse = await fetch(
-        `${API_BASE_URL}/metrics?type=response_time&hours=1`
+        `${API_BASE_URL}/metrics?type=response_time&hours=1&points=30`
       );
       const metrics = await metricsResponse.json();
 
@@ -282,9 +448,8 @@ async function updateCharts() {
         const times = [];
         const data = [];
 
-        // Tomar las últimas 10 métricas
-        const recentMetrics = metrics.slice(-10);
-        recentMetrics.forEach((metric) => {
+        // La serie ya llega agregada en como mucho 30 puntos
+        metrics.forEach((metric) => {
           const time = new Date(metric.timestamp).toLocaleTimeString();
           times.push(time);
           data.push(metric.value || 0);